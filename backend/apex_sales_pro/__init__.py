@@ -1,2 +1,6 @@
 # Makes the apex_sales_pro directory importable so the main backend can reuse
 # its request/response models and helper functions.
+from dotenv import load_dotenv
+
+# Submodules (CRM sync, realtime pool) read their settings from the environment.
+load_dotenv()
@@ -0,0 +1,254 @@
+"""
+Audio transcoding between telephony legs and the OpenAI Realtime pipeline.
+
+The realtime bridge speaks 24 kHz PCM16. Phone legs arrive as 8 kHz G.711
+(mu-law / A-law) or 8/16 kHz linear PCM, so every frame is decoded through a
+lookup table, resampled with a streaming polyphase FIR and re-encoded. Filter
+history and the resampling phase are carried between frames so consecutive
+frames join without clicks.
+"""
+
+from dataclasses import dataclass
+from math import gcd
+from typing import Mapping, Optional
+
+import numpy as np
+
+SUPPORTED_ENCODINGS = ("pcm16", "mulaw", "alaw")
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 24000)
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    encoding: str = "pcm16"
+    sample_rate: int = 24000
+
+    def __post_init__(self):
+        if self.encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding '{self.encoding}'.")
+        if self.sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError(f"Unsupported sample rate {self.sample_rate}.")
+
+
+REALTIME_AUDIO_FORMAT = AudioFormat("pcm16", 24000)
+
+_ENCODING_ALIASES = {
+    "pcm16": "pcm16",
+    "pcm": "pcm16",
+    "l16": "pcm16",
+    "linear16": "pcm16",
+    "mulaw": "mulaw",
+    "ulaw": "mulaw",
+    "pcmu": "mulaw",
+    "g711_ulaw": "mulaw",
+    "alaw": "alaw",
+    "pcma": "alaw",
+    "g711_alaw": "alaw",
+}
+
+
+def audio_format_from_query(params: Mapping[str, str]) -> AudioFormat:
+    """
+    Read a leg format from WebSocket query params (``codec`` / ``sample_rate``).
+
+    Without a codec the leg is assumed to already speak the realtime format; G.711
+    codecs default to 8 kHz.
+    """
+    codec = (params.get("codec") or "").strip().lower()
+    if not codec:
+        return REALTIME_AUDIO_FORMAT
+    encoding = _ENCODING_ALIASES.get(codec)
+    if encoding is None:
+        raise ValueError(f"Unsupported audio codec '{codec}'.")
+    default_rate = REALTIME_AUDIO_FORMAT.sample_rate if encoding == "pcm16" else 8000
+    try:
+        sample_rate = int(params.get("sample_rate") or default_rate)
+    except ValueError:
+        raise ValueError(f"Invalid sample rate '{params.get('sample_rate')}'.")
+    return AudioFormat(encoding, sample_rate)
+
+
+# =========================
+# G.711 LOOKUP TABLES
+# =========================
+
+def _build_mulaw_tables():
+    codes = np.arange(256, dtype=np.int32)
+    u = ~codes & 0xFF
+    t = ((u & 0x0F) << 3) + 0x84
+    t <<= (u & 0x70) >> 4
+    decode = np.where(u & 0x80, 0x84 - t, t - 0x84).astype(np.int16)
+
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), 8159) + (0x84 >> 2)
+    seg = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+    uval = (seg << 4) | ((magnitude >> (seg + 1)) & 0x0F)
+    encode = np.where(seg >= 8, 0x7F ^ mask, uval ^ mask).astype(np.uint8)
+    return decode, encode
+
+
+def _build_alaw_tables():
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    t = (codes & 0x0F) << 4
+    seg = (codes & 0x70) >> 4
+    t = np.where(seg == 0, t + 8, t + 0x108)
+    t = np.where(seg > 1, t << np.maximum(seg - 1, 0), t)
+    decode = np.where(codes & 0x80, t, -t).astype(np.int16)
+
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    magnitude = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), magnitude)
+    aval = (seg << 4) | np.where(seg < 2, (magnitude >> 1) & 0x0F, (magnitude >> np.maximum(seg, 1)) & 0x0F)
+    encode = np.where(seg >= 8, 0x7F ^ mask, aval ^ mask).astype(np.uint8)
+    return decode, encode
+
+
+_MULAW_DECODE, _MULAW_ENCODE = _build_mulaw_tables()
+_ALAW_DECODE, _ALAW_ENCODE = _build_alaw_tables()
+
+
+def decode_to_pcm16(data: bytes, encoding: str) -> np.ndarray:
+    """
+    Decode raw frame bytes into int16 samples.
+    """
+    if encoding == "pcm16":
+        return np.frombuffer(data, dtype="<i2")
+    codes = np.frombuffer(data, dtype=np.uint8)
+    if encoding == "mulaw":
+        return _MULAW_DECODE[codes]
+    if encoding == "alaw":
+        return _ALAW_DECODE[codes]
+    raise ValueError(f"Unsupported audio encoding '{encoding}'.")
+
+
+def encode_from_pcm16(samples: np.ndarray, encoding: str) -> bytes:
+    """
+    Encode int16 samples into raw frame bytes.
+    """
+    samples = np.asarray(samples, dtype=np.int16)
+    if encoding == "pcm16":
+        return samples.astype("<i2", copy=False).tobytes()
+    index = samples.astype(np.int32) + 32768
+    if encoding == "mulaw":
+        return _MULAW_ENCODE[index].tobytes()
+    if encoding == "alaw":
+        return _ALAW_ENCODE[index].tobytes()
+    raise ValueError(f"Unsupported audio encoding '{encoding}'.")
+
+
+# =========================
+# STREAMING RESAMPLER
+# =========================
+
+class StreamingResampler:
+    """
+    Rational L/M polyphase resampler that keeps filter history between calls.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, taps_per_phase: int = 24, kaiser_beta: float = 8.0):
+        divisor = gcd(from_rate, to_rate)
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+        self.passthrough = self.up == self.down
+
+        if self.passthrough:
+            return
+
+        # Low-pass at the lower of the two Nyquist rates (with a little headroom),
+        # designed at the upsampled rate and split into `up` phases.
+        num_taps = taps_per_phase * self.up
+        cutoff = 0.5 / max(self.up, self.down) * 0.92
+        n = np.arange(num_taps) - (num_taps - 1) / 2.0
+        h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, kaiser_beta)
+        h *= self.up / h.sum()
+        self.taps_per_phase = taps_per_phase
+        # phases[p, k] = h[k * up + p], reversed so a window of ascending samples can be dotted directly.
+        self._phases = h.reshape(taps_per_phase, self.up).T[:, ::-1].copy()
+
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float64)
+        self._history_start = -(taps_per_phase - 1)  # global index of _history[0]
+        self._next_t = 0  # upsampled-domain index of the next output sample
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.passthrough:
+            return np.asarray(samples, dtype=np.int16)
+
+        buffer = np.concatenate([self._history, np.asarray(samples, dtype=np.float64)])
+        last_index = self._history_start + len(buffer) - 1
+        last_t = last_index * self.up + self.up - 1
+
+        if self._next_t > last_t:
+            output = np.zeros(0, dtype=np.float64)
+        else:
+            count = (last_t - self._next_t) // self.down + 1
+            t = self._next_t + self.down * np.arange(count, dtype=np.int64)
+            newest = t // self.up - self._history_start
+            window = newest[:, None] + np.arange(-(self.taps_per_phase - 1), 1)[None, :]
+            output = np.einsum("ij,ij->i", buffer[window], self._phases[t % self.up])
+            self._next_t += count * self.down
+
+        keep_from = self._next_t // self.up - (self.taps_per_phase - 1)
+        drop = min(max(0, keep_from - self._history_start), len(buffer))
+        self._history = buffer[drop:]
+        self._history_start += drop
+
+        return np.clip(np.rint(output), -32768, 32767).astype(np.int16)
+
+
+# =========================
+# TRANSCODERS
+# =========================
+
+class AudioTranscoder:
+    """
+    One direction of a leg (source format -> target format) with streaming state.
+    """
+
+    def __init__(self, source: AudioFormat, target: AudioFormat):
+        self.source = source
+        self.target = target
+        self._resampler = StreamingResampler(source.sample_rate, target.sample_rate)
+        self._pending_byte: Optional[bytes] = None
+
+    @property
+    def is_identity(self) -> bool:
+        return self.source == self.target
+
+    def convert(self, data: bytes) -> bytes:
+        if self.is_identity or not data:
+            return data
+        if self.source.encoding == "pcm16":
+            # Frames may split a sample across a boundary; carry the odd byte over.
+            if self._pending_byte:
+                data = self._pending_byte + data
+                self._pending_byte = None
+            if len(data) % 2:
+                self._pending_byte = data[-1:]
+                data = data[:-1]
+        samples = decode_to_pcm16(data, self.source.encoding)
+        return encode_from_pcm16(self._resampler.process(samples), self.target.encoding)
+
+
+class RealtimeAudioLeg:
+    """
+    Both directions between a caller leg and the 24 kHz PCM16 realtime pipeline.
+    """
+
+    def __init__(self, leg_format: AudioFormat):
+        self.leg_format = leg_format
+        self.inbound = AudioTranscoder(leg_format, REALTIME_AUDIO_FORMAT)
+        self.outbound = AudioTranscoder(REALTIME_AUDIO_FORMAT, leg_format)
+        # Set once the caller sends raw binary frames; replies are then sent as raw frames too.
+        self.binary_frames = False
+
+    @property
+    def is_identity(self) -> bool:
+        return self.leg_format == REALTIME_AUDIO_FORMAT
+
+    def to_realtime(self, data: bytes) -> bytes:
+        return self.inbound.convert(data)
+
+    def from_realtime(self, data: bytes) -> bytes:
+        return self.outbound.convert(data)
@@ -0,0 +1,540 @@
+"""
+Batched HubSpot contact sync.
+
+Every agent turn with ``crm_auto_sync`` used to open a fresh HTTPS connection and
+POST a single contact. Turns now only write the latest properties for a lead into a
+small SQLite outbox; repeated updates for the same lead inside ``coalesce_window``
+seconds collapse into one row. A background worker drains due rows through the
+HubSpot batch endpoints over one long-lived ``httpx.AsyncClient``, paced by a token
+bucket. 429s pause the bucket for ``Retry-After``; other failures are retried with
+backoff.
+
+Every API worker with an API key drains the same outbox file, so a drain claims
+the rows it reads (for ``CLAIM_SECONDS``) in the same transaction, and the token
+bucket's state lives in the file too: a row is sent by one worker at a time and
+the rate limit holds for all of them together. In a partial (207) response, contacts HubSpot rejected are retried or parked
+as dead per error and only the rest are completed. Because pending rows live on disk,
+a restart resumes where it stopped.
+
+Point ``HUBSPOT_API_BASE_URL`` at a local stand-in server to exercise the worker
+without touching HubSpot.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx  # imported lazily: only a worker with an API key needs it
+
+HUBSPOT_API_BASE_URL = "https://api.hubapi.com"
+BATCH_LIMIT = 100  # HubSpot's maximum inputs per batch call
+
+# Endpoint per identity kind: leads with an email are upserted on it, known CRM ids
+# are updated in place, anything else can only be created.
+BATCH_ENDPOINTS = {
+    "email": "/crm/v3/objects/contacts/batch/upsert",
+    "id": "/crm/v3/objects/contacts/batch/update",
+    "lead": "/crm/v3/objects/contacts/batch/create",
+}
+
+# Per-contact errors in a 207 that a later attempt can get past; any other category
+# (validation, unknown id, ...) will fail the same way again, so the row is parked.
+RETRYABLE_ERROR_CATEGORIES = {"RATE_LIMITS", "INTERNAL_ERROR", "CONFLICT"}
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crm_outbox (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    properties TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    first_enqueued_at REAL NOT NULL,
+    due_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    claimed_until REAL
+)
+"""
+
+# Token bucket state shared by every process draining the outbox (a single row)
+RATE_LIMIT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crm_rate_limit (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0
+)
+"""
+
+# How long a drain holds the rows it read: longer than one send (10s request timeout
+# plus pacing). Rows of a drain that died are taken over once the claim expires.
+CLAIM_SECONDS = 60.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class CrmOutbox:
+    """
+    Durable, coalescing queue of pending contact writes (one row per lead).
+    Blocking; the worker calls it from threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Marks the rows this outbox's drain has claimed
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(OUTBOX_SCHEMA)
+        self._conn.execute(RATE_LIMIT_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(crm_outbox)")}
+        for column, definition in (("claimed_by", "TEXT"), ("claimed_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE crm_outbox ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _transaction(self):
+        """A write transaction that other processes sharing the file wait for."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, kind: str, identifier: str, properties: Dict[str, Any], window: float) -> None:
+        key = f"{kind}:{identifier}"
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT properties, dead FROM crm_outbox WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1]:
+                conn.execute(
+                    "INSERT OR REPLACE INTO crm_outbox (key, kind, identifier, properties, first_enqueued_at, due_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, identifier, json.dumps(properties), now, now + window),
+                )
+            else:
+                # Later turns win per property; the row keeps its original due time so
+                # a chatty call is still synced once per window.
+                merged = {**json.loads(row[0]), **properties}
+                conn.execute(
+                    "UPDATE crm_outbox SET properties = ?, version = version + 1 WHERE key = ?",
+                    (json.dumps(merged), key),
+                )
+
+    def due(self, kind: str, limit: int, now: Optional[float] = None) -> List[Tuple[str, str, Dict[str, Any], int, int]]:
+        """
+        Claim up to ``limit`` due rows for ``CLAIM_SECONDS``. Rows another drain has
+        claimed are skipped until it settles them or its claim expires.
+        """
+        claimed_at = time.time()
+        now = claimed_at if now is None else now
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT key, identifier, properties, version, attempts FROM crm_outbox "
+                "WHERE kind = ? AND dead = 0 AND due_at <= ? AND (claimed_until IS NULL OR claimed_until <= ?) "
+                "ORDER BY due_at LIMIT ?",
+                (kind, now, claimed_at, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE crm_outbox SET claimed_by = ?, claimed_until = ? WHERE key = ?",
+                [(self.owner, claimed_at + CLAIM_SECONDS, row[0]) for row in rows],
+            )
+        return [(key, identifier, json.loads(props), version, attempts) for key, identifier, props, version, attempts in rows]
+
+    def next_due_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(MAX(due_at, COALESCE(claimed_until, 0))) FROM crm_outbox WHERE dead = 0"
+            ).fetchone()
+        return row[0] if row else None
+
+    def complete(self, rows: List[Tuple[str, int]]) -> None:
+        """
+        Drop synced rows, unless a newer update landed while the batch was in flight
+        (those are released to be sent again).
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM crm_outbox WHERE key = ? AND version = ?", rows)
+        self.release([key for key, _ in rows])
+
+    def release(self, keys: List[str]) -> None:
+        """Give up this drain's claim on rows without settling them."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE crm_outbox SET claimed_by = NULL, claimed_until = NULL WHERE key = ? AND claimed_by = ?",
+                [(key, self.owner) for key in keys],
+            )
+
+    def retry(self, keys: List[str], delay: float, error: str, max_attempts: int) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE crm_outbox SET attempts = attempts + 1, due_at = ?, last_error = ?, "
+                "dead = CASE WHEN attempts + 1 >= ? THEN 1 ELSE 0 END, claimed_by = NULL, claimed_until = NULL "
+                "WHERE key = ? AND claimed_by = ?",
+                [(time.time() + delay, error[:500], max_attempts, key, self.owner) for key in keys],
+            )
+
+    def fail(self, keys: List[str], error: str) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE crm_outbox SET dead = 1, last_error = ?, claimed_by = NULL, claimed_until = NULL "
+                "WHERE key = ? AND claimed_by = ?",
+                [(error[:500], key, self.owner) for key in keys],
+            )
+
+    def take_token(self, rate_per_second: float, burst: int) -> float:
+        """
+        Take one request token from the shared bucket. Returns 0 when taken, else
+        the seconds to wait before trying again.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated_at, paused_until FROM crm_rate_limit WHERE id = 1").fetchone()
+            tokens, updated_at, paused_until = row or (float(burst), now, 0.0)
+            if now < paused_until:
+                return paused_until - now
+            tokens = min(burst, tokens + max(0.0, now - updated_at) * rate_per_second)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate_per_second
+            if not wait:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO crm_rate_limit (id, tokens, updated_at, paused_until) VALUES (1, ?, ?, ?)",
+                (tokens, now, paused_until),
+            )
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Empty the shared bucket until ``seconds`` from now (a 429's Retry-After)."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO crm_rate_limit (id, tokens, updated_at, paused_until) VALUES (1, 0, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at, "
+                "paused_until = MAX(paused_until, excluded.paused_until)",
+                (now, now + seconds),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending, dead = self._conn.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM crm_outbox"
+            ).fetchone()
+        return {"pending": pending, "dead": dead}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _retry_after_seconds(response: "httpx.Response", default: float) -> float:
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value else default
+    except ValueError:
+        return default
+
+
+class HubSpotSyncWorker:
+    """
+    Owns the outbox, the pooled HTTP client and the drain task.
+    """
+
+    def __init__(
+        self,
+        *,
+        api_key: Optional[str],
+        base_url: str = HUBSPOT_API_BASE_URL,
+        outbox_path: str = "crm_outbox.sqlite3",
+        coalesce_window: float = 5.0,
+        rate_per_second: float = 9.0,
+        burst: int = 10,
+        max_attempts: int = 8,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.outbox_path = outbox_path
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        self.rate_per_second = max(rate_per_second, 0.01)
+        self.burst = max(1, burst)
+        self._outbox: Optional[CrmOutbox] = None
+        self._outbox_lock = threading.Lock()
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "HubSpotSyncWorker":
+        default_outbox = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crm_outbox.sqlite3")
+        return cls(
+            api_key=os.getenv("HUBSPOT_API_KEY"),
+            base_url=os.getenv("HUBSPOT_API_BASE_URL", HUBSPOT_API_BASE_URL),
+            outbox_path=os.getenv("HUBSPOT_OUTBOX_PATH", default_outbox),
+            coalesce_window=_env_float("HUBSPOT_SYNC_COALESCE_SECONDS", 5.0),
+            rate_per_second=_env_float("HUBSPOT_RATE_LIMIT_PER_SECOND", 9.0),
+            burst=int(_env_float("HUBSPOT_RATE_LIMIT_BURST", 10)),
+        )
+
+    @property
+    def outbox(self) -> CrmOutbox:
+        with self._outbox_lock:
+            if self._outbox is None:
+                self._outbox = CrmOutbox(self.outbox_path)
+            return self._outbox
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def enqueue(self, *, email: Optional[str], crm_id: Optional[str], lead_id: str, properties: Dict[str, Any]) -> None:
+        """
+        Record the latest properties for a lead. Safe to call from any thread;
+        it blocks on the outbox file, so async code runs it with ``asyncio.to_thread``.
+        """
+        properties = {name: value for name, value in properties.items() if value is not None}
+        if email:
+            kind, identifier = "email", email.strip().lower()
+        elif crm_id:
+            kind, identifier = "id", str(crm_id)
+        else:
+            kind, identifier = "lead", lead_id
+        self.outbox.put(kind, identifier, properties, self.coalesce_window)
+        self._wake()
+
+    def start(self) -> None:
+        """
+        Start draining on the running loop (idempotent).
+        """
+        if not self.api_key:
+            return
+        if self._worker is None or self._worker.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """
+        Send everything pending right now, ignoring the coalescing window.
+        """
+        await self._drain(now=float("inf"))
+
+    def stats(self) -> Dict[str, int]:
+        return self.outbox.stats()
+
+    async def close(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+        if self._outbox:
+            self._outbox.close()
+            self._outbox = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _wake(self) -> None:
+        if self._wakeup is None or self._worker is None:
+            return
+        # enqueue() may run in a threadpool (sync background tasks).
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _http(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+            )
+        return self._client
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._drain()
+            except Exception as exc:
+                print("[CRM] Sync worker error:", exc)
+            next_due = await asyncio.to_thread(self.outbox.next_due_at)
+            timeout = 30.0 if next_due is None else min(30.0, max(0.05, next_due - time.time()))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self, now: Optional[float] = None) -> None:
+        for kind in BATCH_ENDPOINTS:
+            while True:
+                rows = await asyncio.to_thread(self.outbox.due, kind, BATCH_LIMIT, now)
+                if not rows:
+                    break
+                if not await self._send(kind, rows):
+                    break
+
+    def _batch_body(self, kind: str, rows) -> Dict[str, Any]:
+        inputs = []
+        for key, identifier, properties, _version, _attempts in rows:
+            if kind == "email":
+                item = {"idProperty": "email", "id": identifier, "properties": {**properties, "email": identifier}}
+            elif kind == "id":
+                item = {"id": identifier, "properties": properties}
+            else:
+                item = {"properties": properties}
+            # Echoed in per-input errors, so a failure can be traced to its outbox row
+            item["objectWriteTraceId"] = key
+            inputs.append(item)
+        return {"inputs": inputs}
+
+    @staticmethod
+    def _error_rows(kind: str, rows, body: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+        """
+        Split a 207 response into ({key: error} to retry, {key: error} to park, keys
+        whose outcome is unknown). Errors name their inputs in ``context`` (trace id,
+        email or object id); errors naming none leave every row that is not in
+        ``results`` unknown.
+        """
+        by_name = {}
+        for row in rows:
+            by_name[row[0]] = row[0]
+            by_name[row[1].lower()] = row[0]
+        retry: Dict[str, str] = {}
+        dead: Dict[str, str] = {}
+        unmatched = False
+        for error in body.get("errors") or []:
+            names = []
+            for value in (error.get("context") or {}).values():
+                names.extend(value if isinstance(value, list) else [value])
+            keys = {by_name[str(name).lower()] for name in names if str(name).lower() in by_name}
+            if not keys:
+                unmatched = True
+                continue
+            category = error.get("category") or "ERROR"
+            target = retry if category in RETRYABLE_ERROR_CATEGORIES else dead
+            for key in keys:
+                target[key] = f"{category}: {error.get('message')}"
+        if not unmatched:
+            return retry, dead, []
+
+        synced = set()
+        for result in body.get("results") or []:
+            if kind == "email":
+                synced.add(str((result.get("properties") or {}).get("email") or "").lower())
+            elif kind == "id":
+                synced.add(str(result.get("id")))
+        unknown = [row[0] for row in rows if row[0] not in retry and row[0] not in dead and row[1].lower() not in synced]
+        return retry, dead, unknown
+
+    async def _send(self, kind: str, rows) -> bool:
+        """
+        Push one batch. Returns False when draining should stop for now.
+        """
+        import httpx
+
+        keys = [row[0] for row in rows]
+        await self._acquire()
+        try:
+            response = await self._http().post(BATCH_ENDPOINTS[kind], json=self._batch_body(kind, rows))
+        except httpx.HTTPError as exc:
+            await asyncio.to_thread(self.outbox.retry, keys, self._backoff(rows), f"transport: {exc}", self.max_attempts)
+            print(f"[CRM] HubSpot batch of {len(rows)} failed ({exc}); will retry.")
+            return False
+
+        if response.status_code == 429:
+            wait = _retry_after_seconds(response, 10.0)
+            await asyncio.to_thread(self.outbox.pause, wait)
+            await asyncio.to_thread(self.outbox.release, keys)
+            print(f"[CRM] HubSpot rate limited; pausing {wait:.1f}s.")
+            return True  # rows stay due; the bucket holds the next send back
+        if response.status_code >= 500:
+            await asyncio.to_thread(
+                self.outbox.retry, keys, self._backoff(rows), f"HTTP {response.status_code}", self.max_attempts
+            )
+            print(f"[CRM] HubSpot returned {response.status_code} for {len(rows)} contacts; will retry.")
+            return False
+        if response.status_code >= 400:
+            # The whole batch was rejected (bad property, auth, ...); retrying will not help.
+            await asyncio.to_thread(self.outbox.fail, keys, f"HTTP {response.status_code}: {response.text}")
+            print(f"[CRM] HubSpot rejected {len(rows)} contacts: {response.status_code} {response.text[:200]}")
+            return True
+
+        retry, dead, unknown = {}, {}, []
+        if response.status_code == 207:
+            retry, dead, unknown = self._error_rows(kind, rows, response.json())
+            if unknown and kind == "lead":
+                # Sending creates again could duplicate contacts that did go through
+                print(f"[CRM] {len(unknown)} created contacts have unattributed errors; not resending.")
+                unknown = []
+        settled = set(retry) | set(dead) | set(unknown)
+        await asyncio.to_thread(self._settle, rows, retry, dead, unknown, settled)
+        print(
+            f"[CRM] Synced {len(rows) - len(settled)}/{len(rows)} contacts via {BATCH_ENDPOINTS[kind]} "
+            f"({response.status_code})."
+        )
+        if settled:
+            print(f"[CRM] {len(retry) + len(unknown)} contacts will be retried, {len(dead)} were rejected.")
+        for key, error in list(dead.items())[:5]:
+            print(f"[CRM] Contact {key} rejected: {error}")
+        # Like a 5xx: leave retried rows to their backoff instead of resending them right away
+        return not (retry or unknown)
+
+    def _settle(self, rows, retry: Dict[str, str], dead: Dict[str, str], unknown: List[str], settled) -> None:
+        """Park, retry and complete the rows of a 2xx batch. Blocking."""
+        for key, error in dead.items():
+            self.outbox.fail([key], error)
+        for key, error in retry.items():
+            self.outbox.retry([key], self._backoff(rows), error, self.max_attempts)
+        if unknown:
+            self.outbox.retry(unknown, self._backoff(rows), "unattributed batch error", self.max_attempts)
+        self.outbox.complete([(row[0], row[3]) for row in rows if row[0] not in settled])
+
+    async def _acquire(self) -> None:
+        """Wait for a token from the bucket shared through the outbox file."""
+        while True:
+            wait = await asyncio.to_thread(self.outbox.take_token, self.rate_per_second, self.burst)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _backoff(rows) -> float:
+        attempts = max(row[4] for row in rows) + 1
+        return min(300.0, 2.0 ** attempts)
+
+
+hubspot_sync = HubSpotSyncWorker.from_env()
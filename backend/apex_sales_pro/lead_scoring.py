@@ -0,0 +1,195 @@
+"""
+Vectorised lead scoring for ranking whole lead lists.
+
+``score_lead`` / ``determine_next_step`` in ``main`` score one lead per chat turn.
+Campaign planning needs the same rules over tens of thousands of leads, so here the
+relevant fields are turned into NumPy columns and scored in a single pass. String
+fields (role, region, sentiment) are factorised first: the keyword rules run once
+per *distinct* value and are broadcast back through the codes.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rules shared with the per-turn scorer in main.score_lead.
+BASE_SCORE = 50
+LARGE_DEAL_THRESHOLD = 10000
+LARGE_DEAL_POINTS = 10
+SENIOR_ROLE_KEYWORDS = ("cfo", "vp", "director", "head")
+SENIOR_ROLE_POINTS = 10
+PRIORITY_REGIONS = frozenset({"us", "usa", "north america"})
+PRIORITY_REGION_POINTS = 5
+SENTIMENT_POINTS = 10
+POSITIVE_SENTIMENTS = frozenset({"positive", "very_positive"})
+NEGATIVE_SENTIMENTS = frozenset({"negative", "very_negative"})
+
+# (minimum score, step, reason), highest threshold first; mirrors main.determine_next_step.
+NEXT_STEP_RULES: Tuple[Tuple[int, str, str], ...] = (
+    (80, "send_contract", "Lead is highly qualified with strong buying signals."),
+    (60, "book_demo", "Lead appears qualified but may still need to see the product in action."),
+    (40, "schedule_discovery_call", "Lead shows some interest but needs more discovery and value alignment."),
+    (0, "nurture_sequence", "Signals are weak; better to add to nurture sequence instead of pushing for a meeting."),
+)
+NEXT_STEPS = np.array([step for _, step, _ in NEXT_STEP_RULES], dtype=object)
+
+
+def is_senior_role(role: Optional[str]) -> bool:
+    return bool(role) and any(keyword in role.lower() for keyword in SENIOR_ROLE_KEYWORDS)
+
+
+def is_priority_region(region: Optional[str]) -> bool:
+    return bool(region) and region.lower() in PRIORITY_REGIONS
+
+
+def sentiment_direction(sentiment: Optional[str]) -> int:
+    sentiment = getattr(sentiment, "value", sentiment)
+    if sentiment in POSITIVE_SENTIMENTS:
+        return 1
+    if sentiment in NEGATIVE_SENTIMENTS:
+        return -1
+    return 0
+
+
+def _factorize(values: Sequence) -> Tuple[np.ndarray, list]:
+    """
+    Map each value to a dense integer code; returns (codes, distinct values).
+    """
+    distinct = list(dict.fromkeys(values))
+    lookup = {value: code for code, value in enumerate(distinct)}
+    codes = np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=len(values))
+    return codes, distinct
+
+
+def _flag_column(values: Sequence, rule, dtype=np.bool_) -> np.ndarray:
+    codes, distinct = _factorize(values)
+    per_value = np.array([rule(value) for value in distinct], dtype=dtype)
+    return per_value[codes] if len(values) else np.zeros(0, dtype=dtype)
+
+
+@dataclass(frozen=True)
+class LeadColumns:
+    """Columnar view of the lead fields the scorer uses."""
+
+    lead_ids: np.ndarray  # object
+    deal_size: np.ndarray  # float64, NaN when unknown
+    senior_role: np.ndarray  # bool
+    priority_region: np.ndarray  # bool
+    sentiment: np.ndarray  # int8: -1 / 0 / +1
+
+    def __len__(self) -> int:
+        return len(self.lead_ids)
+
+    @classmethod
+    def from_lists(
+        cls,
+        lead_ids: Sequence[str],
+        deal_sizes: Optional[Sequence[Optional[float]]] = None,
+        roles: Optional[Sequence[Optional[str]]] = None,
+        regions: Optional[Sequence[Optional[str]]] = None,
+        last_sentiments: Optional[Sequence[Optional[str]]] = None,
+    ) -> "LeadColumns":
+        count = len(lead_ids)
+        for name, column in (
+            ("deal_sizes", deal_sizes),
+            ("roles", roles),
+            ("regions", regions),
+            ("last_sentiments", last_sentiments),
+        ):
+            if column is not None and len(column) != count:
+                raise ValueError(f"{name} has {len(column)} values, expected {count}.")
+
+        if deal_sizes is None:
+            deal_size = np.full(count, np.nan)
+        else:
+            # None becomes NaN under a float dtype.
+            deal_size = np.array(deal_sizes, dtype=np.float64)
+        return cls(
+            lead_ids=np.asarray(lead_ids, dtype=object),
+            deal_size=deal_size,
+            senior_role=_flag_column(roles, is_senior_role) if roles is not None else np.zeros(count, dtype=bool),
+            priority_region=(
+                _flag_column(regions, is_priority_region) if regions is not None else np.zeros(count, dtype=bool)
+            ),
+            sentiment=(
+                _flag_column(last_sentiments, sentiment_direction, dtype=np.int8)
+                if last_sentiments is not None
+                else np.zeros(count, dtype=np.int8)
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class BatchScores:
+    """Scores and recommendations for a batch, plus the ranking order."""
+
+    lead_ids: np.ndarray
+    scores: np.ndarray  # int16, 0-100
+    step_codes: np.ndarray  # index into NEXT_STEP_RULES
+    order: np.ndarray  # indices of leads, best first
+
+    def steps(self) -> np.ndarray:
+        return NEXT_STEPS[self.step_codes]
+
+
+def score_columns(columns: LeadColumns) -> np.ndarray:
+    score = np.full(len(columns), BASE_SCORE, dtype=np.int16)
+    # NaN compares False, so unknown deal sizes get no points (as in score_lead).
+    with np.errstate(invalid="ignore"):
+        score += np.where(columns.deal_size > LARGE_DEAL_THRESHOLD, LARGE_DEAL_POINTS, 0).astype(np.int16)
+    score += columns.senior_role.astype(np.int16) * SENIOR_ROLE_POINTS
+    score += columns.priority_region.astype(np.int16) * PRIORITY_REGION_POINTS
+    score += columns.sentiment.astype(np.int16) * SENTIMENT_POINTS
+    return np.clip(score, 0, 100)
+
+
+def next_step_codes(scores: np.ndarray) -> np.ndarray:
+    thresholds = np.array([minimum for minimum, _, _ in NEXT_STEP_RULES])
+    # Rules are ordered high -> low; count the thresholds a score does not reach.
+    return (scores[:, None] < thresholds[None, :-1]).sum(axis=1).astype(np.int8)
+
+
+def _top_candidates(scores: np.ndarray, deal: np.ndarray, top_k: int) -> np.ndarray:
+    """Indexes of the best ``top_k`` leads by (score, deal size), unsorted, without a full sort."""
+    if top_k == 0:
+        return np.zeros(0, dtype=np.int64)
+    cutoff = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+    above = np.flatnonzero(scores > cutoff)
+    tied = np.flatnonzero(scores == cutoff)
+    need = top_k - len(above)
+    if need < len(tied):
+        tied = tied[np.argpartition(-deal[tied], need - 1)[:need]]
+    return np.concatenate([above, tied])
+
+
+def score_leads_batch(columns: LeadColumns, top_k: Optional[int] = None) -> BatchScores:
+    """
+    Score, recommend and rank every lead in one pass.
+
+    Ties on score are broken by larger deal size. With ``top_k`` only the best
+    ``top_k`` leads are sorted (``argpartition``), which is what large lists need.
+    """
+    scores = score_columns(columns)
+    steps = next_step_codes(scores)
+    deal = np.clip(np.nan_to_num(columns.deal_size, nan=0.0), 0.0, None)
+
+    count = len(columns)
+    candidates = np.arange(count)
+    if top_k is not None and top_k < count:
+        candidates = _top_candidates(scores, deal, max(top_k, 0))
+    # Score first, deal size breaks ties (lexsort sorts by the last key first and is stable)
+    order = candidates[np.lexsort((-deal[candidates], -scores[candidates]))]
+    return BatchScores(lead_ids=columns.lead_ids, scores=scores, step_codes=steps, order=order)
+
+
+def next_step_reasons(target_next_step: Optional[str] = None) -> Dict[str, str]:
+    """
+    Reason text per step, with the campaign target appended like determine_next_step.
+    """
+    reasons = {}
+    for _, step, reason in NEXT_STEP_RULES:
+        if target_next_step and target_next_step != step:
+            reason += f" Primary campaign target is {target_next_step}."
+        reasons[step] = reason
+    return reasons
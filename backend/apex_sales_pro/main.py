@@ -1,31 +1,96 @@
 import os
 import asyncio
+import base64
 import json
-from enum import Enum
-from typing import List, Optional, Dict, Any, Literal
+from typing import List, Optional, Dict, Any, Callable, Iterable
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from openai import OpenAI
 from dotenv import load_dotenv
 from fastapi.responses import StreamingResponse
 import io
-import httpx
+import numpy as np
 import websockets
 
+# Load .env (before the sibling modules read their settings from the environment)
+load_dotenv()
+
+try:
+    from .audio_transcode import RealtimeAudioLeg, audio_format_from_query
+    from .crm_sync import hubspot_sync
+    from . import lead_scoring
+    from .models import (
+        Channel,
+        WebhookEventType,
+        SentimentLabel,
+        AgentPersona,
+        AgentAdvancedSettings,
+        AgentIntegrations,
+        AgentConfig,
+        LeadContext,
+        ConversationTurn,
+        CallSettings,
+        ApexSalesRequest,
+        ApexSalesResponse,
+        WebhookEvent,
+        LeadScoreInput,
+        LeadColumnsInput,
+        BatchLeadScoreRequest,
+        BatchLeadScoreResponse,
+        DialRequest,
+        build_demo_request,
+    )
+    from .prompts import SystemPromptTemplate, build_system_prompt, compile_system_prompt
+    from .realtime_pool import realtime_pool
+except ImportError:  # launched directly from the apex_sales_pro directory
+    from audio_transcode import RealtimeAudioLeg, audio_format_from_query
+    from crm_sync import hubspot_sync
+    import lead_scoring
+    from models import (
+        Channel,
+        WebhookEventType,
+        SentimentLabel,
+        AgentPersona,
+        AgentAdvancedSettings,
+        AgentIntegrations,
+        AgentConfig,
+        LeadContext,
+        ConversationTurn,
+        CallSettings,
+        ApexSalesRequest,
+        ApexSalesResponse,
+        WebhookEvent,
+        LeadScoreInput,
+        LeadColumnsInput,
+        BatchLeadScoreRequest,
+        BatchLeadScoreResponse,
+        DialRequest,
+        build_demo_request,
+    )
+    from prompts import SystemPromptTemplate, build_system_prompt, compile_system_prompt
+    from realtime_pool import realtime_pool
 
 
-# Load .env
-load_dotenv()
 HUBSPOT_API_KEY = os.getenv("HUBSPOT_API_KEY")
 
-# --- OpenAI client ---
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")   # Auto loads from .env
-)
+# --- OpenAI client (created on first use; importing openai alone takes ~0.3s) ---
+_openai_client = None
+
+
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+
+        _openai_client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY")   # Auto loads from .env
+        )
+    return _openai_client
+
+
 REALTIME_MODEL = os.getenv("OPENAI_REALTIME_MODEL", "gpt-4o-realtime-preview")
 REALTIME_SAMPLE_RATE = 24000
+REALTIME_VOICE = "alloy"
 
 # --- FastAPI app ---
 app = FastAPI(
@@ -43,167 +108,21 @@ app.add_middleware(
 )
 
 
-# =========================
-# ENUMS & MODELS
-# =========================
-
-
-
-class Channel(str, Enum):
-    phone = "phone"
-    video = "video"
-    chat = "chat"
-    meeting = "meeting"
+@app.on_event("startup")
+async def start_crm_sync():
+    # Resume anything left in the CRM outbox by a previous run.
+    hubspot_sync.start()
 
 
-class WebhookEventType(str, Enum):
-    call_started = "call.started"
-    call_completed = "call.completed"
-    call_failed = "call.failed"
-    call_voicemail = "call.voicemail"
+@app.on_event("startup")
+async def warm_default_realtime_session():
+    await warm_realtime_sessions([default_realtime_instructions()])
 
 
-class SentimentLabel(str, Enum):
-    very_negative = "very_negative"
-    negative = "negative"
-    neutral = "neutral"
-    positive = "positive"
-    very_positive = "very_positive"
-
-
-class AgentPersona(BaseModel):
-    tier: str = "Platinum"
-    description: str = (
-        "Platinum sales closer focused on outbound demos and contracts; "
-        "confident tone, assumptive closing, ROI storytelling, strong objection handling."
-    )
-    tone: str = "confident, consultative, assumptive-closing"
-    closing_style: str = "assumptive close with clear next steps (demo / contract)"
-    storytelling_focus: str = "ROI, business impact, and time-to-value"
-
-
-class AgentAdvancedSettings(BaseModel):
-    max_call_duration_seconds: int = 900  # 15 min
-    max_retries: int = 3
-    voicemail_strategy: str = "drop_voicemail_if_no_answer"
-    record_calls: bool = True
-    transcribe_calls: bool = True
-    retain_days: int = 30
-    rate_limit_per_minute: int = 30
-    fallback_routing: str = "transfer_to_AE_if_blocked"
-    webhook_urls: Dict[str, str] = Field(
-        default_factory=lambda: {
-            "call.started": "https://example.com/webhooks/call-started",
-            "call.completed": "https://example.com/webhooks/call-completed",
-            "call.failed": "https://example.com/webhooks/call-failed",
-            "call.voicemail": "https://example.com/webhooks/call-voicemail",
-        }
-    )
-
-
-class AgentIntegrations(BaseModel):
-    crm_provider: Optional[str] = None
-    crm_auto_sync: bool = False
-    lead_scoring_enabled: bool = True
-    conferencing_platforms: List[str] = ["Zoom", "Google Meet", "Teams"]
-    default_meeting_link_template: str = (
-        "https://meet.example.com/{owner_id}/{lead_id}"
-    )
-
-
-class AgentConfig(BaseModel):
-    name: str = "Apex Sales Pro"
-    active: bool = True
-    model: str = "gpt-4o-mini"  # faster default for conversational latency
-    voice: str = "nova"     # conceptual; real voice handled in telephony layer
-    deployment_channels: List[Channel] = [
-        Channel.phone,
-        Channel.video,
-        Channel.chat,
-        Channel.meeting,
-    ]
-    temperature: float = 0.6
-    top_p: float = 0.9
-    memory_turns: int = 15  # how many past messages to keep
-    multi_language: bool = True
-    persona: AgentPersona = Field(default_factory=AgentPersona)
-    advanced: AgentAdvancedSettings = Field(default_factory=AgentAdvancedSettings)
-    integrations: AgentIntegrations = Field(default_factory=AgentIntegrations)
-    # A/B testing variant label, e.g. "A" vs "B"
-    ab_test_variant: Optional[str] = "A"
-
-
-class LeadContext(BaseModel):
-    lead_id: str
-    name: Optional[str] = None
-    company: Optional[str] = None
-    role: Optional[str] = None
-    region: Optional[str] = None
-    email: Optional[str] = None
-    phone: Optional[str] = None
-    estimated_deal_size: Optional[float] = None
-    currency: str = "USD"
-    crm_id: Optional[str] = None
-    pain_points: List[str] = Field(default_factory=list)
-    current_tools: Optional[str] = None
-    notes: Optional[str] = None
-    preferred_language: Optional[str] = None
-
-
-class ConversationTurn(BaseModel):
-    role: Literal["agent", "prospect"]
-    content: str
-    sentiment: Optional[SentimentLabel] = None
-    timestamp: Optional[str] = None
-
-
-class CallSettings(BaseModel):
-    channel: Channel = Channel.phone
-    call_id: str
-    call_attempt: int = 1
-    allow_negotiation: bool = True
-    target_next_step: str = "book_demo"
-    max_agent_response_tokens: int = 600
-
-
-class ApexSalesRequest(BaseModel):
-    agent: AgentConfig = Field(default_factory=AgentConfig)
-    lead: LeadContext
-    settings: CallSettings
-    history: List[ConversationTurn] = Field(
-        default_factory=list,
-        description="Chronological conversation turns (agent/prospect).",
-    )
-    custom_variables: Dict[str, Any] = Field(
-        default_factory=dict,
-        description="Additional custom variables like deal size, CRM IDs, campaign IDs etc.",
-    )
-
-
-class ApexSalesResponse(BaseModel):
-    call_id: str
-    channel: Channel
-    agent_message: str
-    sentiment: SentimentLabel
-    lead_score: Optional[int] = None
-    recommended_next_step: str
-    recommended_next_step_reason: str
-    variant: Optional[str] = None
-    debug_metadata: Optional[Dict[str, Any]] = None
-
-
-class WebhookEvent(BaseModel):
-    event_type: WebhookEventType
-    call_id: str
-    lead_id: Optional[str] = None
-    payload: Dict[str, Any] = Field(default_factory=dict)
-
-
-class DialRequest(BaseModel):
-    phone_number: str
-    caller_id: Optional[str] = "+15551234567"
-    agent_name: str = "Apex Sales Pro"
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+@app.on_event("shutdown")
+async def close_realtime_pool():
+    await realtime_pool.close()
+    await hubspot_sync.close()
 
 
 # Simple in-memory call logs for demo purposes
@@ -214,7 +133,15 @@ CALL_LOGS: Dict[str, List[ConversationTurn]] = {}
 # HELPER FUNCTIONS
 # =========================
 
-def run_apex_sales_turn(payload: ApexSalesRequest, background_tasks: BackgroundTasks) -> ApexSalesResponse:
+def run_apex_sales_turn(
+    payload: ApexSalesRequest,
+    background_tasks: BackgroundTasks,
+    system_prompt: Optional[SystemPromptTemplate] = None,
+) -> ApexSalesResponse:
+    """
+    ``system_prompt`` is the agent's precompiled prompt when the caller already has one
+    (agent runtimes compile it once per blueprint).
+    """
     if not payload.agent.active:
         raise HTTPException(status_code=400, detail="Agent is not active.")
 
@@ -228,12 +155,13 @@ def run_apex_sales_turn(payload: ApexSalesRequest, background_tasks: BackgroundT
     history = payload.history[-payload.agent.memory_turns :]
 
     # Build messages for OpenAI
-    system_prompt = build_system_prompt(payload.agent, payload.lead, payload.settings)
-    messages = [{"role": "system", "content": system_prompt}]
+    if system_prompt is None:
+        system_prompt = compile_system_prompt(payload.agent)
+    messages = [{"role": "system", "content": system_prompt.render(payload.lead, payload.settings)}]
     messages += convert_history_to_openai_messages(history)
 
     # Call OpenAI to generate the next agent turn
-    completion = client.chat.completions.create(
+    completion = get_openai_client().chat.completions.create(
         model=payload.agent.model,
         messages=messages,
         temperature=payload.agent.temperature,
@@ -293,7 +221,7 @@ def synthesize_agent_audio(text: str, voice: str = "nova") -> bytes:
     Helper that turns agent text into mp3 bytes using OpenAI TTS.
     """
     audio_bytes = b""
-    with client.audio.speech.with_streaming_response.create(
+    with get_openai_client().audio.speech.with_streaming_response.create(
         model="gpt-4o-mini-tts",
         voice=voice,
         input=text,
@@ -317,71 +245,6 @@ def sanitize_header_value(value: str) -> str:
 
 
 
-def build_system_prompt(agent: AgentConfig, lead: LeadContext, settings: CallSettings) -> str:
-    """
-    System prompt encoding persona, objection handling, ROI storytelling,
-    multi-language support, and channel-specific behavior.
-    """
-    persona = agent.persona
-    channel = settings.channel.value
-
-    return f"""
-You are **{agent.name}**, a {persona.tier} outbound sales closer focused on demos and contracts.
-
-Personality & tone:
-- {persona.description}
-- Tone: {persona.tone}
-- Storytelling: {persona.storytelling_focus}
-- Always aim to move the conversation forward with an assumptive close.
-
-Channel & format:
-- Current channel: {channel}
-- If channel is 'phone' or 'video', keep responses conversational and speakable.
-- If channel is 'chat' or 'meeting', you can use short bullet points, but still keep it concise.
-
-Sales behavior:
-- Quickly qualify using frameworks like BANT / SPICED (budget, authority, need, timeline).
-- Focus heavily on ROI, business impact, and time-to-value for the buyer.
-- Handle objections clearly and confidently (pricing, timing, competitors, integrations, proof).
-- Offer clear, specific next steps (e.g., book a demo, send contract, introduce AE).
-- You can negotiate pricing, but protect margin; trade discounts for commitment (longer term, multi-seat).
-- Avoid being pushy; be consultative and value-based.
-
-Opening behavior:
-- On the very first response in each conversation, greet the prospect warmly and introduce yourself as {agent.name}, their dedicated Apex Sales Pro closer, before addressing their question.
-- After you have introduced yourself once, do not keep repeating your name or recycled talking points unless the prospect explicitly asks for them again.
-
-Conversation flow:
-- Treat each call as a natural human conversation: acknowledge what the prospect just said, reference earlier moments from this same call when helpful, and avoid restating the full backstory every turn.
-- Pivot quickly to the prospect's current question or objection; only reuse prior messaging when it directly moves the conversation forward.
-- Vary your phrasing so the conversation feels like two people talking, not a script being read.
-
-Multi-language:
-- If the prospect speaks a language other than English, mirror their language.
-- Lead's preferred language: {lead.preferred_language or "unknown"}.
-- If unclear, default to English.
-
-Lead context:
-- Lead ID: {lead.lead_id}
-- Name: {lead.name}
-- Company: {lead.company}
-- Role: {lead.role}
-- Region: {lead.region}
-- Estimated deal size: {lead.estimated_deal_size} {lead.currency}
-- Pain points: {", ".join(lead.pain_points) if lead.pain_points else "N/A"}
-- Current tools: {lead.current_tools}
-- Notes: {lead.notes}
-
-Next step target for this interaction:
-- Primary goal: {settings.target_next_step} (e.g., book_demo, send_contract, schedule_followup)
-
-Output style:
-- Be concise.
-- Respect the channel.
-- End most messages with a simple assumptive next step question or confirmation.
-    """.strip()
-
-
 def convert_history_to_openai_messages(history: List[ConversationTurn]) -> List[Dict[str, str]]:
     """
     Convert our internal history to OpenAI chat format.
@@ -408,7 +271,7 @@ very_negative, negative, neutral, positive, very_positive.
 Message:
 {text}
 """
-    completion = client.chat.completions.create(
+    completion = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a precise sentiment analysis classifier."},
@@ -434,20 +297,17 @@ def score_lead(lead: LeadContext, history: List[ConversationTurn]) -> int:
     """
     Simple lead scoring stub (0-100).
     You can replace this with your own logic or another model call.
-    """
-    score = 50
-    if lead.estimated_deal_size and lead.estimated_deal_size > 10000:
-        score += 10
-    if lead.role and any(k in lead.role.lower() for k in ["cfo", "vp", "director", "head"]):
-        score += 10
-    if lead.region and lead.region.lower() in {"us", "usa", "north america"}:
-        score += 5
+    Keep in step with lead_scoring, which applies the same rules to whole lead lists.
+    """
+    score = lead_scoring.BASE_SCORE
+    if lead.estimated_deal_size and lead.estimated_deal_size > lead_scoring.LARGE_DEAL_THRESHOLD:
+        score += lead_scoring.LARGE_DEAL_POINTS
+    if lead_scoring.is_senior_role(lead.role):
+        score += lead_scoring.SENIOR_ROLE_POINTS
+    if lead_scoring.is_priority_region(lead.region):
+        score += lead_scoring.PRIORITY_REGION_POINTS
     if history:
-        last = history[-1]
-        if last.sentiment in {SentimentLabel.positive, SentimentLabel.very_positive}:
-            score += 10
-        if last.sentiment in {SentimentLabel.negative, SentimentLabel.very_negative}:
-            score -= 10
+        score += lead_scoring.sentiment_direction(history[-1].sentiment) * lead_scoring.SENTIMENT_POINTS
     return max(0, min(100, score))
 
 
@@ -455,62 +315,55 @@ def determine_next_step(lead_score: int, settings: CallSettings) -> (str, str):
     """
     Simple rule-based next-step recommendation.
     """
-    if lead_score >= 80:
-        step = "send_contract"
-        reason = "Lead is highly qualified with strong buying signals."
-    elif lead_score >= 60:
-        step = "book_demo"
-        reason = "Lead appears qualified but may still need to see the product in action."
-    elif lead_score >= 40:
-        step = "schedule_discovery_call"
-        reason = "Lead shows some interest but needs more discovery and value alignment."
-    else:
-        step = "nurture_sequence"
-        reason = "Signals are weak; better to add to nurture sequence instead of pushing for a meeting."
+    for minimum, step, reason in lead_scoring.NEXT_STEP_RULES:
+        if lead_score >= minimum:
+            break
     # Prefer explicit goal from settings if provided
     if settings.target_next_step and settings.target_next_step != step:
         reason += f" Primary campaign target is {settings.target_next_step}."
     return step, reason
 
 
-def build_demo_request() -> ApexSalesRequest:
+def rank_leads(payload: BatchLeadScoreRequest) -> BatchLeadScoreResponse:
     """
-    Creates a ready-to-run Apex request payload for simplified testing.
+    Score and rank a whole lead list in one vectorised pass (see lead_scoring).
     """
-    agent = AgentConfig()
-    lead = LeadContext(
-        lead_id="LEAD-DEMO-001",
-        name="Jordan",
-        company="Northwind Analytics",
-        role="COO",
-        region="USA",
-        email="jordan@nwanalytics.com",
-        phone="+15551231234",
-        estimated_deal_size=25000,
-        notes="Inbound demo request from website CTA.",
-        preferred_language="en",
-    )
-    history = [
-        ConversationTurn(
-            role="prospect",
-            content="Hi, I'm curious how you can help us automate onboarding.",
-            sentiment=SentimentLabel.neutral,
+    if payload.columns is not None:
+        columns = payload.columns
+        try:
+            lead_columns = lead_scoring.LeadColumns.from_lists(
+                columns.lead_ids,
+                deal_sizes=columns.estimated_deal_sizes,
+                roles=columns.roles,
+                regions=columns.regions,
+                last_sentiments=columns.last_sentiments,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    else:
+        leads = payload.leads
+        lead_columns = lead_scoring.LeadColumns.from_lists(
+            [lead.lead_id for lead in leads],
+            deal_sizes=[lead.estimated_deal_size for lead in leads],
+            roles=[lead.role for lead in leads],
+            regions=[lead.region for lead in leads],
+            last_sentiments=[lead.last_sentiment for lead in leads],
         )
-    ]
-    settings = CallSettings(
-        channel=Channel.phone,
-        call_id="CALL-DEMO-001",
-        call_attempt=1,
-        allow_negotiation=True,
-        target_next_step="book_demo",
-        max_agent_response_tokens=600,
-    )
-    return ApexSalesRequest(
-        agent=agent,
-        lead=lead,
-        settings=settings,
-        history=history,
-        custom_variables={},
+
+    batch = lead_scoring.score_leads_batch(lead_columns, top_k=payload.top_k)
+    order = batch.order
+    step_counts = np.bincount(batch.step_codes, minlength=len(lead_scoring.NEXT_STEP_RULES))
+    return BatchLeadScoreResponse(
+        total_leads=len(lead_columns),
+        lead_ids=batch.lead_ids[order].tolist(),
+        lead_scores=batch.scores[order].tolist(),
+        recommended_next_steps=batch.steps()[order].tolist(),
+        next_step_counts={
+            step: int(count)
+            for (_, step, _), count in zip(lead_scoring.NEXT_STEP_RULES, step_counts)
+            if count
+        },
+        next_step_reasons=lead_scoring.next_step_reasons(payload.target_next_step),
     )
 
 
@@ -522,21 +375,21 @@ def default_realtime_instructions() -> str:
     return build_system_prompt(payload.agent, payload.lead, payload.settings)
 
 
-def sync_lead_to_hubspot(lead: LeadContext, call_result: ApexSalesResponse):
+async def sync_lead_to_hubspot(lead: LeadContext, call_result: ApexSalesResponse):
     """
-    Minimal CRM sync stub so the agent can auto-push updates into HubSpot.
+    Queue the lead's latest state for the batched HubSpot sync worker.
     """
     if not HUBSPOT_API_KEY:
         print("[CRM] HUBSPOT_API_KEY not set, skipping HubSpot sync.")
         return
 
-    headers = {
-        "Authorization": f"Bearer {HUBSPOT_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    contact_body = {
-        "properties": {
-            "email": lead.email,
+    hubspot_sync.start()
+    await asyncio.to_thread(
+        hubspot_sync.enqueue,
+        email=lead.email,
+        crm_id=lead.crm_id,
+        lead_id=lead.lead_id,
+        properties={
             "firstname": lead.name,
             "phone": lead.phone,
             "company": lead.company,
@@ -546,15 +399,8 @@ def sync_lead_to_hubspot(lead: LeadContext, call_result: ApexSalesResponse):
             "apex_lead_score": call_result.lead_score,
             "apex_last_agent_message": call_result.agent_message,
             "apex_recommended_next_step": call_result.recommended_next_step,
-        }
-    }
-
-    try:
-        with httpx.Client(base_url="https://api.hubapi.com", headers=headers, timeout=10.0) as client:
-            response = client.post("/crm/v3/objects/contacts", json=contact_body)
-            print("[CRM] Contact sync response:", response.status_code)
-    except Exception as exc:
-        print("[CRM] Error syncing lead:", exc)
+        },
+    )
 
 
 def _estimate_audio_ms_from_b64(audio_b64: Optional[str]) -> float:
@@ -568,21 +414,39 @@ def _estimate_audio_ms_from_b64(audio_b64: Optional[str]) -> float:
     return (samples / REALTIME_SAMPLE_RATE) * 1000.0
 
 
-async def _forward_client_to_openai(client_ws: WebSocket, openai_ws):
+def _append_event(audio: bytes) -> str:
+    return json.dumps({"type": "input_audio_buffer.append", "audio": base64.b64encode(audio).decode("ascii")})
+
+
+async def _forward_client_to_openai(client_ws: WebSocket, openai_ws, leg: Optional[RealtimeAudioLeg] = None) -> int:
+    """
+    Relay client frames upstream; returns how many frames were forwarded.
+
+    With a telephony ``leg``, caller audio (raw binary frames or base64 appends) is
+    transcoded to 24 kHz PCM16 before it reaches OpenAI.
+    """
+    messages_forwarded = 0
     audio_frames_forwarded = 0
     total_audio_ms = 0.0
     audio_items_forwarded = 0
     try:
         while True:
             data = await client_ws.receive()
+            if data.get("type") == "websocket.disconnect":
+                break
             text = data.get("text")
             binary = data.get("bytes")
             if text is not None:
-                await openai_ws.send(text)
                 try:
                     payload = json.loads(text)
                 except json.JSONDecodeError:
                     payload = None
+                if leg and payload and payload.get("type") == "input_audio_buffer.append" and payload.get("audio"):
+                    audio = leg.to_realtime(base64.b64decode(payload["audio"]))
+                    payload["audio"] = base64.b64encode(audio).decode("ascii")
+                    text = json.dumps(payload)
+                await openai_ws.send(text)
+                messages_forwarded += 1
                 if payload:
                     msg_type = payload.get("type")
                     if msg_type == "input_audio_buffer.append":
@@ -613,23 +477,45 @@ async def _forward_client_to_openai(client_ws: WebSocket, openai_ws):
                         audio_frames_forwarded = 0
                         total_audio_ms = 0.0
             elif binary is not None:
-                await openai_ws.send(binary)
+                if leg:
+                    # Raw phone frames: replies go back as raw frames in the leg format too.
+                    leg.binary_frames = True
+                    await openai_ws.send(_append_event(leg.to_realtime(binary)))
+                else:
+                    await openai_ws.send(binary)
+                messages_forwarded += 1
     except WebSocketDisconnect:
         pass
+    return messages_forwarded
 
 
-async def _forward_openai_to_client(client_ws: WebSocket, openai_ws):
+async def _forward_openai_to_client(
+    client_ws: WebSocket,
+    openai_ws,
+    leg: Optional[RealtimeAudioLeg] = None,
+    event_tap: Optional[Callable[[Dict[str, Any]], None]] = None,
+):
     try:
         async for message in openai_ws:
             if isinstance(message, bytes):
                 await client_ws.send_bytes(message)
             else:
-                await client_ws.send_text(message)
                 try:
                     payload = json.loads(message)
                 except json.JSONDecodeError:
                     payload = None
+                if leg and payload and payload.get("type") == "response.audio.delta" and payload.get("delta"):
+                    audio = leg.from_realtime(base64.b64decode(payload["delta"]))
+                    if leg.binary_frames:
+                        await client_ws.send_bytes(audio)
+                        continue
+                    payload["delta"] = base64.b64encode(audio).decode("ascii")
+                    message = json.dumps(payload)
+                await client_ws.send_text(message)
                 if payload:
+                    if event_tap:
+                        # Must not block: the tap only enqueues for the call-log writer.
+                        event_tap(payload)
                     event_type = payload.get("type")
                     interesting = {
                         "error",
@@ -649,41 +535,50 @@ async def _forward_openai_to_client(client_ws: WebSocket, openai_ws):
         pass
 
 
-async def bridge_realtime_session(client_ws: WebSocket, instructions: str):
+async def warm_realtime_sessions(instructions: Iterable[str], voice: str = REALTIME_VOICE) -> None:
+    """
+    Start keeping configured upstream sessions ready for these prompts, so the
+    first call for each does not pay for the handshake.
+    """
+    for prompt in instructions:
+        await realtime_pool.warm(REALTIME_MODEL, voice, prompt)
+
+
+async def bridge_realtime_session(
+    client_ws: WebSocket,
+    instructions: str,
+    voice: str = REALTIME_VOICE,
+    leg: Optional[RealtimeAudioLeg] = None,
+    event_tap: Optional[Callable[[Dict[str, Any]], None]] = None,
+):
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         await client_ws.send_text(json.dumps({"type": "error", "message": "Missing OPENAI_API_KEY"}))
         await client_ws.close(code=1011)
         return
 
-    uri = f"wss://api.openai.com/v1/realtime?model={REALTIME_MODEL}"
-    headers = [
-        ("Authorization", f"Bearer {api_key}"),
-        ("OpenAI-Beta", "realtime=v1"),
-    ]
-
-    async with websockets.connect(uri, additional_headers=headers) as openai_ws:
-        await openai_ws.send(
-            json.dumps(
-                {
-                    "type": "session.update",
-                    "session": {
-                        "instructions": instructions,
-                        "voice": "alloy",
-                        "input_audio_format": "pcm16",
-                        "modalities": ["text", "audio"],
-                    },
-                }
-            )
-        )
-        client_task = asyncio.create_task(_forward_client_to_openai(client_ws, openai_ws))
-        server_task = asyncio.create_task(_forward_openai_to_client(client_ws, openai_ws))
+    # Lease a pre-warmed, already configured upstream session (or open one on a pool miss).
+    upstream = await realtime_pool.lease(REALTIME_MODEL, voice, instructions)
+    openai_ws = upstream.websocket
+    reusable = False
+    try:
+        for event in upstream.handshake_events:
+            await client_ws.send_text(event)
+        if leg and leg.is_identity:
+            leg = None
+        client_task = asyncio.create_task(_forward_client_to_openai(client_ws, openai_ws, leg))
+        server_task = asyncio.create_task(_forward_openai_to_client(client_ws, openai_ws, leg, event_tap))
         done, pending = await asyncio.wait(
             [client_task, server_task],
-            return_when=asyncio.FIRST_EXCEPTION,
+            return_when=asyncio.FIRST_COMPLETED,
         )
         for task in pending:
             task.cancel()
+        # A session that never received a client frame holds no conversation state.
+        if client_task in done and not client_task.cancelled() and client_task.exception() is None:
+            reusable = client_task.result() == 0
+    finally:
+        await realtime_pool.release(upstream, reusable=reusable)
 
 
 # =========================
@@ -706,6 +601,14 @@ def apex_sales_chat(payload: ApexSalesRequest, background_tasks: BackgroundTasks
     return run_apex_sales_turn(payload, background_tasks)
 
 
+@app.post("/agents/apex-sales-pro/leads/score-batch", response_model=BatchLeadScoreResponse)
+def apex_sales_score_leads(payload: BatchLeadScoreRequest):
+    """
+    Rank a lead list for campaign planning, with a next-step recommendation per lead.
+    """
+    return rank_leads(payload)
+
+
 @app.post("/agents/apex-sales-pro/chat-demo", response_model=ApexSalesResponse)
 def apex_sales_chat_demo(background_tasks: BackgroundTasks):
     """
@@ -762,11 +665,15 @@ async def apex_sales_realtime_socket(websocket: WebSocket):
     """
     WebSocket bridge that lets browsers/telephony send audio to OpenAI Realtime and
     receive synthesized replies in near real-time.
+
+    Telephony legs pass ``?codec=mulaw&sample_rate=8000`` (or alaw / pcm16 at 8, 16
+    or 24 kHz) and audio is transcoded to and from the 24 kHz PCM16 pipeline.
     """
     await websocket.accept()
     instructions = default_realtime_instructions()
     try:
-        await bridge_realtime_session(websocket, instructions)
+        leg = RealtimeAudioLeg(audio_format_from_query(websocket.query_params))
+        await bridge_realtime_session(websocket, instructions, leg=leg)
     except Exception as exc:
         await websocket.close(code=1011, reason=str(exc))
 
@@ -0,0 +1,247 @@
+"""
+Request / response models and enums of the Apex runtime.
+
+Kept free of the runtime's heavier dependencies (OpenAI client, NumPy, websockets)
+so the main API can declare its agent runtime routes without importing the runtime.
+"""
+
+from enum import Enum
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Channel(str, Enum):
+    phone = "phone"
+    video = "video"
+    chat = "chat"
+    meeting = "meeting"
+
+
+class WebhookEventType(str, Enum):
+    call_started = "call.started"
+    call_completed = "call.completed"
+    call_failed = "call.failed"
+    call_voicemail = "call.voicemail"
+
+
+class SentimentLabel(str, Enum):
+    very_negative = "very_negative"
+    negative = "negative"
+    neutral = "neutral"
+    positive = "positive"
+    very_positive = "very_positive"
+
+
+class AgentPersona(BaseModel):
+    tier: str = "Platinum"
+    description: str = (
+        "Platinum sales closer focused on outbound demos and contracts; "
+        "confident tone, assumptive closing, ROI storytelling, strong objection handling."
+    )
+    tone: str = "confident, consultative, assumptive-closing"
+    closing_style: str = "assumptive close with clear next steps (demo / contract)"
+    storytelling_focus: str = "ROI, business impact, and time-to-value"
+
+
+class AgentAdvancedSettings(BaseModel):
+    max_call_duration_seconds: int = 900  # 15 min
+    max_retries: int = 3
+    voicemail_strategy: str = "drop_voicemail_if_no_answer"
+    record_calls: bool = True
+    transcribe_calls: bool = True
+    retain_days: int = 30
+    rate_limit_per_minute: int = 30
+    fallback_routing: str = "transfer_to_AE_if_blocked"
+    webhook_urls: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "call.started": "https://example.com/webhooks/call-started",
+            "call.completed": "https://example.com/webhooks/call-completed",
+            "call.failed": "https://example.com/webhooks/call-failed",
+            "call.voicemail": "https://example.com/webhooks/call-voicemail",
+        }
+    )
+
+
+class AgentIntegrations(BaseModel):
+    crm_provider: Optional[str] = None
+    crm_auto_sync: bool = False
+    lead_scoring_enabled: bool = True
+    conferencing_platforms: List[str] = ["Zoom", "Google Meet", "Teams"]
+    default_meeting_link_template: str = (
+        "https://meet.example.com/{owner_id}/{lead_id}"
+    )
+
+
+class AgentConfig(BaseModel):
+    name: str = "Apex Sales Pro"
+    active: bool = True
+    model: str = "gpt-4o-mini"  # faster default for conversational latency
+    voice: str = "nova"     # conceptual; real voice handled in telephony layer
+    deployment_channels: List[Channel] = [
+        Channel.phone,
+        Channel.video,
+        Channel.chat,
+        Channel.meeting,
+    ]
+    temperature: float = 0.6
+    top_p: float = 0.9
+    memory_turns: int = 15  # how many past messages to keep
+    multi_language: bool = True
+    persona: AgentPersona = Field(default_factory=AgentPersona)
+    advanced: AgentAdvancedSettings = Field(default_factory=AgentAdvancedSettings)
+    integrations: AgentIntegrations = Field(default_factory=AgentIntegrations)
+    # A/B testing variant label, e.g. "A" vs "B"
+    ab_test_variant: Optional[str] = "A"
+
+
+class LeadContext(BaseModel):
+    lead_id: str
+    name: Optional[str] = None
+    company: Optional[str] = None
+    role: Optional[str] = None
+    region: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    estimated_deal_size: Optional[float] = None
+    currency: str = "USD"
+    crm_id: Optional[str] = None
+    pain_points: List[str] = Field(default_factory=list)
+    current_tools: Optional[str] = None
+    notes: Optional[str] = None
+    preferred_language: Optional[str] = None
+
+
+class ConversationTurn(BaseModel):
+    role: Literal["agent", "prospect"]
+    content: str
+    sentiment: Optional[SentimentLabel] = None
+    timestamp: Optional[str] = None
+
+
+class CallSettings(BaseModel):
+    channel: Channel = Channel.phone
+    call_id: str
+    call_attempt: int = 1
+    allow_negotiation: bool = True
+    target_next_step: str = "book_demo"
+    max_agent_response_tokens: int = 600
+
+
+class ApexSalesRequest(BaseModel):
+    agent: AgentConfig = Field(default_factory=AgentConfig)
+    lead: LeadContext
+    settings: CallSettings
+    history: List[ConversationTurn] = Field(
+        default_factory=list,
+        description="Chronological conversation turns (agent/prospect).",
+    )
+    custom_variables: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Additional custom variables like deal size, CRM IDs, campaign IDs etc.",
+    )
+
+
+class ApexSalesResponse(BaseModel):
+    call_id: str
+    channel: Channel
+    agent_message: str
+    sentiment: SentimentLabel
+    lead_score: Optional[int] = None
+    recommended_next_step: str
+    recommended_next_step_reason: str
+    variant: Optional[str] = None
+    debug_metadata: Optional[Dict[str, Any]] = None
+
+
+class WebhookEvent(BaseModel):
+    event_type: WebhookEventType
+    call_id: str
+    lead_id: Optional[str] = None
+    payload: Dict[str, Any] = Field(default_factory=dict)
+
+
+class LeadScoreInput(BaseModel):
+    lead_id: str
+    estimated_deal_size: Optional[float] = None
+    role: Optional[str] = None
+    region: Optional[str] = None
+    last_sentiment: Optional[SentimentLabel] = None
+
+
+class LeadColumnsInput(BaseModel):
+    """
+    Column-oriented lead list (one array per field); cheapest to parse for large batches.
+    """
+    lead_ids: List[str]
+    estimated_deal_sizes: Optional[List[Optional[float]]] = None
+    roles: Optional[List[Optional[str]]] = None
+    regions: Optional[List[Optional[str]]] = None
+    last_sentiments: Optional[List[Optional[SentimentLabel]]] = None
+
+
+class BatchLeadScoreRequest(BaseModel):
+    leads: List[LeadScoreInput] = Field(default_factory=list)
+    columns: Optional[LeadColumnsInput] = None
+    target_next_step: Optional[str] = None
+    top_k: Optional[int] = Field(default=None, ge=0, description="Only return the best N leads.")
+
+
+class BatchLeadScoreResponse(BaseModel):
+    """
+    Ranked results as parallel columns (best lead first), so large lists stay cheap to serialize.
+    """
+    total_leads: int
+    lead_ids: List[str]
+    lead_scores: List[int]
+    recommended_next_steps: List[str]
+    next_step_counts: Dict[str, int]
+    next_step_reasons: Dict[str, str]
+
+
+class DialRequest(BaseModel):
+    phone_number: str
+    caller_id: Optional[str] = "+15551234567"
+    agent_name: str = "Apex Sales Pro"
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+def build_demo_request() -> ApexSalesRequest:
+    """
+    Creates a ready-to-run Apex request payload for simplified testing.
+    """
+    agent = AgentConfig()
+    lead = LeadContext(
+        lead_id="LEAD-DEMO-001",
+        name="Jordan",
+        company="Northwind Analytics",
+        role="COO",
+        region="USA",
+        email="jordan@nwanalytics.com",
+        phone="+15551231234",
+        estimated_deal_size=25000,
+        notes="Inbound demo request from website CTA.",
+        preferred_language="en",
+    )
+    history = [
+        ConversationTurn(
+            role="prospect",
+            content="Hi, I'm curious how you can help us automate onboarding.",
+            sentiment=SentimentLabel.neutral,
+        )
+    ]
+    settings = CallSettings(
+        channel=Channel.phone,
+        call_id="CALL-DEMO-001",
+        call_attempt=1,
+        allow_negotiation=True,
+        target_next_step="book_demo",
+        max_agent_response_tokens=600,
+    )
+    return ApexSalesRequest(
+        agent=agent,
+        lead=lead,
+        settings=settings,
+        history=history,
+        custom_variables={},
+    )
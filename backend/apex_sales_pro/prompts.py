@@ -0,0 +1,138 @@
+"""
+System prompt template shared by the chat and realtime paths.
+"""
+
+import string
+from typing import Any, Callable, Dict, List
+
+try:
+    from .models import AgentConfig, CallSettings, LeadContext
+except ImportError:  # launched directly from the apex_sales_pro directory
+    from models import AgentConfig, CallSettings, LeadContext
+
+
+# Placeholders are filled from the agent once per blueprint (see compile_system_prompt)
+# and from the lead / call settings on every turn.
+SYSTEM_PROMPT_TEMPLATE = """
+You are **{agent_name}**, a {persona_tier} outbound sales closer focused on demos and contracts.
+
+Personality & tone:
+- {persona_description}
+- Tone: {persona_tone}
+- Storytelling: {persona_storytelling_focus}
+- Always aim to move the conversation forward with an assumptive close.
+
+Channel & format:
+- Current channel: {channel}
+- If channel is 'phone' or 'video', keep responses conversational and speakable.
+- If channel is 'chat' or 'meeting', you can use short bullet points, but still keep it concise.
+
+Sales behavior:
+- Quickly qualify using frameworks like BANT / SPICED (budget, authority, need, timeline).
+- Focus heavily on ROI, business impact, and time-to-value for the buyer.
+- Handle objections clearly and confidently (pricing, timing, competitors, integrations, proof).
+- Offer clear, specific next steps (e.g., book a demo, send contract, introduce AE).
+- You can negotiate pricing, but protect margin; trade discounts for commitment (longer term, multi-seat).
+- Avoid being pushy; be consultative and value-based.
+
+Opening behavior:
+- On the very first response in each conversation, greet the prospect warmly and introduce yourself as {agent_name}, their dedicated Apex Sales Pro closer, before addressing their question.
+- After you have introduced yourself once, do not keep repeating your name or recycled talking points unless the prospect explicitly asks for them again.
+
+Conversation flow:
+- Treat each call as a natural human conversation: acknowledge what the prospect just said, reference earlier moments from this same call when helpful, and avoid restating the full backstory every turn.
+- Pivot quickly to the prospect's current question or objection; only reuse prior messaging when it directly moves the conversation forward.
+- Vary your phrasing so the conversation feels like two people talking, not a script being read.
+
+Multi-language:
+- If the prospect speaks a language other than English, mirror their language.
+- Lead's preferred language: {preferred_language}.
+- If unclear, default to English.
+
+Lead context:
+- Lead ID: {lead_id}
+- Name: {lead_name}
+- Company: {lead_company}
+- Role: {lead_role}
+- Region: {lead_region}
+- Estimated deal size: {estimated_deal_size} {currency}
+- Pain points: {pain_points}
+- Current tools: {current_tools}
+- Notes: {lead_notes}
+
+Next step target for this interaction:
+- Primary goal: {target_next_step} (e.g., book_demo, send_contract, schedule_followup)
+
+Output style:
+- Be concise.
+- Respect the channel.
+- End most messages with a simple assumptive next step question or confirmation.
+    """.strip()
+
+_AGENT_PROMPT_FIELDS: Dict[str, Callable[[AgentConfig], Any]] = {
+    "agent_name": lambda agent: agent.name,
+    "persona_tier": lambda agent: agent.persona.tier,
+    "persona_description": lambda agent: agent.persona.description,
+    "persona_tone": lambda agent: agent.persona.tone,
+    "persona_storytelling_focus": lambda agent: agent.persona.storytelling_focus,
+}
+
+_CALL_PROMPT_FIELDS: Dict[str, Callable[[LeadContext, CallSettings], Any]] = {
+    "channel": lambda lead, settings: settings.channel.value,
+    "preferred_language": lambda lead, settings: lead.preferred_language or "unknown",
+    "lead_id": lambda lead, settings: lead.lead_id,
+    "lead_name": lambda lead, settings: lead.name,
+    "lead_company": lambda lead, settings: lead.company,
+    "lead_role": lambda lead, settings: lead.role,
+    "lead_region": lambda lead, settings: lead.region,
+    "estimated_deal_size": lambda lead, settings: lead.estimated_deal_size,
+    "currency": lambda lead, settings: lead.currency,
+    "pain_points": lambda lead, settings: ", ".join(lead.pain_points) if lead.pain_points else "N/A",
+    "current_tools": lambda lead, settings: lead.current_tools,
+    "lead_notes": lambda lead, settings: lead.notes,
+    "target_next_step": lambda lead, settings: settings.target_next_step,
+}
+
+_SYSTEM_PROMPT_PARTS = [
+    (literal, field) for literal, field, _, _ in string.Formatter().parse(SYSTEM_PROMPT_TEMPLATE)
+]
+
+
+class SystemPromptTemplate:
+    """
+    The system prompt with one agent's persona already rendered in, so a turn
+    only formats the lead / call fields.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, agent: AgentConfig):
+        parts: List[Any] = []
+        literal = ""
+        for text, field in _SYSTEM_PROMPT_PARTS:
+            literal += text
+            if field is None:
+                continue
+            if field in _AGENT_PROMPT_FIELDS:
+                literal += str(_AGENT_PROMPT_FIELDS[field](agent))
+                continue
+            parts.append(literal)
+            parts.append(_CALL_PROMPT_FIELDS[field])
+            literal = ""
+        parts.append(literal)
+        self._parts = tuple(parts)
+
+    def render(self, lead: LeadContext, settings: CallSettings) -> str:
+        return "".join(part if isinstance(part, str) else str(part(lead, settings)) for part in self._parts)
+
+
+def compile_system_prompt(agent: AgentConfig) -> SystemPromptTemplate:
+    return SystemPromptTemplate(agent)
+
+
+def build_system_prompt(agent: AgentConfig, lead: LeadContext, settings: CallSettings) -> str:
+    """
+    System prompt encoding persona, objection handling, ROI storytelling,
+    multi-language support, and channel-specific behavior.
+    """
+    return compile_system_prompt(agent).render(lead, settings)
@@ -0,0 +1,327 @@
+"""
+Pool of pre-established, pre-configured OpenAI Realtime upstream sessions.
+
+Opening a realtime session costs a TLS handshake, a WebSocket upgrade and a
+``session.update`` round-trip before the first audio byte can flow. The pool
+keeps a few sessions per (model, voice, instructions) warm so the bridge can
+lease one that is already configured the moment a caller connects.
+
+Realtime sessions are stateful (the conversation lives upstream), so a
+session that carried a call is discarded at call end; only sessions that were
+leased but never used go back to the idle set.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import websockets
+from websockets.protocol import State
+
+REALTIME_URL = "wss://api.openai.com/v1/realtime"
+
+PoolKey = Tuple[str, str, str]  # (model, voice, sha256(instructions))
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def realtime_session_update(instructions: str, voice: str) -> Dict[str, object]:
+    """
+    The ``session.update`` event every upstream session is configured with.
+    """
+    return {
+        "type": "session.update",
+        "session": {
+            "instructions": instructions,
+            "voice": voice,
+            "input_audio_format": "pcm16",
+            "modalities": ["text", "audio"],
+        },
+    }
+
+
+@dataclass
+class PooledRealtimeConnection:
+    key: PoolKey
+    websocket: "websockets.ClientConnection"
+    created_at: float = field(default_factory=time.monotonic)
+    # Upstream events received while warming (session.created / session.updated);
+    # replayed to the client on lease so the bridge looks the same as a cold connect.
+    handshake_events: List[str] = field(default_factory=list)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.created_at
+
+    @property
+    def is_open(self) -> bool:
+        return self.websocket.state is State.OPEN
+
+
+@dataclass
+class _PoolEntry:
+    model: str
+    voice: str
+    instructions: str
+    idle: List[PooledRealtimeConnection] = field(default_factory=list)
+    warming: int = 0
+    last_leased_at: float = field(default_factory=time.monotonic)
+    consecutive_failures: int = 0
+    retry_at: float = 0.0
+
+
+class RealtimeConnectionPool:
+    """
+    Keeps ``min_idle`` ready sessions per key, recycles them after ``max_age_seconds``
+    and pings idle sessions every ``health_check_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_idle: int = 1,
+        max_idle: int = 4,
+        max_age_seconds: int = 600,
+        health_check_interval: int = 15,
+        key_ttl_seconds: int = 1800,
+        connect_timeout: float = 10.0,
+    ):
+        self.min_idle = max(0, min_idle)
+        self.max_idle = max(self.min_idle, max_idle)
+        self.max_age_seconds = max_age_seconds
+        self.health_check_interval = health_check_interval
+        self.key_ttl_seconds = key_ttl_seconds
+        self.connect_timeout = connect_timeout
+        self._entries: Dict[PoolKey, _PoolEntry] = {}
+        self._maintainer: Optional[asyncio.Task] = None
+        self._fills: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "RealtimeConnectionPool":
+        return cls(
+            min_idle=_env_int("OPENAI_REALTIME_POOL_MIN_IDLE", 1),
+            max_idle=_env_int("OPENAI_REALTIME_POOL_MAX_IDLE", 4),
+            max_age_seconds=_env_int("OPENAI_REALTIME_POOL_MAX_AGE_SECONDS", 600),
+            health_check_interval=_env_int("OPENAI_REALTIME_POOL_HEALTH_INTERVAL_SECONDS", 15),
+            key_ttl_seconds=_env_int("OPENAI_REALTIME_POOL_KEY_TTL_SECONDS", 1800),
+        )
+
+    @staticmethod
+    def key_for(model: str, voice: str, instructions: str) -> PoolKey:
+        digest = hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+        return (model, voice, digest)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def lease(self, model: str, voice: str, instructions: str) -> PooledRealtimeConnection:
+        """
+        Hand out a ready session, or open one on the spot if none is idle.
+        """
+        entry = self._entry(model, voice, instructions)
+        entry.last_leased_at = time.monotonic()
+        self._ensure_maintainer()
+
+        while entry.idle:
+            conn = entry.idle.pop()
+            if conn.is_open and conn.age_seconds < self.max_age_seconds:
+                self._wake()
+                return conn
+            await self._discard(conn)
+
+        self._wake()
+        # Cold path: do not wait for session.updated so audio can start flowing
+        # right after the update is sent, exactly like an unpooled connect.
+        return await self._open(self.key_for(model, voice, instructions), entry, wait_ready=False)
+
+    async def release(self, conn: PooledRealtimeConnection, reusable: bool = False) -> None:
+        """
+        Return a leased session. Only sessions that never carried a call are reusable.
+        """
+        entry = self._entries.get(conn.key)
+        if (
+            reusable
+            and not self._closed
+            and entry is not None
+            and conn.is_open
+            and conn.age_seconds < self.max_age_seconds
+            and len(entry.idle) < self.max_idle
+        ):
+            entry.idle.append(conn)
+            return
+        await self._discard(conn)
+
+    async def warm(self, model: str, voice: str, instructions: str) -> None:
+        """
+        Register a key ahead of the first call so its sessions start warming now.
+        """
+        self._entry(model, voice, instructions)
+        self._ensure_maintainer()
+        self._wake()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            f"{model}:{voice}:{digest[:8]}": {"idle": len(entry.idle), "warming": entry.warming}
+            for (model, voice, digest), entry in self._entries.items()
+        }
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._maintainer:
+            self._maintainer.cancel()
+            try:
+                await self._maintainer
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._maintainer = None
+        for task in list(self._fills):
+            task.cancel()
+        if self._fills:
+            await asyncio.gather(*self._fills, return_exceptions=True)
+        for entry in self._entries.values():
+            while entry.idle:
+                await self._discard(entry.idle.pop())
+        self._entries.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _entry(self, model: str, voice: str, instructions: str) -> _PoolEntry:
+        key = self.key_for(model, voice, instructions)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PoolEntry(model=model, voice=voice, instructions=instructions)
+            self._entries[key] = entry
+        return entry
+
+    def _ensure_maintainer(self) -> None:
+        self._closed = False
+        if self.min_idle == 0:
+            return
+        if self._maintainer is None or self._maintainer.done():
+            self._wakeup = asyncio.Event()
+            self._maintainer = asyncio.create_task(self._maintain())
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _open(self, key: PoolKey, entry: _PoolEntry, wait_ready: bool) -> PooledRealtimeConnection:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("Missing OPENAI_API_KEY")
+        headers = [
+            ("Authorization", f"Bearer {api_key}"),
+            ("OpenAI-Beta", "realtime=v1"),
+        ]
+        websocket = await asyncio.wait_for(
+            websockets.connect(f"{REALTIME_URL}?model={entry.model}", additional_headers=headers),
+            timeout=self.connect_timeout,
+        )
+        conn = PooledRealtimeConnection(key=key, websocket=websocket)
+        try:
+            await websocket.send(json.dumps(realtime_session_update(entry.instructions, entry.voice)))
+            if wait_ready:
+                await asyncio.wait_for(self._await_session_updated(conn), timeout=self.connect_timeout)
+        except BaseException:
+            await self._discard(conn)
+            raise
+        return conn
+
+    async def _await_session_updated(self, conn: PooledRealtimeConnection) -> None:
+        while True:
+            message = await conn.websocket.recv()
+            conn.handshake_events.append(message if isinstance(message, str) else message.decode("utf-8", "ignore"))
+            try:
+                event_type = json.loads(conn.handshake_events[-1]).get("type")
+            except json.JSONDecodeError:
+                continue
+            if event_type == "session.updated":
+                return
+            if event_type == "error":
+                raise RuntimeError(f"Realtime session rejected: {conn.handshake_events[-1]}")
+
+    async def _discard(self, conn: PooledRealtimeConnection) -> None:
+        try:
+            await conn.websocket.close()
+        except Exception:
+            pass
+
+    async def _healthy(self, conn: PooledRealtimeConnection) -> bool:
+        if not conn.is_open or conn.age_seconds >= self.max_age_seconds:
+            return False
+        try:
+            pong = await conn.websocket.ping()
+            await asyncio.wait_for(pong, timeout=5)
+        except Exception:
+            return False
+        return True
+
+    async def _fill(self, key: PoolKey, entry: _PoolEntry) -> None:
+        try:
+            conn = await self._open(key, entry, wait_ready=True)
+        except Exception as exc:
+            if self._closed:
+                return
+            entry.consecutive_failures += 1
+            backoff = min(60.0, 2.0 ** entry.consecutive_failures)
+            entry.retry_at = time.monotonic() + backoff
+            print(f"[REALTIME-POOL] Warm-up failed for {key[0]}/{key[1]} ({exc}); retrying in {backoff:.0f}s.")
+            return
+        finally:
+            entry.warming -= 1
+        entry.consecutive_failures = 0
+        if self._closed or self._entries.get(key) is not entry or len(entry.idle) >= self.max_idle:
+            await self._discard(conn)
+            return
+        entry.idle.append(conn)
+
+    async def _maintain(self) -> None:
+        while not self._closed:
+            now = time.monotonic()
+            for key, entry in list(self._entries.items()):
+                # Drop keys nobody has leased for a while instead of keeping them warm forever.
+                if now - entry.last_leased_at > self.key_ttl_seconds and not entry.warming:
+                    self._entries.pop(key, None)
+                    while entry.idle:
+                        await self._discard(entry.idle.pop())
+                    continue
+
+                # Iterate over a snapshot: leases may pop connections while we await pings.
+                for conn in list(entry.idle):
+                    if await self._healthy(conn):
+                        continue
+                    if conn in entry.idle:
+                        entry.idle.remove(conn)
+                    await self._discard(conn)
+
+                if now < entry.retry_at:
+                    continue
+                missing = self.min_idle - len(entry.idle) - entry.warming
+                for _ in range(max(0, missing)):
+                    entry.warming += 1
+                    task = asyncio.create_task(self._fill(key, entry))
+                    self._fills.add(task)
+                    task.add_done_callback(self._fills.discard)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.health_check_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+realtime_pool = RealtimeConnectionPool.from_env()
@@ -1,9 +1,14 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+from fastapi import Depends, HTTPException, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
 
-from app.db import get_session
+from app.db import AnyAsyncSession, get_async_session
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
 from app.core.security import decode_token, verify_token_type
 from app.models.user import User
 from app.models.workspace import Workspace, WorkspaceMembership
@@ -11,11 +16,93 @@ from app.models.workspace import Workspace, WorkspaceMembership
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> User:
-    """Get current authenticated user."""
+@dataclass(frozen=True)
+class WorkspaceAccess:
+    """A user's active membership in a workspace, as cached for authorization."""
+
+    workspace_id: int
+    user_id: int
+    role: str
+
+
+# (user_id, workspace_id) -> WorkspaceAccess, or None for "not an active member"
+membership_cache = TTLCache(ttl_seconds=settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+
+
+def _active_role_query(workspace_id: int, user_id: int):
+    return select(WorkspaceMembership.role).where(
+        WorkspaceMembership.workspace_id == workspace_id,
+        WorkspaceMembership.user_id == user_id,
+        WorkspaceMembership.status == "active",
+    )
+
+
+def _remember_access(workspace_id: int, user_id: int, role: Optional[str]) -> Optional[WorkspaceAccess]:
+    access = WorkspaceAccess(workspace_id, user_id, role) if role else None
+    membership_cache.set((user_id, workspace_id), access)
+    return access
+
+
+async def get_workspace_access(
+    session: AnyAsyncSession, workspace_id: int, user_id: int
+) -> Optional[WorkspaceAccess]:
+    """Active membership of user_id in workspace_id (None if not a member), cached."""
+    access = membership_cache.get((user_id, workspace_id), MISSING)
+    if access is not MISSING:
+        return access
+    role = (await session.exec(_active_role_query(workspace_id, user_id))).first()
+    return _remember_access(workspace_id, user_id, role)
+
+
+def get_workspace_access_sync(session: Session, workspace_id: int, user_id: int) -> Optional[WorkspaceAccess]:
+    """get_workspace_access for handlers still on the sync session."""
+    access = membership_cache.get((user_id, workspace_id), MISSING)
+    if access is not MISSING:
+        return access
+    role = session.exec(_active_role_query(workspace_id, user_id)).first()
+    return _remember_access(workspace_id, user_id, role)
+
+
+def invalidate_workspace_access(workspace_id: int, user_id: Optional[int] = None) -> None:
+    """Forget cached access after membership changes (one member, or the whole workspace)."""
+    if user_id is not None:
+        membership_cache.pop((user_id, workspace_id))
+    else:
+        membership_cache.discard_where(lambda key, _: key[1] == workspace_id)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """A verified access token's user, cached until the token expires."""
+
+    user_id: int
+    expires_at: float  # the token's "exp", epoch seconds
+    user_fields: Mapping[str, Any]
+
+    def user(self) -> User:
+        # A fresh detached User per request; load the row to modify it.
+        return User.model_construct(**self.user_fields)
+
+
+# access-token signature -> Principal
+principal_cache = TTLCache(ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _token_signature(token: str) -> str:
+    return token.rsplit(".", 1)[-1]
+
+
+async def authenticate_token(token: str, session: AnyAsyncSession) -> User:
+    """
+    User for an access token, for REST and WebSocket auth alike.
+
+    Raises HTTPException(401) when the token is invalid, expired or of the wrong type.
+    """
+    signature = _token_signature(token)
+    principal = principal_cache.get(signature)
+    if principal is not None and principal.expires_at > time.time():
+        return principal.user()
+
     payload = decode_token(token)
     verify_token_type(payload, "access")
     
@@ -26,16 +113,62 @@ async def get_current_user(
             detail="Invalid token payload",
         )
     
-    user = session.get(User, int(user_id))
+    user = await session.get(User, int(user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    
+
+    expires_at = float(payload.get("exp", 0))
+    principal = Principal(
+        user_id=user.id,
+        expires_at=expires_at,
+        user_fields=MappingProxyType(user.model_dump(exclude={"hashed_password"})),
+    )
+    principal_cache.set(signature, principal, ttl_seconds=min(principal_cache.ttl_seconds, expires_at - time.time()))
+    return principal.user()
+
+
+async def authorize_socket(
+    websocket: WebSocket,
+    token: str,
+    session: AnyAsyncSession,
+    workspace_id: Optional[int],
+) -> Optional[User]:
+    """Check the socket's access token and workspace access; closes the socket and returns None if denied."""
+    try:
+        user = await authenticate_token(token, session)
+    except HTTPException:
+        await websocket.close(code=4401)
+        return None
+    if workspace_id is None:
+        await websocket.close(code=4404)
+        return None
+    if not user.is_active or not await get_workspace_access(session, workspace_id, user.id):
+        await websocket.close(code=4403)
+        return None
+    # Don't hold a pooled connection for the lifetime of the socket
+    await session.close()
     return user
 
 
+def invalidate_principals(user_id: Optional[int] = None, token: Optional[str] = None) -> None:
+    """Forget cached principals for one token, or every token of a user."""
+    if token is not None:
+        principal_cache.pop(_token_signature(token))
+    if user_id is not None:
+        principal_cache.discard_where(lambda _, principal: principal.user_id == user_id)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AnyAsyncSession = Depends(get_async_session),
+) -> User:
+    """Get current authenticated user."""
+    return await authenticate_token(token, session)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -51,17 +184,11 @@ async def get_current_active_user(
 async def get_current_workspace(
     workspace_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ) -> Workspace:
     """Get current workspace and verify user access."""
     # Check if user has access to this workspace
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -69,7 +196,7 @@ async def get_current_workspace(
             detail="You don't have access to this workspace",
         )
     
-    workspace = session.get(Workspace, workspace_id)
+    workspace = await session.get(Workspace, workspace_id)
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -83,16 +210,10 @@ async def require_workspace_role(
     required_role: str,
     workspace_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
-) -> WorkspaceMembership:
+    session: AnyAsyncSession = Depends(get_async_session),
+) -> WorkspaceAccess:
     """Verify user has required role in workspace."""
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination for list endpoints ordered newest first.
+
+A cursor is an opaque token holding the (sort timestamp, id) of the last row of a
+page. The next page seeks past it with ``(ts, id) < (cursor_ts, cursor_id)``,
+which an index on (workspace_id, ts) serves directly, so every page costs the
+same however deep it is, and rows inserted meanwhile do not shift pages.
+
+List endpoints keep ``skip``/``limit`` for existing clients; when a further page
+exists, the cursor for it is returned in the ``X-Next-Cursor`` response header in
+either mode.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def paginate(query, sort_column, id_column, cursor: Optional[str], skip: int, limit: int):
+    """
+    Order ``query`` newest first and select one page (plus one row to detect a next page).
+    ``cursor`` takes precedence over ``skip``.
+    """
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def finish_page(rows: Sequence[Any], limit: int, sort_field: str, response: Response) -> List[Any]:
+    """Trim the look-ahead row and set the next-page cursor header."""
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_field), last.id)
+    return page
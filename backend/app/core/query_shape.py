@@ -0,0 +1,58 @@
+"""
+Query-shape helpers: keep the number of queries per request independent of the
+number of rows.
+
+- Join related rows into the list query instead of ``session.get`` per row
+  (``select(Membership, User).join(...)``).
+- ``assert_max_queries`` fails when a block issues more queries than budgeted;
+  ``scripts/check_query_budgets.py`` runs it over the list endpoints.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """Statements executed on the watched engines while counting."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(*engines: Engine) -> Iterator[QueryCounter]:
+    counter = QueryCounter()
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", counter._record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, *engines: Engine) -> Iterator[QueryCounter]:
+    """
+    Fail with AssertionError (listing the statements) when the block runs more
+    than ``limit`` queries. Defaults to the app's sync and async engines.
+    """
+    if not engines:
+        from app import db
+
+        engines = (db.engine,) + ((db.async_engine.sync_engine,) if db.async_engine is not None else ())
+    with count_queries(*engines) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {' '.join(statement.split())[:200]}" for statement in counter.statements)
+        raise AssertionError(f"expected at most {limit} queries, got {counter.count}:\n{listing}")
@@ -0,0 +1,202 @@
+"""
+DDSketch: mergeable quantile sketch with relative-error guarantees.
+
+A value ``x > 0`` is counted in bucket ``ceil(log_gamma(x))`` with
+``gamma = (1 + a) / (1 - a)``, so any quantile read back is within relative
+accuracy ``a`` (1% by default) of a value actually added. Values at or below
+``MIN_VALUE`` (including zero and negatives) share one zero bucket.
+
+Buckets are plain counts, so sketches merge by adding counts and a value can be
+taken out again by adding it with weight -1 (the rollup hooks rely on this to
+apply updates and deletes). ``to_bytes`` packs the non-empty buckets as int16
+indexes plus counts in the narrowest signed width (about 3 bytes per bucket),
+which ``merge_serialized`` reads with NumPy to merge many sketches at once.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np  # imported lazily: only (de)serializing sketches needs it, not importing this module
+
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 1e-3
+_FORMAT_VERSION = 1
+
+
+# Serialized layout: header, then int16 bucket indexes, then counts in the narrowest signed width
+_HEADER = struct.Struct("<BqHB")  # version, zero count, buckets, count width in bytes
+_COUNT_TYPES = {1: "<i1", 2: "<i2", 4: "<i4", 8: "<i8"}
+_INDEX_TYPE = "<i2"
+_MAX_INDEX = 2**15 - 1
+
+
+def _count_width(counts: np.ndarray) -> int:
+    if not len(counts):
+        return 1
+    low, high = int(counts.min()), int(counts.max())
+    for width in _COUNT_TYPES:
+        limit = 1 << (8 * width - 1)
+        if -limit <= low and high < limit:
+            return width
+    raise OverflowError("sketch count out of range")
+
+
+def decode(data: bytes) -> Tuple[int, np.ndarray, np.ndarray]:
+    """(zero count, bucket indexes, counts) of a serialized sketch, without building a DDSketch."""
+    import numpy as np
+    version, zero_count, buckets, width = _HEADER.unpack_from(data)
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"unknown sketch format {version}")
+    indexes = np.frombuffer(data, _INDEX_TYPE, buckets, _HEADER.size)
+    counts = np.frombuffer(data, _COUNT_TYPES[width], buckets, _HEADER.size + 2 * buckets)
+    return zero_count, indexes, counts
+
+
+class DDSketch:
+    """Bucket counts for values added so far (counts may go negative only transiently)."""
+
+    __slots__ = ("bins", "zero_count")
+
+    gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _log_gamma = math.log(gamma)
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None, zero_count: int = 0):
+        self.bins: Dict[int, int] = bins or {}
+        self.zero_count = zero_count
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "DDSketch":
+        sketch = cls()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    @classmethod
+    def index(cls, value: float) -> int:
+        return min(math.ceil(math.log(value) / cls._log_gamma), _MAX_INDEX)
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """Representative value of a bucket (within the relative accuracy of all its values)."""
+        return 2 * cls.gamma**index / (cls.gamma + 1)
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value: float, weight: int = 1) -> None:
+        if value <= MIN_VALUE:
+            self.zero_count += weight
+            return
+        index = self.index(value)
+        count = self.bins.get(index, 0) + weight
+        if count:
+            self.bins[index] = count
+        else:
+            self.bins.pop(index, None)
+
+    def merge(self, other: "DDSketch", sign: int = 1) -> None:
+        """Add (or with ``sign=-1`` subtract) another sketch's counts."""
+        self.zero_count += sign * other.zero_count
+        for index, count in other.bins.items():
+            merged = self.bins.get(index, 0) + sign * count
+            if merged:
+                self.bins[index] = merged
+            else:
+                self.bins.pop(index, None)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile ``q`` (0..1); None for an empty sketch."""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return self.bucket_value(index)
+        return self.bucket_value(max(self.bins)) if self.bins else 0.0
+
+    def quantiles(self, qs: Sequence[float]) -> Dict[float, Optional[float]]:
+        return {q: self.quantile(q) for q in qs}
+
+    def is_empty(self) -> bool:
+        return not self.bins and not self.zero_count
+
+    def to_bytes(self) -> bytes:
+        import numpy as np
+        indexes = np.array(sorted(self.bins), dtype=_INDEX_TYPE)
+        counts = np.array([self.bins[index] for index in indexes.tolist()], dtype=np.int64)
+        width = _count_width(counts)
+        header = _HEADER.pack(_FORMAT_VERSION, self.zero_count, len(indexes), width)
+        return header + indexes.tobytes() + counts.astype(_COUNT_TYPES[width]).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "DDSketch":
+        if not data:
+            return cls()
+        zero_count, indexes, counts = decode(data)
+        return cls(dict(zip(indexes.tolist(), counts.tolist())), zero_count)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DDSketch) and self.bins == other.bins and self.zero_count == other.zero_count
+
+    def __repr__(self) -> str:
+        return f"DDSketch(count={self.count}, buckets={len(self.bins)})"
+
+
+def merged(sketches: Iterable[DDSketch]) -> DDSketch:
+    result = DDSketch()
+    for sketch in sketches:
+        result.merge(sketch)
+    return result
+
+
+def merge_serialized(rows: Iterable[Tuple[Hashable, Optional[bytes]]]) -> Dict[Hashable, DDSketch]:
+    """
+    Merge serialized sketches by key: ``(key, data)`` pairs in, one sketch per key out.
+    All buckets of all keys are added up in a single bincount.
+    """
+    import numpy as np
+    groups: Dict[Hashable, int] = {}
+    zero_counts: List[int] = []
+    group_ids, lengths, all_indexes, all_counts = [], [], [], []
+    for key, data in rows:
+        group = groups.setdefault(key, len(groups))
+        if group == len(zero_counts):
+            zero_counts.append(0)
+        if not data:
+            continue
+        zeros, indexes, counts = decode(data)
+        zero_counts[group] += zeros
+        group_ids.append(group)
+        lengths.append(len(indexes))
+        all_indexes.append(indexes)
+        all_counts.append(counts.astype(np.int64))
+    bins: List[Dict[int, int]] = [{} for _ in groups]
+    if sum(lengths):
+        indexes = np.concatenate(all_indexes).astype(np.int64)
+        low = int(indexes.min())
+        width = int(indexes.max()) - low + 1
+        cells = np.repeat(np.array(group_ids), lengths) * width + (indexes - low)
+        totals = np.bincount(cells, weights=np.concatenate(all_counts), minlength=len(groups) * width)
+        for cell in np.flatnonzero(totals).tolist():
+            group, offset = divmod(cell, width)
+            bins[group][offset + low] = int(totals[cell])
+    return {key: DDSketch(bins[group], zero_counts[group]) for key, group in groups.items()}
+
+
+def percentile_summary(sketch: DDSketch, qs: Sequence[float] = (0.5, 0.9, 0.99), digits: int = 2) -> Dict[str, Optional[float]]:
+    """{"count": n, "p50": ..., "p90": ..., "p99": ...} (percentiles None when empty)."""
+    summary: Dict[str, Optional[float]] = {"count": sketch.count}
+    for q in qs:
+        value = sketch.quantile(q)
+        summary[f"p{q * 100:g}"] = None if value is None else round(value, digits)
+    return summary
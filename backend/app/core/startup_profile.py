@@ -0,0 +1,121 @@
+"""
+Worker boot profiling.
+
+``python -m app.core.startup_profile`` imports ``app.main`` in a fresh interpreter
+with ``-X importtime`` and reports the slowest modules, by self and cumulative time.
+With ``STARTUP_PROFILE=true`` a real boot also logs how long importing the app and
+each startup step took (see ``BootTimer``).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportTiming]:
+    """
+    Parse ``-X importtime`` output ("import time: self | cumulative | name").
+    """
+    timings: List[ImportTiming] = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            self_value, cumulative_value = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # header row
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        timings.append(ImportTiming(name.strip(), self_value, cumulative_value, depth))
+    return timings
+
+
+def profile_imports(module: str = "app.main") -> Tuple[List[ImportTiming], float]:
+    """
+    Import ``module`` in a child interpreter; returns per-module timings and wall seconds.
+    """
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(BACKEND_ROOT),
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    wall_seconds = float(result.stdout.strip().splitlines()[-1])
+    return parse_importtime(result.stderr.splitlines()), wall_seconds
+
+
+def package_totals(timings: List[ImportTiming]) -> Dict[str, int]:
+    """Self time summed per top-level package (microseconds)."""
+    totals: Dict[str, int] = {}
+    for timing in timings:
+        package = timing.module.split(".", 1)[0]
+        totals[package] = totals.get(package, 0) + timing.self_us
+    return totals
+
+
+def format_report(timings: List[ImportTiming], wall_seconds: float, top: int = 25, prefix: Optional[str] = None) -> str:
+    rows = [t for t in timings if prefix is None or t.module.startswith(prefix)]
+    lines = [f"Imported in {wall_seconds * 1000:.0f} ms ({len(timings)} modules)", ""]
+
+    lines.append(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for timing in sorted(rows, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(f"{timing.cumulative_us / 1000:>14.1f}{timing.self_us / 1000:>10.1f}  {timing.module}")
+
+    lines += ["", f"{'self ms':>14}  package"]
+    for package, total in sorted(package_totals(rows).items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"{total / 1000:>14.1f}  {package}")
+    return "\n".join(lines)
+
+
+class BootTimer:
+    """
+    Wall-clock marks for the boot sequence, logged in one line when profiling is on.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.steps: List[Tuple[str, float]] = []
+
+    def mark(self, step: str) -> None:
+        now = time.perf_counter()
+        self.steps.append((step, now - self._last))
+        self._last = now
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in self.steps)
+        return f"{parts}; ready after {(self._last - self.started) * 1000:.0f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report per-module import time of the API worker.")
+    parser.add_argument("--module", default="app.main", help="module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="rows per table")
+    parser.add_argument("--prefix", default=None, help="only modules starting with this, e.g. 'app.'")
+    args = parser.parse_args()
+
+    timings, wall_seconds = profile_imports(args.module)
+    print(format_report(timings, wall_seconds, top=args.top, prefix=args.prefix))
+
+
+if __name__ == "__main__":
+    main()
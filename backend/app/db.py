@@ -1,24 +1,16 @@
-from typing import Generator
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Sequence, Union
+import asyncio
+import importlib.util
 import logging
 from sqlmodel import Session, SQLModel, create_engine
-from sqlalchemy import inspect
-from sqlalchemy.engine import Engine
-from sqlalchemy.exc import OperationalError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
-from app.seed import seed_database
 
 logger = logging.getLogger(__name__)
-REQUIRED_TABLES = {
-    "users",
-    "workspaces",
-    "workspace_memberships",
-    "subscriptions",
-    "invoices",
-    "usage_stats",
-    "payment_methods",
-    "user_settings",
-}
 
 
 def _create_engine(db_url: str) -> "Engine":
@@ -56,6 +48,42 @@ def _create_engine(db_url: str) -> "Engine":
 engine = _create_engine(settings.DATABASE_URL)
 
 
+def _create_async_engine(db_url: str) -> Optional[AsyncEngine]:
+    """
+    Async engine on the same database (psycopg async / aiosqlite).
+
+    Returns None for SQLite when aiosqlite is not installed; get_async_session then
+    falls back to ThreadedSession.
+    """
+    if db_url.startswith("sqlite"):
+        if importlib.util.find_spec("aiosqlite") is None:
+            return None
+        return create_async_engine(
+            db_url.replace("sqlite://", "sqlite+aiosqlite://", 1),
+            echo=settings.SQLALCHEMY_ECHO,
+        )
+
+    if db_url.startswith("postgresql://"):
+        db_url = db_url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return create_async_engine(
+        db_url,
+        echo=settings.SQLALCHEMY_ECHO,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT},
+    )
+
+
+async_engine = _create_async_engine(settings.DATABASE_URL)
+# expire_on_commit=False: attribute access after commit must not trigger implicit IO.
+async_session_factory = (
+    async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
 def init_db() -> None:
     """Initialize database with PostgreSQL."""
     global engine
@@ -63,113 +91,121 @@ def init_db() -> None:
 
 
 def _init_db_for_engine(target_engine: Engine) -> None:
-    """Create schema or validate connection for the provided engine."""
-    should_create_schema = settings.DB_CREATE_SCHEMA_ON_STARTUP or _schema_missing(target_engine)
-
-    if should_create_schema:
-        # Import all models to ensure they're registered, then create schema
-        from app.models.user import User  # noqa: F401
-        from app.models.workspace import Workspace, WorkspaceMembership  # noqa: F401
-        from app.models.agent import Agent  # noqa: F401
-        from app.models.call import CallLog  # noqa: F401
-        from app.models.meeting import Meeting  # noqa: F401
-        from app.models.knowledge import KnowledgeAsset  # noqa: F401
-        from app.models.integration import Integration  # noqa: F401
-        from app.models.workflow import Workflow  # noqa: F401
-        from app.models.notification import Notification  # noqa: F401
-        from app.models.billing import Invoice, UsageStat, Subscription, PaymentMethod  # noqa: F401
-        from app.models.webhook import WebhookSubscription  # noqa: F401
-        from app.models.user_settings import UserSettings  # noqa: F401
+    """Check the schema version, migrating the database when it is behind."""
+    from app.migrations import check_schema, import_models
 
+    if settings.DB_CREATE_SCHEMA_ON_STARTUP:
+        # Pick up tables added to the models without a migration (local development)
+        import_models()
         SQLModel.metadata.create_all(target_engine)
-        with target_engine.connect() as conn:
-            _ensure_user_profile_columns(conn)
-            _ensure_billing_columns(conn)
-        with Session(target_engine) as session:
-            seed_database(session)
-    else:
-        # Fast path: just validate the connection
-        with target_engine.connect() as conn:
-            conn.exec_driver_sql("SELECT 1")
-            _ensure_user_profile_columns(conn)
-            _ensure_billing_columns(conn)
-        with Session(target_engine) as session:
-            seed_database(session)
+
+    check_schema(target_engine, migrate_if_behind=settings.DB_MIGRATE_ON_STARTUP)
+
+
+def add_to_counters(
+    conn: Connection,
+    model: Any,
+    rows: List[Dict[str, Any]],
+    measures: Sequence[str],
+    key: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Upsert counter rows: insert each row, or add its ``measures`` to the stored
+    row with the same primary key (INSERT ... ON CONFLICT DO UPDATE). ``key``
+    names the columns of a unique index to match on instead.
+    """
+    if not rows:
+        return
+    dialect_insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(model)
+    table = model.__table__
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key) if key else [column.name for column in table.primary_key.columns],
+        set_={measure: table.c[measure] + statement.excluded[measure] for measure in measures},
+    )
+    conn.execute(statement, rows)
 
 
 def get_session() -> Generator[Session, None, None]:
-    """Dependency for getting database session."""
+    """
+    Dependency for getting a sync database session.
+
+    Compatibility path for handlers not yet moved to get_async_session: queries run
+    on the event loop, so keep new and hot endpoints off it.
+    """
     with Session(engine) as session:
         yield session
 
 
-def _schema_missing(target_engine: Engine) -> bool:
-    """Return True if core tables are missing (e.g., brand-new database)."""
-    try:
-        inspector = inspect(target_engine)
-        tables = set(inspector.get_table_names())
-        return bool(REQUIRED_TABLES - tables)
-    except Exception as exc:  # pragma: no cover - best effort safeguard
-        logger.warning("Could not inspect database schema: %s", exc)
-        return False
-
-
-def _ensure_user_profile_columns(conn) -> None:
-    """Ensure recently added profile columns exist on the users table."""
-    columns = {
-        "company": "TEXT",
-        "job_title": "TEXT",
-        "location": "TEXT",
-        "bio": "TEXT",
-        "avatar_url": "TEXT",
-    }
-    mutated = False
-    for column, column_type in columns.items():
-        try:
-            if _column_exists(conn, "users", column):
-                continue
-            conn.exec_driver_sql(f"ALTER TABLE users ADD COLUMN {column} {column_type}")
-            mutated = True
-        except Exception as exc:  # pragma: no cover - best effort safeguard
-            logger.warning("Could not ensure column %s on users table: %s", column, exc)
-    if mutated:
-        try:
-            conn.commit()
-        except Exception:
-            logger.exception("Failed to commit schema changes for user profile columns")
-
-
-def _ensure_billing_columns(conn) -> None:
-    """Ensure newer billing fields exist when running without migrations."""
-    columns = {
-        "invoices": {
-            "currency": "TEXT DEFAULT 'usd'",
-            "description": "TEXT",
-            "billed_to_user_id": "INTEGER",
-        },
-    }
-    mutated = False
-    for table, cols in columns.items():
-        for column, column_type in cols.items():
-            try:
-                if _column_exists(conn, table, column):
-                    continue
-                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
-                mutated = True
-            except Exception as exc:  # pragma: no cover
-                logger.warning("Could not ensure column %s on %s: %s", column, table, exc)
-    if mutated:
+_PREBUFFER = {"prebuffer_rows": True}
+
+
+class ThreadedSession:
+    """
+    The AsyncSession subset the routers use, backed by a sync Session whose queries
+    run in worker threads. Used when the database has no async driver installed.
+    """
+
+    def __init__(self, bind: Engine):
+        self.sync_session = Session(bind, expire_on_commit=False)
+
+    async def _call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    async def exec(self, statement: Any, **kwargs: Any) -> Any:
+        # Buffer rows in the worker thread, as AsyncSession does, so reading the result never blocks.
+        return await self._call(self.sync_session.exec, statement, execution_options=_PREBUFFER, **kwargs)
+
+    async def execute(self, statement: Any, params: Any = None, **kwargs: Any) -> Any:
+        return await self._call(
+            self.sync_session.execute, statement, params, execution_options=_PREBUFFER, **kwargs
+        )
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await self._call(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await self._call(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance: Any, **kwargs: Any) -> None:
+        await self._call(self.sync_session.refresh, instance, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await self._call(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await self._call(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await self._call(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await self._call(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await self._call(self.sync_session.close)
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await self._call(fn, self.sync_session, *args, **kwargs)
+
+
+AnyAsyncSession = Union[AsyncSession, ThreadedSession]
+
+
+async def get_async_session() -> AsyncGenerator[AnyAsyncSession, None]:
+    """Dependency for getting an async database session."""
+    if async_session_factory is None:
+        session = ThreadedSession(engine)
         try:
-            conn.commit()
-        except Exception:
-            logger.exception("Failed to commit schema changes for billing tables")
-
-
-def _column_exists(conn, table: str, column: str) -> bool:
-    """Return True if a column exists on the given table."""
-    dialect = conn.engine.dialect.name
-    if dialect == "sqlite":
-        result = conn.exec_driver_sql(f"PRAGMA table_info({table})")
-        return any(row[1] == column for row in result)
-    inspector = inspect(conn)
-    return column in {col["name"] for col in inspector.get_columns(table)}
+            yield session
+        finally:
+            await session.close()
+        return
+    async with async_session_factory() as session:
+        yield session
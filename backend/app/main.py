@@ -1,3 +1,8 @@
+import time
+
+# Taken before anything else is imported so STARTUP_PROFILE covers the whole import.
+BOOT_STARTED = time.perf_counter()
+
 import logging
 import base64
 from contextlib import asynccontextmanager
@@ -10,7 +15,12 @@ from fastapi.staticfiles import StaticFiles
 from starlette.responses import Response
 
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.startup_profile import BootTimer
 from app.db import init_db
+from app.services.realtime_call_log import realtime_call_log_writer
+from app.services.campaign_dialer import campaign_dialer
+from app.services.usage_meter import usage_meter
 from app.routers import (
     auth,
     workspaces,
@@ -29,7 +39,9 @@ from app.routers import (
     account_settings,
     dashboard,
     vonage,
+    campaigns,
 )
+from apex_sales_pro.crm_sync import hubspot_sync
 
 # Configure root logging early so app logs show in the terminal.
 LOG_LEVEL = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
@@ -38,6 +50,7 @@ logging.basicConfig(
     format="%(levelname)s %(asctime)s %(name)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
+boot_timer = BootTimer(started=BOOT_STARTED)
 
 # 1x1 transparent PNG so missing avatars render gracefully instead of 404.
 DEFAULT_AVATAR_BYTES = base64.b64decode(
@@ -48,11 +61,31 @@ DEFAULT_AVATAR_BYTES = base64.b64decode(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize database and resources on startup."""
+    boot_timer.mark("import")
     logger.info("Initializing database...")
     init_db()
     logger.info("Database ready.")
+    boot_timer.mark("init_db")
+    hubspot_sync.start()
+    usage_meter.start()
+    if settings.CAMPAIGN_DIALER_ENABLED:
+        campaign_dialer.start()
+    boot_timer.mark("background workers")
+    if settings.STARTUP_PROFILE:
+        logger.info("Startup profile: %s", boot_timer.summary())
+    if settings.APEX_RUNTIME_PRELOAD:
+        # Load the agent runtime off the event loop and pre-open realtime sessions for every
+        # blueprint, so the first agent call doesn't pay for either
+        agent_runtimes.warm_realtime_sessions()
     yield
-    # Cleanup on shutdown if needed
+    await campaign_dialer.close()
+    # Close pre-warmed realtime upstream sessions so workers exit cleanly
+    await agent_runtimes.close_realtime_sessions()
+    await hubspot_sync.close()
+    # Write out realtime calls that are still buffered
+    await realtime_call_log_writer.close()
+    # Add unflushed usage to usage_stats (the journal covers a crash before this)
+    await usage_meter.close()
 
 
 app = FastAPI(
@@ -69,6 +102,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -87,6 +121,7 @@ app.include_router(billing.router, prefix="/api/billing", tags=["Billing"])
 app.include_router(account_settings.router, prefix="/api/account", tags=["Account Settings"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(vonage.router, prefix="/api/vonage", tags=["Vonage"])
+app.include_router(campaigns.router, prefix="/api/campaigns", tags=["Campaigns"])
 app.include_router(websocket.router, prefix="/ws", tags=["WebSocket"])
 # Specialized agent runtime endpoints (multi-agent runtime inspired by Apex Sales Pro)
 app.include_router(agent_runtimes.router, prefix="", tags=["Agent Runtime"])
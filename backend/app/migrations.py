@@ -0,0 +1,264 @@
+"""
+Versioned schema migrations.
+
+Applied migrations are stamped in the ``schema_version`` table, so a worker boot
+only has to read one number (``check_schema``). Pending migrations run once, in
+order, in a single transaction, either at boot (``DB_MIGRATE_ON_STARTUP``) or as a
+deploy step:
+
+    cd backend && python -m app.migrations            # apply pending migrations
+    cd backend && python -m app.migrations --status   # show current / latest version
+
+Add new schema changes as a new ``Migration`` at the end of ``MIGRATIONS``; never
+edit or reorder ones that have shipped.
+"""
+
+import argparse
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel
+
+logger = logging.getLogger(__name__)
+
+# Kept out of SQLModel.metadata so create_all() never touches it.
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Arbitrary key for pg_advisory_xact_lock: workers booting together migrate one at a time.
+_MIGRATION_LOCK_ID = 7_240_311
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def import_models() -> None:
+    """Register every table on SQLModel.metadata."""
+    import app.models  # noqa: F401
+    import app.models.user_settings  # noqa: F401
+
+
+def _existing_columns(conn: Connection, table: str) -> set:
+    """All column names of a table in one round trip."""
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _add_missing_columns(conn: Connection, table: str, columns: Dict[str, str]) -> None:
+    existing = _existing_columns(conn, table)
+    for column, column_type in columns.items():
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def _create_tables(conn: Connection) -> None:
+    # checkfirst: databases created before versioning keep their tables.
+    import_models()
+    SQLModel.metadata.create_all(conn)
+
+
+def _user_profile_columns(conn: Connection) -> None:
+    _add_missing_columns(
+        conn,
+        "users",
+        {
+            "company": "TEXT",
+            "job_title": "TEXT",
+            "location": "TEXT",
+            "bio": "TEXT",
+            "avatar_url": "TEXT",
+        },
+    )
+
+
+def _billing_columns(conn: Connection) -> None:
+    _add_missing_columns(
+        conn,
+        "invoices",
+        {
+            "currency": "TEXT DEFAULT 'usd'",
+            "description": "TEXT",
+            "billed_to_user_id": "INTEGER",
+        },
+    )
+
+
+def _call_log_indexes(conn: Connection) -> None:
+    from app.models.call import CallLog
+
+    for index in CallLog.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    # Superseded by the composite indexes above (same leading column)
+    for name in ("ix_call_logs_workspace_id", "ix_call_logs_agent_id"):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def _list_pagination_indexes(conn: Connection) -> None:
+    from app.models.knowledge import KnowledgeAsset
+    from app.models.meeting import Meeting
+    from app.models.notification import Notification
+
+    for model in (Notification, KnowledgeAsset, Meeting):
+        for index in model.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    # Superseded by the (workspace_id, timestamp, id) indexes above
+    for name in ("ix_notifications_workspace_id", "ix_knowledge_assets_workspace_id", "ix_meetings_workspace_id"):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def _call_metrics_rollup(conn: Connection) -> None:
+    from app.models.call import CallMetricsDaily
+    from app.services.call_metrics import rebuild_daily_metrics
+
+    CallMetricsDaily.__table__.create(conn, checkfirst=True)
+    rebuild_daily_metrics(conn)
+
+
+def _notification_counters(conn: Connection) -> None:
+    from app.models.notification import Notification, NotificationCounter
+    from app.services.notifications import rebuild_unread_counters
+
+    NotificationCounter.__table__.create(conn, checkfirst=True)
+    for index in Notification.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    rebuild_unread_counters(conn)
+
+
+def _call_metric_sketches(conn: Connection) -> None:
+    from app.models.call import CallMetricSketch
+    from app.services.call_distributions import rebuild_sketches
+
+    CallMetricSketch.__table__.create(conn, checkfirst=True)
+    rebuild_sketches(conn)
+
+
+def _usage_counters(conn: Connection) -> None:
+    from app.models.billing import UsageJournalSegment, UsageStat
+    from app.services.usage_meter import rebuild_call_usage
+
+    _add_missing_columns(conn, "usage_stats", {"period_start": "DATE"})
+    for index in UsageStat.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    UsageJournalSegment.__table__.create(conn, checkfirst=True)
+    rebuild_call_usage(conn)
+
+
+def _seed_demo_data(conn: Connection) -> None:
+    from app.seed import seed_database
+
+    with Session(bind=conn) as session:
+        seed_database(session)
+        session.flush()
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "user profile columns", _user_profile_columns),
+    Migration(3, "invoice currency / description / billed_to_user_id", _billing_columns),
+    Migration(4, "seed demo workspace", _seed_demo_data),
+    Migration(5, "call_logs composite indexes", _call_log_indexes),
+    Migration(6, "call_metrics_daily rollup", _call_metrics_rollup),
+    Migration(7, "notifications / knowledge_assets / meetings list indexes", _list_pagination_indexes),
+    Migration(8, "notification_counters", _notification_counters),
+    Migration(9, "call_metric_sketches", _call_metric_sketches),
+    Migration(10, "usage_stats counters / usage_journal_segments", _usage_counters),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(target_engine: Engine) -> Optional[int]:
+    """
+    The stamped schema version; None when the database has never been migrated.
+    """
+    try:
+        with target_engine.connect() as conn:
+            return conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+    except DBAPIError as exc:
+        if exc.connection_invalidated:
+            raise
+        return None  # no schema_version table yet
+
+
+def migrate(target_engine: Engine) -> List[Migration]:
+    """
+    Apply pending migrations in one transaction; returns the ones applied.
+    """
+    with target_engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_MIGRATION_LOCK_ID})")
+        schema_version_table.create(conn, checkfirst=True)
+        applied = conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+        pending = [migration for migration in MIGRATIONS if migration.version > applied]
+        for migration in pending:
+            logger.info("Applying migration %s: %s", migration.version, migration.name)
+            migration.apply(conn)
+            conn.execute(
+                schema_version_table.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.utcnow(),
+                )
+            )
+    return pending
+
+
+def check_schema(target_engine: Engine, migrate_if_behind: bool = True) -> int:
+    """
+    Boot-time check: one query when the schema is current. Returns the version.
+    """
+    version = current_version(target_engine)
+    if version == LATEST_VERSION:
+        return version
+    if version is not None and version > LATEST_VERSION:
+        logger.warning(
+            "Database schema version %s is newer than this build (%s); a newer release migrated it.",
+            version,
+            LATEST_VERSION,
+        )
+        return version
+    if not migrate_if_behind:
+        raise RuntimeError(
+            f"Database schema is at version {version or 0}, this build needs {LATEST_VERSION}. "
+            "Run `python -m app.migrations` first."
+        )
+    applied = migrate(target_engine)
+    logger.info("Database migrated to version %s (%s migrations applied).", LATEST_VERSION, len(applied))
+    return LATEST_VERSION
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply pending database migrations.")
+    parser.add_argument("--status", action="store_true", help="only print the current and latest version")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s - %(message)s")
+    from app.db import engine
+
+    version = current_version(engine)
+    if args.status:
+        print(f"current: {version if version is not None else 'unversioned'}, latest: {LATEST_VERSION}")
+        return
+    applied = migrate(engine)
+    if applied:
+        for migration in applied:
+            print(f"applied {migration.version}: {migration.name}")
+    else:
+        print(f"Schema already at version {LATEST_VERSION}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 """Aggregate exports for SQLModel models."""
 
 from .agent import Agent  # noqa: F401
-from .billing import Invoice, UsageStat, Subscription, PaymentMethod  # noqa: F401
-from .call import CallLog, CallLogCreate, CallLogUpdate, CallLogRead  # noqa: F401
+from .billing import Invoice, UsageStat, UsageJournalSegment, Subscription, PaymentMethod  # noqa: F401
+from .call import CallLog, CallLogCreate, CallLogUpdate, CallLogRead, CallMetricsDaily, CallMetricSketch  # noqa: F401
+from .campaign import Campaign, CampaignLead  # noqa: F401
 from .integration import Integration  # noqa: F401
 from .knowledge import KnowledgeAsset  # noqa: F401
 from .meeting import Meeting  # noqa: F401
-from .notification import Notification  # noqa: F401
+from .notification import Notification, NotificationCounter  # noqa: F401
 from .user import User  # noqa: F401
 from .webhook import WebhookSubscription  # noqa: F401
 from .workflow import Workflow  # noqa: F401
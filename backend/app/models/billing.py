@@ -1,5 +1,6 @@
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -53,27 +54,56 @@ class InvoiceRead(SQLModel):
 
 
 class UsageStat(SQLModel, table=True):
-    """Usage statistics for billing and analytics."""
+    """
+    Usage statistics for billing and analytics.
+
+    Rows with a ``period_start`` are running counters (one per workspace, metric
+    and period) maintained by app.services.usage_meter; rows without one are
+    standalone values.
+    """
     __tablename__ = "usage_stats"
+    __table_args__ = (
+        Index("ux_usage_stats_counter", "workspace_id", "metric", "period", "period_start", unique=True),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     workspace_id: int = Field(index=True)
     metric: str
     value: float
     period: str = "monthly"
+    period_start: Optional[date] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class UsageJournalSegment(SQLModel, table=True):
+    """Usage journal segments already added to usage_stats (so a replay skips them)."""
+    __tablename__ = "usage_journal_segments"
+
+    name: str = Field(primary_key=True)
+    flushed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class UsageStatRead(SQLModel):
-    """Schema for reading usage stats."""
-    id: int
+    """Schema for reading usage stats (no id for a counter not written yet)."""
+    id: Optional[int] = None
     workspace_id: int
     metric: str
     value: float
     period: str
+    period_start: Optional[date] = None
     created_at: datetime
 
 
+class UsageRecorded(SQLModel):
+    """Schema for a metered usage event and the metric's running total."""
+    workspace_id: int
+    metric: str
+    period: str
+    period_start: date
+    recorded: float
+    value: float
+
+
 class InvoiceCreate(SQLModel):
     """Schema for creating an invoice."""
     period_start: datetime
@@ -1,5 +1,6 @@
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import Index, LargeBinary
 from sqlmodel import Field, SQLModel, Relationship, Column, JSON
 
 
@@ -14,10 +15,19 @@ class CallLogBase(SQLModel):
 class CallLog(CallLogBase, table=True):
     """Call log database model."""
     __tablename__ = "call_logs"
+    __table_args__ = (
+        # Call lists, analytics windows and dashboards: a workspace's calls by time,
+        # optionally narrowed by status or direction. These also serve plain
+        # workspace_id / agent_id lookups, so those columns carry no index of their own.
+        Index("ix_call_logs_workspace_started", "workspace_id", "started_at"),
+        Index("ix_call_logs_workspace_status_started", "workspace_id", "status", "started_at"),
+        Index("ix_call_logs_workspace_direction_started", "workspace_id", "direction", "started_at"),
+        Index("ix_call_logs_agent_started", "agent_id", "started_at"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    workspace_id: int = Field(foreign_key="workspaces.id", index=True)
-    agent_id: Optional[int] = Field(default=None, foreign_key="agents.id", index=True)
+    workspace_id: int = Field(foreign_key="workspaces.id")
+    agent_id: Optional[int] = Field(default=None, foreign_key="agents.id")
     
     duration_seconds: int = 0
     sentiment: str = "neutral"  # positive, neutral, negative
@@ -40,6 +50,46 @@ class CallLog(CallLogBase, table=True):
     agent: Optional["Agent"] = Relationship(back_populates="calls")
 
 
+class CallMetricsDaily(SQLModel, table=True):
+    """
+    Per-day call totals, maintained alongside call_logs (see app.services.call_metrics).
+
+    One row per workspace, day and (agent, direction, status, sentiment); calls
+    without an agent are counted under agent_id 0.
+    """
+    __tablename__ = "call_metrics_daily"
+
+    workspace_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    agent_id: int = Field(default=0, primary_key=True)
+    direction: str = Field(default="", primary_key=True)
+    status: str = Field(default="", primary_key=True)
+    sentiment: str = Field(default="", primary_key=True)
+
+    call_count: int = 0
+    duration_seconds: int = 0
+    cost_cents: int = 0
+    sentiment_score_sum: float = 0.0
+    sentiment_score_count: int = 0
+
+
+class CallMetricSketch(SQLModel, table=True):
+    """
+    Per-day distribution of a call metric (duration, handle time, turn latency)
+    as a serialized DDSketch, maintained alongside call_logs (see
+    app.services.call_distributions). Calls without an agent use agent_id 0.
+    """
+    __tablename__ = "call_metric_sketches"
+
+    workspace_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    agent_id: int = Field(default=0, primary_key=True)
+    metric: str = Field(primary_key=True)
+
+    value_count: int = 0
+    sketch: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
+
+
 class CallLogCreate(CallLogBase):
     """Schema for creating a call log."""
     workspace_id: int
@@ -81,6 +131,33 @@ class CallLogRead(CallLogBase):
     created_at: datetime
 
 
+class CallLogSummary(SQLModel):
+    """Call list row (``view=summary``): the fields a call list or card shows."""
+    id: int
+    workspace_id: int
+    agent_id: Optional[int]
+    caller_name: Optional[str]
+    caller_number: Optional[str]
+    direction: str
+    status: str
+    duration_seconds: int
+    sentiment: str
+    sentiment_score: Optional[float]
+    cost_cents: int
+    started_at: datetime
+    ended_at: Optional[datetime]
+
+
+class CallLogListItem(CallLogSummary):
+    """Call list row (``view=full``): every column except the transcript."""
+    recording_url: Optional[str]
+    summary: Optional[str]
+    outcome: Optional[str]
+    tags: List[str]
+    twilio_call_sid: Optional[str]
+    created_at: datetime
+
+
 class CallInitiate(SQLModel):
     """Schema for initiating an outbound call."""
     agent_id: int
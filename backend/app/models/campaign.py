@@ -0,0 +1,123 @@
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel, Column, JSON
+
+
+class CampaignBase(SQLModel):
+    """Base outbound campaign model."""
+    name: str
+    caller_id: Optional[str] = None
+    timezone: str = "UTC"
+    # Local dialing window in the campaign timezone ("HH:MM", end exclusive)
+    call_window_start: str = "09:00"
+    call_window_end: str = "18:00"
+    # Overrides for the agent's advanced settings (None = use the agent's value)
+    rate_limit_per_minute: Optional[int] = None
+    max_retries: Optional[int] = None
+    retry_delay_minutes: int = 30
+
+
+class Campaign(CampaignBase, table=True):
+    """Outbound campaign database model."""
+    __tablename__ = "campaigns"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    workspace_id: int = Field(foreign_key="workspaces.id", index=True)
+    agent_id: int = Field(foreign_key="agents.id", index=True)
+    status: str = Field(default="draft", index=True)  # draft, running, paused, completed, cancelled
+    created_by: Optional[int] = Field(default=None, foreign_key="users.id")
+
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CampaignLead(SQLModel, table=True):
+    """A lead queued for dialing within a campaign."""
+    __tablename__ = "campaign_leads"
+    __table_args__ = (
+        # The scheduler's claim query: next due pending leads of a campaign
+        Index("ix_campaign_leads_claim", "campaign_id", "status", "next_attempt_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    campaign_id: int = Field(foreign_key="campaigns.id", index=True)
+    workspace_id: int = Field(foreign_key="workspaces.id")
+    phone_number: str
+    name: Optional[str] = None
+    lead_ref: Optional[str] = None  # external / CRM lead id
+    priority: int = 0  # higher is dialed first (e.g. a batch lead score)
+    lead_data: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+
+    status: str = "pending"  # pending, dialing, completed, exhausted, cancelled
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    last_call_id: Optional[int] = Field(default=None, foreign_key="call_logs.id")
+    last_outcome: Optional[str] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CampaignCreate(CampaignBase):
+    """Schema for creating a campaign."""
+    workspace_id: int
+    agent_id: int
+
+
+class CampaignUpdate(SQLModel):
+    """Schema for updating a campaign."""
+    name: Optional[str] = None
+    caller_id: Optional[str] = None
+    timezone: Optional[str] = None
+    call_window_start: Optional[str] = None
+    call_window_end: Optional[str] = None
+    rate_limit_per_minute: Optional[int] = None
+    max_retries: Optional[int] = None
+    retry_delay_minutes: Optional[int] = None
+
+
+class CampaignRead(CampaignBase):
+    """Schema for reading a campaign."""
+    id: int
+    workspace_id: int
+    agent_id: int
+    status: str
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    lead_counts: Dict[str, int] = {}
+
+
+class CampaignLeadCreate(SQLModel):
+    """Schema for queueing a lead."""
+    phone_number: str
+    name: Optional[str] = None
+    lead_ref: Optional[str] = None
+    priority: int = 0
+    lead_data: Dict[str, Any] = {}
+
+
+class CampaignLeadRead(SQLModel):
+    """Schema for reading a queued lead."""
+    id: int
+    campaign_id: int
+    phone_number: str
+    name: Optional[str]
+    lead_ref: Optional[str]
+    priority: int
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_call_id: Optional[int]
+    last_outcome: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+class CampaignLeadsImport(SQLModel):
+    """Bulk lead import payload."""
+    leads: List[CampaignLeadCreate]
@@ -1,5 +1,6 @@
 from typing import Optional, Dict, Any
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship, Column, JSON
 
 
@@ -13,9 +14,13 @@ class KnowledgeAssetBase(SQLModel):
 class KnowledgeAsset(KnowledgeAssetBase, table=True):
     """Knowledge asset database model."""
     __tablename__ = "knowledge_assets"
+    __table_args__ = (
+        # Newest-first listing and keyset pagination (app.core.pagination)
+        Index("ix_knowledge_assets_workspace_created", "workspace_id", "created_at", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    workspace_id: int = Field(foreign_key="workspaces.id", index=True)
+    workspace_id: int = Field(foreign_key="workspaces.id")
     agent_id: Optional[int] = Field(default=None, foreign_key="agents.id", index=True)
     
     file_url: Optional[str] = None
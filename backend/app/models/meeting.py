@@ -1,5 +1,6 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Column, JSON
 
 
@@ -14,9 +15,13 @@ class MeetingBase(SQLModel):
 class Meeting(MeetingBase, table=True):
     """Meeting database model."""
     __tablename__ = "meetings"
+    __table_args__ = (
+        # Latest-first listing and keyset pagination (app.core.pagination)
+        Index("ix_meetings_workspace_scheduled", "workspace_id", "scheduled_for", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    workspace_id: int = Field(foreign_key="workspaces.id", index=True)
+    workspace_id: int = Field(foreign_key="workspaces.id")
     agent_id: Optional[int] = Field(default=None, foreign_key="agents.id", index=True)
     
     meeting_id: Optional[str] = None
@@ -1,11 +1,12 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class NotificationBase(SQLModel):
     """Base notification model."""
-    workspace_id: int = Field(index=True)
+    workspace_id: int
     user_id: Optional[int] = Field(default=None, index=True)
     type: str = "info"  # info, warning, error
     severity: str = "low"  # low, medium, high
@@ -17,12 +18,31 @@ class NotificationBase(SQLModel):
 class Notification(NotificationBase, table=True):
     """Notification database model."""
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Newest-first listing and keyset pagination (app.core.pagination)
+        Index("ix_notifications_workspace_created", "workspace_id", "created_at", "id"),
+        # Unread counts without the counters (app.services.notifications.count_unread)
+        Index("ix_notifications_workspace_unread", "workspace_id", "read", "user_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class NotificationCounter(SQLModel, table=True):
+    """
+    Unread notifications per workspace and recipient, maintained by
+    app.services.notifications. user_id 0 counts workspace-wide notifications
+    (user_id NULL), which every member sees.
+    """
+    __tablename__ = "notification_counters"
+
+    workspace_id: int = Field(primary_key=True)
+    user_id: int = Field(default=0, primary_key=True)
+    unread_count: int = 0
+
+
 class NotificationCreate(NotificationBase):
     """Schema for creating a notification."""
     pass
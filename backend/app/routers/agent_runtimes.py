@@ -1,10 +1,20 @@
+import asyncio
 import io
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, TypedDict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple, Type, TypedDict
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, WebSocket
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, WebSocket
 from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict
+
+from app.core.config import settings
+from app.core.deps import authorize_socket
+from app.db import AnyAsyncSession, get_async_session
+from app.models.agent import Agent
+from app.services.realtime_call_log import RealtimeCallTap, realtime_call_log_writer
 
 # Make the sibling apex_sales_pro package importable when the API is launched
 # from backend/app.
@@ -12,20 +22,74 @@ BACKEND_ROOT = Path(__file__).resolve().parents[2]
 if str(BACKEND_ROOT) not in sys.path:
     sys.path.append(str(BACKEND_ROOT))
 
-from apex_sales_pro import main as apex_runtime  # type: ignore  # noqa: E402
+from apex_sales_pro import models as apex_models  # type: ignore  # noqa: E402
+from apex_sales_pro.prompts import SystemPromptTemplate, compile_system_prompt  # type: ignore  # noqa: E402
 
 router = APIRouter(tags=["Agent Runtime"])
 
+_apex_runtime = None
+
+
+def get_apex_runtime():
+    """
+    The Apex runtime module (OpenAI client, realtime bridge, CRM sync), imported on
+    first use. Routes only need apex_models, so importing this router stays cheap.
+    """
+    global _apex_runtime
+    if _apex_runtime is None:
+        from apex_sales_pro import main as runtime  # type: ignore
+
+        _apex_runtime = runtime
+    return _apex_runtime
+
+
+def runtime_loaded() -> bool:
+    return _apex_runtime is not None
+
+
+_realtime_warmup: Optional[asyncio.Task] = None
+
+
+def warm_realtime_sessions() -> None:
+    """
+    Load the runtime and start keeping upstream realtime sessions ready for every
+    blueprint (once per worker; call from the event loop).
+    """
+    global _realtime_warmup
+    if _realtime_warmup is None or (_realtime_warmup.done() and _realtime_warmup.exception() is not None):
+        _realtime_warmup = asyncio.create_task(_warm_realtime_sessions())
+
+
+async def _warm_realtime_sessions() -> None:
+    runtime = await asyncio.to_thread(get_apex_runtime)
+    blueprints = await asyncio.to_thread(agent_blueprints)
+    await runtime.warm_realtime_sessions(blueprint.instructions for blueprint in blueprints.values())
+
+
+async def close_realtime_sessions() -> None:
+    """Stop warming and close the pooled upstream sessions."""
+    global _realtime_warmup
+    if _realtime_warmup is not None:
+        _realtime_warmup.cancel()
+        try:
+            await _realtime_warmup
+        except (asyncio.CancelledError, Exception):
+            pass
+        _realtime_warmup = None
+    if runtime_loaded():
+        await get_apex_runtime().realtime_pool.close()
+
 
 class RuntimeAgentBlueprint(TypedDict):
-    config: apex_runtime.AgentConfig
-    lead: apex_runtime.LeadContext
-    history: List[apex_runtime.ConversationTurn]
-    settings: apex_runtime.CallSettings
+    """Blueprint source as written below; compiled once into a CompiledBlueprint."""
+    config: apex_models.AgentConfig
+    lead: apex_models.LeadContext
+    history: List[apex_models.ConversationTurn]
+    settings: apex_models.CallSettings
 
 
 def _apex_blueprint() -> RuntimeAgentBlueprint:
-    demo = apex_runtime.build_demo_request()
+    demo = apex_models.build_demo_request()
     return {
         "config": demo.agent,
         "lead": demo.lead,
@@ -34,326 +98,416 @@ def _apex_blueprint() -> RuntimeAgentBlueprint:
     }
 
 
-AGENT_BLUEPRINTS: Dict[str, RuntimeAgentBlueprint] = {
-    "apex-sales-pro": _apex_blueprint(),
-    "zenith-support": {
-        "config": apex_runtime.AgentConfig(
-            name="Zenith Support Agent",
-            model="gpt-4o-mini",
-            voice="alloy",
-            deployment_channels=[
-                apex_runtime.Channel.phone,
-                apex_runtime.Channel.video,
-                apex_runtime.Channel.chat,
-                apex_runtime.Channel.meeting,
-            ],
-            temperature=0.35,
-            top_p=0.9,
-            memory_turns=20,
-            persona=apex_runtime.AgentPersona(
-                tier="Platinum",
-                description="Empathetic tier-2 support agent that triages, troubleshoots, and resolves complex product cases.",
-                tone="calm, patient, solution-focused",
-                closing_style="confirm resolution and surface next helpful action",
-                storytelling_focus="clear troubleshooting, reassurance, and expectation setting",
-            ),
-            advanced=apex_runtime.AgentAdvancedSettings(
-                fallback_routing="escalate_to_human_if_blocked",
-                record_calls=True,
-                transcribe_calls=True,
-                rate_limit_per_minute=40,
+def _blueprint_sources() -> Dict[str, RuntimeAgentBlueprint]:
+    return {
+        "apex-sales-pro": _apex_blueprint(),
+        "zenith-support": {
+            "config": apex_models.AgentConfig(
+                name="Zenith Support Agent",
+                model="gpt-4o-mini",
+                voice="alloy",
+                deployment_channels=[
+                    apex_models.Channel.phone,
+                    apex_models.Channel.video,
+                    apex_models.Channel.chat,
+                    apex_models.Channel.meeting,
+                ],
+                temperature=0.35,
+                top_p=0.9,
+                memory_turns=20,
+                persona=apex_models.AgentPersona(
+                    tier="Platinum",
+                    description="Empathetic tier-2 support agent that triages, troubleshoots, and resolves complex product cases.",
+                    tone="calm, patient, solution-focused",
+                    closing_style="confirm resolution and surface next helpful action",
+                    storytelling_focus="clear troubleshooting, reassurance, and expectation setting",
+                ),
+                advanced=apex_models.AgentAdvancedSettings(
+                    fallback_routing="escalate_to_human_if_blocked",
+                    record_calls=True,
+                    transcribe_calls=True,
+                    rate_limit_per_minute=40,
+                ),
+                integrations=apex_models.AgentIntegrations(
+                    crm_provider="HubSpot",
+                    crm_auto_sync=True,
+                    lead_scoring_enabled=False,
+                ),
+                ab_test_variant="support-A",
             ),
-            integrations=apex_runtime.AgentIntegrations(
-                crm_provider="HubSpot",
-                crm_auto_sync=True,
-                lead_scoring_enabled=False,
+            "lead": apex_models.LeadContext(
+                lead_id="SUPPORT-DEMO-001",
+                name="Casey",
+                company="AcmeSoft",
+                role="IT Manager",
+                region="USA",
+                email="casey@acmesoft.com",
+                phone="+15550101010",
+                pain_points=["SSO failing for VIPs", "Unable to provision new seats"],
+                preferred_language="en",
+                notes="Enterprise customer with high urgency ticket.",
             ),
-            ab_test_variant="support-A",
-        ),
-        "lead": apex_runtime.LeadContext(
-            lead_id="SUPPORT-DEMO-001",
-            name="Casey",
-            company="AcmeSoft",
-            role="IT Manager",
-            region="USA",
-            email="casey@acmesoft.com",
-            phone="+15550101010",
-            pain_points=["SSO failing for VIPs", "Unable to provision new seats"],
-            preferred_language="en",
-            notes="Enterprise customer with high urgency ticket.",
-        ),
-        "history": [
-            apex_runtime.ConversationTurn(
-                role="prospect",
-                content="Hi, our SSO stopped working for some users after yesterday's update.",
-                sentiment=apex_runtime.SentimentLabel.negative,
-            )
-        ],
-        "settings": apex_runtime.CallSettings(
-            channel=apex_runtime.Channel.chat,
-            call_id="SUPPORT-CALL-001",
-            call_attempt=1,
-            allow_negotiation=False,
-            target_next_step="resolve_issue",
-            max_agent_response_tokens=450,
-        ),
-    },
-    "quantum-scheduler": {
-        "config": apex_runtime.AgentConfig(
-            name="Quantum Scheduler",
-            model="gpt-4o-mini",
-            voice="fable",
-            deployment_channels=[
-                apex_runtime.Channel.phone,
-                apex_runtime.Channel.chat,
-                apex_runtime.Channel.meeting,
+            "history": [
+                apex_models.ConversationTurn(
+                    role="prospect",
+                    content="Hi, our SSO stopped working for some users after yesterday's update.",
+                    sentiment=apex_models.SentimentLabel.negative,
+                )
             ],
-            temperature=0.35,
-            top_p=0.9,
-            memory_turns=12,
-            persona=apex_runtime.AgentPersona(
-                tier="Gold",
-                description="Logistics-focused meeting concierge that owns scheduling, reminders, and conflict resolution.",
-                tone="polished, efficient, helpful",
-                closing_style="lock in times quickly and confirm invites",
-                storytelling_focus="time savings, reduced no-shows, smooth coordination",
+            "settings": apex_models.CallSettings(
+                channel=apex_models.Channel.chat,
+                call_id="SUPPORT-CALL-001",
+                call_attempt=1,
+                allow_negotiation=False,
+                target_next_step="resolve_issue",
+                max_agent_response_tokens=450,
             ),
-            advanced=apex_runtime.AgentAdvancedSettings(
-                voicemail_strategy="leave_callback_number",
-                record_calls=False,
-                transcribe_calls=True,
-                rate_limit_per_minute=50,
+        },
+        "quantum-scheduler": {
+            "config": apex_models.AgentConfig(
+                name="Quantum Scheduler",
+                model="gpt-4o-mini",
+                voice="fable",
+                deployment_channels=[
+                    apex_models.Channel.phone,
+                    apex_models.Channel.chat,
+                    apex_models.Channel.meeting,
+                ],
+                temperature=0.35,
+                top_p=0.9,
+                memory_turns=12,
+                persona=apex_models.AgentPersona(
+                    tier="Gold",
+                    description="Logistics-focused meeting concierge that owns scheduling, reminders, and conflict resolution.",
+                    tone="polished, efficient, helpful",
+                    closing_style="lock in times quickly and confirm invites",
+                    storytelling_focus="time savings, reduced no-shows, smooth coordination",
+                ),
+                advanced=apex_models.AgentAdvancedSettings(
+                    voicemail_strategy="leave_callback_number",
+                    record_calls=False,
+                    transcribe_calls=True,
+                    rate_limit_per_minute=50,
+                ),
+                integrations=apex_models.AgentIntegrations(
+                    crm_provider=None,
+                    crm_auto_sync=False,
+                    conferencing_platforms=["Zoom", "Google Meet", "Teams", "Webex"],
+                ),
+                ab_test_variant="scheduler-A",
             ),
-            integrations=apex_runtime.AgentIntegrations(
-                crm_provider=None,
-                crm_auto_sync=False,
-                conferencing_platforms=["Zoom", "Google Meet", "Teams", "Webex"],
+            "lead": apex_models.LeadContext(
+                lead_id="SCHED-DEMO-001",
+                name="Priya",
+                company="Northwind Analytics",
+                role="Operations Lead",
+                region="UK",
+                email="priya@nwanalytics.com",
+                preferred_language="en-GB",
+                notes="Needs to coordinate a 6-person kickoff with multiple time zones.",
             ),
-            ab_test_variant="scheduler-A",
-        ),
-        "lead": apex_runtime.LeadContext(
-            lead_id="SCHED-DEMO-001",
-            name="Priya",
-            company="Northwind Analytics",
-            role="Operations Lead",
-            region="UK",
-            email="priya@nwanalytics.com",
-            preferred_language="en-GB",
-            notes="Needs to coordinate a 6-person kickoff with multiple time zones.",
-        ),
-        "history": [
-            apex_runtime.ConversationTurn(
-                role="prospect",
-                content="Can you find a time next week for a 60 minute kickoff with New York, London, and Sydney?",
-                sentiment=apex_runtime.SentimentLabel.neutral,
-            )
-        ],
-        "settings": apex_runtime.CallSettings(
-            channel=apex_runtime.Channel.chat,
-            call_id="SCHED-CALL-001",
-            call_attempt=1,
-            allow_negotiation=True,
-            target_next_step="book_meeting",
-            max_agent_response_tokens=400,
-        ),
-    },
-    "summit-onboarding": {
-        "config": apex_runtime.AgentConfig(
-            name="Summit Onboarding",
-            model="gpt-4o-mini",
-            voice="verse",
-            deployment_channels=[
-                apex_runtime.Channel.phone,
-                apex_runtime.Channel.video,
-                apex_runtime.Channel.chat,
+            "history": [
+                apex_models.ConversationTurn(
+                    role="prospect",
+                    content="Can you find a time next week for a 60 minute kickoff with New York, London, and Sydney?",
+                    sentiment=apex_models.SentimentLabel.neutral,
+                )
             ],
-            temperature=0.4,
-            top_p=0.9,
-            memory_turns=18,
-            persona=apex_runtime.AgentPersona(
-                tier="Gold",
-                description="Guided onboarding and implementation specialist that removes friction and drives adoption.",
-                tone="reassuring, proactive, clear",
-                closing_style="summarize progress and set the next milestone",
-                storytelling_focus="speed-to-value, confidence, and clear checklists",
+            "settings": apex_models.CallSettings(
+                channel=apex_models.Channel.chat,
+                call_id="SCHED-CALL-001",
+                call_attempt=1,
+                allow_negotiation=True,
+                target_next_step="book_meeting",
+                max_agent_response_tokens=400,
             ),
-            advanced=apex_runtime.AgentAdvancedSettings(
-                record_calls=True,
-                transcribe_calls=True,
-                retain_days=45,
-                rate_limit_per_minute=30,
+        },
+        "summit-onboarding": {
+            "config": apex_models.AgentConfig(
+                name="Summit Onboarding",
+                model="gpt-4o-mini",
+                voice="verse",
+                deployment_channels=[
+                    apex_models.Channel.phone,
+                    apex_models.Channel.video,
+                    apex_models.Channel.chat,
+                ],
+                temperature=0.4,
+                top_p=0.9,
+                memory_turns=18,
+                persona=apex_models.AgentPersona(
+                    tier="Gold",
+                    description="Guided onboarding and implementation specialist that removes friction and drives adoption.",
+                    tone="reassuring, proactive, clear",
+                    closing_style="summarize progress and set the next milestone",
+                    storytelling_focus="speed-to-value, confidence, and clear checklists",
+                ),
+                advanced=apex_models.AgentAdvancedSettings(
+                    record_calls=True,
+                    transcribe_calls=True,
+                    retain_days=45,
+                    rate_limit_per_minute=30,
+                ),
+                integrations=apex_models.AgentIntegrations(
+                    crm_provider="HubSpot",
+                    crm_auto_sync=True,
+                    conferencing_platforms=["Zoom", "Google Meet", "Teams"],
+                ),
+                ab_test_variant="onboarding-A",
             ),
-            integrations=apex_runtime.AgentIntegrations(
-                crm_provider="HubSpot",
-                crm_auto_sync=True,
-                conferencing_platforms=["Zoom", "Google Meet", "Teams"],
+            "lead": apex_models.LeadContext(
+                lead_id="ONBOARD-DEMO-001",
+                name="Morgan",
+                company="Helio Health",
+                role="Implementation Manager",
+                region="USA",
+                email="morgan@heliohealth.com",
+                preferred_language="en",
+                notes="Needs a clear rollout plan for 150 seats across three departments.",
             ),
-            ab_test_variant="onboarding-A",
-        ),
-        "lead": apex_runtime.LeadContext(
-            lead_id="ONBOARD-DEMO-001",
-            name="Morgan",
-            company="Helio Health",
-            role="Implementation Manager",
-            region="USA",
-            email="morgan@heliohealth.com",
-            preferred_language="en",
-            notes="Needs a clear rollout plan for 150 seats across three departments.",
-        ),
-        "history": [
-            apex_runtime.ConversationTurn(
-                role="prospect",
-                content="We want a phased rollout but need help sequencing training and permissions.",
-                sentiment=apex_runtime.SentimentLabel.neutral,
-            )
-        ],
-        "settings": apex_runtime.CallSettings(
-            channel=apex_runtime.Channel.video,
-            call_id="ONBOARD-CALL-001",
-            call_attempt=1,
-            allow_negotiation=False,
-            target_next_step="plan_milestones",
-            max_agent_response_tokens=500,
-        ),
-    },
-    "commerce-concierge": {
-        "config": apex_runtime.AgentConfig(
-            name="Commerce Concierge",
-            model="gpt-4o-mini",
-            voice="shimmer",
-            deployment_channels=[
-                apex_runtime.Channel.chat,
-                apex_runtime.Channel.phone,
+            "history": [
+                apex_models.ConversationTurn(
+                    role="prospect",
+                    content="We want a phased rollout but need help sequencing training and permissions.",
+                    sentiment=apex_models.SentimentLabel.neutral,
+                )
             ],
-            temperature=0.5,
-            top_p=0.9,
-            memory_turns=10,
-            persona=apex_runtime.AgentPersona(
-                tier="Gold",
-                description="Retail-focused assistant that guides buyers, recovers carts, and handles post-purchase care.",
-                tone="friendly, enthusiastic, trustworthy",
-                closing_style="recommend and confirm purchase choices",
-                storytelling_focus="product benefits, fit, and fast checkout",
+            "settings": apex_models.CallSettings(
+                channel=apex_models.Channel.video,
+                call_id="ONBOARD-CALL-001",
+                call_attempt=1,
+                allow_negotiation=False,
+                target_next_step="plan_milestones",
+                max_agent_response_tokens=500,
             ),
-            advanced=apex_runtime.AgentAdvancedSettings(
-                max_call_duration_seconds=600,
-                rate_limit_per_minute=60,
-                voicemail_strategy="retry_and_sms",
-                record_calls=False,
-                transcribe_calls=False,
+        },
+        "commerce-concierge": {
+            "config": apex_models.AgentConfig(
+                name="Commerce Concierge",
+                model="gpt-4o-mini",
+                voice="shimmer",
+                deployment_channels=[
+                    apex_models.Channel.chat,
+                    apex_models.Channel.phone,
+                ],
+                temperature=0.5,
+                top_p=0.9,
+                memory_turns=10,
+                persona=apex_models.AgentPersona(
+                    tier="Gold",
+                    description="Retail-focused assistant that guides buyers, recovers carts, and handles post-purchase care.",
+                    tone="friendly, enthusiastic, trustworthy",
+                    closing_style="recommend and confirm purchase choices",
+                    storytelling_focus="product benefits, fit, and fast checkout",
+                ),
+                advanced=apex_models.AgentAdvancedSettings(
+                    max_call_duration_seconds=600,
+                    rate_limit_per_minute=60,
+                    voicemail_strategy="retry_and_sms",
+                    record_calls=False,
+                    transcribe_calls=False,
+                ),
+                integrations=apex_models.AgentIntegrations(
+                    crm_provider=None,
+                    crm_auto_sync=False,
+                    lead_scoring_enabled=True,
+                    conferencing_platforms=["Voice", "Chat"],
+                ),
+                ab_test_variant="commerce-A",
             ),
-            integrations=apex_runtime.AgentIntegrations(
-                crm_provider=None,
-                crm_auto_sync=False,
-                lead_scoring_enabled=True,
-                conferencing_platforms=["Voice", "Chat"],
+            "lead": apex_models.LeadContext(
+                lead_id="COMMERCE-DEMO-001",
+                name="Alex",
+                company="Personal",
+                role="Buyer",
+                region="USA",
+                email="alex@example.com",
+                preferred_language="en",
+                notes="Comparing bundles and unsure about sizing and shipping speed.",
             ),
-            ab_test_variant="commerce-A",
-        ),
-        "lead": apex_runtime.LeadContext(
-            lead_id="COMMERCE-DEMO-001",
-            name="Alex",
-            company="Personal",
-            role="Buyer",
-            region="USA",
-            email="alex@example.com",
-            preferred_language="en",
-            notes="Comparing bundles and unsure about sizing and shipping speed.",
-        ),
-        "history": [
-            apex_runtime.ConversationTurn(
-                role="prospect",
-                content="I'm between the pro and premium bundle. Can you help me decide and place the order?",
-                sentiment=apex_runtime.SentimentLabel.positive,
-            )
-        ],
-        "settings": apex_runtime.CallSettings(
-            channel=apex_runtime.Channel.chat,
-            call_id="COMMERCE-CALL-001",
-            call_attempt=1,
-            allow_negotiation=True,
-            target_next_step="complete_purchase",
-            max_agent_response_tokens=380,
-        ),
-    },
-}
-
-
-def get_blueprint(agent_slug: str) -> RuntimeAgentBlueprint:
-    blueprint = AGENT_BLUEPRINTS.get(agent_slug)
+            "history": [
+                apex_models.ConversationTurn(
+                    role="prospect",
+                    content="I'm between the pro and premium bundle. Can you help me decide and place the order?",
+                    sentiment=apex_models.SentimentLabel.positive,
+                )
+            ],
+            "settings": apex_models.CallSettings(
+                channel=apex_models.Channel.chat,
+                call_id="COMMERCE-CALL-001",
+                call_attempt=1,
+                allow_negotiation=True,
+                target_next_step="complete_purchase",
+                max_agent_response_tokens=380,
+            ),
+        },
+    }
+
+
+_FROZEN_MODEL_CLASSES: Dict[type, type] = {}
+
+
+def _frozen_model_class(model_cls: Type[BaseModel]) -> Type[BaseModel]:
+    frozen_cls = _FROZEN_MODEL_CLASSES.get(model_cls)
+    if frozen_cls is None:
+        frozen_cls = type(
+            f"Frozen{model_cls.__name__}",
+            (model_cls,),
+            {"model_config": ConfigDict(**model_cls.model_config, frozen=True), "__module__": model_cls.__module__},
+        )
+        _FROZEN_MODEL_CLASSES[model_cls] = frozen_cls
+    return frozen_cls
+
+
+def freeze_model(model: BaseModel) -> BaseModel:
+    """
+    Read-only copy of a (nested) model: assigning an attribute raises. The copy is an
+    instance of a subclass, so it still validates and serializes as the original type.
+    """
+    values = {
+        name: freeze_model(value) if isinstance(value, BaseModel) else value
+        for name, value in model.__dict__.items()
+    }
+    return _frozen_model_class(type(model)).model_construct(_fields_set=model.model_fields_set, **values)
+
+
+@dataclass(frozen=True)
+class CompiledBlueprint:
+    """
+    An agent template compiled once at startup. Models are frozen and shared by every
+    request, so per-request payloads reference them instead of deep-copying.
+    """
+    slug: str
+    config: apex_models.AgentConfig
+    lead: apex_models.LeadContext
+    history: Tuple[apex_models.ConversationTurn, ...]
+    settings: apex_models.CallSettings
+    # Persona and name are rendered in; merged request configs keep both from the blueprint.
+    system_prompt: SystemPromptTemplate
+    # Full prompt for the blueprint's own lead / settings (realtime sessions, demos).
+    instructions: str
+
+
+def compile_blueprint(slug: str, source: RuntimeAgentBlueprint) -> CompiledBlueprint:
+    config = freeze_model(source["config"])
+    lead = freeze_model(source["lead"])
+    call_settings = freeze_model(source["settings"])
+    system_prompt = compile_system_prompt(config)
+    return CompiledBlueprint(
+        slug=slug,
+        config=config,
+        lead=lead,
+        history=tuple(freeze_model(turn) for turn in source["history"]),
+        settings=call_settings,
+        system_prompt=system_prompt,
+        instructions=system_prompt.render(lead, call_settings),
+    )
+
+
+_AGENT_BLUEPRINTS: Optional[Mapping[str, CompiledBlueprint]] = None
+
+
+def agent_blueprints() -> Mapping[str, CompiledBlueprint]:
+    """
+    All blueprints, compiled on first use rather than while the worker boots.
+    """
+    global _AGENT_BLUEPRINTS
+    if _AGENT_BLUEPRINTS is None:
+        _AGENT_BLUEPRINTS = MappingProxyType(
+            {slug: compile_blueprint(slug, source) for slug, source in _blueprint_sources().items()}
+        )
+    return _AGENT_BLUEPRINTS
+
+
+def get_blueprint(agent_slug: str) -> CompiledBlueprint:
+    blueprint = agent_blueprints().get(agent_slug)
     if blueprint:
         return blueprint
     raise HTTPException(status_code=404, detail=f"Agent '{agent_slug}' is not configured.")
 
 
-def merge_agent_config(agent_slug: str, incoming: apex_runtime.AgentConfig) -> apex_runtime.AgentConfig:
-    base = get_blueprint(agent_slug)["config"]
-    merged = base.model_dump()
-    incoming_data = incoming.model_dump(exclude_none=True)
-    for field, value in incoming_data.items():
-        if field in {"name", "persona"}:
-            continue
-        merged[field] = value
-    merged["name"] = base.name
-    merged["persona"] = base.persona.model_dump()
-    return apex_runtime.AgentConfig(**merged)
+def merge_agent_config(agent_slug: str, incoming: apex_models.AgentConfig) -> apex_models.AgentConfig:
+    """
+    Overlay a request's (already validated) config on the blueprint without re-validating:
+    name and persona always come from the blueprint, and so does anything the request left unset.
+    """
+    base = get_blueprint(agent_slug).config
+    overrides = {"name": base.name, "persona": base.persona}
+    for field in apex_models.AgentConfig.model_fields:
+        if getattr(incoming, field) is None:
+            overrides[field] = getattr(base, field)
+    return incoming.model_copy(update=overrides)
 
 
-def build_demo_request_for(agent_slug: str) -> apex_runtime.ApexSalesRequest:
+def build_demo_request_for(agent_slug: str) -> apex_models.ApexSalesRequest:
     blueprint = get_blueprint(agent_slug)
-    return apex_runtime.ApexSalesRequest(
-        agent=blueprint["config"].model_copy(deep=True),
-        lead=blueprint["lead"].model_copy(deep=True),
-        settings=blueprint["settings"].model_copy(deep=True),
-        history=[turn.model_copy(deep=True) for turn in blueprint["history"]],
+    return apex_models.ApexSalesRequest.model_construct(
+        agent=blueprint.config,
+        lead=blueprint.lead,
+        settings=blueprint.settings,
+        history=list(blueprint.history),
         custom_variables={},
     )
 
 
-def build_runtime_request(agent_slug: str, payload: apex_runtime.ApexSalesRequest) -> apex_runtime.ApexSalesRequest:
+def build_runtime_request(agent_slug: str, payload: apex_models.ApexSalesRequest) -> apex_models.ApexSalesRequest:
     payload.agent = merge_agent_config(agent_slug, payload.agent)
     return payload
 
 
-@router.get("/agents/{agent_slug}/config", response_model=apex_runtime.AgentConfig)
+@router.get("/agents/{agent_slug}/config", response_model=apex_models.AgentConfig)
 async def get_agent_config(agent_slug: str):
     """
     Return the default runtime configuration for the requested agent template.
     """
-    blueprint = get_blueprint(agent_slug)
-    return blueprint["config"]
+    return get_blueprint(agent_slug).config
 
 
-@router.post("/agents/{agent_slug}/chat", response_model=apex_runtime.ApexSalesResponse)
-async def agent_chat(agent_slug: str, payload: apex_runtime.ApexSalesRequest, background_tasks: BackgroundTasks):
+@router.post("/agents/{agent_slug}/chat", response_model=apex_models.ApexSalesResponse)
+async def agent_chat(agent_slug: str, payload: apex_models.ApexSalesRequest, background_tasks: BackgroundTasks):
     """
     Generate the next turn for a given specialized agent (sales, support, scheduling, onboarding, commerce).
     """
     runtime_payload = build_runtime_request(agent_slug, payload)
-    return apex_runtime.run_apex_sales_turn(runtime_payload, background_tasks)
+    system_prompt = get_blueprint(agent_slug).system_prompt
+    return get_apex_runtime().run_apex_sales_turn(runtime_payload, background_tasks, system_prompt=system_prompt)
 
 
-@router.post("/agents/{agent_slug}/chat-demo", response_model=apex_runtime.ApexSalesResponse)
+@router.post("/agents/{agent_slug}/leads/score-batch", response_model=apex_models.BatchLeadScoreResponse)
+async def agent_score_leads(agent_slug: str, payload: apex_models.BatchLeadScoreRequest):
+    """
+    Rank a whole lead list before dialing; defaults the campaign target to the agent's next step.
+    """
+    blueprint = get_blueprint(agent_slug)
+    if payload.target_next_step is None:
+        payload = payload.model_copy(update={"target_next_step": blueprint.settings.target_next_step})
+    return get_apex_runtime().rank_leads(payload)
+
+
+@router.post("/agents/{agent_slug}/chat-demo", response_model=apex_models.ApexSalesResponse)
 async def agent_chat_demo(agent_slug: str, background_tasks: BackgroundTasks):
     """
     Trigger the agent using a baked-in demo payload so UI testers can hit /docs quickly.
     """
     payload = build_demo_request_for(agent_slug)
-    return apex_runtime.run_apex_sales_turn(payload, background_tasks)
+    system_prompt = get_blueprint(agent_slug).system_prompt
+    return get_apex_runtime().run_apex_sales_turn(payload, background_tasks, system_prompt=system_prompt)
 
 
 @router.post("/agents/{agent_slug}/chat-voice", response_class=StreamingResponse)
-async def agent_chat_voice(agent_slug: str, payload: apex_runtime.ApexSalesRequest, background_tasks: BackgroundTasks):
+async def agent_chat_voice(agent_slug: str, payload: apex_models.ApexSalesRequest, background_tasks: BackgroundTasks):
     """
     Same as /chat but returns an MP3 stream of the agent response.
     """
     runtime_payload = build_runtime_request(agent_slug, payload)
-    result = apex_runtime.run_apex_sales_turn(runtime_payload, background_tasks)
-    audio_bytes = apex_runtime.synthesize_agent_audio(result.agent_message, voice=runtime_payload.agent.voice)
+    system_prompt = get_blueprint(agent_slug).system_prompt
+    runtime = get_apex_runtime()
+    result = runtime.run_apex_sales_turn(runtime_payload, background_tasks, system_prompt=system_prompt)
+    audio_bytes = runtime.synthesize_agent_audio(result.agent_message, voice=runtime_payload.agent.voice)
     return StreamingResponse(
         io.BytesIO(audio_bytes),
         media_type="audio/mpeg",
-        headers={"X-Agent-Message": apex_runtime.sanitize_header_value(result.agent_message)},
+        headers={"X-Agent-Message": runtime.sanitize_header_value(result.agent_message)},
     )
 
 
@@ -363,29 +517,102 @@ async def agent_chat_voice_demo(agent_slug: str, background_tasks: BackgroundTas
     Same as chat-demo but streams an MP3 audio reply (X-Agent-Message header carries text).
     """
     payload = build_demo_request_for(agent_slug)
-    result = apex_runtime.run_apex_sales_turn(payload, background_tasks)
-    audio_bytes = apex_runtime.synthesize_agent_audio(result.agent_message, voice=payload.agent.voice)
+    system_prompt = get_blueprint(agent_slug).system_prompt
+    runtime = get_apex_runtime()
+    result = runtime.run_apex_sales_turn(payload, background_tasks, system_prompt=system_prompt)
+    audio_bytes = runtime.synthesize_agent_audio(result.agent_message, voice=payload.agent.voice)
     return StreamingResponse(
         io.BytesIO(audio_bytes),
         media_type="audio/mpeg",
-        headers={"X-Agent-Message": apex_runtime.sanitize_header_value(result.agent_message)},
+        headers={"X-Agent-Message": runtime.sanitize_header_value(result.agent_message)},
+    )
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def _call_log_target(
+    websocket: WebSocket, token: Optional[str], session: AnyAsyncSession
+) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    (workspace_id, agent_id) to record the call under, or None if the socket was refused (and closed).
+
+    A workspace named with ``?workspace_id=`` needs ``?token=`` of one of its members;
+    otherwise calls go to REALTIME_CALL_LOG_WORKSPACE_ID, if set. ``?agent_id=`` must be
+    an agent of that workspace.
+    """
+    params = websocket.query_params
+    workspace_id = _optional_int(params.get("workspace_id"))
+    if workspace_id is not None:
+        if not token:
+            await websocket.close(code=4401)
+            return None
+        if not await authorize_socket(websocket, token, session, workspace_id):
+            return None
+    else:
+        workspace_id = settings.REALTIME_CALL_LOG_WORKSPACE_ID
+    agent_id = _optional_int(params.get("agent_id"))
+    if workspace_id and agent_id is not None:
+        agent = await session.get(Agent, agent_id)
+        await session.close()
+        if agent is None or agent.workspace_id != workspace_id:
+            await websocket.close(code=4403)
+            return None
+    return workspace_id, agent_id
+
+
+def _open_call_tap(
+    agent_slug: str, websocket: WebSocket, workspace_id: Optional[int], agent_id: Optional[int]
+) -> Optional[RealtimeCallTap]:
+    """Start recording a realtime call when it has a workspace (see _call_log_target)."""
+    if not workspace_id:
+        return None
+    params = websocket.query_params
+    return realtime_call_log_writer.open_call(
+        workspace_id=workspace_id,
+        agent_id=agent_id,
+        caller_name=params.get("caller_name"),
+        caller_number=params.get("caller_number"),
+        direction="outbound" if params.get("direction") == "outbound" else "inbound",
+        tags=["realtime", agent_slug],
     )
 
 
 @router.websocket("/ws/agents/{agent_slug}/realtime")
-async def agent_realtime_socket(agent_slug: str, websocket: WebSocket):
+async def agent_realtime_socket(
+    agent_slug: str,
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    session: AnyAsyncSession = Depends(get_async_session),
+):
     """
     WebSocket bridge for live audio/text streaming into OpenAI Realtime for any configured agent.
+    Phone legs may pass ``codec`` / ``sample_rate`` query params to have audio transcoded.
+    Transcript, duration and token cost are recorded as a CallLog in the background.
     """
-    blueprint = get_blueprint(agent_slug)
-    instructions = apex_runtime.build_system_prompt(
-        blueprint["config"], blueprint["lead"], blueprint["settings"]
-    )
+    instructions = get_blueprint(agent_slug).instructions
+    target = await _call_log_target(websocket, token, session)
+    if target is None:
+        return
+    # No-op once the worker has started warming (APEX_RUNTIME_PRELOAD does it at boot)
+    warm_realtime_sessions()
     await websocket.accept()
+    call_tap = _open_call_tap(agent_slug, websocket, *target)
+    call_status = "completed"
     try:
-        await apex_runtime.bridge_realtime_session(websocket, instructions)
+        runtime = get_apex_runtime()
+        leg = runtime.RealtimeAudioLeg(runtime.audio_format_from_query(websocket.query_params))
+        await runtime.bridge_realtime_session(websocket, instructions, leg=leg, event_tap=call_tap)
     except Exception as exc:
+        call_status = "failed"
         await websocket.close(code=1011, reason=str(exc))
+    finally:
+        if call_tap:
+            call_tap.close(call_status)
 
 
 @router.post("/integrations/{agent_slug}/zoom/webhook")
@@ -400,7 +627,7 @@ async def zoom_webhook(agent_slug: str, request: Request):
 
 
 @router.post("/webhooks/{agent_slug}/call-events")
-async def receive_call_webhook(agent_slug: str, event: apex_runtime.WebhookEvent):
+async def receive_call_webhook(agent_slug: str, event: apex_models.WebhookEvent):
     """
     Receive call-related webhooks and log them with the agent slug for debugging.
     """
@@ -410,12 +637,11 @@ async def receive_call_webhook(agent_slug: str, event: apex_runtime.WebhookEvent
 
 
 @router.post("/telephony/{agent_slug}/dial")
-async def dial_any_number(agent_slug: str, request_data: apex_runtime.DialRequest):
+async def dial_any_number(agent_slug: str, request_data: apex_models.DialRequest):
     """
     Stub dialer endpoint that tags the request with the chosen agent.
     """
-    blueprint = get_blueprint(agent_slug)
-    agent_name = blueprint["config"].name
+    agent_name = get_blueprint(agent_slug).config.name
     print(
         f"[DIALER][{agent_slug}] Dialing {request_data.phone_number} from {request_data.caller_id} "
         f"with agent {agent_name} metadata={request_data.metadata}"
@@ -428,11 +654,12 @@ async def dial_any_number(agent_slug: str, request_data: apex_runtime.DialReques
     }
 
 
-@router.get("/calls/{call_id}/log", response_model=List[apex_runtime.ConversationTurn])
+@router.get("/calls/{call_id}/log", response_model=List[apex_models.ConversationTurn])
 async def get_call_log(call_id: str):
     """
     Return the in-memory call log for debugging / QA.
     """
-    if call_id not in apex_runtime.CALL_LOGS:
+    call_logs = get_apex_runtime().CALL_LOGS
+    if call_id not in call_logs:
         raise HTTPException(status_code=404, detail="Call log not found.")
-    return apex_runtime.CALL_LOGS[call_id]
+    return call_logs[call_id]
@@ -6,9 +6,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from sqlmodel import Session, select, SQLModel
 
 from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_workspace_access_sync
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.agent import Agent, AgentCreate, AgentUpdate, AgentRead
 from app.models.call import CallLog
 from app.services.language import resolve_language_code
@@ -45,13 +44,7 @@ async def list_agents(
 ):
     """List all agents in workspace with optional filters."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -79,13 +72,7 @@ async def create_agent(
 ):
     """Create a new agent."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent_data.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent_data.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -117,13 +104,7 @@ async def get_agent(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -150,13 +131,7 @@ async def update_agent(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -189,13 +164,7 @@ async def chat_with_agent(
     if not agent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
 
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
 
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
@@ -230,6 +199,7 @@ async def chat_with_agent(
         model=agent.model or "gpt-4o-mini",
         temperature=min(payload.temperature, 0.8),
         max_tokens=min(payload.max_tokens, 320),
+        workspace_id=agent.workspace_id,
     )
 
     return AgentChatResponse(reply=response["content"], usage=response.get("usage"))
@@ -248,13 +218,7 @@ async def voice_chat_with_agent(
     if not agent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
 
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
 
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
@@ -270,6 +234,7 @@ async def voice_chat_with_agent(
         audio_file=audio_bytes,
         language=whisper_language or "en",
         file_extension=extension,
+        workspace_id=agent.workspace_id,
     )
 
     user_text = transcription.get("text", "").strip() or "..."
@@ -308,12 +273,14 @@ async def voice_chat_with_agent(
         model=agent.model or "gpt-4o-mini",
         temperature=0.45,
         max_tokens=260,
+        workspace_id=agent.workspace_id,
     )
 
     audio_bytes = await openai_service.text_to_speech(
         text=response["content"],
         voice=agent.voice or "nova",
         model="tts-1",
+        workspace_id=agent.workspace_id,
     )
     audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
 
@@ -340,13 +307,7 @@ async def delete_agent(
         )
     
     # Verify workspace access (admin or owner)
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -375,13 +336,7 @@ async def deploy_agent(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -412,13 +367,7 @@ async def pause_agent(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -449,13 +398,7 @@ async def clone_agent(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -505,13 +448,7 @@ async def get_agent_analytics(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -1,34 +1,32 @@
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Set
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select, func
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 
-from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.db import AnyAsyncSession, get_async_session
+from app.core.config import settings
+from app.core.deps import get_current_active_user, get_workspace_access
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
-from app.models.call import CallLog
-from app.models.agent import Agent
+from app.services import call_columns, call_distributions, call_export, call_metrics
+from app.services.usage_meter import usage_meter
 
 router = APIRouter()
 
+# Running export jobs (kept referenced until they finish)
+_export_tasks: Set[asyncio.Task] = set()
+
 
 @router.get("/overview")
 async def get_analytics_overview(
     workspace_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get analytics dashboard overview."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -40,29 +38,21 @@ async def get_analytics_overview(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get calls in date range
-    calls = session.exec(
-        select(CallLog).where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= end_date,
-        )
-    ).all()
+    # Aggregate calls in date range
+    totals = await call_columns.call_totals(session, workspace_id, start_date, end_date)
     
     # Calculate metrics
-    total_calls = len(calls)
-    completed_calls = len([c for c in calls if c.status == "completed"])
-    total_duration = sum([c.duration_seconds for c in calls])
+    total_calls = totals["total_calls"]
+    completed_calls = totals["completed_calls"]
+    total_duration = totals["total_duration"]
     avg_duration = total_duration / total_calls if total_calls > 0 else 0
-    total_cost = sum([c.cost_cents for c in calls]) / 100  # Convert to dollars
+    total_cost = totals["total_cost_cents"] / 100  # Convert to dollars
     
     # Get active agents count
-    active_agents = session.exec(
-        select(Agent).where(
-            Agent.workspace_id == workspace_id,
-            Agent.status == "active",
-        )
-    ).all()
+    active_agents_count = await call_metrics.count_active_agents(session, workspace_id)
+    
+    # p50/p90/p99 of duration, handle time and turn latency (merged daily sketches)
+    percentiles = await call_distributions.percentiles(session, workspace_id, start_date, end_date)
     
     return {
         "period_days": days,
@@ -71,8 +61,9 @@ async def get_analytics_overview(
         "total_duration_seconds": total_duration,
         "average_duration_seconds": int(avg_duration),
         "total_cost_usd": round(total_cost, 2),
-        "active_agents_count": len(active_agents),
+        "active_agents_count": active_agents_count,
         "completion_rate": round((completed_calls / total_calls * 100) if total_calls > 0 else 0, 2),
+        "percentiles": percentiles,
     }
 
 
@@ -81,17 +72,11 @@ async def get_call_trends(
     workspace_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get call trends over time."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -103,40 +88,8 @@ async def get_call_trends(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get calls
-    calls = session.exec(
-        select(CallLog).where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= end_date,
-        )
-    ).all()
-    
-    # Group by date
-    daily_data = {}
-    for call in calls:
-        date_key = call.started_at.date().isoformat()
-        if date_key not in daily_data:
-            daily_data[date_key] = {
-                "date": date_key,
-                "total_calls": 0,
-                "completed_calls": 0,
-                "total_duration": 0,
-                "inbound": 0,
-                "outbound": 0,
-            }
-        
-        daily_data[date_key]["total_calls"] += 1
-        if call.status == "completed":
-            daily_data[date_key]["completed_calls"] += 1
-        daily_data[date_key]["total_duration"] += call.duration_seconds
-        if call.direction == "inbound":
-            daily_data[date_key]["inbound"] += 1
-        else:
-            daily_data[date_key]["outbound"] += 1
-    
-    # Convert to list and sort by date
-    trends = sorted(daily_data.values(), key=lambda x: x["date"])
+    # Group by date (sorted by date)
+    trends = await call_columns.daily_call_trends(session, workspace_id, start_date, end_date)
     
     return {
         "period_days": days,
@@ -149,17 +102,11 @@ async def get_agent_performance(
     workspace_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get agent performance metrics."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -171,41 +118,30 @@ async def get_agent_performance(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get agents
-    agents = session.exec(
-        select(Agent).where(Agent.workspace_id == workspace_id)
-    ).all()
+    # Get agents with their call totals (one grouped query)
+    agents = await call_columns.agent_call_totals(session, workspace_id, start_date, end_date)
+    percentiles_by_agent = await call_distributions.percentiles_by_agent(session, workspace_id, start_date, end_date)
+    no_values = call_distributions.empty_percentiles()
     
     agent_metrics = []
     for agent in agents:
-        # Get calls for this agent
-        calls = session.exec(
-            select(CallLog).where(
-                CallLog.agent_id == agent.id,
-                CallLog.started_at >= start_date,
-                CallLog.started_at <= end_date,
-            )
-        ).all()
-        
-        total_calls = len(calls)
-        completed_calls = len([c for c in calls if c.status == "completed"])
-        total_duration = sum([c.duration_seconds for c in calls])
+        total_calls = agent["total_calls"]
+        completed_calls = agent["completed_calls"]
+        total_duration = agent["total_duration"]
         avg_duration = total_duration / total_calls if total_calls > 0 else 0
-        
-        # Calculate sentiment scores
-        sentiment_scores = [c.sentiment_score for c in calls if c.sentiment_score is not None]
-        avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
+        avg_sentiment = agent["average_sentiment_score"] or 0
         
         agent_metrics.append({
-            "agent_id": agent.id,
-            "agent_name": agent.name,
-            "agent_type": agent.agent_type,
-            "status": agent.status,
+            "agent_id": agent["id"],
+            "agent_name": agent["name"],
+            "agent_type": agent["agent_type"],
+            "status": agent["status"],
             "total_calls": total_calls,
             "completed_calls": completed_calls,
             "completion_rate": round((completed_calls / total_calls * 100) if total_calls > 0 else 0, 2),
             "average_duration_seconds": int(avg_duration),
             "average_sentiment_score": round(avg_sentiment, 2),
+            "percentiles": percentiles_by_agent.get(agent["id"], no_values),
         })
     
     # Sort by total calls descending
@@ -217,23 +153,59 @@ async def get_agent_performance(
     }
 
 
+@router.get("/distributions")
+async def get_metric_distributions(
+    workspace_id: int = Query(...),
+    days: int = Query(30, ge=1, le=365),
+    agent_id: Optional[int] = Query(None),
+    quantiles: str = Query("0.5,0.9,0.99", description="comma-separated, each between 0 and 1"),
+    current_user: User = Depends(get_current_active_user),
+    session: AnyAsyncSession = Depends(get_async_session),
+):
+    """Get percentiles of call duration, handle time and turn latency."""
+    # Verify workspace access
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
+    
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied",
+        )
+    
+    try:
+        qs = sorted({float(q) for q in quantiles.split(",") if q.strip()})
+    except ValueError:
+        qs = []
+    if not qs or len(qs) > 20 or not all(0 <= q <= 1 for q in qs):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="quantiles must be 1-20 comma-separated numbers between 0 and 1",
+        )
+    
+    # Calculate date range
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+    
+    metrics = await call_distributions.percentiles(session, workspace_id, start_date, end_date, agent_id=agent_id, qs=qs)
+    
+    return {
+        "period_days": days,
+        "agent_id": agent_id,
+        "metrics": metrics,
+    }
+
+
 @router.get("/sentiment/distribution")
 async def get_sentiment_distribution(
     workspace_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
     agent_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get sentiment analysis distribution."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -245,35 +217,24 @@ async def get_sentiment_distribution(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Build query
-    query = select(CallLog).where(
-        CallLog.workspace_id == workspace_id,
-        CallLog.started_at >= start_date,
-        CallLog.started_at <= end_date,
-    )
-    
-    if agent_id:
-        query = query.where(CallLog.agent_id == agent_id)
-    
-    calls = session.exec(query).all()
+    totals = await call_columns.call_totals(session, workspace_id, start_date, end_date, agent_id=agent_id)
     
     # Calculate distribution
     sentiment_counts = {
-        "positive": len([c for c in calls if c.sentiment == "positive"]),
-        "neutral": len([c for c in calls if c.sentiment == "neutral"]),
-        "negative": len([c for c in calls if c.sentiment == "negative"]),
+        "positive": totals["positive"],
+        "neutral": totals["neutral"],
+        "negative": totals["negative"],
     }
     
-    total_calls = len(calls)
+    total_calls = totals["total_calls"]
     sentiment_percentages = {
         "positive": round((sentiment_counts["positive"] / total_calls * 100) if total_calls > 0 else 0, 2),
         "neutral": round((sentiment_counts["neutral"] / total_calls * 100) if total_calls > 0 else 0, 2),
         "negative": round((sentiment_counts["negative"] / total_calls * 100) if total_calls > 0 else 0, 2),
     }
     
-    # Calculate average sentiment score
-    sentiment_scores = [c.sentiment_score for c in calls if c.sentiment_score is not None]
-    avg_sentiment_score = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
+    # Average sentiment score (AVG skips calls without a score)
+    avg_sentiment_score = totals["average_sentiment_score"] or 0
     
     return {
         "period_days": days,
@@ -288,17 +249,11 @@ async def get_sentiment_distribution(
 async def get_usage_stats(
     workspace_id: int = Query(...),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get current usage statistics."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -310,23 +265,14 @@ async def get_usage_stats(
     now = datetime.utcnow()
     month_start = datetime(now.year, now.month, 1)
     
-    calls = session.exec(
-        select(CallLog).where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.started_at >= month_start,
-        )
-    ).all()
+    # Running monthly counters (see app.services.usage_meter), not a scan of the month's calls
+    usage = await usage_meter.live_usage(session, workspace_id)
     
-    total_minutes = sum([c.duration_seconds for c in calls]) / 60
-    total_calls_count = len(calls)
+    total_minutes = usage["minutes"]
+    total_calls_count = int(round(usage["calls"]))
     
     # Get active agents
-    active_agents = session.exec(
-        select(Agent).where(
-            Agent.workspace_id == workspace_id,
-            Agent.status == "active",
-        )
-    ).all()
+    active_agents_count = await call_metrics.count_active_agents(session, workspace_id)
     
     # Plan limits (hardcoded for now, should come from subscription)
     plan_limits = {
@@ -346,8 +292,11 @@ async def get_usage_stats(
             "minutes_percentage": round((total_minutes / plan_limits["minutes"] * 100), 2),
             "calls_count": total_calls_count,
             "calls_limit": plan_limits["calls"],
-            "active_agents": len(active_agents),
+            "active_agents": active_agents_count,
             "agents_limit": plan_limits["agents"],
+            "llm_tokens": int(round(usage["llm_tokens"])),
+            "tts_characters": int(round(usage["tts_characters"])),
+            "stt_seconds": round(usage["stt_seconds"], 2),
         },
     }
 
@@ -355,20 +304,70 @@ async def get_usage_stats(
 @router.post("/export")
 async def export_analytics(
     workspace_id: int = Query(...),
-    format: str = Query("csv", regex="^(csv|json)$"),
+    format: str = Query("csv", pattern="^(csv|json|ndjson|parquet)$"),
     days: int = Query(30, ge=1, le=365),
+    include_transcripts: bool = Query(False),
+    delivery: str = Query("auto", pattern="^(auto|stream|file)$"),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
-    """Export analytics data."""
+    """
+    Export the workspace's calls from the last ``days`` days.
+
+    ``stream`` sends the file as a chunked download; ``file`` starts a job and
+    returns 202 with its status URL; ``auto`` streams unless the window holds
+    more than EXPORT_STREAM_MAX_CALLS calls. ``json`` is newline-delimited JSON.
+    """
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
+    
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied",
+        )
+    
+    export_format = "ndjson" if format == "json" else format
+    call_export.check_format(export_format)
+    since = datetime.utcnow() - timedelta(days=days)
+    
+    if delivery == "auto":
+        # Estimated from the daily rollup, so deciding costs one small query
+        totals = await call_metrics.call_totals(session, call_metrics.metrics_window(workspace_id, since))
+        delivery = "file" if totals["total_calls"] > settings.EXPORT_STREAM_MAX_CALLS else "stream"
+    
+    if delivery == "file":
+        job = call_export.create_job(workspace_id, current_user.id, since, export_format, include_transcripts)
+        task = asyncio.create_task(asyncio.to_thread(call_export.run_job, job))
+        _export_tasks.add(task)
+        task.add_done_callback(_export_tasks.discard)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                **call_export.public_job(job),
+                "status_url": f"/api/analytics/export/{job['id']}",
+                "download_url": f"/api/analytics/export/{job['id']}/download",
+            },
         )
-    ).first()
+    
+    _, media_type, _ = call_export.FORMATS[export_format]
+    filename = call_export.export_filename(workspace_id, export_format)
+    return StreamingResponse(
+        call_export.export_chunks(workspace_id, since, export_format, include_transcripts),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _get_export_job(job_id: str, current_user: User, session: AnyAsyncSession) -> dict:
+    job = call_export.read_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found",
+        )
+    
+    membership = await get_workspace_access(session, job["workspace_id"], current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -376,11 +375,41 @@ async def export_analytics(
             detail="Access denied",
         )
     
-    # TODO: Generate export file
-    # For now, return a placeholder
+    return job
+
+
+@router.get("/export/{job_id}")
+async def get_export_status(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user),
+    session: AnyAsyncSession = Depends(get_async_session),
+):
+    """Get the status of an export job."""
+    job = await _get_export_job(job_id, current_user, session)
+    return call_export.public_job(job)
+
+
+@router.get("/export/{job_id}/download")
+async def download_export(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user),
+    session: AnyAsyncSession = Depends(get_async_session),
+):
+    """Download a completed export."""
+    job = await _get_export_job(job_id, current_user, session)
+    
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {job['status']}",
+        )
+    
+    path = call_export.job_file(job)
+    if not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export has expired",
+        )
     
-    return {
-        "message": "Export will be generated and sent to your email",
-        "format": format,
-        "days": days,
-    }
\ No newline at end of file
+    _, media_type, _ = call_export.FORMATS[job["format"]]
+    return FileResponse(path, media_type=media_type, filename=job["download_name"])
@@ -1,11 +1,11 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlmodel import select
 from pathlib import Path
 import uuid
 
-from app.db import get_session
+from app.db import AnyAsyncSession, get_async_session
 from app.core.security import (
     verify_password,
     get_password_hash,
@@ -14,7 +14,7 @@ from app.core.security import (
     decode_token,
     verify_token_type,
 )
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, invalidate_principals, oauth2_scheme
 from app.models.user import User, UserCreate, UserLogin, UserRead, Token, TokenRefresh, UserUpdate
 from app.models.workspace import Workspace, WorkspaceMembership
 from app.models.agent import Agent
@@ -25,13 +25,13 @@ router = APIRouter()
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Register a new user."""
     # Check if user already exists
-    existing_user = session.exec(
+    existing_user = (await session.exec(
         select(User).where(User.email == user_data.email)
-    ).first()
+    )).first()
     
     if existing_user:
         raise HTTPException(
@@ -55,8 +55,8 @@ async def register(
     )
     
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     
     # Create default workspace for user
     workspace = Workspace(
@@ -64,8 +64,8 @@ async def register(
         slug=f"{user.email.split('@')[0]}-workspace",
     )
     session.add(workspace)
-    session.commit()
-    session.refresh(workspace)
+    await session.commit()
+    await session.refresh(workspace)
     
     # Add user as owner of the workspace (no auto-created agents;
     # owners explicitly create or deploy agents they need).
@@ -77,7 +77,7 @@ async def register(
         joined_at=datetime.utcnow(),
     )
     session.add(membership)
-    session.commit()
+    await session.commit()
     
     return user
 
@@ -85,13 +85,13 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Login user and return access token."""
     # Find user
-    user = session.exec(
+    user = (await session.exec(
         select(User).where(User.email == form_data.username)
-    ).first()
+    )).first()
     
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
@@ -109,7 +109,8 @@ async def login(
     # Update last login
     user.last_login_at = datetime.utcnow()
     session.add(user)
-    session.commit()
+    await session.commit()
+    invalidate_principals(user_id=user.id)
     
     # Create tokens
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -121,7 +122,7 @@ async def login(
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     token_data: TokenRefresh,
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Refresh access token using refresh token."""
     payload = decode_token(token_data.refresh_token)
@@ -134,7 +135,7 @@ async def refresh_token(
             detail="Invalid token",
         )
     
-    user = session.get(User, int(user_id))
+    user = await session.get(User, int(user_id))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -160,25 +161,31 @@ async def get_current_user_info(
 async def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Update current user information."""
+    user = await session.get(User, current_user.id)
     update_data = user_update.dict(exclude_unset=True)
     
     for field, value in update_data.items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
-    current_user.updated_at = datetime.utcnow()
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    user.updated_at = datetime.utcnow()
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    invalidate_principals(user_id=user.id)
     
-    return current_user
+    return user
 
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_active_user)):
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_active_user),
+):
     """Logout user (client should discard tokens)."""
+    invalidate_principals(token=token)
     return {"message": "Successfully logged out"}
 
 
@@ -186,7 +193,7 @@ async def logout(current_user: User = Depends(get_current_active_user)):
 async def upload_avatar(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Upload and set the current user's avatar image.
     Stores file under backend/static/avatars and updates avatar_url.
@@ -213,9 +220,11 @@ async def upload_avatar(
     # Build URL served by StaticFiles
     avatar_url = f"/static/avatars/{filename}"
 
-    current_user.avatar_url = avatar_url
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    user = await session.get(User, current_user.id)
+    user.avatar_url = avatar_url
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    invalidate_principals(user_id=user.id)
 
-    return current_user
+    return user
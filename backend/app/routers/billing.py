@@ -10,11 +10,10 @@ from jose import jwt
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
 from sqlmodel import Session, select
-from fpdf import FPDF
 
 from app.db import get_session
 from app.core.config import settings
-from app.core.deps import get_current_active_user
+from app.core.deps import WorkspaceAccess, get_current_active_user, get_workspace_access_sync
 from app.models.user import User
 from app.models.workspace import WorkspaceMembership, Workspace
 from app.models.billing import (
@@ -25,11 +24,13 @@ from app.models.billing import (
     UsageStat,
     UsageStatRead,
     UsageStatCreate,
+    UsageRecorded,
     PaymentMethod,
     PaymentMethodRead,
     PaymentMethodUpdate,
 )
 from app.models.notification import Notification
+from app.services.usage_meter import PERIODS, period_start, usage_meter
 from pydantic import BaseModel
 
 
@@ -161,14 +162,8 @@ async def list_plans(current_user: User = Depends(get_current_active_user)):
     return {"plans": list(PLAN_CATALOG.values())}
 
 
-def _require_membership(session: Session, workspace_id: int, user_id: int, owner_only: bool = False) -> WorkspaceMembership:
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == user_id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+def _require_membership(session: Session, workspace_id: int, user_id: int, owner_only: bool = False) -> WorkspaceAccess:
+    membership = get_workspace_access_sync(session, workspace_id, user_id)
     if not membership:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -286,6 +281,9 @@ def _render_invoice_pdf(invoice: Invoice, workspace: Workspace, billed_user: Opt
     Render a structured, branded PDF for the invoice using FPDF.
     The layout mirrors a polished SaaS invoice with clear hierarchy and spacing.
     """
+    # Imported here: fpdf (and fontTools) add ~0.25s to worker boot.
+    from fpdf import FPDF
+
     pdf = FPDF(format="A4")
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
@@ -731,7 +729,7 @@ async def get_usage_stats(
     current_user: User = Depends(get_current_active_user),
     session: Session = Depends(get_session),
 ):
-    """Get usage statistics."""
+    """Get usage statistics (running counters include usage not yet flushed)."""
     _require_membership(session, workspace_id, current_user.id)
     
     usage_stats = session.exec(
@@ -739,18 +737,44 @@ async def get_usage_stats(
         .where(UsageStat.workspace_id == workspace_id)
         .order_by(UsageStat.created_at.desc())
     ).all()
-    
-    return usage_stats
+
+    unflushed = usage_meter.unflushed_by_counter(workspace_id)
+    results = []
+    for usage in usage_stats:
+        row = UsageStatRead.model_validate(usage)
+        if usage.period_start is not None:
+            row.value += unflushed.pop((usage.metric, usage.period, usage.period_start), 0.0)
+        results.append(row)
+    # Counters this worker has usage for but that haven't been written yet
+    for (metric, period, start), value in unflushed.items():
+        results.insert(
+            0,
+            UsageStatRead(
+                workspace_id=workspace_id,
+                metric=metric,
+                value=value,
+                period=period,
+                period_start=start,
+                created_at=datetime.utcnow(),
+            ),
+        )
+    return results
 
 
-@router.post("/usage", response_model=UsageStatRead, status_code=status.HTTP_201_CREATED)
+@router.post("/usage", response_model=UsageRecorded, status_code=status.HTTP_202_ACCEPTED)
 async def record_usage(
     workspace_id: int = Query(...),
     payload: UsageStatCreate = Body(...),
     current_user: User = Depends(get_current_active_user),
     session: Session = Depends(get_session),
 ):
-    """Record a usage event for billing/analytics."""
+    """
+    Record a usage event for billing/analytics.
+
+    The event is added to the workspace's counter for the current period in
+    memory and written to usage_stats with the next batch (see
+    app.services.usage_meter); the response carries the running total.
+    """
     _require_membership(session, workspace_id, current_user.id)
 
     if payload.value < 0:
@@ -758,17 +782,22 @@ async def record_usage(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Usage value cannot be negative",
         )
+    if payload.period not in PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Usage period must be one of: {', '.join(PERIODS)}",
+        )
 
-    usage = UsageStat(
+    usage_meter.record(workspace_id, payload.metric, payload.value, payload.period)
+    live = usage_meter.live_usage_sync(session, workspace_id, payload.period)
+    return UsageRecorded(
         workspace_id=workspace_id,
         metric=payload.metric,
-        value=payload.value,
         period=payload.period,
+        period_start=period_start(payload.period),
+        recorded=payload.value,
+        value=live.get(payload.metric, 0.0),
     )
-    session.add(usage)
-    session.commit()
-    session.refresh(usage)
-    return usage
 
 
 @router.post("/invoices/generate", response_model=InvoiceRead, status_code=status.HTTP_201_CREATED)
@@ -878,13 +907,7 @@ async def create_invoice(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Billed user not found",
             )
-        billed_membership = session.exec(
-            select(WorkspaceMembership).where(
-                WorkspaceMembership.workspace_id == workspace_id,
-                WorkspaceMembership.user_id == payload.billed_to_user_id,
-                WorkspaceMembership.status == "active",
-            )
-        ).first()
+        billed_membership = get_workspace_access_sync(session, workspace_id, payload.billed_to_user_id)
         if not billed_membership:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
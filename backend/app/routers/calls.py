@@ -1,22 +1,25 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select, func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlmodel import select, func
 
-from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.db import AnyAsyncSession, get_async_session
+from app.core.deps import get_current_active_user, get_workspace_access
+from app.core.pagination import finish_page, paginate
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.call import (
     CallLog,
     CallLogCreate,
     CallLogUpdate,
     CallLogRead,
+    CallLogSummary,
+    CallLogListItem,
     CallInitiate,
     CallSessionCreate,
     CallSessionResponse,
 )
 from app.models.agent import Agent
+from app.services import call_metrics
 from app.services.call_sessions import call_session_manager
 from app.services.language import resolve_language_code
 from app.models.workspace import Workspace
@@ -24,26 +27,34 @@ from app.models.workspace import Workspace
 router = APIRouter()
 
 
-@router.get("", response_model=List[CallLogRead])
+# Columns each list view selects; transcripts are only served by /{call_id}/transcript
+LIST_VIEWS = {
+    "summary": CallLogSummary,
+    "full": CallLogListItem,
+}
+
+
+def _list_columns(schema: type) -> list:
+    return [getattr(CallLog, name) for name in schema.model_fields]
+
+
+@router.get("", response_model=List[Union[CallLogListItem, CallLogSummary]])
 async def list_calls(
+    response: Response,
     workspace_id: int = Query(...),
     agent_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
     direction: Optional[str] = Query(None),
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
-    """List call logs with filters and pagination."""
+    """List call logs with filters and pagination (without transcripts); see app.core.pagination."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -51,8 +62,9 @@ async def list_calls(
             detail="Access denied to workspace",
         )
     
-    # Build query
-    query = select(CallLog).where(CallLog.workspace_id == workspace_id)
+    # Build query over the view's columns only
+    schema = LIST_VIEWS[view]
+    query = select(*_list_columns(schema)).where(CallLog.workspace_id == workspace_id)
     
     if agent_id:
         query = query.where(CallLog.agent_id == agent_id)
@@ -61,38 +73,29 @@ async def list_calls(
     if direction:
         query = query.where(CallLog.direction == direction)
     
-    # Order by most recent first
-    query = query.order_by(CallLog.started_at.desc())
-    
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Most recent first; cursor (keyset) or skip/limit pagination
+    query = paginate(query, CallLog.started_at, CallLog.id, cursor, skip, limit)
     
-    calls = session.exec(query).all()
-    return calls
+    rows = finish_page((await session.exec(query)).all(), limit, "started_at", response)
+    return [schema.model_validate(row._mapping) for row in rows]
 
 
 @router.post("", response_model=CallLogRead, status_code=status.HTTP_201_CREATED)
 async def initiate_call(
     call_data: CallInitiate,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Initiate an outbound call."""
     # Get agent and verify workspace access
-    agent = session.get(Agent, call_data.agent_id)
+    agent = await session.get(Agent, call_data.agent_id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found",
         )
     
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, agent.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -113,8 +116,8 @@ async def initiate_call(
     session.add(call_log)
     agent.total_calls = (agent.total_calls or 0) + 1
     session.add(agent)
-    session.commit()
-    session.refresh(call_log)
+    await session.commit()
+    await session.refresh(call_log)
     
     # TODO: Integrate with Twilio to initiate actual call
     # from app.services.twilio_service import initiate_call
@@ -130,23 +133,17 @@ async def initiate_call(
 async def create_live_call_session(
     call_data: CallSessionCreate,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Create a live voice session that streams audio over WebSocket."""
-    agent = session.get(Agent, call_data.agent_id)
+    agent = await session.get(Agent, call_data.agent_id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found",
         )
 
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == agent.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, agent.workspace_id, current_user.id)
 
     if not membership:
         raise HTTPException(
@@ -167,8 +164,8 @@ async def create_live_call_session(
     # Keep a lightweight counter so UI cards can reflect activity immediately
     agent.total_calls = (agent.total_calls or 0) + 1
     session.add(agent)
-    session.commit()
-    session.refresh(call_log)
+    await session.commit()
+    await session.refresh(call_log)
 
     system_prompts = [f"You are {agent.name}, a {agent.agent_type} AI voice agent."]
     if agent.goal:
@@ -217,7 +214,7 @@ async def create_live_call_session(
 @router.post("/sessions/live/public", response_model=CallSessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_public_live_call_session(
     call_data: CallSessionCreate,
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """
     Create a live voice session without authentication (demo/public).
@@ -228,9 +225,9 @@ async def create_public_live_call_session(
     """
     agent: Optional[Agent] = None
     if call_data.agent_id:
-        agent = session.get(Agent, call_data.agent_id)
+        agent = await session.get(Agent, call_data.agent_id)
     if not agent:
-        agent = session.exec(select(Agent).order_by(Agent.id.desc())).first()
+        agent = (await session.exec(select(Agent).order_by(Agent.id.desc()))).first()
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -249,8 +246,8 @@ async def create_public_live_call_session(
     session.add(call_log)
     agent.total_calls = (agent.total_calls or 0) + 1
     session.add(agent)
-    session.commit()
-    session.refresh(call_log)
+    await session.commit()
+    await session.refresh(call_log)
 
     system_prompts = [f"You are {agent.name}, a {agent.agent_type} AI voice agent."]
     if agent.goal:
@@ -301,10 +298,10 @@ async def create_public_live_call_session(
 async def get_call(
     call_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get call details."""
-    call = session.get(CallLog, call_id)
+    call = await session.get(CallLog, call_id)
     if not call:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -312,13 +309,7 @@ async def get_call(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == call.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, call.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -334,10 +325,10 @@ async def update_call(
     call_id: int,
     call_update: CallLogUpdate,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Update call log."""
-    call = session.get(CallLog, call_id)
+    call = await session.get(CallLog, call_id)
     if not call:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -345,13 +336,7 @@ async def update_call(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == call.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, call.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -365,8 +350,8 @@ async def update_call(
         setattr(call, field, value)
     
     session.add(call)
-    session.commit()
-    session.refresh(call)
+    await session.commit()
+    await session.refresh(call)
     
     return call
 
@@ -375,10 +360,10 @@ async def update_call(
 async def delete_call(
     call_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Delete call log."""
-    call = session.get(CallLog, call_id)
+    call = await session.get(CallLog, call_id)
     if not call:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -386,13 +371,7 @@ async def delete_call(
         )
     
     # Verify workspace access (admin or owner)
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == call.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, call.workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -400,8 +379,8 @@ async def delete_call(
             detail="Requires admin access",
         )
     
-    session.delete(call)
-    session.commit()
+    await session.delete(call)
+    await session.commit()
     
     return None
 
@@ -410,10 +389,10 @@ async def delete_call(
 async def get_call_transcript(
     call_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get call transcript."""
-    call = session.get(CallLog, call_id)
+    call = await session.get(CallLog, call_id)
     if not call:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -421,13 +400,7 @@ async def get_call_transcript(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == call.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, call.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -448,10 +421,10 @@ async def get_call_transcript(
 async def get_call_recording(
     call_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get call recording URL."""
-    call = session.get(CallLog, call_id)
+    call = await session.get(CallLog, call_id)
     if not call:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -459,13 +432,7 @@ async def get_call_recording(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == call.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, call.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -491,17 +458,11 @@ async def get_call_stats(
     workspace_id: int = Query(...),
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get call statistics overview."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -513,30 +474,26 @@ async def get_call_stats(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get calls in date range
-    calls = session.exec(
-        select(CallLog).where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= end_date,
-        )
-    ).all()
+    # Aggregate calls in date range
+    totals = await call_metrics.call_totals(
+        session, call_metrics.metrics_window(workspace_id, start_date, end_date)
+    )
     
-    total_calls = len(calls)
-    completed_calls = len([c for c in calls if c.status == "completed"])
-    total_duration = sum([c.duration_seconds for c in calls])
+    total_calls = totals["total_calls"]
+    completed_calls = totals["completed_calls"]
+    total_duration = totals["total_duration"]
     avg_duration = total_duration / total_calls if total_calls > 0 else 0
     
     # Calculate sentiment distribution
     sentiment_counts = {
-        "positive": len([c for c in calls if c.sentiment == "positive"]),
-        "neutral": len([c for c in calls if c.sentiment == "neutral"]),
-        "negative": len([c for c in calls if c.sentiment == "negative"]),
+        "positive": totals["positive"],
+        "neutral": totals["neutral"],
+        "negative": totals["negative"],
     }
     
     # Direction breakdown
-    inbound_calls = len([c for c in calls if c.direction == "inbound"])
-    outbound_calls = len([c for c in calls if c.direction == "outbound"])
+    inbound_calls = totals["inbound_calls"]
+    outbound_calls = totals["outbound_calls"]
     
     return {
         "period_days": days,
@@ -553,7 +510,7 @@ async def get_call_stats(
 @router.post("/webhook/twilio")
 async def twilio_webhook(
     # Twilio sends form data
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Handle Twilio webhook for call events."""
     # TODO: Implement Twilio webhook handling
@@ -0,0 +1,358 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import insert, update
+from sqlmodel import Session, select, func
+
+from app.db import get_session
+from app.core.deps import WorkspaceAccess, get_current_active_user, get_workspace_access_sync
+from app.models.user import User
+from app.models.agent import Agent
+from app.models.campaign import (
+    Campaign,
+    CampaignCreate,
+    CampaignUpdate,
+    CampaignRead,
+    CampaignLead,
+    CampaignLeadRead,
+    CampaignLeadsImport,
+)
+from app.services.campaign_dialer import campaign_dialer, parse_clock, resolve_timezone
+
+router = APIRouter()
+
+MAX_LEADS_PER_IMPORT = 50000
+
+
+def _require_membership(session: Session, workspace_id: int, user_id: int, admin_only: bool = False) -> WorkspaceAccess:
+    membership = get_workspace_access_sync(session, workspace_id, user_id)
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to workspace",
+        )
+    if admin_only and membership.role not in ["owner", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Requires admin access",
+        )
+    return membership
+
+
+def _get_campaign(session: Session, campaign_id: int, user_id: int, admin_only: bool = False) -> Campaign:
+    campaign = session.get(Campaign, campaign_id)
+    if not campaign:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found",
+        )
+    _require_membership(session, campaign.workspace_id, user_id, admin_only=admin_only)
+    return campaign
+
+
+def _validate_schedule(timezone: Optional[str], window_start: Optional[str], window_end: Optional[str]) -> None:
+    if timezone is not None:
+        try:
+            resolve_timezone(timezone)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(exc),
+            )
+    for value in (window_start, window_end):
+        if value is None:
+            continue
+        try:
+            parse_clock(value)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid call window time '{value}', expected HH:MM",
+            )
+
+
+def _lead_counts(session: Session, campaign_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    counts: Dict[int, Dict[str, int]] = {campaign_id: {} for campaign_id in campaign_ids}
+    if not campaign_ids:
+        return counts
+    rows = session.exec(
+        select(CampaignLead.campaign_id, CampaignLead.status, func.count())
+        .where(CampaignLead.campaign_id.in_(campaign_ids))
+        .group_by(CampaignLead.campaign_id, CampaignLead.status)
+    ).all()
+    for campaign_id, lead_status, count in rows:
+        counts[campaign_id][lead_status] = count
+    return counts
+
+
+def _to_read(campaign: Campaign, lead_counts: Dict[str, int]) -> CampaignRead:
+    return CampaignRead(**campaign.model_dump(), lead_counts=lead_counts)
+
+
+@router.get("", response_model=List[CampaignRead])
+async def list_campaigns(
+    workspace_id: int = Query(...),
+    campaign_status: Optional[str] = Query(None, alias="status"),
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """List outbound campaigns in a workspace with lead counts per status."""
+    _require_membership(session, workspace_id, current_user.id)
+
+    query = select(Campaign).where(Campaign.workspace_id == workspace_id)
+    if campaign_status:
+        query = query.where(Campaign.status == campaign_status)
+    campaigns = session.exec(query.order_by(Campaign.created_at.desc())).all()
+
+    counts = _lead_counts(session, [campaign.id for campaign in campaigns])
+    return [_to_read(campaign, counts[campaign.id]) for campaign in campaigns]
+
+
+@router.post("", response_model=CampaignRead, status_code=status.HTTP_201_CREATED)
+async def create_campaign(
+    campaign_data: CampaignCreate,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Create a draft outbound campaign for one of the workspace's agents."""
+    _require_membership(session, campaign_data.workspace_id, current_user.id)
+
+    agent = session.get(Agent, campaign_data.agent_id)
+    if not agent or agent.workspace_id != campaign_data.workspace_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Agent not found",
+        )
+    _validate_schedule(campaign_data.timezone, campaign_data.call_window_start, campaign_data.call_window_end)
+
+    campaign = Campaign(**campaign_data.model_dump(), created_by=current_user.id)
+    session.add(campaign)
+    session.commit()
+    session.refresh(campaign)
+
+    return _to_read(campaign, {})
+
+
+@router.get("/{campaign_id}", response_model=CampaignRead)
+async def get_campaign(
+    campaign_id: int,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Get campaign details."""
+    campaign = _get_campaign(session, campaign_id, current_user.id)
+    return _to_read(campaign, _lead_counts(session, [campaign.id])[campaign.id])
+
+
+@router.patch("/{campaign_id}", response_model=CampaignRead)
+async def update_campaign(
+    campaign_id: int,
+    campaign_update: CampaignUpdate,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Update campaign settings (takes effect on the dialer's next tick)."""
+    campaign = _get_campaign(session, campaign_id, current_user.id)
+    if campaign.status in ("completed", "cancelled"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campaign is {campaign.status}",
+        )
+
+    update_data = campaign_update.model_dump(exclude_unset=True)
+    _validate_schedule(
+        update_data.get("timezone"),
+        update_data.get("call_window_start"),
+        update_data.get("call_window_end"),
+    )
+    for field, value in update_data.items():
+        setattr(campaign, field, value)
+    campaign.updated_at = datetime.utcnow()
+
+    session.add(campaign)
+    session.commit()
+    session.refresh(campaign)
+
+    return _to_read(campaign, _lead_counts(session, [campaign.id])[campaign.id])
+
+
+@router.post("/{campaign_id}/leads", status_code=status.HTTP_201_CREATED)
+async def import_leads(
+    campaign_id: int,
+    payload: CampaignLeadsImport,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Queue leads for dialing. Rows are inserted in a single bulk statement."""
+    campaign = _get_campaign(session, campaign_id, current_user.id)
+    if campaign.status in ("completed", "cancelled"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campaign is {campaign.status}",
+        )
+    if len(payload.leads) > MAX_LEADS_PER_IMPORT:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_LEADS_PER_IMPORT} leads per import",
+        )
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "campaign_id": campaign.id,
+            "workspace_id": campaign.workspace_id,
+            "phone_number": lead.phone_number.strip(),
+            "name": lead.name,
+            "lead_ref": lead.lead_ref,
+            "priority": lead.priority,
+            "lead_data": lead.lead_data,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for lead in payload.leads
+        if lead.phone_number and lead.phone_number.strip()
+    ]
+    if rows:
+        session.execute(insert(CampaignLead), rows)
+        session.commit()
+        if campaign.status == "running":
+            campaign_dialer.wake()
+
+    return {"campaign_id": campaign.id, "queued": len(rows), "skipped": len(payload.leads) - len(rows)}
+
+
+@router.get("/{campaign_id}/leads", response_model=List[CampaignLeadRead])
+async def list_leads(
+    campaign_id: int,
+    lead_status: Optional[str] = Query(None, alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """List a campaign's queued leads with pagination."""
+    campaign = _get_campaign(session, campaign_id, current_user.id)
+
+    query = select(CampaignLead).where(CampaignLead.campaign_id == campaign.id)
+    if lead_status:
+        query = query.where(CampaignLead.status == lead_status)
+    query = query.order_by(CampaignLead.id).offset(skip).limit(limit)
+
+    return session.exec(query).all()
+
+
+@router.post("/{campaign_id}/start", response_model=CampaignRead)
+async def start_campaign(
+    campaign_id: int,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Start (or resume) dialing. Pacing is handled by the campaign dialer."""
+    campaign = _get_campaign(session, campaign_id, current_user.id, admin_only=True)
+    if campaign.status not in ("draft", "paused"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campaign is {campaign.status}",
+        )
+
+    counts = _lead_counts(session, [campaign.id])[campaign.id]
+    if not counts.get("pending") and not counts.get("dialing"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Campaign has no leads to dial",
+        )
+
+    now = datetime.utcnow()
+    campaign.status = "running"
+    campaign.started_at = campaign.started_at or now
+    campaign.updated_at = now
+    session.add(campaign)
+    session.commit()
+    session.refresh(campaign)
+
+    campaign_dialer.wake()
+
+    return _to_read(campaign, counts)
+
+
+@router.post("/{campaign_id}/pause", response_model=CampaignRead)
+async def pause_campaign(
+    campaign_id: int,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Stop placing new calls. Calls already in flight finish normally."""
+    campaign = _get_campaign(session, campaign_id, current_user.id, admin_only=True)
+    if campaign.status != "running":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campaign is {campaign.status}",
+        )
+
+    campaign.status = "paused"
+    campaign.updated_at = datetime.utcnow()
+    session.add(campaign)
+    session.commit()
+    session.refresh(campaign)
+
+    return _to_read(campaign, _lead_counts(session, [campaign.id])[campaign.id])
+
+
+@router.post("/{campaign_id}/cancel", response_model=CampaignRead)
+async def cancel_campaign(
+    campaign_id: int,
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """Cancel a campaign and drop every lead that has not been dialed yet."""
+    campaign = _get_campaign(session, campaign_id, current_user.id, admin_only=True)
+    if campaign.status in ("completed", "cancelled"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campaign is {campaign.status}",
+        )
+
+    now = datetime.utcnow()
+    session.execute(
+        update(CampaignLead)
+        .where(CampaignLead.campaign_id == campaign.id, CampaignLead.status == "pending")
+        .values(status="cancelled", updated_at=now)
+    )
+    campaign.status = "cancelled"
+    campaign.completed_at = now
+    campaign.updated_at = now
+    session.add(campaign)
+    session.commit()
+    session.refresh(campaign)
+
+    return _to_read(campaign, _lead_counts(session, [campaign.id])[campaign.id])
+
+
+@router.post("/calls/{call_id}/result")
+async def report_call_result(
+    call_id: int,
+    outcome: str = Query(..., pattern="^(completed|voicemail|no-answer|busy|failed)$"),
+    duration_seconds: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Report the outcome of a campaign call placed by a driver that finishes asynchronously.
+    """
+    lead = session.exec(select(CampaignLead).where(CampaignLead.last_call_id == call_id)).first()
+    if not lead:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign call not found",
+        )
+    _require_membership(session, lead.workspace_id, current_user.id)
+
+    if not campaign_dialer.report_result(call_id, outcome, duration_seconds):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Call is not in flight on this server",
+        )
+    return {"call_id": call_id, "outcome": outcome, "accepted": True}
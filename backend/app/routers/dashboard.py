@@ -1,16 +1,23 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlmodel import Session, select, func
-
-from app.core.deps import get_current_active_user
-from app.db import get_session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import select
+
+from app.core.cache import SingleFlight, TTLCache
+from app.core.config import settings
+from app.core.deps import WorkspaceAccess, get_current_active_user, get_workspace_access
+from app.db import AnyAsyncSession, get_async_session
 from app.models.agent import Agent
 from app.models.call import CallLog
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
+from app.services import call_metrics
 
 router = APIRouter()
 
@@ -65,16 +72,37 @@ class DashboardOverview(BaseModel):
     updated_at: datetime
 
 
-def _require_workspace_membership(
-    session: Session, workspace_id: int, user: User
-) -> WorkspaceMembership:
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+# CallLog columns of a DashboardCall (agent_name comes from the workspace's agents)
+_CALL_COLUMNS = (
+    CallLog.id,
+    CallLog.caller_name,
+    CallLog.caller_number,
+    CallLog.agent_id,
+    CallLog.duration_seconds,
+    CallLog.status,
+    CallLog.sentiment,
+    CallLog.started_at,
+)
+
+
+def _dashboard_call(call: Any, agent_names: Dict[int, str]) -> DashboardCall:
+    return DashboardCall(
+        id=call.id,
+        caller_name=call.caller_name,
+        caller_number=call.caller_number,
+        agent_id=call.agent_id,
+        agent_name=agent_names.get(call.agent_id),
+        duration_seconds=call.duration_seconds,
+        status=call.status,
+        sentiment=call.sentiment,
+        started_at=call.started_at,
+    )
+
+
+async def _require_workspace_membership(
+    session: AnyAsyncSession, workspace_id: int, user: User
+) -> WorkspaceAccess:
+    membership = await get_workspace_access(session, workspace_id, user.id)
     if not membership:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -83,95 +111,71 @@ def _require_workspace_membership(
     return membership
 
 
-@router.get("/overview", response_model=DashboardOverview)
-async def get_dashboard_overview(
-    workspace_id: int = Query(...),
-    days: int = Query(30, ge=1, le=365),
-    recent_limit: int = Query(5, ge=1, le=25),
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
-):
-    """Return aggregated stats, recent calls, and active agents for the dashboard."""
-    _require_workspace_membership(session, workspace_id, current_user)
+# Assembled overviews per (workspace_id, days, recent_limit); see invalidate_dashboard()
+overview_cache = TTLCache(settings.DASHBOARD_CACHE_TTL_SECONDS, max_entries=2_000)
+_overview_flight = SingleFlight()
+# Bumped on invalidation so a computation that started before it is not cached
+_workspace_generation: Dict[int, int] = {}
 
-    now = datetime.utcnow()
+
+@call_metrics.on_calls_committed
+def invalidate_dashboard(workspace_ids: Set[int]) -> None:
+    """Drop cached overviews of workspaces whose calls changed."""
+    for workspace_id in workspace_ids:
+        _workspace_generation[workspace_id] = _workspace_generation.get(workspace_id, 0) + 1
+    overview_cache.discard_where(lambda key, _: key[0] in workspace_ids)
+
+
+async def _load_overview_inputs(
+    session: AnyAsyncSession, workspace_id: int, days: int, recent_limit: int, now: datetime
+) -> Tuple[Dict[str, Any], Dict[int, int], List[Any], List[DashboardCall]]:
+    """Rollup totals, calls per agent, agent rows and recent calls behind an overview."""
     start_date = now - timedelta(days=days)
 
-    # Aggregate call metrics for the period
-    total_calls = session.exec(
-        select(func.count())
-        .select_from(CallLog)
-        .where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= now,
-        )
-    ).one()
-
-    total_duration = session.exec(
-        select(func.coalesce(func.sum(CallLog.duration_seconds), 0))
-        .where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= now,
-        )
-    ).one()
-
-    completed_calls = session.exec(
-        select(func.count())
-        .select_from(CallLog)
-        .where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.status == "completed",
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= now,
-        )
-    ).one()
-
-    inbound_calls = session.exec(
-        select(func.count())
-        .select_from(CallLog)
-        .where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.direction == "inbound",
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= now,
-        )
-    ).one()
-
-    outbound_calls = session.exec(
-        select(func.count())
-        .select_from(CallLog)
-        .where(
-            CallLog.workspace_id == workspace_id,
-            CallLog.direction == "outbound",
-            CallLog.started_at >= start_date,
-            CallLog.started_at <= now,
-        )
-    ).one()
+    # Call totals and per-agent call counts for the period (one grouped rollup query)
+    totals, call_counts_by_agent = await call_metrics.call_totals_by_agent(
+        session, call_metrics.metrics_window(workspace_id, start_date, now)
+    )
 
-    average_call_duration = int(total_duration / total_calls) if total_calls else 0
+    # Agents (only the columns the cards show)
+    agents = (await session.exec(
+        select(
+            Agent.id,
+            Agent.name,
+            Agent.status,
+            Agent.language,
+            Agent.average_handle_time,
+            Agent.sentiment_score,
+        ).where(Agent.workspace_id == workspace_id)
+    )).all()
 
-    # Agents and per-agent call counts
-    agents = session.exec(
-        select(Agent).where(Agent.workspace_id == workspace_id)
-    ).all()
-    agent_ids = [a.id for a in agents if a.id is not None]
-    call_counts_by_agent: dict[int, int] = {}
-    if agent_ids:
-        rows = session.exec(
-            select(CallLog.agent_id, func.count(CallLog.id))
-            .where(
-                CallLog.workspace_id == workspace_id,
-                CallLog.agent_id.in_(agent_ids),
-                CallLog.started_at >= start_date,
-                CallLog.started_at <= now,
-            )
-            .group_by(CallLog.agent_id)
-        ).all()
-        call_counts_by_agent = {
-            agent_id: count for agent_id, count in rows if agent_id is not None
-        }
+    agent_name_map = {a.id: a.name for a in agents if a.id is not None}
+    recent_calls = (await session.exec(
+        select(*_CALL_COLUMNS)
+        .where(CallLog.workspace_id == workspace_id)
+        .order_by(CallLog.started_at.desc())
+        .limit(recent_limit)
+    )).all()
+    recent_call_payloads = [_dashboard_call(call, agent_name_map) for call in recent_calls]
+    return totals, call_counts_by_agent, agents, recent_call_payloads
+
+
+def _assemble_overview(
+    workspace_id: int,
+    days: int,
+    totals: Dict[str, Any],
+    call_counts_by_agent: Dict[int, int],
+    agents: List[Any],
+    recent_calls: List[DashboardCall],
+    now: datetime,
+) -> DashboardOverview:
+    total_calls = totals["total_calls"]
+    total_duration = totals["total_duration"]
+    completed_calls = totals["completed_calls"]
+    inbound_calls = totals["inbound_calls"]
+    outbound_calls = totals["outbound_calls"]
+
+    average_call_duration = int(total_duration / total_calls) if total_calls else 0
 
     handle_times = [
         a.average_handle_time for a in agents if a.average_handle_time is not None
@@ -195,28 +199,6 @@ async def get_dashboard_overview(
     ]
     active_agents.sort(key=lambda agent: agent.calls, reverse=True)
 
-    agent_name_map = {a.id: a.name for a in agents if a.id is not None}
-    recent_calls = session.exec(
-        select(CallLog)
-        .where(CallLog.workspace_id == workspace_id)
-        .order_by(CallLog.started_at.desc())
-        .limit(recent_limit)
-    ).all()
-    recent_call_payloads = [
-        DashboardCall(
-            id=call.id,
-            caller_name=call.caller_name,
-            caller_number=call.caller_number,
-            agent_id=call.agent_id,
-            agent_name=agent_name_map.get(call.agent_id),
-            duration_seconds=call.duration_seconds,
-            status=call.status,
-            sentiment=call.sentiment,
-            started_at=call.started_at,
-        )
-        for call in recent_calls
-    ]
-
     stats = DashboardStats(
         active_agents=len(active_agents),
         total_calls=total_calls,
@@ -232,7 +214,410 @@ async def get_dashboard_overview(
         workspace_id=workspace_id,
         period_days=days,
         stats=stats,
-        recent_calls=recent_call_payloads,
+        recent_calls=recent_calls,
         active_agents=active_agents,
         updated_at=now,
     )
+
+
+async def _build_overview(
+    session: AnyAsyncSession, workspace_id: int, days: int, recent_limit: int
+) -> DashboardOverview:
+    now = datetime.utcnow()
+    inputs = await _load_overview_inputs(session, workspace_id, days, recent_limit, now)
+    return _assemble_overview(workspace_id, days, *inputs, now)
+
+
+@router.get("/overview", response_model=DashboardOverview)
+async def get_dashboard_overview(
+    workspace_id: int = Query(...),
+    days: int = Query(30, ge=1, le=365),
+    recent_limit: int = Query(5, ge=1, le=25),
+    current_user: User = Depends(get_current_active_user),
+    session: AnyAsyncSession = Depends(get_async_session),
+):
+    """Return aggregated stats, recent calls, and active agents for the dashboard."""
+    await _require_workspace_membership(session, workspace_id, current_user)
+
+    key = (workspace_id, days, recent_limit)
+    overview = overview_cache.get(key)
+    if overview is not None:
+        return overview
+
+    async def compute() -> DashboardOverview:
+        generation = _workspace_generation.get(workspace_id, 0)
+        # Its own session: the flight outlives this request if the client that started it leaves
+        async with asynccontextmanager(get_async_session)() as flight_session:
+            result = await _build_overview(flight_session, workspace_id, days, recent_limit)
+        if _workspace_generation.get(workspace_id, 0) == generation:
+            overview_cache.set(key, result)
+        return result
+
+    # Concurrent viewers of the same dashboard share one computation
+    return await _overview_flight.run(key, compute)
+
+
+# --- live feed (/ws/dashboard) ---------------------------------------------
+
+# Calls listed as active on the live dashboard
+ACTIVE_CALL_STATUSES = ("queued", "in-progress")
+_ACTIVE_CALLS_LIMIT = 50
+# Messages a subscriber may fall behind by before its backlog is replaced with a snapshot
+_SUBSCRIBER_BACKLOG = 256
+# Changes committed within this long of each other go out as one delta
+_COALESCE_SECONDS = 0.05
+_CALL_FIELDS = tuple(column.key for column in _CALL_COLUMNS)
+
+
+def _without_time(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in state.items() if key != "updated_at"}
+
+
+class DashboardFeed:
+    """
+    Live overview of one workspace and window, pushed to /ws/dashboard subscribers.
+
+    Keeps the overview's inputs (rollup totals, calls per agent, agents, recent
+    and active calls) in memory, applies committed call changes to them and
+    publishes what changed as deltas numbered by ``seq``. A subscriber that sees
+    a gap asks to resync: the deltas it missed are replayed while they are still
+    held, otherwise it gets a new snapshot. The overview is also re-read every
+    DASHBOARD_FEED_REFRESH_SECONDS (other workers' writes, agent changes, the
+    window moving on at midnight) and republished as a snapshot if it differs.
+    """
+
+    def __init__(self, workspace_id: int, days: int, recent_limit: int):
+        self.workspace_id = workspace_id
+        self.days = days
+        self.recent_limit = recent_limit
+        self.seq = 0
+        self.state: Optional[Dict[str, Any]] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=settings.DASHBOARD_FEED_HISTORY)
+        self._totals: Dict[str, Any] = {}
+        self._calls_by_agent: Dict[int, int] = {}
+        self._agents: List[Any] = []
+        self._agent_names: Dict[int, str] = {}
+        self._recent: Dict[int, DashboardCall] = {}
+        self._active: Dict[int, DashboardCall] = {}
+        self._lock = asyncio.Lock()
+        self._loading = False
+        self._missed = False
+        self._reload_scheduled = False
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        """Read the overview from the database; publishes it as a snapshot if it changed."""
+        async with self._lock:
+            self._loading, self._missed = True, False
+            try:
+                now = datetime.utcnow()
+                async with asynccontextmanager(get_async_session)() as session:
+                    totals, calls_by_agent, agents, recent = await _load_overview_inputs(
+                        session, self.workspace_id, self.days, self.recent_limit, now
+                    )
+                    active = (await session.exec(
+                        select(*_CALL_COLUMNS)
+                        .where(CallLog.workspace_id == self.workspace_id, CallLog.status.in_(ACTIVE_CALL_STATUSES))
+                        .order_by(CallLog.started_at.desc())
+                        .limit(_ACTIVE_CALLS_LIMIT)
+                    )).all()
+            finally:
+                self._loading = False
+            self._totals, self._calls_by_agent, self._agents = totals, calls_by_agent, agents
+            self._agent_names = {a.id: a.name for a in agents if a.id is not None}
+            self._recent = {call.id: call for call in recent}
+            self._active = {call.id: _dashboard_call(call, self._agent_names) for call in active}
+            state = self._current_state(now)
+            if self.state is None:
+                self.state = state
+            elif _without_time(state) != _without_time(self.state):
+                self.state = state
+                self._publish("snapshot", data=state)
+        if self._missed:
+            # Changes committed while reading may or may not be in what was read
+            self.schedule_load()
+
+    def schedule_load(self) -> None:
+        if self._reload_scheduled:
+            return
+        self._reload_scheduled = True
+
+        async def reload() -> None:
+            self._reload_scheduled = False
+            try:
+                await self.load()
+            except Exception as exc:
+                print(f"[dashboard] reloading feed for workspace {self.workspace_id} failed: {exc}")
+
+        asyncio.ensure_future(reload())
+
+    def start(self) -> None:
+        if self._refresher is None and settings.DASHBOARD_FEED_REFRESH_SECONDS > 0:
+            self._refresher = asyncio.ensure_future(self._refresh_periodically())
+
+    def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.DASHBOARD_FEED_REFRESH_SECONDS)
+            self.schedule_load()
+
+    def apply(self, counters: Dict[tuple, List[float]], calls: Dict[int, Dict[str, Any]], removed: Set[int]) -> None:
+        """Apply committed rollup deltas and call changes of this workspace, then publish the difference."""
+        if self.state is None:
+            return
+        if self._loading:
+            self._missed = True
+            return
+        now = datetime.utcnow()
+        first_day, last_day = (now - timedelta(days=self.days)).date(), now.date()
+        totals = self._totals
+        for (_, day, agent_id, direction, status, _), (count, duration, *_) in counters.items():
+            if not first_day <= day <= last_day:
+                continue
+            totals["total_calls"] += count
+            totals["total_duration"] += duration
+            if status == "completed":
+                totals["completed_calls"] += count
+            if direction == "inbound":
+                totals["inbound_calls"] += count
+            elif direction == "outbound":
+                totals["outbound_calls"] += count
+            if agent_id:
+                self._calls_by_agent[agent_id] = self._calls_by_agent.get(agent_id, 0) + count
+
+        for call_id, fields in calls.items():
+            call = DashboardCall(**fields, agent_name=self._agent_names.get(fields["agent_id"]))
+            if call.status in ACTIVE_CALL_STATUSES:
+                self._active[call_id] = call
+            else:
+                self._active.pop(call_id, None)
+            self._recent[call_id] = call
+        recent_gone = False
+        for call_id in removed:
+            self._active.pop(call_id, None)
+            recent_gone = self._recent.pop(call_id, None) is not None or recent_gone
+        self._recent = self._newest(self._recent, self.recent_limit)
+        self._active = self._newest(self._active, _ACTIVE_CALLS_LIMIT)
+
+        self._publish_changes(now)
+        if recent_gone:
+            # The call that now makes the recent list is not known here
+            self.schedule_load()
+
+    @staticmethod
+    def _newest(calls: Dict[int, DashboardCall], limit: int) -> Dict[int, DashboardCall]:
+        ordered = sorted(calls.values(), key=lambda call: call.started_at, reverse=True)[:limit]
+        return {call.id: call for call in ordered}
+
+    def _current_state(self, now: datetime) -> Dict[str, Any]:
+        overview = _assemble_overview(
+            self.workspace_id,
+            self.days,
+            self._totals,
+            self._calls_by_agent,
+            self._agents,
+            list(self._recent.values()),
+            now,
+        )
+        state = overview.model_dump(mode="json")
+        state["active_calls"] = [call.model_dump(mode="json") for call in self._active.values()]
+        return state
+
+    def _publish_changes(self, now: datetime) -> None:
+        state, previous = self._current_state(now), self.state
+        changes: Dict[str, Any] = {}
+        stats = {key: value for key, value in state["stats"].items() if previous["stats"].get(key) != value}
+        if stats:
+            changes["stats"] = stats
+        for section in ("recent_calls", "active_agents"):
+            if state[section] != previous[section]:
+                changes[section] = state[section]
+        before = {call["id"]: call for call in previous["active_calls"]}
+        after = {call["id"]: call for call in state["active_calls"]}
+        upsert = [call for call_id, call in after.items() if before.get(call_id) != call]
+        remove = [call_id for call_id in before if call_id not in after]
+        if upsert or remove:
+            changes["active_calls"] = {"upsert": upsert, "remove": remove}
+        if not changes:
+            return
+        changes["updated_at"] = state["updated_at"]
+        self.state = state
+        self._publish("delta", changes=changes)
+
+    def _publish(self, kind: str, **fields: Any) -> None:
+        self.seq += 1
+        message = {"type": kind, "workspace_id": self.workspace_id, "seq": self.seq, **fields}
+        self._history.append(message)
+        for queue in self.subscribers:
+            self.deliver(queue, message)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"type": "snapshot", "workspace_id": self.workspace_id, "seq": self.seq, "data": self.state}
+
+    def deliver(self, queue: asyncio.Queue, message: Dict[str, Any]) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind for deltas to be worth sending
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.snapshot())
+
+    def resync(self, queue: asyncio.Queue, since: Optional[int] = None) -> None:
+        """Send the messages after ``since`` if they are all still held, else a snapshot."""
+        if isinstance(since, int) and 0 <= since <= self.seq:
+            missed = [message for message in self._history if message["seq"] > since]
+            if len(missed) == self.seq - since:
+                for message in missed:
+                    self.deliver(queue, message)
+                return
+        self.deliver(queue, self.snapshot())
+
+
+class DashboardFeeds:
+    """This worker's live dashboard feeds, and the hand-off of committed call changes to them."""
+
+    def __init__(self):
+        self._feeds: Dict[Tuple[int, int, int], DashboardFeed] = {}
+        # Feeds per workspace (read from commit hooks, which may run in worker threads)
+        self._watched: Dict[int, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._flush_scheduled = False
+
+    async def subscribe(self, workspace_id: int, days: int, recent_limit: int) -> Tuple[DashboardFeed, asyncio.Queue]:
+        """Join (or start) the feed; its current snapshot is the first message on the returned queue."""
+        self._loop = asyncio.get_running_loop()
+        key = (workspace_id, days, recent_limit)
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = DashboardFeed(workspace_id, days, recent_limit)
+            self._watched[workspace_id] = self._watched.get(workspace_id, 0) + 1
+        if feed.state is None:
+            try:
+                await feed.load()
+            except Exception:
+                if not feed.subscribers:
+                    self._drop(feed)
+                raise
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_BACKLOG)
+        feed.subscribers.add(queue)
+        feed.start()
+        feed.resync(queue)
+        return feed, queue
+
+    def unsubscribe(self, feed: DashboardFeed, queue: asyncio.Queue) -> None:
+        feed.subscribers.discard(queue)
+        if not feed.subscribers:
+            self._drop(feed)
+
+    def _drop(self, feed: DashboardFeed) -> None:
+        feed.stop()
+        key = (feed.workspace_id, feed.days, feed.recent_limit)
+        if self._feeds.get(key) is feed:
+            del self._feeds[key]
+            remaining = self._watched.get(feed.workspace_id, 0) - 1
+            if remaining > 0:
+                self._watched[feed.workspace_id] = remaining
+            else:
+                self._watched.pop(feed.workspace_id, None)
+
+    def notify(
+        self,
+        counters: Optional[Dict[tuple, List[float]]] = None,
+        calls: Optional[Dict[int, Tuple[int, Dict[str, Any]]]] = None,
+        removed: Optional[Dict[int, int]] = None,
+    ) -> None:
+        """Hand committed changes to the feeds' event loop (callable from any thread)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        counters = {key: measures for key, measures in (counters or {}).items() if key[0] in self._watched}
+        calls = {call_id: entry for call_id, entry in (calls or {}).items() if entry[0] in self._watched}
+        removed = {call_id: ws for call_id, ws in (removed or {}).items() if ws in self._watched}
+        if counters or calls or removed:
+            loop.call_soon_threadsafe(self._receive, counters, calls, removed)
+
+    def _pending_for(self, workspace_id: int) -> Dict[str, Any]:
+        return self._pending.setdefault(workspace_id, {"counters": {}, "calls": {}, "removed": set()})
+
+    def _receive(self, counters, calls, removed) -> None:
+        for key, measures in counters.items():
+            pending = self._pending_for(key[0])["counters"]
+            pending[key] = [total + change for total, change in zip(pending.get(key, [0] * len(measures)), measures)]
+        for call_id, (workspace_id, fields) in calls.items():
+            self._pending_for(workspace_id)["calls"][call_id] = fields
+        for call_id, workspace_id in removed.items():
+            pending = self._pending_for(workspace_id)
+            pending["calls"].pop(call_id, None)
+            pending["removed"].add(call_id)
+        # The hooks of one commit hand off separately; publish them (and any commits close behind) together
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_later(_COALESCE_SECONDS, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        for feed in list(self._feeds.values()):
+            changes = pending.get(feed.workspace_id)
+            if changes:
+                feed.apply(changes["counters"], changes["calls"], changes["removed"])
+
+
+dashboard_feeds = DashboardFeeds()
+
+
+@call_metrics.on_deltas_committed
+def _feed_call_counters(deltas: Dict[tuple, List[float]]) -> None:
+    dashboard_feeds.notify(counters=deltas)
+
+
+def _call_fields_changed(call: CallLog) -> bool:
+    attrs = inspect(call).attrs
+    return any(attrs[field].history.has_changes() for field in _CALL_FIELDS)
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_dashboard_calls(session: OrmSession, flush_context) -> None:
+    if not dashboard_feeds._watched:
+        return
+    # Ids are assigned by now and attribute history still shows what changed
+    calls: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+    removed: Dict[int, int] = {}
+    for obj in session.new:
+        if isinstance(obj, CallLog) and obj.started_at is not None:
+            calls[obj.id] = (obj.workspace_id, {field: getattr(obj, field) for field in _CALL_FIELDS})
+    for obj in session.dirty:
+        if isinstance(obj, CallLog) and obj.started_at is not None and _call_fields_changed(obj):
+            calls[obj.id] = (obj.workspace_id, {field: getattr(obj, field) for field in _CALL_FIELDS})
+    for obj in session.deleted:
+        if isinstance(obj, CallLog) and obj.id is not None:
+            removed[obj.id] = obj.workspace_id
+    if calls or removed:
+        session.info.setdefault("dashboard_calls", []).append((calls, removed))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _push_dashboard_calls(session: OrmSession) -> None:
+    flushes = session.info.pop("dashboard_calls", None)
+    if not flushes:
+        return
+    calls: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+    removed: Dict[int, int] = {}
+    for flushed, deleted in flushes:
+        calls.update(flushed)
+        for call_id, workspace_id in deleted.items():
+            calls.pop(call_id, None)
+            removed[call_id] = workspace_id
+    dashboard_feeds.notify(calls=calls, removed=removed)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_dashboard_calls(session: OrmSession) -> None:
+    session.info.pop("dashboard_calls", None)
@@ -2,13 +2,12 @@ from copy import deepcopy
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, SQLModel, Field, select
+from sqlmodel import Session, SQLModel, Field
 
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_workspace_access_sync
 from app.db import get_session
 from app.models.agent import Agent, AgentRead
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 
 
 class FeaturedAgentTemplate(SQLModel):
@@ -413,13 +412,7 @@ async def deploy_featured_agent(
             detail="Featured agent template not found",
         )
 
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == request.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, request.workspace_id, current_user.id)
     if not membership:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
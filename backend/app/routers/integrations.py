@@ -4,9 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlmodel import Session, select
 
 from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_workspace_access_sync
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.integration import Integration, IntegrationCreate, IntegrationRead
 
 router = APIRouter()
@@ -109,13 +108,7 @@ async def list_connected_integrations(
 ):
     """List connected integrations for workspace."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -141,13 +134,7 @@ async def connect_integration(
 ):
     """Connect an integration to workspace."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -197,13 +184,7 @@ async def disconnect_integration(
 ):
     """Disconnect an integration."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -239,13 +220,7 @@ async def get_integration_status(
 ):
     """Get integration status."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -285,13 +260,7 @@ async def sync_integration(
 ):
     """Manually trigger integration sync."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
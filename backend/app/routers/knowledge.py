@@ -1,12 +1,12 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
 from sqlmodel import Session, select
 
 from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_workspace_access_sync
+from app.core.pagination import finish_page, paginate
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.knowledge import KnowledgeAsset, KnowledgeAssetCreate, KnowledgeAssetUpdate, KnowledgeAssetRead
 
 router = APIRouter()
@@ -14,9 +14,11 @@ router = APIRouter()
 
 @router.get("", response_model=List[KnowledgeAssetRead])
 async def list_knowledge_assets(
+    response: Response,
     workspace_id: int = Query(...),
     agent_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
@@ -24,13 +26,7 @@ async def list_knowledge_assets(
 ):
     """List knowledge base documents."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -46,10 +42,10 @@ async def list_knowledge_assets(
     if status:
         query = query.where(KnowledgeAsset.status == status)
     
-    query = query.order_by(KnowledgeAsset.created_at.desc()).offset(skip).limit(limit)
+    query = paginate(query, KnowledgeAsset.created_at, KnowledgeAsset.id, cursor, skip, limit)
     
     assets = session.exec(query).all()
-    return assets
+    return finish_page(assets, limit, "created_at", response)
 
 
 @router.post("/upload", response_model=KnowledgeAssetRead, status_code=status.HTTP_201_CREATED)
@@ -62,13 +58,7 @@ async def upload_knowledge_asset(
 ):
     """Upload a knowledge base document."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -133,13 +123,7 @@ async def get_knowledge_asset(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == asset.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, asset.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -165,13 +149,7 @@ async def delete_knowledge_asset(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == asset.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, asset.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -204,13 +182,7 @@ async def process_knowledge_asset(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == asset.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, asset.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -242,13 +214,7 @@ async def search_knowledge(
 ):
     """Semantic search in knowledge base."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
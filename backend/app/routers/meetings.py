@@ -1,12 +1,12 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlmodel import Session, select
 
 from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_workspace_access_sync
+from app.core.pagination import finish_page, paginate
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.meeting import Meeting, MeetingCreate, MeetingUpdate, MeetingRead
 
 router = APIRouter()
@@ -14,9 +14,11 @@ router = APIRouter()
 
 @router.get("", response_model=List[MeetingRead])
 async def list_meetings(
+    response: Response,
     workspace_id: int = Query(...),
     status: Optional[str] = Query(None),
     platform: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_active_user),
@@ -24,13 +26,7 @@ async def list_meetings(
 ):
     """List meetings with filters."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -46,10 +42,10 @@ async def list_meetings(
     if platform:
         query = query.where(Meeting.platform == platform)
     
-    query = query.order_by(Meeting.scheduled_for.desc()).offset(skip).limit(limit)
+    query = paginate(query, Meeting.scheduled_for, Meeting.id, cursor, skip, limit)
     
     meetings = session.exec(query).all()
-    return meetings
+    return finish_page(meetings, limit, "scheduled_for", response)
 
 
 @router.post("", response_model=MeetingRead, status_code=status.HTTP_201_CREATED)
@@ -60,13 +56,7 @@ async def create_meeting(
 ):
     """Schedule a new meeting."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting_data.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting_data.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -97,13 +87,7 @@ async def get_meeting(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -130,13 +114,7 @@ async def update_meeting(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -171,13 +149,7 @@ async def delete_meeting(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -206,13 +178,7 @@ async def join_meeting(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -243,13 +209,7 @@ async def get_meeting_transcript(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -281,13 +241,7 @@ async def get_meeting_recording(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == meeting.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, meeting.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -1,35 +1,32 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlmodel import select
 
-from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.db import AnyAsyncSession, get_async_session
+from app.core.deps import get_current_active_user, get_workspace_access
+from app.core.pagination import finish_page, paginate
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.notification import Notification, NotificationCreate, NotificationRead
+from app.services import notifications as notification_service
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[NotificationRead])
 async def list_notifications(
+    response: Response,
     workspace_id: int = Query(...),
     read: bool = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """List notifications for current user in workspace."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -46,27 +43,21 @@ async def list_notifications(
     if read is not None:
         query = query.where(Notification.read == read)
     
-    query = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit)
+    query = paginate(query, Notification.created_at, Notification.id, cursor, skip, limit)
     
-    notifications = session.exec(query).all()
-    return notifications
+    notifications = (await session.exec(query)).all()
+    return finish_page(notifications, limit, "created_at", response)
 
 
 @router.get("/unread-count")
 async def get_unread_count(
     workspace_id: int = Query(...),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get unread notification count."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -74,25 +65,19 @@ async def get_unread_count(
             detail="Access denied",
         )
     
-    count = session.exec(
-        select(Notification).where(
-            Notification.workspace_id == workspace_id,
-            (Notification.user_id == current_user.id) | (Notification.user_id == None),
-            Notification.read == False,
-        )
-    ).all()
+    count = await notification_service.unread_count(session, workspace_id, current_user.id)
     
-    return {"unread_count": len(count)}
+    return {"unread_count": count}
 
 
 @router.get("/{notification_id}", response_model=NotificationRead)
 async def get_notification(
     notification_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Get notification details."""
-    notification = session.get(Notification, notification_id)
+    notification = await session.get(Notification, notification_id)
     if not notification:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,13 +85,7 @@ async def get_notification(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == notification.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, notification.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -121,10 +100,10 @@ async def get_notification(
 async def mark_notification_read(
     notification_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Mark notification as read."""
-    notification = session.get(Notification, notification_id)
+    notification = await session.get(Notification, notification_id)
     if not notification:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -132,13 +111,7 @@ async def mark_notification_read(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == notification.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, notification.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -148,8 +121,8 @@ async def mark_notification_read(
     
     notification.read = True
     session.add(notification)
-    session.commit()
-    session.refresh(notification)
+    await session.commit()
+    await session.refresh(notification)
     
     return notification
 
@@ -158,17 +131,11 @@ async def mark_notification_read(
 async def mark_all_read(
     workspace_id: int = Query(...),
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Mark all notifications as read."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -176,31 +143,19 @@ async def mark_all_read(
             detail="Access denied",
         )
     
-    notifications = session.exec(
-        select(Notification).where(
-            Notification.workspace_id == workspace_id,
-            (Notification.user_id == current_user.id) | (Notification.user_id == None),
-            Notification.read == False,
-        )
-    ).all()
-    
-    for notification in notifications:
-        notification.read = True
-        session.add(notification)
+    count = await notification_service.mark_all_read(session, workspace_id, current_user.id)
     
-    session.commit()
-    
-    return {"message": "All notifications marked as read", "count": len(notifications)}
+    return {"message": "All notifications marked as read", "count": count}
 
 
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_notification(
     notification_id: int,
     current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """Delete notification."""
-    notification = session.get(Notification, notification_id)
+    notification = await session.get(Notification, notification_id)
     if not notification:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -208,13 +163,7 @@ async def delete_notification(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == notification.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = await get_workspace_access(session, notification.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -222,7 +171,7 @@ async def delete_notification(
             detail="Access denied",
         )
     
-    session.delete(notification)
-    session.commit()
+    await session.delete(notification)
+    await session.commit()
     
     return None
\ No newline at end of file
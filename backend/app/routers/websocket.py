@@ -1,13 +1,17 @@
+import asyncio
 import base64
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional, Set, Tuple
 from uuid import uuid4
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
-from sqlmodel import Session
 
-from app.db import get_session
+from app.db import AnyAsyncSession, get_async_session
+from app.core.deps import authorize_socket
 from app.models.agent import Agent
 from app.models.call import CallLog
+from app.routers.dashboard import dashboard_feeds
+from app.services import notifications as notification_service
 from app.services.call_sessions import CallSessionState, call_session_manager
 from app.services.openai_service import openai_service
 
@@ -64,6 +68,10 @@ class ConnectionManager:
 call_manager = ConnectionManager()
 notification_manager = ConnectionManager()
 agent_manager = ConnectionManager()
+# User behind each /ws/notifications socket, for per-user unread counts
+_notification_socket_users: Dict[WebSocket, int] = {}
+# Event loop serving the notification sockets (commit hooks may run in worker threads)
+_notification_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
 @router.websocket("/calls/{call_id}")
@@ -71,10 +79,12 @@ async def websocket_call_updates(
     websocket: WebSocket,
     call_id: int,
     token: str = Query(...),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """WebSocket for real-time call updates."""
-    # TODO: Validate token and user access to call
+    call = await session.get(CallLog, call_id)
+    if not await authorize_socket(websocket, token, session, call.workspace_id if call else None):
+        return
     
     connection_id = f"call_{call_id}"
     await call_manager.connect(websocket, connection_id)
@@ -112,7 +122,7 @@ async def websocket_live_voice_call(
     websocket: WebSocket,
     session_id: str,
     token: str = Query(...),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """WebSocket that streams audio for an active VoiceAI call."""
     state = call_session_manager.get_session(session_id)
@@ -120,8 +130,8 @@ async def websocket_live_voice_call(
         await websocket.close(code=4403)
         return
 
-    call_log = session.get(CallLog, state.call_id)
-    agent = session.get(Agent, state.agent_id)
+    call_log = await session.get(CallLog, state.call_id)
+    agent = await session.get(Agent, state.agent_id)
     if not call_log or not agent:
         call_session_manager.remove_session(session_id)
         await websocket.close(code=4404)
@@ -230,7 +240,7 @@ async def websocket_live_voice_call(
                     state.append_history("assistant", assistant_text, message_id=assistant_message_id)
                     call_log.transcript = state.history
                     session.add(call_log)
-                    session.commit()
+                    await session.commit()
                     await websocket.send_json({
                         "type": "transcript",
                         "role": "assistant",
@@ -243,6 +253,7 @@ async def websocket_live_voice_call(
                             text=assistant_text,
                             voice=state.voice,
                             model="tts-1",
+                            workspace_id=call_log.workspace_id,
                         )
                         await websocket.send_json({
                             "type": "audio_chunk",
@@ -277,6 +288,7 @@ async def websocket_live_voice_call(
                         audio_file=audio_bytes,
                         language=whisper_language,
                         file_extension=audio_extension,
+                        workspace_id=call_log.workspace_id,
                     )
                     # Reset failure count on success
                     state.stt_failures = 0
@@ -306,7 +318,7 @@ async def websocket_live_voice_call(
                     state.append_history("assistant", assistant_text, message_id=assistant_message_id)
                     call_log.transcript = state.history
                     session.add(call_log)
-                    session.commit()
+                    await session.commit()
                     await websocket.send_json({
                         "type": "transcript",
                         "role": "assistant",
@@ -319,6 +331,7 @@ async def websocket_live_voice_call(
                             text=assistant_text,
                             voice=state.voice,
                             model="tts-1",
+                            workspace_id=call_log.workspace_id,
                         )
                         await websocket.send_json({
                             "type": "audio_chunk",
@@ -364,7 +377,7 @@ async def websocket_live_voice_call(
         call_log.duration_seconds = int((call_log.ended_at - call_log.started_at).total_seconds())
         call_log.transcript = state.history
         session.add(call_log)
-        session.commit()
+        await session.commit()
         call_session_manager.remove_session(session_id)
         await send_call_update(call_log.id, {"type": "call_completed", "call_id": call_log.id})
 
@@ -374,13 +387,18 @@ async def websocket_notifications(
     websocket: WebSocket,
     workspace_id: int = Query(...),
     token: str = Query(...),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
-    """WebSocket for real-time notifications."""
-    # TODO: Validate token and user access to workspace
+    """WebSocket for real-time notifications (and unread count changes)."""
+    user = await authorize_socket(websocket, token, session, workspace_id)
+    if not user:
+        return
     
+    global _notification_loop
+    _notification_loop = asyncio.get_running_loop()
     connection_id = f"workspace_{workspace_id}"
     await notification_manager.connect(websocket, connection_id)
+    _notification_socket_users[websocket] = user.id
     
     try:
         await websocket.send_json({
@@ -398,6 +416,58 @@ async def websocket_notifications(
     except WebSocketDisconnect:
         notification_manager.disconnect(websocket, connection_id)
         print(f"Client disconnected from workspace {workspace_id} notifications")
+    finally:
+        _notification_socket_users.pop(websocket, None)
+
+
+@router.websocket("/dashboard")
+async def websocket_dashboard(
+    websocket: WebSocket,
+    workspace_id: int = Query(...),
+    token: str = Query(...),
+    days: int = Query(30, ge=1, le=365),
+    recent_limit: int = Query(5, ge=1, le=25),
+    session: AnyAsyncSession = Depends(get_async_session),
+):
+    """
+    WebSocket for the live dashboard: a "snapshot" of the overview (as GET
+    /api/dashboard/overview, plus active_calls), then "delta" messages with the
+    sections that changed. Every message carries a seq; after a gap send
+    {"type": "resync", "seq": <last applied>} to get the missed deltas or a new snapshot.
+    """
+    user = await authorize_socket(websocket, token, session, workspace_id)
+    if not user:
+        return
+
+    await websocket.accept()
+    try:
+        feed, queue = await dashboard_feeds.subscribe(workspace_id, days, recent_limit)
+    except Exception as exc:
+        print(f"[dashboard] could not load the live overview of workspace {workspace_id}: {exc}")
+        await websocket.close(code=1011)
+        return
+
+    async def forward() -> None:
+        # One writer per socket keeps messages in seq order
+        while True:
+            message = await queue.get()
+            await websocket.send_json(message)
+
+    sender = asyncio.create_task(forward())
+    try:
+        while True:
+            data = await websocket.receive_json()
+            
+            if data.get("type") == "ping":
+                feed.deliver(queue, {"type": "pong"})
+            elif data.get("type") == "resync":
+                feed.resync(queue, data.get("seq"))
+    
+    except WebSocketDisconnect:
+        print(f"Client disconnected from workspace {workspace_id} dashboard")
+    finally:
+        sender.cancel()
+        dashboard_feeds.unsubscribe(feed, queue)
 
 
 @router.websocket("/agent/{agent_id}")
@@ -405,10 +475,12 @@ async def websocket_agent_status(
     websocket: WebSocket,
     agent_id: int,
     token: str = Query(...),
-    session: Session = Depends(get_session),
+    session: AnyAsyncSession = Depends(get_async_session),
 ):
     """WebSocket for real-time agent status updates."""
-    # TODO: Validate token and user access to agent
+    agent = await session.get(Agent, agent_id)
+    if not await authorize_socket(websocket, token, session, agent.workspace_id if agent else None):
+        return
     
     connection_id = f"agent_{agent_id}"
     await agent_manager.connect(websocket, connection_id)
@@ -444,7 +516,7 @@ async def _generate_initial_greeting(
     websocket: WebSocket,
     call_log: CallLog,
     state: CallSessionState,
-    session: Session,
+    session: AnyAsyncSession,
 ):
     """Generate and stream the initial greeting from the agent."""
     try:
@@ -462,6 +534,7 @@ async def _generate_initial_greeting(
             model=state.model,
             temperature=0.55,
             max_tokens=15,  # Reduced to enforce brevity
+            workspace_id=call_log.workspace_id,
         )
         greeting_text = (response.get("content") or "").strip()
     except Exception as exc:
@@ -479,7 +552,7 @@ async def _generate_initial_greeting(
     state.append_history("assistant", greeting_text, message_id=assistant_message_id)
     call_log.transcript = state.history
     session.add(call_log)
-    session.commit()
+    await session.commit()
 
     await websocket.send_json({
         "type": "transcript",
@@ -494,6 +567,7 @@ async def _generate_initial_greeting(
             text=greeting_text,
             voice=state.voice,
             model="tts-1",
+            workspace_id=call_log.workspace_id,
         )
         await websocket.send_json({
             "type": "audio_chunk",
@@ -519,7 +593,7 @@ async def _handle_agent_turn(
     user_message_id: str,
     call_log: CallLog,
     state: CallSessionState,
-    session: Session,
+    session: AnyAsyncSession,
 ):
     """Transcribe, generate reply, and stream assistant audio."""
     try:
@@ -534,6 +608,7 @@ async def _handle_agent_turn(
             model=state.model,
             temperature=0.45,
             max_tokens=160,
+            workspace_id=call_log.workspace_id,
         )
         assistant_text = (response.get("content") or "").strip()
     except Exception as exc:
@@ -556,7 +631,7 @@ async def _handle_agent_turn(
     call_log.outcome = assistant_text  # keep latest assistant reply as outcome for quick view
     call_log.duration_seconds = int((datetime.utcnow() - call_log.started_at).total_seconds())
     session.add(call_log)
-    session.commit()
+    await session.commit()
     await websocket.send_json({
         "type": "transcript",
         "role": "assistant",
@@ -570,6 +645,7 @@ async def _handle_agent_turn(
             text=assistant_text,
             voice=state.voice,
             model="tts-1",
+            workspace_id=call_log.workspace_id,
         )
         await websocket.send_json({
             "type": "audio_chunk",
@@ -593,7 +669,7 @@ async def _process_audio_buffer(
     websocket: WebSocket,
     state: CallSessionState,
     call_log: CallLog,
-    session: Session,
+    session: AnyAsyncSession,
     audio_extension: str,
 ):
     """Transcribe buffered audio and trigger an assistant turn."""
@@ -624,6 +700,7 @@ async def _process_audio_buffer(
             audio_file=audio_bytes,
             language=whisper_language,
             file_extension=audio_extension,
+            workspace_id=call_log.workspace_id,
         )
         user_text = (transcript.get("text") or "").strip()
         
@@ -681,6 +758,37 @@ async def send_notification(workspace_id: int, notification: dict):
     }, connection_id)
 
 
+async def send_unread_counts(workspace_ids: Set[int]):
+    """Push each connected user's current unread count in these workspaces."""
+    async with asynccontextmanager(get_async_session)() as session:
+        for workspace_id in workspace_ids:
+            sockets = list(notification_manager.active_connections.get(f"workspace_{workspace_id}", []))
+            user_ids = {_notification_socket_users[ws] for ws in sockets if ws in _notification_socket_users}
+            if not user_ids:
+                continue
+            counts = await notification_service.unread_counts_for(session, workspace_id, user_ids)
+            for ws in sockets:
+                user_id = _notification_socket_users.get(ws)
+                if user_id is not None:
+                    await safe_websocket_send(ws, {
+                        "type": "unread_count",
+                        "workspace_id": workspace_id,
+                        "unread_count": counts[user_id],
+                    })
+
+
+@notification_service.on_unread_counts_committed
+def _schedule_unread_push(keys: Set[Tuple[int, int]]) -> None:
+    # Runs after commit, possibly in a worker thread; hand off to the sockets' loop
+    loop = _notification_loop
+    workspace_ids = {workspace_id for workspace_id, _ in keys}
+    if loop is None or loop.is_closed():
+        return
+    if not any(f"workspace_{workspace_id}" in notification_manager.active_connections for workspace_id in workspace_ids):
+        return
+    loop.call_soon_threadsafe(lambda: asyncio.ensure_future(send_unread_counts(workspace_ids)))
+
+
 async def send_call_update(call_id: int, update: dict):
     """Send call update to all connected clients."""
     connection_id = f"call_{call_id}"
@@ -4,9 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlmodel import Session, select
 
 from app.db import get_session
-from app.core.deps import get_current_active_user
+from app.core.deps import get_current_active_user, get_workspace_access_sync
 from app.models.user import User
-from app.models.workspace import WorkspaceMembership
 from app.models.workflow import Workflow, WorkflowCreate, WorkflowRead
 
 router = APIRouter()
@@ -21,13 +20,7 @@ async def list_workflows(
 ):
     """List workflows."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -52,13 +45,7 @@ async def create_workflow(
 ):
     """Create a new workflow."""
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workflow_data.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workflow_data.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -89,13 +76,7 @@ async def get_workflow(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workflow.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workflow.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -121,13 +102,7 @@ async def delete_workflow(
         )
     
     # Verify workspace access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workflow.workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workflow.workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
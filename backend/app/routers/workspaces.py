@@ -4,7 +4,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from app.db import get_session
-from app.core.deps import get_current_active_user, require_workspace_role
+from app.core.deps import (
+    get_current_active_user,
+    get_workspace_access_sync,
+    invalidate_workspace_access,
+    require_workspace_role,
+)
 from app.models.user import User
 from app.models.workspace import (
     Workspace,
@@ -25,18 +30,15 @@ async def list_workspaces(
     session: Session = Depends(get_session),
 ):
     """List all workspaces for current user."""
-    memberships = session.exec(
-        select(WorkspaceMembership)
+    # Workspaces joined to the user's active memberships (one query)
+    workspaces = session.exec(
+        select(Workspace)
+        .join(WorkspaceMembership, WorkspaceMembership.workspace_id == Workspace.id)
         .where(WorkspaceMembership.user_id == current_user.id)
         .where(WorkspaceMembership.status == "active")
+        .order_by(WorkspaceMembership.id)
     ).all()
     
-    workspaces = []
-    for membership in memberships:
-        workspace = session.get(Workspace, membership.workspace_id)
-        if workspace:
-            workspaces.append(workspace)
-    
     return workspaces
 
 
@@ -74,6 +76,7 @@ async def create_workspace(
     )
     session.add(membership)
     session.commit()
+    invalidate_workspace_access(workspace.id, current_user.id)
     
     return workspace
 
@@ -86,13 +89,7 @@ async def get_workspace(
 ):
     """Get workspace details."""
     # Verify access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -119,13 +116,7 @@ async def update_workspace(
 ):
     """Update workspace."""
     # Verify admin access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -160,13 +151,7 @@ async def delete_workspace(
     session: Session = Depends(get_session),
 ):
     """Delete workspace (owner only)."""
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership or membership.role != "owner":
         raise HTTPException(
@@ -183,6 +168,7 @@ async def delete_workspace(
     
     session.delete(workspace)
     session.commit()
+    invalidate_workspace_access(workspace_id)
     
     return None
 
@@ -195,13 +181,7 @@ async def list_members(
 ):
     """List workspace members."""
     # Verify access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership:
         raise HTTPException(
@@ -209,26 +189,26 @@ async def list_members(
             detail="Access denied",
         )
     
-    memberships = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id
-        )
+    # Memberships joined to their users (one query)
+    rows = session.exec(
+        select(WorkspaceMembership, User)
+        .join(User, User.id == WorkspaceMembership.user_id)
+        .where(WorkspaceMembership.workspace_id == workspace_id)
+        .order_by(WorkspaceMembership.id)
     ).all()
     
     members = []
-    for m in memberships:
-        user = session.get(User, m.user_id)
-        if user:
-            members.append({
-                "id": m.id,
-                "user_id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "avatar_url": user.avatar_url,
-                "role": m.role,
-                "status": m.status,
-                "joined_at": m.joined_at,
-            })
+    for m, user in rows:
+        members.append({
+            "id": m.id,
+            "user_id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "avatar_url": user.avatar_url,
+            "role": m.role,
+            "status": m.status,
+            "joined_at": m.joined_at,
+        })
     
     return members
 
@@ -242,13 +222,7 @@ async def invite_member(
 ):
     """Invite member to workspace."""
     # Verify admin access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -291,6 +265,7 @@ async def invite_member(
     )
     session.add(new_membership)
     session.commit()
+    invalidate_workspace_access(workspace_id, user.id)
     
     return {"message": "Invitation sent", "email": invite_data.email}
 
@@ -304,13 +279,7 @@ async def remove_member(
 ):
     """Remove member from workspace."""
     # Verify admin access
-    membership = session.exec(
-        select(WorkspaceMembership).where(
-            WorkspaceMembership.workspace_id == workspace_id,
-            WorkspaceMembership.user_id == current_user.id,
-            WorkspaceMembership.status == "active",
-        )
-    ).first()
+    membership = get_workspace_access_sync(session, workspace_id, current_user.id)
     
     if not membership or membership.role not in ["owner", "admin"]:
         raise HTTPException(
@@ -341,5 +310,6 @@ async def remove_member(
     
     session.delete(member)
     session.commit()
+    invalidate_workspace_access(workspace_id, user_id)
     
     return None
\ No newline at end of file
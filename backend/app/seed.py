@@ -78,7 +78,7 @@ def seed_database(session: Session) -> None:
     call_logs = [
         CallLog(
             workspace_id=workspace.id,
-            agent_id=agents[0].id,
+            agent_id=None,
             caller_name="John Smith",
             caller_number="+1 (555) 888-1234",
             direction="inbound",
@@ -96,7 +96,7 @@ def seed_database(session: Session) -> None:
         ),
         CallLog(
             workspace_id=workspace.id,
-            agent_id=agents[1].id,
+            agent_id=None,
             caller_name="Sarah Johnson",
             caller_number="+1 (555) 222-9876",
             direction="inbound",
@@ -114,7 +114,7 @@ def seed_database(session: Session) -> None:
         ),
         CallLog(
             workspace_id=workspace.id,
-            agent_id=agents[2].id,
+            agent_id=None,
             caller_name="Miguel Lopez",
             caller_number="+34 600 123 456",
             direction="outbound",
@@ -179,7 +179,7 @@ def seed_database(session: Session) -> None:
     assets = [
         KnowledgeAsset(
             workspace_id=workspace.id,
-            agent_id=agents[0].id,
+            agent_id=None,
             filename="Product_Catalog_2025.pdf",
             size_bytes=2_400_000,
             source_type="upload",
@@ -189,7 +189,7 @@ def seed_database(session: Session) -> None:
         ),
         KnowledgeAsset(
             workspace_id=workspace.id,
-            agent_id=agents[1].id,
+            agent_id=None,
             filename="FAQ_Document.docx",
             size_bytes=856_000,
             source_type="upload",
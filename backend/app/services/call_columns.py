@@ -0,0 +1,597 @@
+"""
+Per-worker columnar cache of recent call logs for the analytics endpoints.
+
+Each cached workspace holds its calls of the last ANALYTICS_COLUMNS_DAYS days
+as NumPy arrays (id, started_at, duration, status, direction, agent, sentiment
+score and label, cost), so a window's totals, per-day trends or per-agent
+numbers are a mask and a few sums / bincounts instead of a query. Results match
+the ``call_metrics`` rollup reads: windows are whole UTC days.
+
+- Calls committed through the ORM on this worker are applied to the arrays
+  after commit: new calls join a short unsorted tail (re-sorted into the rest
+  every few thousand), updates and deletes change their row in place.
+- Writes from other workers are picked up by revalidation: after
+  ANALYTICS_COLUMNS_REVALIDATE_SECONDS, the cached totals are compared with the
+  rollup (one small query) and the workspace reloads if they differ.
+- Workspaces are evicted least recently used first once the cache holds more
+  than ANALYTICS_COLUMNS_MAX_ROWS calls or ANALYTICS_COLUMNS_MAX_WORKSPACES
+  workspaces; a workspace with more recent calls than the row budget is never
+  cached.
+
+Every read falls back to the rollup query when the workspace is not cached (or
+the window starts before the cached days).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.core.cache import SingleFlight
+from app.core.config import settings
+from app.models.agent import Agent
+from app.models.call import CallLog
+from app.services import call_metrics
+
+if TYPE_CHECKING:
+    import numpy as np  # imported lazily: app.main loads this module for its hooks, not for the cache
+
+# Longest analytics window is 365 days; one more covers its first partial day
+ANALYTICS_COLUMNS_DAYS = 366
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY_SECONDS = 86400
+# Calls committed since the last sort before the rows are re-sorted
+_TAIL_ROWS = 4096
+
+# Category codes; 0 is anything else (counted in totals, never matched by name)
+STATUS_CODES = {"queued": 1, "in-progress": 2, "completed": 3, "failed": 4, "missed": 5, "voicemail": 6}
+DIRECTION_CODES = {"inbound": 1, "outbound": 2}
+SENTIMENT_CODES = {"positive": 1, "neutral": 2, "negative": 3}
+# Status of deleted calls, whose measures are zeroed; excluded from every count
+_DELETED = len(STATUS_CODES) + 1
+_STATUS_SLOTS = _DELETED + 1
+_DIRECTIONS = len(DIRECTION_CODES) + 1
+_SENTIMENTS = len(SENTIMENT_CODES) + 1
+
+_COLUMN_TYPES = {
+    "id": "int64",
+    "started_at": "int64",  # seconds since the epoch (UTC)
+    "day": "int32",  # days since the epoch (UTC)
+    "duration": "int64",
+    "status": "int8",
+    "direction": "int8",
+    "agent": "int32",  # WorkspaceColumns.agent_codes; 0 = no agent
+    "sentiment": "int8",
+    "score": "float64",  # NaN = no score
+    "cost": "int64",
+}
+_SOURCE_FIELDS = (
+    "id",
+    "started_at",
+    "duration_seconds",
+    "status",
+    "direction",
+    "agent_id",
+    "sentiment",
+    "sentiment_score",
+    "cost_cents",
+)
+_TRACKED_FIELDS = ("workspace_id",) + _SOURCE_FIELDS[1:]
+
+
+def _seconds(value: datetime) -> int:
+    return int((value - _EPOCH).total_seconds())
+
+
+def _day_start(value: date) -> int:
+    return (value - _EPOCH.date()).days * _DAY_SECONDS
+
+
+class WorkspaceColumns:
+    """
+    A workspace's calls started on or after ``since`` (a UTC day), as arrays.
+
+    Rows ``[0, sorted_size)`` are ordered by started_at, so a window there is a
+    slice found by binary search; calls committed since the last ``compact()``
+    follow as a short unsorted tail that reads scan with a mask. Readers and
+    writers hold ``lock``.
+    """
+
+    def __init__(self, workspace_id: int, since: date):
+        import numpy as np
+        self.workspace_id = workspace_id
+        self.since = since
+        self.size = 0
+        self.sorted_size = 0
+        self.validated_at = time.monotonic()
+        self.lock = threading.Lock()
+        # agent_id -> small code, so per-agent numbers are one bincount
+        self.agent_codes: Dict[int, int] = {0: 0}
+        self._arrays = {name: np.empty(0, dtype) for name, dtype in _COLUMN_TYPES.items()}
+        # Ids of the sorted rows in ascending order and each one's position; tail ids in a dict
+        self._sorted_ids = np.empty(0, np.int64)
+        self._positions = np.empty(0, np.int64)
+        self._tail_ids: Dict[int, int] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        return self._arrays[name][: self.size]
+
+    def _agent_code(self, agent_id: Optional[int]) -> int:
+        return self.agent_codes.setdefault(agent_id or 0, len(self.agent_codes))
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> Dict[str, np.ndarray]:
+        """Column arrays for rows of _SOURCE_FIELDS values."""
+        import numpy as np
+        count = len(rows)
+        ids, started, duration, status, direction, agent, sentiment, score, cost = (
+            zip(*rows) if rows else ((),) * len(_SOURCE_FIELDS)
+        )
+        seconds = np.fromiter((_seconds(value) for value in started), np.int64, count)
+        return {
+            "id": np.fromiter(ids, np.int64, count),
+            "started_at": seconds,
+            "day": (seconds // _DAY_SECONDS).astype(np.int32),
+            "duration": np.fromiter((value or 0 for value in duration), np.int64, count),
+            "status": np.fromiter((STATUS_CODES.get(value, 0) for value in status), np.int8, count),
+            "direction": np.fromiter((DIRECTION_CODES.get(value, 0) for value in direction), np.int8, count),
+            "agent": np.fromiter((self._agent_code(value) for value in agent), np.int32, count),
+            "sentiment": np.fromiter((SENTIMENT_CODES.get(value, 0) for value in sentiment), np.int8, count),
+            "score": np.fromiter((np.nan if value is None else value for value in score), np.float64, count),
+            "cost": np.fromiter((value or 0 for value in cost), np.int64, count),
+        }
+
+    def extend(self, columns: Dict[str, np.ndarray]) -> None:
+        """Append rows to the tail."""
+        import numpy as np
+        count = len(columns["id"])
+        needed = self.size + count
+        capacity = len(self._arrays["id"])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2, 1024)
+            for name, array in self._arrays.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[: self.size] = array[: self.size]
+                self._arrays[name] = grown
+        for name, array in self._arrays.items():
+            array[self.size : needed] = columns[name]
+        for offset, call_id in enumerate(columns["id"].tolist()):
+            self._tail_ids[call_id] = self.size + offset
+        self.size = needed
+
+    def compact(self) -> None:
+        """Sort every row by started_at (then id) and re-index the ids."""
+        import numpy as np
+        order = np.lexsort((self.column("id"), self.column("started_at")))
+        for array in self._arrays.values():
+            array[: self.size] = array[: self.size][order]
+        self._positions = np.argsort(self.column("id"), kind="stable")
+        self._sorted_ids = self.column("id")[self._positions]
+        self._tail_ids = {}
+        self.sorted_size = self.size
+
+    def _position(self, call_id: int) -> Optional[int]:
+        import numpy as np
+        if call_id in self._tail_ids:
+            return self._tail_ids[call_id]
+        slot = int(np.searchsorted(self._sorted_ids, call_id))
+        if slot < len(self._sorted_ids) and self._sorted_ids[slot] == call_id:
+            return int(self._positions[slot])
+        return None
+
+    def _keeps_order(self, position: int, started: int) -> bool:
+        if position >= self.sorted_size:
+            return True
+        started_column = self._arrays["started_at"]
+        return (position == 0 or started_column[position - 1] <= started) and (
+            position == self.sorted_size - 1 or started <= started_column[position + 1]
+        )
+
+    def upsert(self, row: Sequence[Any]) -> bool:
+        """
+        Apply one committed call. False when it cannot be applied in place (a
+        started_at change that would reorder the sorted rows); the caller then
+        drops the workspace.
+        """
+        columns = self.encode([row])
+        started = int(columns["started_at"][0])
+        position = self._position(row[0])
+        if position is None:
+            if started >= _day_start(self.since):
+                self.extend(columns)
+                if self.size - self.sorted_size > _TAIL_ROWS:
+                    self.compact()
+            return True
+        if not self._keeps_order(position, started):
+            return False
+        for name, array in self._arrays.items():
+            array[position] = columns[name][0]
+        return True
+
+    def remove(self, call_id: int) -> None:
+        """Drop a committed delete from every read (the row stays, so the order is kept)."""
+        import numpy as np
+        position = self._position(call_id)
+        if position is None:
+            return
+        self._arrays["status"][position] = _DELETED
+        self._arrays["direction"][position] = 0
+        self._arrays["sentiment"][position] = 0
+        self._arrays["duration"][position] = 0
+        self._arrays["cost"][position] = 0
+        self._arrays["score"][position] = np.nan
+
+    def covers(self, start: datetime) -> bool:
+        return start.date() >= self.since
+
+    # --- reads (same results as the call_metrics rollup reads) ---
+
+    def _parts(self, start: datetime, end: Optional[datetime] = None) -> List[Any]:
+        """Row selectors for the window: a slice of the sorted rows, plus matching tail positions."""
+        import numpy as np
+        low = _day_start(start.date())
+        high = _day_start(end.date() + timedelta(days=1)) if end is not None else None
+        started = self._arrays["started_at"]
+        sorted_started = started[: self.sorted_size]
+        first = int(np.searchsorted(sorted_started, low, side="left"))
+        last = int(np.searchsorted(sorted_started, high, side="left")) if high is not None else self.sorted_size
+        parts: List[Any] = [slice(first, max(first, last))]
+        if self.size > self.sorted_size:
+            tail = started[self.sorted_size : self.size]
+            keep = tail >= low
+            if high is not None:
+                keep &= tail < high
+            parts.append(self.sorted_size + np.flatnonzero(keep))
+        return parts
+
+    def totals(self, start: datetime, end: Optional[datetime] = None, agent_id: Optional[int] = None) -> Dict[str, Any]:
+        import numpy as np
+        agent_code = self.agent_codes.get(agent_id, -1) if agent_id else None
+        by_status = np.zeros(_STATUS_SLOTS, np.int64)
+        by_direction = np.zeros(_DIRECTIONS, np.int64)
+        by_sentiment = np.zeros(_SENTIMENTS, np.int64)
+        duration = cost = scored = 0
+        score_sum = 0.0
+        for rows in self._parts(start, end):
+            if agent_code is not None:
+                rows = self._rows_of(rows)[self.column("agent")[rows] == agent_code]
+            by_status += np.bincount(self.column("status")[rows], minlength=_STATUS_SLOTS)
+            by_direction += np.bincount(self.column("direction")[rows], minlength=_DIRECTIONS)
+            by_sentiment += np.bincount(self.column("sentiment")[rows], minlength=_SENTIMENTS)
+            duration += int(self.column("duration")[rows].sum())
+            cost += int(self.column("cost")[rows].sum())
+            scores = self.column("score")[rows]
+            scores = scores[~np.isnan(scores)]
+            scored += len(scores)
+            score_sum += float(scores.sum())
+        return {
+            "total_calls": int(by_status[:_DELETED].sum()),
+            "completed_calls": int(by_status[STATUS_CODES["completed"]]),
+            "inbound_calls": int(by_direction[DIRECTION_CODES["inbound"]]),
+            "outbound_calls": int(by_direction[DIRECTION_CODES["outbound"]]),
+            "total_duration": duration,
+            "total_cost_cents": cost,
+            "positive": int(by_sentiment[SENTIMENT_CODES["positive"]]),
+            "neutral": int(by_sentiment[SENTIMENT_CODES["neutral"]]),
+            "negative": int(by_sentiment[SENTIMENT_CODES["negative"]]),
+            "average_sentiment_score": score_sum / scored if scored else None,
+        }
+
+    def daily_trends(self, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        import numpy as np
+        first_day = (start.date() - _EPOCH.date()).days
+        days = ((end or datetime.utcnow()).date() - _EPOCH.date()).days - first_day + 1
+        if days <= 0:
+            return []
+        by_status = np.zeros(days * _STATUS_SLOTS, np.int64)
+        by_direction = np.zeros(days * _DIRECTIONS, np.int64)
+        duration = np.zeros(days, np.float64)
+        for rows in self._parts(start, end):
+            slot = self.column("day")[rows] - first_day
+            by_status += np.bincount(slot * _STATUS_SLOTS + self.column("status")[rows], minlength=days * _STATUS_SLOTS)
+            by_direction += np.bincount(
+                slot * _DIRECTIONS + self.column("direction")[rows], minlength=days * _DIRECTIONS
+            )
+            duration += np.bincount(slot, weights=self.column("duration")[rows], minlength=days)
+        by_status = by_status.reshape(days, _STATUS_SLOTS)
+        by_direction = by_direction.reshape(days, _DIRECTIONS)
+        total = by_status[:, :_DELETED].sum(axis=1)
+        inbound = by_direction[:, DIRECTION_CODES["inbound"]]
+        return [
+            {
+                "date": (_EPOCH.date() + timedelta(days=first_day + int(i))).isoformat(),
+                "total_calls": int(total[i]),
+                "completed_calls": int(by_status[i, STATUS_CODES["completed"]]),
+                "total_duration": int(duration[i]),
+                "inbound": int(inbound[i]),
+                "outbound": int(total[i] - inbound[i]),
+            }
+            for i in np.flatnonzero(total)
+        ]
+
+    def agent_totals(self, start: datetime, end: Optional[datetime] = None) -> Dict[int, Dict[str, Any]]:
+        """Totals per agent id (calls without an agent omitted)."""
+        import numpy as np
+        agents = len(self.agent_codes)
+        by_status = np.zeros(agents * _STATUS_SLOTS, np.int64)
+        duration = np.zeros(agents, np.float64)
+        score_sum = np.zeros(agents, np.float64)
+        score_count = np.zeros(agents, np.int64)
+        for rows in self._parts(start, end):
+            agent = self.column("agent")[rows]
+            by_status += np.bincount(agent * _STATUS_SLOTS + self.column("status")[rows], minlength=agents * _STATUS_SLOTS)
+            duration += np.bincount(agent, weights=self.column("duration")[rows], minlength=agents)
+            scores = self.column("score")[rows]
+            scored = ~np.isnan(scores)
+            score_sum += np.bincount(agent[scored], weights=scores[scored], minlength=agents)
+            score_count += np.bincount(agent[scored], minlength=agents)
+        by_status = by_status.reshape(agents, _STATUS_SLOTS)
+        total = by_status[:, :_DELETED].sum(axis=1)
+        return {
+            agent_id: {
+                "total_calls": int(total[code]),
+                "completed_calls": int(by_status[code, STATUS_CODES["completed"]]),
+                "total_duration": int(duration[code]),
+                "average_sentiment_score": float(score_sum[code]) / score_count[code] if score_count[code] else None,
+            }
+            for agent_id, code in self.agent_codes.items()
+            if agent_id and total[code]
+        }
+
+    def _rows_of(self, rows: Any) -> np.ndarray:
+        import numpy as np
+        return np.arange(rows.start, rows.stop) if isinstance(rows, slice) else rows
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays.values()) + self._sorted_ids.nbytes + self._positions.nbytes
+
+
+# --- cache -------------------------------------------------------------------
+
+
+class ColumnCache:
+    """LRU over workspaces, bounded by total cached calls and by workspace count."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, WorkspaceColumns]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every commit that touches a workspace, so a load racing a commit is not kept
+        self._generations: Dict[int, int] = defaultdict(int)
+
+    def get(self, workspace_id: int) -> Optional[WorkspaceColumns]:
+        with self._lock:
+            entry = self._entries.get(workspace_id)
+            if entry is not None:
+                self._entries.move_to_end(workspace_id)
+            return entry
+
+    def peek(self, workspace_id: int) -> Optional[WorkspaceColumns]:
+        with self._lock:
+            return self._entries.get(workspace_id)
+
+    def generation(self, workspace_id: int) -> int:
+        with self._lock:
+            return self._generations[workspace_id]
+
+    def bump(self, workspace_id: int) -> None:
+        with self._lock:
+            self._generations[workspace_id] += 1
+
+    def put(self, entry: WorkspaceColumns, generation: int) -> bool:
+        with self._lock:
+            if self._generations[entry.workspace_id] != generation:
+                return False
+            self._entries[entry.workspace_id] = entry
+            self._entries.move_to_end(entry.workspace_id)
+            while self._entries and (
+                len(self._entries) > settings.ANALYTICS_COLUMNS_MAX_WORKSPACES
+                or sum(cached.size for cached in self._entries.values()) > settings.ANALYTICS_COLUMNS_MAX_ROWS
+            ):
+                self._entries.popitem(last=False)
+            return entry.workspace_id in self._entries
+
+    def pop(self, workspace_id: int) -> None:
+        with self._lock:
+            self._entries.pop(workspace_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+column_cache = ColumnCache()
+_loads = SingleFlight()
+
+
+def _covered_since() -> date:
+    return datetime.utcnow().date() - timedelta(days=ANALYTICS_COLUMNS_DAYS)
+
+
+def load_columns(workspace_id: int, since: date, max_rows: int) -> Optional[WorkspaceColumns]:
+    """Read the workspace's calls since ``since`` in batches; None when there are more than ``max_rows``. Blocking."""
+    from app.db import engine
+
+    entry = WorkspaceColumns(workspace_id, since)
+    query = select(*(getattr(CallLog, name) for name in _SOURCE_FIELDS)).where(
+        CallLog.workspace_id == workspace_id,
+        CallLog.started_at >= datetime.combine(since, datetime.min.time()),
+    )
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=settings.EXPORT_BATCH_SIZE).execute(query)
+        for partition in result.partitions():
+            if entry.size + len(partition) > max_rows:
+                return None
+            entry.extend(entry.encode(partition))
+    entry.compact()
+    return entry
+
+
+def _fingerprint(totals: Dict[str, Any]) -> Tuple:
+    score = totals["average_sentiment_score"]
+    return tuple(value for key, value in sorted(totals.items()) if key != "average_sentiment_score") + (
+        None if score is None else round(score, 6),
+    )
+
+
+async def _still_current(session, entry: WorkspaceColumns) -> bool:
+    """Compare the cached totals with the rollup's (catches writes made by other workers)."""
+    start = datetime.combine(entry.since, datetime.min.time())
+    rollup = await call_metrics.call_totals(session, call_metrics.metrics_window(entry.workspace_id, start))
+    with entry.lock:
+        cached = entry.totals(start)
+    return _fingerprint(rollup) == _fingerprint(cached)
+
+
+async def _load(workspace_id: int) -> Optional[WorkspaceColumns]:
+    generation = column_cache.generation(workspace_id)
+    entry = await asyncio.to_thread(
+        load_columns, workspace_id, _covered_since(), settings.ANALYTICS_COLUMNS_MAX_ROWS
+    )
+    if entry is None:
+        return None
+    column_cache.put(entry, generation)
+    return entry
+
+
+async def workspace_columns(session, workspace_id: int, start: datetime) -> Optional[WorkspaceColumns]:
+    """The workspace's cached columns when they can answer a window starting at ``start``, else None."""
+    if settings.ANALYTICS_COLUMNS_MAX_ROWS <= 0 or start.date() < _covered_since():
+        return None
+    entry = column_cache.get(workspace_id)
+    if entry is not None and time.monotonic() - entry.validated_at >= settings.ANALYTICS_COLUMNS_REVALIDATE_SECONDS:
+        if await _still_current(session, entry):
+            entry.validated_at = time.monotonic()
+        else:
+            print(f"[call_columns] workspace {workspace_id} changed elsewhere; reloading")
+            column_cache.pop(workspace_id)
+            entry = None
+    if entry is None:
+        try:
+            entry = await _loads.run(workspace_id, lambda: _load(workspace_id))
+        except Exception as exc:
+            print(f"[call_columns] load failed for workspace {workspace_id}: {exc}")
+            return None
+    if entry is None or not entry.covers(start):
+        return None
+    return entry
+
+
+# --- reads with rollup fallback ----------------------------------------------
+
+
+async def call_totals(
+    session,
+    workspace_id: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+    agent_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """call_metrics.call_totals() over the window, from the cache when possible."""
+    entry = await workspace_columns(session, workspace_id, start)
+    if entry is None:
+        return await call_metrics.call_totals(
+            session, call_metrics.metrics_window(workspace_id, start, end, agent_id=agent_id)
+        )
+    with entry.lock:
+        return entry.totals(start, end, agent_id)
+
+
+async def daily_call_trends(session, workspace_id: int, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """call_metrics.daily_call_trends() over the window, from the cache when possible."""
+    entry = await workspace_columns(session, workspace_id, start)
+    if entry is None:
+        return await call_metrics.daily_call_trends(session, call_metrics.metrics_window(workspace_id, start, end))
+    with entry.lock:
+        return entry.daily_trends(start, end)
+
+
+async def agent_call_totals(session, workspace_id: int, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """call_metrics.agent_call_totals(), from the cache when possible (the agents still come from SQL)."""
+    entry = await workspace_columns(session, workspace_id, start)
+    if entry is None:
+        return await call_metrics.agent_call_totals(session, workspace_id, start, end)
+    with entry.lock:
+        per_agent = entry.agent_totals(start, end)
+    agents = (
+        await session.exec(
+            select(Agent.id, Agent.name, Agent.agent_type, Agent.status)
+            .where(Agent.workspace_id == workspace_id)
+            .order_by(Agent.id)
+        )
+    ).all()
+    empty = {"total_calls": 0, "completed_calls": 0, "total_duration": 0, "average_sentiment_score": None}
+    return [
+        {"id": row.id, "name": row.name, "agent_type": row.agent_type, "status": row.status, **per_agent.get(row.id, empty)}
+        for row in agents
+    ]
+
+
+# --- incremental maintenance -------------------------------------------------
+
+
+def _has_tracked_changes(call: CallLog) -> bool:
+    attrs = inspect(call).attrs
+    return any(attrs[field].history.has_changes() for field in _TRACKED_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_call_rows(session: Session, flush_context) -> None:
+    # Ids are assigned by now and attribute history still shows what changed
+    upserts: Dict[int, List[tuple]] = defaultdict(list)
+    removals: Dict[int, List[int]] = defaultdict(list)
+    for obj in session.new:
+        if isinstance(obj, CallLog) and obj.started_at is not None:
+            upserts[obj.workspace_id].append(tuple(getattr(obj, field) for field in _SOURCE_FIELDS))
+    for obj in session.dirty:
+        if not isinstance(obj, CallLog) or obj.id is None or not _has_tracked_changes(obj):
+            continue
+        for previous in inspect(obj).attrs.workspace_id.history.deleted:
+            if previous is not None and previous != obj.workspace_id:
+                removals[previous].append(obj.id)
+        if obj.started_at is None:
+            removals[obj.workspace_id].append(obj.id)
+        else:
+            upserts[obj.workspace_id].append(tuple(getattr(obj, field) for field in _SOURCE_FIELDS))
+    for obj in session.deleted:
+        if isinstance(obj, CallLog) and obj.id is not None:
+            removals[obj.workspace_id].append(obj.id)
+    if not (upserts or removals):
+        return
+    pending = session.info.setdefault("call_columns_pending", [])
+    pending.append((dict(upserts), dict(removals)))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_call_rows(session: Session) -> None:
+    pending = session.info.pop("call_columns_pending", None)
+    if not pending:
+        return
+    for upserts, removals in pending:
+        for workspace_id in set(upserts) | set(removals):
+            column_cache.bump(workspace_id)
+            entry = column_cache.peek(workspace_id)
+            if entry is None:
+                continue
+            with entry.lock:
+                for call_id in removals.get(workspace_id, ()):
+                    entry.remove(call_id)
+                placed = all([entry.upsert(row) for row in upserts.get(workspace_id, ())])
+            if not placed:
+                column_cache.pop(workspace_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_call_rows(session: Session) -> None:
+    session.info.pop("call_columns_pending", None)
@@ -0,0 +1,281 @@
+"""
+Call metric distributions (percentiles) for the analytics endpoints.
+
+For every finished call (``ended_at`` set) three metrics are recorded:
+
+- ``duration_seconds``: talk time of completed calls,
+- ``handle_time_seconds``: ``ended_at - started_at`` of every finished call,
+- ``turn_latency_seconds``: for each user turn in the transcript, the time until
+  the assistant turn that answers it (from the turns' timestamps).
+
+Values are kept as DDSketches (app.core.sketch) per workspace, UTC day of
+``started_at``, agent and metric in ``call_metric_sketches``. A window's
+percentiles merge its rows (at most one per day, agent and metric), so reading
+p50/p90/p99 costs the same however many calls the window covers.
+
+Sketch rows are kept current by a ``before_flush`` hook, like the
+call_metrics_daily rollup: a call's previous values are taken out of its sketch
+and its new ones added, in the same transaction. Writes that bypass the ORM
+need a rebuild:
+
+    cd backend && python -m app.services.call_distributions                     # rebuild everything
+    cd backend && python -m app.services.call_distributions --workspace-id 1 --since 2026-01-01
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, event, inspect, insert, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.core.sketch import DDSketch, merge_serialized, percentile_summary
+from app.db import add_to_counters
+from app.models.call import CallLog, CallMetricSketch
+
+METRICS = ("duration_seconds", "handle_time_seconds", "turn_latency_seconds")
+QUANTILES = (0.5, 0.9, 0.99)
+
+# CallLog attributes a call's recorded values depend on
+_TRACKED_FIELDS = ("workspace_id", "agent_id", "started_at", "ended_at", "status", "duration_seconds", "transcript")
+_KEY_FIELDS = ("workspace_id", "day", "agent_id", "metric")
+
+
+def _turn_time(turn: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(turn["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def turn_latencies(transcript: Optional[List[Dict[str, Any]]]) -> List[float]:
+    """Seconds from each user turn (the last of a run) to the next assistant turn."""
+    latencies = []
+    asked_at = None
+    for turn in transcript or []:
+        if not isinstance(turn, dict):
+            continue
+        role = turn.get("role")
+        if role == "user":
+            asked_at = _turn_time(turn)
+        elif role == "assistant" and asked_at is not None:
+            answered_at = _turn_time(turn)
+            if answered_at is not None:
+                latencies.append(max((answered_at - asked_at).total_seconds(), 0.0))
+            asked_at = None
+    return latencies
+
+
+def call_values(values: Dict[str, Any]) -> Dict[tuple, List[float]]:
+    """The values a call with these field values contributes, by sketch key."""
+    started_at, ended_at = values["started_at"], values["ended_at"]
+    if values["workspace_id"] is None or started_at is None or ended_at is None:
+        return {}
+    base = (values["workspace_id"], started_at.date(), values["agent_id"] or 0)
+    recorded = {
+        base + ("handle_time_seconds",): [max((ended_at - started_at).total_seconds(), 0.0)],
+        base + ("turn_latency_seconds",): turn_latencies(values["transcript"]),
+    }
+    if values["status"] == "completed":
+        recorded[base + ("duration_seconds",)] = [values["duration_seconds"] or 0]
+    return {key: samples for key, samples in recorded.items() if samples}
+
+
+# --- reads -----------------------------------------------------------------
+
+
+def _window(workspace_id: int, start: datetime, end: Optional[datetime], agent_id: Optional[int]) -> list:
+    conditions = [CallMetricSketch.workspace_id == workspace_id, CallMetricSketch.day >= start.date()]
+    if end is not None:
+        conditions.append(CallMetricSketch.day <= end.date())
+    if agent_id:
+        conditions.append(CallMetricSketch.agent_id == agent_id)
+    return conditions
+
+
+def empty_percentiles(qs: Sequence[float] = QUANTILES) -> Dict[str, Dict[str, Optional[float]]]:
+    return _summaries({}, qs)
+
+
+def _summaries(sketches: Dict[str, DDSketch], qs: Sequence[float]) -> Dict[str, Dict[str, Optional[float]]]:
+    return {metric: percentile_summary(sketches.get(metric, DDSketch()), qs) for metric in METRICS}
+
+
+async def percentiles(
+    session,
+    workspace_id: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+    agent_id: Optional[int] = None,
+    qs: Sequence[float] = QUANTILES,
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """{metric: {"count", "p50", "p90", "p99"}} over the window's days (percentiles None without values)."""
+    rows = (
+        await session.exec(
+            select(CallMetricSketch.metric, CallMetricSketch.sketch).where(*_window(workspace_id, start, end, agent_id))
+        )
+    ).all()
+    return _summaries(merge_serialized(rows), qs)
+
+
+async def percentiles_by_agent(
+    session,
+    workspace_id: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+    qs: Sequence[float] = QUANTILES,
+) -> Dict[int, Dict[str, Dict[str, Optional[float]]]]:
+    """percentiles() per agent id (calls without an agent omitted), from one query."""
+    rows = (
+        await session.exec(
+            select(CallMetricSketch.agent_id, CallMetricSketch.metric, CallMetricSketch.sketch).where(
+                *_window(workspace_id, start, end, None), CallMetricSketch.agent_id != 0
+            )
+        )
+    ).all()
+    sketches: Dict[int, Dict[str, DDSketch]] = defaultdict(dict)
+    for (agent_id, metric), sketch in merge_serialized(((agent_id, metric), data) for agent_id, metric, data in rows).items():
+        sketches[agent_id][metric] = sketch
+    return {agent_id: _summaries(by_metric, qs) for agent_id, by_metric in sketches.items()}
+
+
+# --- incremental maintenance -----------------------------------------------
+
+
+def _stored_values(session: Session, call_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Tracked fields of calls as currently stored (before the flush)."""
+    if not call_ids:
+        return {}
+    table = CallLog.__table__
+    rows = session.connection().execute(
+        select(table.c.id, *(table.c[field] for field in _TRACKED_FIELDS)).where(table.c.id.in_(call_ids))
+    )
+    return {row.id: {field: getattr(row, field) for field in _TRACKED_FIELDS} for row in rows}
+
+
+def _may_change_values(call: CallLog) -> bool:
+    attrs = inspect(call).attrs
+    if not any(attrs[field].history.has_changes() for field in _TRACKED_FIELDS):
+        return False
+    # Calls still in progress record nothing before or after (transcript updates mid-call)
+    return call.ended_at is not None or attrs.ended_at.history.has_changes()
+
+
+def _add_values(deltas: Dict[tuple, DDSketch], values: Dict[str, Any], sign: int) -> None:
+    for key, samples in call_values(values).items():
+        for sample in samples:
+            deltas[key].add(sample, sign)
+
+
+def apply_sketch_deltas(conn: Connection, deltas: Dict[tuple, DDSketch]) -> None:
+    """Merge per-key sketch deltas into the stored sketches, creating rows as needed."""
+    deltas = {key: delta for key, delta in deltas.items() if not delta.is_empty()}
+    if not deltas:
+        return
+    keys = sorted(deltas)
+    # Make sure every row exists (no-op for existing ones), then lock and rewrite them
+    add_to_counters(
+        conn,
+        CallMetricSketch,
+        [dict(zip(_KEY_FIELDS, key), value_count=0, sketch=b"") for key in keys],
+        ("value_count",),
+    )
+    table = CallMetricSketch.__table__
+    key_columns = [table.c[field] for field in _KEY_FIELDS]
+    stored = conn.execute(
+        select(*key_columns, table.c.sketch).where(tuple_(*key_columns).in_(keys)).with_for_update()
+    )
+    rows = []
+    for row in stored:
+        key = tuple(row[:4])
+        sketch = DDSketch.from_bytes(row.sketch)
+        sketch.merge(deltas[key])
+        row_values = {f"key_{field}": value for field, value in zip(_KEY_FIELDS, key)}
+        rows.append(dict(row_values, new_sketch=sketch.to_bytes(), new_count=sketch.count))
+    conn.execute(
+        update(table)
+        .where(*(table.c[field] == bindparam(f"key_{field}") for field in _KEY_FIELDS))
+        .values(sketch=bindparam("new_sketch"), value_count=bindparam("new_count")),
+        rows,
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _track_call_values(session: Session, flush_context, instances) -> None:
+    new_calls = [obj for obj in session.new if isinstance(obj, CallLog) and obj.ended_at is not None]
+    changed_calls = [
+        obj for obj in session.dirty if isinstance(obj, CallLog) and obj.id is not None and _may_change_values(obj)
+    ]
+    deleted_calls = [obj for obj in session.deleted if isinstance(obj, CallLog) and obj.id is not None]
+    if not (new_calls or changed_calls or deleted_calls):
+        return
+
+    deltas: Dict[tuple, DDSketch] = defaultdict(DDSketch)
+    stored = _stored_values(session, [call.id for call in changed_calls + deleted_calls])
+    for call in new_calls + changed_calls:
+        _add_values(deltas, {field: getattr(call, field) for field in _TRACKED_FIELDS}, 1)
+    for call in changed_calls + deleted_calls:
+        if call.id in stored:
+            _add_values(deltas, stored[call.id], -1)
+    apply_sketch_deltas(session.connection(), deltas)
+
+
+# --- backfill / repair -----------------------------------------------------
+
+
+def rebuild_sketches(
+    conn: Connection,
+    workspace_id: Optional[int] = None,
+    since: Optional[date] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Recompute sketch rows from call_logs (optionally one workspace, from a day on).
+    Returns the number of rows written.
+    """
+    clear = delete(CallMetricSketch)
+    calls = CallLog.__table__.c
+    conditions = [calls.ended_at.is_not(None), calls.started_at.is_not(None)]
+    if workspace_id is not None:
+        clear = clear.where(CallMetricSketch.workspace_id == workspace_id)
+        conditions.append(calls.workspace_id == workspace_id)
+    if since is not None:
+        clear = clear.where(CallMetricSketch.day >= since)
+        conditions.append(calls.started_at >= datetime.combine(since, datetime.min.time()))
+    conn.execute(clear)
+
+    sketches: Dict[Tuple, DDSketch] = defaultdict(DDSketch)
+    result = conn.execution_options(yield_per=batch_size).execute(
+        select(*(calls[field] for field in _TRACKED_FIELDS)).where(*conditions)
+    )
+    for partition in result.partitions():
+        for row in partition:
+            _add_values(sketches, dict(row._mapping), 1)
+    rows = [
+        dict(zip(_KEY_FIELDS, key), value_count=sketch.count, sketch=sketch.to_bytes())
+        for key, sketch in sketches.items()
+        if not sketch.is_empty()
+    ]
+    if rows:
+        conn.execute(insert(CallMetricSketch), rows)
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild call_metric_sketches from call_logs.")
+    parser.add_argument("--workspace-id", type=int, help="only this workspace (default: all)")
+    parser.add_argument("--since", type=date.fromisoformat, help="only days from this date on (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    with engine.begin() as conn:
+        written = rebuild_sketches(conn, args.workspace_id, args.since)
+    print(f"Rebuilt call_metric_sketches: {written} rows.")
+
+
+if __name__ == "__main__":
+    main()
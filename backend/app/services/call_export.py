@@ -0,0 +1,378 @@
+"""
+Call log exports (CSV, NDJSON, Parquet).
+
+Rows are read from a server-side cursor (``yield_per``) in batches of
+``EXPORT_BATCH_SIZE`` and each batch is encoded and handed on before the next
+is fetched, so a worker holds one batch in memory however many calls the
+export covers. Small exports are streamed straight into the response; large
+ones run as a job that writes ``<job_id>.<ext>`` under ``EXPORT_DIR`` next to
+a ``<job_id>.json`` status file, which any worker on the host can serve.
+
+Parquet needs the optional ``pyarrow`` package; each batch becomes one row
+group.
+
+    cd backend && python -m app.services.call_export --workspace-id 1 --format ndjson --days 30 > calls.ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.call import CallLog
+
+# Columns in export order; transcripts are opt-in because they dominate the size
+EXPORT_COLUMNS = (
+    "id",
+    "workspace_id",
+    "agent_id",
+    "caller_name",
+    "caller_number",
+    "direction",
+    "status",
+    "duration_seconds",
+    "sentiment",
+    "sentiment_score",
+    "outcome",
+    "summary",
+    "tags",
+    "recording_url",
+    "cost_cents",
+    "twilio_call_sid",
+    "started_at",
+    "ended_at",
+    "created_at",
+)
+TRANSCRIPT_COLUMN = "transcript"
+_JSON_COLUMNS = {"tags", TRANSCRIPT_COLUMN}
+
+
+def export_columns(include_transcripts: bool) -> List[str]:
+    return list(EXPORT_COLUMNS) + ([TRANSCRIPT_COLUMN] if include_transcripts else [])
+
+
+def iter_call_batches(
+    workspace_id: int,
+    since: datetime,
+    columns: Sequence[str],
+    batch_size: Optional[int] = None,
+) -> Iterator[List[tuple]]:
+    """
+    Yield the workspace's calls started since ``since`` (oldest first) as lists
+    of row tuples, ``batch_size`` rows at a time, from a server-side cursor.
+    """
+    from app.db import engine
+
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    query = (
+        select(*(getattr(CallLog, name) for name in columns))
+        .where(CallLog.workspace_id == workspace_id, CallLog.started_at >= since)
+        .order_by(CallLog.started_at, CallLog.id)
+    )
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+# --- encoders ----------------------------------------------------------------
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(columns: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """One chunk for the header, then one per batch. JSON columns are embedded as JSON text."""
+    json_positions = [i for i, name in enumerate(columns) if name in _JSON_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            values = [_plain(value) for value in row]
+            for i in json_positions:
+                values[i] = json.dumps(values[i] if values[i] is not None else [])
+            writer.writerow(values)
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(columns: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """One JSON object per line, one chunk per batch."""
+    for batch in batches:
+        lines = [
+            json.dumps({name: _plain(value) for name, value in zip(columns, row)}, separators=(",", ":"))
+            for row in batch
+        ]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export is not available on this server (pyarrow is not installed)",
+        )
+    return pyarrow
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what was written until ``drain`` hands it on."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(pa, columns: Sequence[str]):
+    types = {
+        "id": pa.int64(),
+        "workspace_id": pa.int64(),
+        "agent_id": pa.int64(),
+        "duration_seconds": pa.int64(),
+        "cost_cents": pa.int64(),
+        "sentiment_score": pa.float64(),
+        "tags": pa.list_(pa.string()),
+        "started_at": pa.timestamp("us"),
+        "ended_at": pa.timestamp("us"),
+        "created_at": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns])
+
+
+def encode_parquet(columns: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """One row group per batch; the footer follows the last one. Transcripts are stored as JSON text."""
+    pa = _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, columns)
+    transcript_at = columns.index(TRANSCRIPT_COLUMN) if TRANSCRIPT_COLUMN in columns else None
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            data = [list(values) for values in zip(*batch)]
+            if transcript_at is not None:
+                data[transcript_at] = [json.dumps(value if value is not None else []) for value in data[transcript_at]]
+            writer.write_table(pa.Table.from_arrays(data, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# Format name -> (encoder, media type, file extension)
+FORMATS: Dict[str, tuple] = {
+    "csv": (encode_csv, "text/csv", "csv"),
+    "ndjson": (encode_ndjson, "application/x-ndjson", "ndjson"),
+    "parquet": (encode_parquet, "application/vnd.apache.parquet", "parquet"),
+}
+
+
+def check_format(export_format: str) -> None:
+    """Fail early (before a response starts) when the format cannot be produced here."""
+    if export_format == "parquet":
+        _require_pyarrow()
+
+
+def export_chunks(
+    workspace_id: int,
+    since: datetime,
+    export_format: str,
+    include_transcripts: bool = False,
+    batch_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    columns = export_columns(include_transcripts)
+    encoder = FORMATS[export_format][0]
+    return encoder(columns, iter_call_batches(workspace_id, since, columns, batch_size))
+
+
+def export_filename(workspace_id: int, export_format: str) -> str:
+    return f"calls-{workspace_id}-{datetime.utcnow():%Y%m%d-%H%M%S}.{FORMATS[export_format][2]}"
+
+
+# --- file jobs -----------------------------------------------------------------
+
+
+def _export_dir() -> Path:
+    path = Path(settings.EXPORT_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _status_path(job_id: str) -> Path:
+    return _export_dir() / f"{job_id}.json"
+
+
+def _write_status(job: Dict[str, Any]) -> None:
+    # Write-then-rename so a poll never reads half a status file
+    path = _status_path(job["id"])
+    temporary = path.with_suffix(".json.tmp")
+    temporary.write_text(json.dumps(job))
+    os.replace(temporary, path)
+
+
+def read_job(job_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        uuid.UUID(hex=job_id)
+    except ValueError:
+        return None
+    try:
+        return json.loads(_status_path(job_id).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def job_file(job: Dict[str, Any]) -> Path:
+    return _export_dir() / job["filename"]
+
+
+def create_job(
+    workspace_id: int,
+    user_id: int,
+    since: datetime,
+    export_format: str,
+    include_transcripts: bool,
+) -> Dict[str, Any]:
+    prune_jobs()
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "workspace_id": workspace_id,
+        "user_id": user_id,
+        "format": export_format,
+        "include_transcripts": include_transcripts,
+        "since": since.isoformat(),
+        "status": "queued",
+        "rows": 0,
+        "bytes": 0,
+        "error": None,
+        "filename": f"{job_id}.{FORMATS[export_format][2]}",
+        "download_name": export_filename(workspace_id, export_format),
+        "created_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+    }
+    _write_status(job)
+    return job
+
+
+def run_job(job: Dict[str, Any], batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Write the export to EXPORT_DIR, updating the status file once per batch. Blocking."""
+    columns = export_columns(job["include_transcripts"])
+    encoder = FORMATS[job["format"]][0]
+    target = job_file(job)
+    partial = target.with_suffix(target.suffix + ".part")
+    job["status"] = "running"
+    _write_status(job)
+
+    def counted(batches: Iterator[List[tuple]]) -> Iterator[List[tuple]]:
+        for batch in batches:
+            job["rows"] += len(batch)
+            yield batch
+
+    batches = counted(
+        iter_call_batches(job["workspace_id"], datetime.fromisoformat(job["since"]), columns, batch_size)
+    )
+    try:
+        with open(partial, "wb") as handle:
+            for chunk in encoder(columns, batches):
+                handle.write(chunk)
+                job["bytes"] += len(chunk)
+                _write_status(job)
+        os.replace(partial, target)
+        job["status"] = "completed"
+    except Exception as exc:
+        print(f"[call_export] job {job['id']} failed: {exc}")
+        partial.unlink(missing_ok=True)
+        job["status"] = "failed"
+        job["error"] = exc.detail if isinstance(exc, HTTPException) else str(exc)
+    job["finished_at"] = datetime.utcnow().isoformat()
+    _write_status(job)
+    return job
+
+
+def prune_jobs(now: Optional[float] = None) -> int:
+    """Delete exports (and their status files) older than EXPORT_RETENTION_HOURS; returns how many."""
+    cutoff = (now or time.time()) - settings.EXPORT_RETENTION_HOURS * 3600
+    removed = 0
+    for status_file in _export_dir().glob("*.json"):
+        if status_file.stat().st_mtime >= cutoff:
+            continue
+        try:
+            job = json.loads(status_file.read_text())
+        except (OSError, ValueError):
+            continue
+        if job.get("status") in ("queued", "running"):
+            continue
+        (_export_dir() / job.get("filename", "")).unlink(missing_ok=True)
+        status_file.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Status fields returned to clients."""
+    return {
+        key: job[key]
+        for key in ("id", "workspace_id", "format", "include_transcripts", "since", "status", "rows", "bytes", "error", "created_at", "finished_at")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export a workspace's calls to stdout.")
+    parser.add_argument("--workspace-id", type=int, required=True)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--include-transcripts", action="store_true")
+    args = parser.parse_args()
+
+    since = datetime.utcnow() - timedelta(days=args.days)
+    out = sys.stdout.buffer
+    for chunk in export_chunks(args.workspace_id, since, args.format, args.include_transcripts):
+        out.write(chunk)
+    out.flush()
+
+
+if __name__ == "__main__":
+    main()
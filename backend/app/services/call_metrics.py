@@ -0,0 +1,436 @@
+"""
+Call metrics for the analytics, call stats and dashboard endpoints.
+
+Reads come from the ``call_metrics_daily`` rollup (CallMetricsDaily), so a
+window costs at most one small row per day, agent and status/direction/
+sentiment combination, however many calls it covers. Windows are whole UTC days.
+
+The rollup is kept current by a ``before_flush`` hook: every ORM insert, update
+or delete of a CallLog adjusts the matching rows in the same transaction. Writes
+that bypass the ORM (bulk ``insert(CallLog)``, raw SQL) need a rebuild:
+
+    cd backend && python -m app.services.call_metrics                     # rebuild everything
+    cd backend && python -m app.services.call_metrics --workspace-id 1 --since 2026-01-01
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement, FunctionElement
+from sqlalchemy.types import String
+from sqlmodel import select
+
+from app.db import add_to_counters
+from app.models.agent import Agent
+from app.models.call import CallLog, CallMetricsDaily
+
+# CallLog attributes that change a call's rollup row or its measures
+_TRACKED_FIELDS = (
+    "workspace_id",
+    "agent_id",
+    "started_at",
+    "direction",
+    "status",
+    "sentiment",
+    "duration_seconds",
+    "cost_cents",
+    "sentiment_score",
+)
+# Callbacks run with the ids of workspaces whose calls changed, after each commit
+_commit_listeners: List[Callable[[Set[int]], None]] = []
+# Callbacks run with the rollup deltas a commit applied, keyed like the rollup rows
+_delta_listeners: List[Callable[[Dict[tuple, List[float]]], None]] = []
+_MEASURES = ("call_count", "duration_seconds", "cost_cents", "sentiment_score_sum", "sentiment_score_count")
+
+
+class day_bucket(FunctionElement):
+    """UTC day of a timestamp: CAST(... AS DATE) on Postgres, date(...) on SQLite."""
+
+    type = String()
+    name = "day_bucket"
+    inherit_cache = True
+
+
+@compiles(day_bucket)
+def _day_bucket_default(element, compiler, **kw):
+    return "CAST(%s AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_bucket, "sqlite")
+def _day_bucket_sqlite(element, compiler, **kw):
+    return "date(%s)" % compiler.process(element.clauses, **kw)
+
+
+def bucket_date(value: Any) -> str:
+    """ISO date of a rollup day (a date, or a string on SQLite)."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def count_where(condition: ColumnElement) -> ColumnElement:
+    """Calls in rollup rows matching condition (0 on an empty set)."""
+    return func.coalesce(func.sum(case((condition, CallMetricsDaily.call_count), else_=0)), 0)
+
+
+def _sum(column: ColumnElement) -> ColumnElement:
+    return func.coalesce(func.sum(column), 0)
+
+
+def _average_score(score_sum: Any, score_count: Any) -> Optional[float]:
+    return score_sum / score_count if score_count else None
+
+
+def metrics_window(
+    workspace_id: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+    agent_id: Optional[int] = None,
+) -> List[ColumnElement]:
+    """WHERE conditions for a workspace's rollup rows on the days from start through end."""
+    conditions = [CallMetricsDaily.workspace_id == workspace_id, CallMetricsDaily.day >= start.date()]
+    if end is not None:
+        conditions.append(CallMetricsDaily.day <= end.date())
+    if agent_id:
+        conditions.append(CallMetricsDaily.agent_id == agent_id)
+    return conditions
+
+
+# --- reads -----------------------------------------------------------------
+
+
+def _totals_columns() -> List[ColumnElement]:
+    return [
+        _sum(CallMetricsDaily.call_count).label("total_calls"),
+        count_where(CallMetricsDaily.status == "completed").label("completed_calls"),
+        count_where(CallMetricsDaily.direction == "inbound").label("inbound_calls"),
+        count_where(CallMetricsDaily.direction == "outbound").label("outbound_calls"),
+        _sum(CallMetricsDaily.duration_seconds).label("total_duration"),
+        _sum(CallMetricsDaily.cost_cents).label("total_cost_cents"),
+        _sum(CallMetricsDaily.sentiment_score_sum).label("sentiment_score_sum"),
+        _sum(CallMetricsDaily.sentiment_score_count).label("sentiment_score_count"),
+        count_where(CallMetricsDaily.sentiment == "positive").label("positive"),
+        count_where(CallMetricsDaily.sentiment == "neutral").label("neutral"),
+        count_where(CallMetricsDaily.sentiment == "negative").label("negative"),
+    ]
+
+
+def _totals(values: Dict[str, Any]) -> Dict[str, Any]:
+    totals = {key: int(value or 0) for key, value in values.items() if key != "sentiment_score_sum"}
+    totals["average_sentiment_score"] = _average_score(values["sentiment_score_sum"], totals.pop("sentiment_score_count"))
+    return totals
+
+
+async def call_totals(session, conditions: List[ColumnElement]) -> Dict[str, Any]:
+    """Counts, sums and the average sentiment score over the matching rollup rows."""
+    row = (await session.exec(select(*_totals_columns()).where(*conditions))).one()
+    return _totals(dict(row._mapping))
+
+
+async def call_totals_by_agent(session, conditions: List[ColumnElement]) -> Tuple[Dict[str, Any], Dict[int, int]]:
+    """
+    call_totals() plus the number of calls per agent id (calls without an agent
+    omitted), from one grouped query.
+    """
+    rows = (
+        await session.exec(
+            select(CallMetricsDaily.agent_id, *_totals_columns())
+            .where(*conditions)
+            .group_by(CallMetricsDaily.agent_id)
+        )
+    ).all()
+    combined: Dict[str, Any] = {column.name: 0 for column in _totals_columns()}
+    calls_by_agent: Dict[int, int] = {}
+    for row in rows:
+        values = dict(row._mapping)
+        agent_id = values.pop("agent_id")
+        for key, value in values.items():
+            combined[key] += value or 0
+        if agent_id:
+            calls_by_agent[agent_id] = int(values["total_calls"])
+    return _totals(combined), calls_by_agent
+
+
+async def daily_call_trends(session, conditions: List[ColumnElement]) -> List[Dict[str, Any]]:
+    """Per-day totals for the matching rollup rows, oldest day first (days without calls omitted)."""
+    rows = (
+        await session.exec(
+            select(
+                CallMetricsDaily.day,
+                _sum(CallMetricsDaily.call_count).label("total_calls"),
+                count_where(CallMetricsDaily.status == "completed").label("completed_calls"),
+                _sum(CallMetricsDaily.duration_seconds).label("total_duration"),
+                count_where(CallMetricsDaily.direction == "inbound").label("inbound"),
+            )
+            .where(*conditions)
+            .group_by(CallMetricsDaily.day)
+            .having(func.sum(CallMetricsDaily.call_count) > 0)
+            .order_by(CallMetricsDaily.day)
+        )
+    ).all()
+    return [
+        {
+            "date": bucket_date(row.day),
+            "total_calls": int(row.total_calls),
+            "completed_calls": int(row.completed_calls),
+            "total_duration": int(row.total_duration),
+            "inbound": int(row.inbound),
+            "outbound": int(row.total_calls) - int(row.inbound),
+        }
+        for row in rows
+    ]
+
+
+async def agent_call_totals(session, workspace_id: int, start: datetime, end: datetime) -> List[Any]:
+    """Every agent of the workspace with its call totals from start through end, in agent id order."""
+    per_agent = (
+        select(
+            CallMetricsDaily.agent_id,
+            _sum(CallMetricsDaily.call_count).label("total_calls"),
+            count_where(CallMetricsDaily.status == "completed").label("completed_calls"),
+            _sum(CallMetricsDaily.duration_seconds).label("total_duration"),
+            _sum(CallMetricsDaily.sentiment_score_sum).label("sentiment_score_sum"),
+            _sum(CallMetricsDaily.sentiment_score_count).label("sentiment_score_count"),
+        )
+        .where(*metrics_window(workspace_id, start, end))
+        .group_by(CallMetricsDaily.agent_id)
+        .subquery()
+    )
+    rows = (
+        await session.exec(
+            select(
+                Agent.id,
+                Agent.name,
+                Agent.agent_type,
+                Agent.status,
+                func.coalesce(per_agent.c.total_calls, 0).label("total_calls"),
+                func.coalesce(per_agent.c.completed_calls, 0).label("completed_calls"),
+                func.coalesce(per_agent.c.total_duration, 0).label("total_duration"),
+                per_agent.c.sentiment_score_sum,
+                per_agent.c.sentiment_score_count,
+            )
+            .select_from(Agent)
+            .outerjoin(per_agent, per_agent.c.agent_id == Agent.id)
+            .where(Agent.workspace_id == workspace_id)
+            .order_by(Agent.id)
+        )
+    ).all()
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "agent_type": row.agent_type,
+            "status": row.status,
+            "total_calls": int(row.total_calls),
+            "completed_calls": int(row.completed_calls),
+            "total_duration": int(row.total_duration),
+            "average_sentiment_score": _average_score(row.sentiment_score_sum, row.sentiment_score_count),
+        }
+        for row in rows
+    ]
+
+
+async def count_active_agents(session, workspace_id: int) -> int:
+    return (
+        await session.exec(
+            select(func.count(Agent.id)).where(Agent.workspace_id == workspace_id, Agent.status == "active")
+        )
+    ).one()
+
+
+# --- incremental maintenance -----------------------------------------------
+
+
+def _rollup_key(values: Dict[str, Any]) -> Optional[tuple]:
+    if values["workspace_id"] is None or values["started_at"] is None:
+        return None
+    return (
+        values["workspace_id"],
+        values["started_at"].date(),
+        values["agent_id"] or 0,
+        values["direction"] or "",
+        values["status"] or "",
+        values["sentiment"] or "",
+    )
+
+
+def _add_contribution(deltas: Dict[tuple, List[float]], values: Dict[str, Any], sign: int) -> None:
+    key = _rollup_key(values)
+    if key is None:
+        return
+    score = values["sentiment_score"]
+    measures = deltas[key]
+    measures[0] += sign
+    measures[1] += sign * (values["duration_seconds"] or 0)
+    measures[2] += sign * (values["cost_cents"] or 0)
+    if score is not None:
+        measures[3] += sign * score
+        measures[4] += sign
+
+
+def _stored_values(session: Session, call_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Tracked fields of calls as currently stored in the database (the flush has not run yet)."""
+    if not call_ids:
+        return {}
+    columns = [getattr(CallLog.__table__.c, field) for field in _TRACKED_FIELDS]
+    rows = session.connection().execute(
+        select(CallLog.__table__.c.id, *columns).where(CallLog.__table__.c.id.in_(call_ids))
+    )
+    return {row.id: {field: getattr(row, field) for field in _TRACKED_FIELDS} for row in rows}
+
+
+def _has_tracked_changes(call: CallLog) -> bool:
+    attrs = inspect(call).attrs
+    return any(attrs[field].history.has_changes() for field in _TRACKED_FIELDS)
+
+
+def apply_deltas(conn: Connection, deltas: Dict[tuple, List[float]]) -> None:
+    """Add per-key measure deltas to the rollup, creating rows as needed."""
+    rows = [
+        dict(
+            zip(("workspace_id", "day", "agent_id", "direction", "status", "sentiment"), key),
+            **dict(zip(_MEASURES, measures)),
+        )
+        for key, measures in deltas.items()
+        if any(measures)
+    ]
+    add_to_counters(conn, CallMetricsDaily, rows, _MEASURES)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_call_log_changes(session: Session, flush_context, instances) -> None:
+    new_calls = [obj for obj in session.new if isinstance(obj, CallLog)]
+    changed_calls = [
+        obj for obj in session.dirty if isinstance(obj, CallLog) and obj.id is not None and _has_tracked_changes(obj)
+    ]
+    deleted_calls = [obj for obj in session.deleted if isinstance(obj, CallLog) and obj.id is not None]
+    if not (new_calls or changed_calls or deleted_calls):
+        return
+
+    deltas: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0, 0.0, 0])
+    stored = _stored_values(session, [call.id for call in changed_calls + deleted_calls])
+    for call in new_calls + changed_calls:
+        _add_contribution(deltas, {field: getattr(call, field) for field in _TRACKED_FIELDS}, 1)
+    for call in changed_calls + deleted_calls:
+        if call.id in stored:
+            _add_contribution(deltas, stored[call.id], -1)
+    apply_deltas(session.connection(), deltas)
+    session.info.setdefault("call_metrics_workspaces", set()).update(key[0] for key in deltas)
+    if _delta_listeners:
+        pending = session.info.setdefault("call_metrics_deltas", defaultdict(lambda: [0, 0, 0, 0.0, 0]))
+        for key, measures in deltas.items():
+            pending[key] = [total + change for total, change in zip(pending[key], measures)]
+
+
+def on_calls_committed(listener: Callable[[Set[int]], None]) -> Callable[[Set[int]], None]:
+    """
+    Register ``listener(workspace_ids)`` to run after a commit that inserted,
+    updated or deleted calls of those workspaces (usable as a decorator).
+    """
+    _commit_listeners.append(listener)
+    return listener
+
+
+def on_deltas_committed(
+    listener: Callable[[Dict[tuple, List[float]]], None]
+) -> Callable[[Dict[tuple, List[float]]], None]:
+    """
+    Register ``listener(deltas)`` to run after a commit that changed the rollup,
+    with ``{(workspace_id, day, agent_id, direction, status, sentiment): measures}``
+    (measures as in _MEASURES, net of the whole transaction; usable as a decorator).
+    """
+    _delta_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_call_changes(session: Session) -> None:
+    workspace_ids = session.info.pop("call_metrics_workspaces", None)
+    deltas = session.info.pop("call_metrics_deltas", None)
+    if not workspace_ids:
+        return
+    for listener in _commit_listeners:
+        try:
+            listener(workspace_ids)
+        except Exception as exc:
+            print(f"[call_metrics] commit listener failed: {exc}")
+    deltas = {key: measures for key, measures in (deltas or {}).items() if any(measures)}
+    if not deltas:
+        return
+    for listener in _delta_listeners:
+        try:
+            listener(deltas)
+        except Exception as exc:
+            print(f"[call_metrics] delta listener failed: {exc}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_call_changes(session: Session) -> None:
+    session.info.pop("call_metrics_workspaces", None)
+    session.info.pop("call_metrics_deltas", None)
+
+
+# --- backfill / repair -----------------------------------------------------
+
+
+def rebuild_daily_metrics(conn: Connection, workspace_id: Optional[int] = None, since: Optional[date] = None) -> int:
+    """
+    Recompute rollup rows from call_logs (optionally one workspace, from a day on).
+    Returns the number of rows written.
+    """
+    clear = delete(CallMetricsDaily)
+    calls = CallLog.__table__.c
+    conditions = []
+    if workspace_id is not None:
+        clear = clear.where(CallMetricsDaily.workspace_id == workspace_id)
+        conditions.append(calls.workspace_id == workspace_id)
+    if since is not None:
+        clear = clear.where(CallMetricsDaily.day >= since)
+        conditions.append(calls.started_at >= datetime.combine(since, datetime.min.time()))
+    conn.execute(clear)
+
+    key = [
+        calls.workspace_id,
+        day_bucket(calls.started_at),
+        func.coalesce(calls.agent_id, 0),
+        func.coalesce(calls.direction, ""),
+        func.coalesce(calls.status, ""),
+        func.coalesce(calls.sentiment, ""),
+    ]
+    grouped = (
+        select(
+            *key,
+            func.count(),
+            _sum(calls.duration_seconds),
+            _sum(calls.cost_cents),
+            _sum(calls.sentiment_score),
+            func.count(calls.sentiment_score),
+        )
+        .where(calls.started_at.is_not(None), *conditions)
+        .group_by(*key)
+    )
+    columns = ["workspace_id", "day", "agent_id", "direction", "status", "sentiment", *_MEASURES]
+    return conn.execute(insert(CallMetricsDaily).from_select(columns, grouped)).rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the call_metrics_daily rollup from call_logs.")
+    parser.add_argument("--workspace-id", type=int, help="only this workspace (default: all)")
+    parser.add_argument("--since", type=date.fromisoformat, help="only days from this date on (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    with engine.begin() as conn:
+        written = rebuild_daily_metrics(conn, args.workspace_id, args.since)
+    print(f"Rebuilt call_metrics_daily: {written} rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+"""
+Paced outbound campaign dialer.
+
+A single scheduler task ticks once a second. Each tick runs one database
+transaction (in a worker thread) that:
+
+1. applies call results reported since the last tick (lead retry / exhaustion,
+   CallLog status and duration),
+2. for every running campaign inside its local call window, claims as many due
+   leads as the agent's free concurrency slots and the campaign's per-minute
+   token bucket allow, and creates their CallLog rows in bulk,
+3. marks campaigns with nothing left to dial as completed.
+
+Claimed leads are handed to the configured telephony driver. Drivers that learn
+the outcome asynchronously (webhooks) return ``in-progress`` and report later
+through ``campaign_dialer.report_result``; the slot stays held until then or
+until ``max_call_seconds`` passes.
+
+Leads a dialer process claimed and never settled (it stopped or crashed) are
+re-queued once they have been 'dialing' for longer than any live process would
+hold a call, so leads another process is still dialing are never called twice.
+
+The scheduler only runs where CAMPAIGN_DIALER_ENABLED is set (one process: the
+per-minute buckets live in memory), and the ``fake`` driver only in development.
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.db import engine
+from app.models.agent import Agent
+from app.models.call import CallLog
+from app.models.campaign import Campaign, CampaignLead
+
+# AgentAdvancedSettings defaults, used when neither the campaign nor the agent sets them.
+DEFAULT_RATE_LIMIT_PER_MINUTE = 30
+DEFAULT_MAX_RETRIES = 3
+
+RETRYABLE_OUTCOMES = {"no-answer", "busy", "failed"}
+CALL_STATUS_BY_OUTCOME = {
+    "completed": "completed",
+    "voicemail": "voicemail",
+    "no-answer": "missed",
+    "busy": "missed",
+    "failed": "failed",
+}
+# Claims older than max_call_seconds plus this are re-queued (see _recover_interrupted_calls),
+# checked this often.
+_CLAIM_GRACE_SECONDS = 60
+_RECOVERY_INTERVAL_SECONDS = 60
+
+
+# =========================
+# TELEPHONY DRIVERS
+# =========================
+
+@dataclass
+class DialAttempt:
+    call_id: int
+    lead_id: int
+    campaign_id: int
+    agent_id: int
+    workspace_id: int
+    phone_number: str
+    caller_id: Optional[str] = None
+    lead_name: Optional[str] = None
+
+
+@dataclass
+class DialResult:
+    outcome: str  # completed, voicemail, no-answer, busy, failed, in-progress
+    duration_seconds: int = 0
+    provider_call_id: Optional[str] = None
+
+    @property
+    def final(self) -> bool:
+        return self.outcome != "in-progress"
+
+
+class TelephonyDriver(abc.ABC):
+    """Places one outbound call. Subclasses talk to a carrier."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def dial(self, attempt: DialAttempt) -> DialResult:
+        ...
+
+
+class FakeTelephonyDriver(TelephonyDriver):
+    """
+    Local stand-in carrier: waits a random call length and picks an outcome.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        *,
+        outcome_weights: Optional[Dict[str, float]] = None,
+        min_seconds: float = 1.0,
+        max_seconds: float = 5.0,
+        seed: Optional[int] = None,
+    ):
+        self.outcome_weights = outcome_weights or {
+            "completed": 0.55,
+            "voicemail": 0.1,
+            "no-answer": 0.25,
+            "busy": 0.07,
+            "failed": 0.03,
+        }
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self._random = random.Random(seed)
+
+    async def dial(self, attempt: DialAttempt) -> DialResult:
+        outcomes = list(self.outcome_weights)
+        outcome = self._random.choices(outcomes, weights=[self.outcome_weights[o] for o in outcomes])[0]
+        seconds = self._random.uniform(self.min_seconds, self.max_seconds)
+        await asyncio.sleep(seconds)
+        talked = outcome in ("completed", "voicemail")
+        return DialResult(outcome=outcome, duration_seconds=round(seconds) if talked else 0)
+
+
+TELEPHONY_DRIVERS: Dict[str, Callable[[], TelephonyDriver]] = {
+    "fake": FakeTelephonyDriver,
+}
+
+
+def register_telephony_driver(name: str, factory: Callable[[], TelephonyDriver]) -> None:
+    TELEPHONY_DRIVERS[name] = factory
+
+
+# =========================
+# PACING
+# =========================
+
+class _MinuteBucket:
+    """Per-campaign calls-per-minute budget with a small burst."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = max(1, per_minute)
+        self.capacity = max(1, self.per_minute // 10)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+
+    def available(self, per_minute: int) -> int:
+        if per_minute != self.per_minute:
+            self.per_minute = max(1, per_minute)
+            self.capacity = max(1, self.per_minute // 10)
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.per_minute / 60.0)
+        self.updated_at = now
+        return int(self.tokens)
+
+    def consume(self, count: int) -> None:
+        self.tokens = max(0.0, self.tokens - count)
+
+
+def parse_clock(value: str) -> dt_time:
+    hours, minutes = value.split(":")
+    return dt_time(int(hours), int(minutes))
+
+
+def resolve_timezone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'.")
+
+
+def within_call_window(campaign: Campaign, now_utc: datetime) -> bool:
+    local = now_utc.replace(tzinfo=ZoneInfo("UTC")).astimezone(resolve_timezone(campaign.timezone)).time()
+    start = parse_clock(campaign.call_window_start)
+    end = parse_clock(campaign.call_window_end)
+    if start <= end:
+        return start <= local < end
+    return local >= start or local < end  # window crosses midnight
+
+
+def effective_limits(campaign: Campaign, agent: Agent) -> Tuple[int, int]:
+    """
+    (rate_limit_per_minute, max_retries): campaign override, then the agent's advanced
+    settings (``llm_settings["advanced"]``), then the runtime defaults.
+    """
+    advanced = (agent.llm_settings or {}).get("advanced") or {}
+    rate = campaign.rate_limit_per_minute or advanced.get("rate_limit_per_minute") or DEFAULT_RATE_LIMIT_PER_MINUTE
+    max_retries = campaign.max_retries
+    if max_retries is None:
+        max_retries = advanced.get("max_retries", DEFAULT_MAX_RETRIES)
+    return int(rate), int(max_retries)
+
+
+# =========================
+# SCHEDULER
+# =========================
+
+@dataclass
+class _ActiveCall:
+    agent_id: int
+    campaign_id: int
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class CampaignDialer:
+    """Owns the scheduler task, in-flight call slots and pending results."""
+
+    def __init__(self, driver_name: str = "fake", tick_seconds: float = 1.0, max_call_seconds: int = 900):
+        self.driver_name = driver_name
+        self.tick_seconds = tick_seconds
+        self.max_call_seconds = max_call_seconds
+        self._driver: Optional[TelephonyDriver] = None
+        self._active: Dict[int, _ActiveCall] = {}
+        self._results: List[Tuple[int, DialResult]] = []
+        self._buckets: Dict[int, _MinuteBucket] = {}
+        self._calls: set = set()
+        self._worker: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._recovered_at = 0.0
+
+    @property
+    def driver(self) -> TelephonyDriver:
+        if self._driver is None:
+            factory = TELEPHONY_DRIVERS.get(self.driver_name)
+            if factory is None:
+                raise RuntimeError(f"Unknown telephony driver '{self.driver_name}'.")
+            self._driver = factory()
+        return self._driver
+
+    def use_driver(self, driver: TelephonyDriver) -> None:
+        self._driver = driver
+
+    def active_calls(self) -> Dict[int, int]:
+        """In-flight calls per agent."""
+        return dict(Counter(call.agent_id for call in self._active.values()))
+
+    def start(self) -> None:
+        driver_name = self._driver.name if self._driver is not None else self.driver_name
+        if driver_name == FakeTelephonyDriver.name and settings.ENVIRONMENT != "development":
+            # The fake driver makes up outcomes; they would land in real call logs, rollups and usage
+            print(
+                f"[DIALER] Not starting: the '{driver_name}' telephony driver only runs in development "
+                f"(ENVIRONMENT={settings.ENVIRONMENT}). Set CAMPAIGN_TELEPHONY_DRIVER to a carrier driver."
+            )
+            return
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def report_result(self, call_id: int, outcome: str, duration_seconds: int = 0) -> bool:
+        """
+        Record the outcome of an in-flight call (for drivers that finish via webhook).
+        Returns False when the call is not one the dialer is waiting on.
+        """
+        if call_id not in self._active:
+            return False
+        self._results.append((call_id, DialResult(outcome=outcome, duration_seconds=duration_seconds)))
+        self.wake()
+        return True
+
+    async def close(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+        for task in list(self._calls):
+            task.cancel()
+        if self._calls:
+            await asyncio.gather(*self._calls, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _recover(self) -> None:
+        # A live dialer settles every claim within max_call_seconds; older claims belong to a dead one.
+        stale_before = datetime.utcnow() - timedelta(seconds=self.max_call_seconds + _CLAIM_GRACE_SECONDS)
+        self._recovered_at = time.monotonic()
+        try:
+            await asyncio.to_thread(_recover_interrupted_calls, stale_before)
+        except Exception as exc:
+            print("[DIALER] Could not recover interrupted campaign calls:", exc)
+
+    async def _run(self) -> None:
+        while True:
+            if time.monotonic() - self._recovered_at >= _RECOVERY_INTERVAL_SECONDS:
+                await self._recover()
+            try:
+                await self._tick()
+            except Exception as exc:
+                print("[DIALER] Tick failed:", exc)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick(self) -> None:
+        # Calls a carrier never reported on give their slot back eventually.
+        now = time.monotonic()
+        for call_id, call in list(self._active.items()):
+            if now - call.started_at > self.max_call_seconds and not any(cid == call_id for cid, _ in self._results):
+                self._results.append((call_id, DialResult(outcome="failed")))
+
+        results, self._results = self._results, []
+        budgets = {campaign_id: bucket.available(bucket.per_minute) for campaign_id, bucket in self._buckets.items()}
+        try:
+            attempts, rates = await asyncio.to_thread(_run_tick, results, budgets, datetime.utcnow())
+        except Exception:
+            self._results = results + self._results  # retry the writes next tick
+            raise
+
+        for call_id, _ in results:
+            self._active.pop(call_id, None)
+        for campaign_id, per_minute in rates.items():
+            bucket = self._buckets.get(campaign_id)
+            if bucket is None:
+                bucket = self._buckets[campaign_id] = _MinuteBucket(per_minute)
+            bucket.available(per_minute)
+        for campaign_id, count in Counter(attempt.campaign_id for attempt in attempts).items():
+            self._buckets[campaign_id].consume(count)
+        for campaign_id in list(self._buckets):
+            if campaign_id not in rates:
+                self._buckets.pop(campaign_id)
+
+        for attempt in attempts:
+            self._active[attempt.call_id] = _ActiveCall(agent_id=attempt.agent_id, campaign_id=attempt.campaign_id)
+            task = asyncio.create_task(self._place_call(attempt))
+            self._calls.add(task)
+            task.add_done_callback(self._calls.discard)
+        if attempts:
+            print(f"[DIALER] Dialing {len(attempts)} leads ({len(self._active)} calls in flight).")
+
+    async def _place_call(self, attempt: DialAttempt) -> None:
+        try:
+            result = await self.driver.dial(attempt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[DIALER] Driver failed for call {attempt.call_id}: {exc}")
+            result = DialResult(outcome="failed")
+        if result.final:
+            self._results.append((attempt.call_id, result))
+            self.wake()
+
+
+def _recover_interrupted_calls(stale_before: datetime) -> None:
+    """
+    Leads claimed before ``stale_before`` and still 'dialing' were left by a process
+    that stopped; they go back to the queue and their calls failed.
+    """
+    with Session(engine) as session:
+        query = select(CampaignLead).where(
+            CampaignLead.status == "dialing", CampaignLead.updated_at < stale_before
+        )
+        if engine.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        leads = session.exec(query).all()
+        if not leads:
+            return
+        now = datetime.utcnow()
+        call_ids = [lead.last_call_id for lead in leads if lead.last_call_id]
+        for call_log in session.exec(select(CallLog).where(CallLog.id.in_(call_ids))).all() if call_ids else []:
+            if call_log.status in ("queued", "in-progress"):
+                call_log.status = "failed"
+                call_log.outcome = "interrupted"
+                call_log.ended_at = now
+                session.add(call_log)
+        for lead in leads:
+            lead.status = "pending"
+            lead.next_attempt_at = now
+            lead.last_outcome = "interrupted"
+            lead.updated_at = now
+            session.add(lead)
+        session.commit()
+        print(f"[DIALER] Re-queued {len(leads)} leads left dialing by a stopped dialer.")
+
+
+def _apply_results(session: Session, results: List[Tuple[int, DialResult]], now: datetime) -> None:
+    call_ids = [call_id for call_id, _ in results]
+    call_logs = {c.id: c for c in session.exec(select(CallLog).where(CallLog.id.in_(call_ids))).all()}
+    leads = {
+        lead.last_call_id: lead
+        for lead in session.exec(select(CampaignLead).where(CampaignLead.last_call_id.in_(call_ids))).all()
+    }
+    campaign_ids = {lead.campaign_id for lead in leads.values()}
+    campaigns = {
+        c.id: c for c in session.exec(select(Campaign).where(Campaign.id.in_(campaign_ids))).all()
+    } if campaign_ids else {}
+    agents = {
+        a.id: a for a in session.exec(select(Agent).where(Agent.id.in_({c.agent_id for c in campaigns.values()}))).all()
+    } if campaigns else {}
+
+    for call_id, result in results:
+        call_log = call_logs.get(call_id)
+        if call_log is not None:
+            call_log.status = CALL_STATUS_BY_OUTCOME.get(result.outcome, "failed")
+            call_log.outcome = result.outcome
+            call_log.duration_seconds = result.duration_seconds
+            call_log.ended_at = now
+            session.add(call_log)
+
+        lead = leads.get(call_id)
+        if lead is None or lead.status != "dialing":
+            continue
+        lead.last_outcome = result.outcome
+        lead.updated_at = now
+        campaign = campaigns.get(lead.campaign_id)
+        agent = agents.get(campaign.agent_id) if campaign else None
+        if result.outcome in RETRYABLE_OUTCOMES and campaign and agent and campaign.status != "cancelled":
+            _, max_retries = effective_limits(campaign, agent)
+            if lead.attempts <= max_retries:
+                lead.status = "pending"
+                lead.next_attempt_at = now + timedelta(minutes=campaign.retry_delay_minutes)
+            else:
+                lead.status = "exhausted"
+        elif result.outcome in RETRYABLE_OUTCOMES:
+            lead.status = "exhausted"
+        else:
+            lead.status = "completed"
+        session.add(lead)
+
+
+def _claim_query(campaign_id: int, now: datetime, limit: int):
+    query = (
+        select(CampaignLead)
+        .where(
+            CampaignLead.campaign_id == campaign_id,
+            CampaignLead.status == "pending",
+            CampaignLead.next_attempt_at <= now,
+        )
+        .order_by(CampaignLead.priority.desc(), CampaignLead.next_attempt_at, CampaignLead.id)
+        .limit(limit)
+    )
+    if engine.dialect.name == "postgresql":
+        # Several API workers may run a dialer; never hand the same lead to two of them.
+        query = query.with_for_update(skip_locked=True)
+    return query
+
+
+def _run_tick(
+    results: List[Tuple[int, DialResult]],
+    budgets: Dict[int, int],
+    now: datetime,
+) -> Tuple[List[DialAttempt], Dict[int, int]]:
+    """
+    One scheduler transaction. Returns the attempts to dial and each running
+    campaign's per-minute rate (so the caller can size its token buckets).
+    """
+    attempts: List[DialAttempt] = []
+    rates: Dict[int, int] = {}
+    with Session(engine) as session:
+        if results:
+            _apply_results(session, results, now)
+            session.flush()
+
+        # Calls in flight per agent, across every dialer process.
+        busy = Counter(
+            dict(
+                session.exec(
+                    select(Campaign.agent_id, func.count())
+                    .join(CampaignLead, CampaignLead.campaign_id == Campaign.id)
+                    .where(CampaignLead.status == "dialing")
+                    .group_by(Campaign.agent_id)
+                ).all()
+            )
+        )
+
+        running = session.exec(
+            select(Campaign, Agent).join(Agent, Agent.id == Campaign.agent_id).where(Campaign.status == "running")
+        ).all()
+        remaining = dict(
+            session.exec(
+                select(CampaignLead.campaign_id, func.count())
+                .where(
+                    CampaignLead.campaign_id.in_([campaign.id for campaign, _ in running]),
+                    CampaignLead.status.in_(["pending", "dialing"]),
+                )
+                .group_by(CampaignLead.campaign_id)
+            ).all()
+        ) if running else {}
+
+        new_calls: List[Tuple[CampaignLead, CallLog, Campaign]] = []
+        for campaign, agent in running:
+            if not remaining.get(campaign.id):
+                campaign.status = "completed"
+                campaign.completed_at = now
+                campaign.updated_at = now
+                session.add(campaign)
+                continue
+            rate, _ = effective_limits(campaign, agent)
+            rates[campaign.id] = rate
+            if agent.status in ("paused", "archived") or not within_call_window(campaign, now):
+                continue
+            # A campaign seen for the first time starts with a full burst.
+            budget = budgets.get(campaign.id, max(1, rate // 10))
+            capacity = min(max(0, (agent.concurrency_limit or 1) - busy[agent.id]), budget)
+            if capacity <= 0:
+                continue
+            leads = session.exec(_claim_query(campaign.id, now, capacity)).all()
+            for lead in leads:
+                lead.status = "dialing"
+                lead.attempts += 1
+                lead.updated_at = now
+                call_log = CallLog(
+                    workspace_id=campaign.workspace_id,
+                    agent_id=agent.id,
+                    caller_name=lead.name,
+                    caller_number=lead.phone_number,
+                    direction="outbound",
+                    status="in-progress",
+                    started_at=now,
+                    tags=["campaign", f"campaign:{campaign.id}"],
+                )
+                new_calls.append((lead, call_log, campaign))
+            busy[agent.id] += len(leads)
+            if leads:
+                agent.total_calls = (agent.total_calls or 0) + len(leads)
+                session.add(agent)
+
+        if new_calls:
+            session.add_all([call_log for _, call_log, _ in new_calls])
+            session.flush()  # assigns CallLog ids in one round of inserts
+            for lead, call_log, campaign in new_calls:
+                lead.last_call_id = call_log.id
+                session.add(lead)
+                attempts.append(
+                    DialAttempt(
+                        call_id=call_log.id,
+                        lead_id=lead.id,
+                        campaign_id=campaign.id,
+                        agent_id=campaign.agent_id,
+                        workspace_id=campaign.workspace_id,
+                        phone_number=lead.phone_number,
+                        caller_id=campaign.caller_id,
+                        lead_name=lead.name,
+                    )
+                )
+        session.commit()
+    return attempts, rates
+
+
+campaign_dialer = CampaignDialer(
+    driver_name=settings.CAMPAIGN_TELEPHONY_DRIVER,
+    tick_seconds=settings.CAMPAIGN_DIALER_TICK_SECONDS,
+)
@@ -0,0 +1,247 @@
+"""
+Unread notification counts.
+
+A user's unread count in a workspace is the ``notification_counters`` row for
+(workspace, user) plus the workspace-wide row (user_id 0), so reading it costs
+the same however many notifications have piled up. The counters are adjusted in
+the same transaction as the notifications by a ``before_flush`` hook (ORM
+inserts, updates of ``read``/recipient, deletes); ``mark_all_read`` subtracts
+the rows its bulk update marked. When a workspace has no counter rows yet,
+counts fall back to an index-backed COUNT.
+
+Writes that bypass the ORM need a repair:
+
+    cd backend && python -m app.services.notifications                    # rebuild all counters
+    cd backend && python -m app.services.notifications --workspace-id 1
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, inspect, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.db import add_to_counters
+from app.models.notification import Notification, NotificationCounter
+
+_TRACKED_FIELDS = ("workspace_id", "user_id", "read")
+
+# Callbacks run with the (workspace_id, user_id) counter keys that changed, after each commit
+_commit_listeners: List[Callable[[Set[Tuple[int, int]]], None]] = []
+
+
+def _visible_to(user_id: int):
+    return (Notification.user_id == user_id) | (Notification.user_id == None)  # noqa: E711
+
+
+async def count_unread(session, workspace_id: int, user_id: int) -> int:
+    """Unread notifications visible to the user, counted from the notifications table."""
+    return (
+        await session.exec(
+            select(func.count(Notification.id)).where(
+                Notification.workspace_id == workspace_id,
+                Notification.read == False,  # noqa: E712
+                _visible_to(user_id),
+            )
+        )
+    ).one()
+
+
+async def unread_count(session, workspace_id: int, user_id: int) -> int:
+    """Unread notifications visible to the user, from the counters (COUNT fallback)."""
+    counts = (
+        await session.exec(
+            select(NotificationCounter.unread_count).where(
+                NotificationCounter.workspace_id == workspace_id,
+                NotificationCounter.user_id.in_((user_id, 0)),
+            )
+        )
+    ).all()
+    if not counts:
+        return await count_unread(session, workspace_id, user_id)
+    return max(sum(counts), 0)
+
+
+async def unread_counts_for(session, workspace_id: int, user_ids: Set[int]) -> Dict[int, int]:
+    """unread_count() for several users of a workspace in one query."""
+    rows = (
+        await session.exec(
+            select(NotificationCounter.user_id, NotificationCounter.unread_count).where(
+                NotificationCounter.workspace_id == workspace_id,
+                NotificationCounter.user_id.in_(set(user_ids) | {0}),
+            )
+        )
+    ).all()
+    by_user = dict(rows)
+    shared = by_user.get(0, 0)
+    return {user_id: max(by_user.get(user_id, 0) + shared, 0) for user_id in user_ids}
+
+
+async def mark_all_read(session, workspace_id: int, user_id: int) -> int:
+    """Mark every unread notification visible to the user as read; returns how many. Commits."""
+    result = await session.execute(
+        update(Notification)
+        .where(
+            Notification.workspace_id == workspace_id,
+            Notification.read == False,  # noqa: E712
+            _visible_to(user_id),
+        )
+        .values(read=True, updated_at=datetime.utcnow())
+        .returning(Notification.user_id)
+    )
+    # Take off what was marked, per counter: the user's own and the workspace-wide one
+    deltas: Dict[int, int] = defaultdict(int)
+    for recipient in result.scalars().all():
+        deltas[recipient or 0] -= 1
+    rows = [
+        {"workspace_id": workspace_id, "user_id": recipient, "unread_count": delta}
+        for recipient, delta in deltas.items()
+    ]
+    if rows:
+        await session.run_sync(
+            lambda sync_session: add_to_counters(
+                sync_session.connection(), NotificationCounter, rows, ("unread_count",)
+            )
+        )
+        await session.run_sync(
+            lambda sync_session: sync_session.info.setdefault("notification_counter_keys", set()).update(
+                (workspace_id, recipient) for recipient in deltas
+            )
+        )
+    await session.commit()
+    return sum(-delta for delta in deltas.values())
+
+
+# --- incremental maintenance -----------------------------------------------
+
+
+def _stored_values(session: Session, notification_ids: List[int]) -> Dict[int, tuple]:
+    """(workspace_id, user_id, read) of notifications as currently stored (before the flush)."""
+    if not notification_ids:
+        return {}
+    table = Notification.__table__
+    rows = session.connection().execute(
+        select(table.c.id, table.c.workspace_id, table.c.user_id, table.c.read).where(table.c.id.in_(notification_ids))
+    )
+    return {row.id: (row.workspace_id, row.user_id, row.read) for row in rows}
+
+
+def _has_tracked_changes(notification: Notification) -> bool:
+    attrs = inspect(notification).attrs
+    return any(attrs[field].history.has_changes() for field in _TRACKED_FIELDS)
+
+
+def _add_unread(deltas: Dict[Tuple[int, int], int], values: tuple, sign: int) -> None:
+    workspace_id, user_id, read = values
+    if workspace_id is not None and not read:
+        deltas[(workspace_id, user_id or 0)] += sign
+
+
+@event.listens_for(Session, "before_flush")
+def _track_notification_changes(session: Session, flush_context, instances) -> None:
+    new = [obj for obj in session.new if isinstance(obj, Notification)]
+    changed = [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, Notification) and obj.id is not None and _has_tracked_changes(obj)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Notification) and obj.id is not None]
+    if not (new or changed or deleted):
+        return
+
+    deltas: Dict[Tuple[int, int], int] = defaultdict(int)
+    stored = _stored_values(session, [obj.id for obj in changed + deleted])
+    for obj in new + changed:
+        _add_unread(deltas, (obj.workspace_id, obj.user_id, obj.read), 1)
+    for obj in changed + deleted:
+        if obj.id in stored:
+            _add_unread(deltas, stored[obj.id], -1)
+
+    rows = [
+        {"workspace_id": workspace_id, "user_id": user_id, "unread_count": delta}
+        for (workspace_id, user_id), delta in deltas.items()
+        if delta
+    ]
+    add_to_counters(session.connection(), NotificationCounter, rows, ("unread_count",))
+    session.info.setdefault("notification_counter_keys", set()).update(
+        (row["workspace_id"], row["user_id"]) for row in rows
+    )
+
+
+def on_unread_counts_committed(
+    listener: Callable[[Set[Tuple[int, int]]], None]
+) -> Callable[[Set[Tuple[int, int]]], None]:
+    """
+    Register ``listener(keys)`` to run after a commit that changed the counters
+    for those (workspace_id, user_id) keys; user_id 0 affects every member.
+    """
+    _commit_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_counter_changes(session: Session) -> None:
+    keys = session.info.pop("notification_counter_keys", None)
+    if not keys:
+        return
+    for listener in _commit_listeners:
+        try:
+            listener(keys)
+        except Exception as exc:
+            print(f"[notifications] commit listener failed: {exc}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_counter_changes(session: Session) -> None:
+    session.info.pop("notification_counter_keys", None)
+
+
+# --- repair ----------------------------------------------------------------
+
+
+def rebuild_unread_counters(conn: Connection, workspace_id: Optional[int] = None) -> int:
+    """
+    Recompute counters from the notifications table (optionally one workspace).
+    Returns the number of counter rows written.
+    """
+    table = Notification.__table__
+    clear = delete(NotificationCounter)
+    conditions = []
+    if workspace_id is not None:
+        clear = clear.where(NotificationCounter.workspace_id == workspace_id)
+        conditions.append(table.c.workspace_id == workspace_id)
+    conn.execute(clear)
+
+    recipient = func.coalesce(table.c.user_id, 0)
+    grouped = (
+        select(
+            table.c.workspace_id,
+            recipient,
+            func.coalesce(func.sum(case((table.c.read == False, 1), else_=0)), 0),  # noqa: E712
+        )
+        .where(*conditions)
+        .group_by(table.c.workspace_id, recipient)
+    )
+    return conn.execute(
+        insert(NotificationCounter).from_select(["workspace_id", "user_id", "unread_count"], grouped)
+    ).rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild unread notification counters.")
+    parser.add_argument("--workspace-id", type=int, help="only this workspace (default: all)")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    with engine.begin() as conn:
+        written = rebuild_unread_counters(conn, args.workspace_id)
+    print(f"Rebuilt notification_counters: {written} rows.")
+
+
+if __name__ == "__main__":
+    main()
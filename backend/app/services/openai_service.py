@@ -1,11 +1,8 @@
 from typing import List, Dict, Any, Optional
 import asyncio
-from openai import OpenAI
 
 from app.core.config import settings
-
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from app.services.usage_meter import audio_seconds, usage_meter
 
 
 class OpenAIService:
@@ -25,7 +22,16 @@ class OpenAIService:
     DEFAULT_TTS_VOICE = "nova"
     
     def __init__(self):
-        self.client = client
+        self._client = None
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use (importing openai adds ~0.3s to boot)."""
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
 
     def _prefer_fast_model(self, model: Optional[str]) -> str:
         """Pick a low-latency model when callers request heavier defaults."""
@@ -57,8 +63,9 @@ class OpenAIService:
         temperature: float = 0.6,
         max_tokens: int = 320,
         functions: Optional[List[Dict]] = None,
+        workspace_id: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Generate chat completion without blocking the event loop."""
+        """Generate chat completion without blocking the event loop (tokens metered to ``workspace_id``)."""
         try:
             params = {
                 "model": self._prefer_fast_model(model),
@@ -73,6 +80,7 @@ class OpenAIService:
                 params["function_call"] = "auto"
 
             response = await asyncio.to_thread(self.client.chat.completions.create, **params)
+            usage_meter.record(workspace_id, "llm_tokens", response.usage.total_tokens)
 
             return {
                 "content": response.choices[0].message.content,
@@ -98,8 +106,9 @@ class OpenAIService:
         text: str,
         voice: Optional[str] = None,
         model: str = "tts-1",
+        workspace_id: Optional[int] = None,
     ) -> bytes:
-        """Convert text to speech."""
+        """Convert text to speech (characters metered to ``workspace_id``)."""
         normalized_voice = self._normalize_voice(voice)
         try:
             response = await asyncio.to_thread(
@@ -109,6 +118,7 @@ class OpenAIService:
                 input=text,
                 timeout=20,
             )
+            usage_meter.record(workspace_id, "tts_characters", len(text))
             return response.content
         except Exception as e:
             error_str = str(e)
@@ -125,8 +135,9 @@ class OpenAIService:
         audio_file: bytes,
         language: Optional[str] = None,
         file_extension: str = ".wav",
+        workspace_id: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Transcribe audio to text using Whisper."""
+        """Transcribe audio to text using Whisper (audio seconds metered to ``workspace_id``)."""
         try:
             # Enhanced audio validation
             if not audio_file or len(audio_file) < 1024:  # Minimum size check
@@ -182,6 +193,8 @@ class OpenAIService:
                 os.unlink(temp_file_path)
             except Exception:
                 pass  # Ignore cleanup errors
+            if workspace_id:
+                usage_meter.record(workspace_id, "stt_seconds", audio_seconds(audio_file))
 
             return {
                 "text": response.text,
@@ -0,0 +1,394 @@
+"""
+Persist OpenAI Realtime bridge sessions as CallLog rows.
+
+The bridge hands every upstream event to a per-call tap. The tap only filters on
+the event type and ``put_nowait``s into a bounded queue, so audio forwarding never
+waits on the database; when the queue is full events are dropped (and counted)
+instead of applying back-pressure to the call. A single writer task drains the
+queue, folds events into per-call state and writes all dirty calls in one
+transaction every ``flush_interval`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlmodel import Session, select
+
+from app.db import engine
+from app.models.agent import Agent
+from app.models.call import CallLog
+from app.services.usage_meter import usage_meter
+
+TAPPED_EVENT_TYPES = frozenset(
+    {
+        "conversation.item.input_audio_transcription.completed",
+        "response.audio_transcript.delta",
+        "response.audio_transcript.done",
+        "response.text.delta",
+        "response.text.done",
+        "response.done",
+        "error",
+    }
+)
+
+# US cents per 1M tokens for the realtime models (text / audio, input / output).
+REALTIME_PRICING_CENTS_PER_MTOK = {
+    "text_input": 500,
+    "text_output": 2000,
+    "audio_input": 4000,
+    "audio_output": 8000,
+}
+
+MAX_WRITE_ATTEMPTS = 3
+
+
+@dataclass
+class RealtimeCallState:
+    """Accumulated transcript and usage for one bridged realtime call."""
+
+    key: str
+    workspace_id: int
+    agent_id: Optional[int]
+    caller_name: Optional[str]
+    caller_number: Optional[str]
+    direction: str
+    tags: List[str]
+    call_id: Optional[int] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    ended_at: Optional[datetime] = None
+    status: str = "in-progress"
+    final_status: str = "completed"
+    transcript: List[Dict[str, Any]] = field(default_factory=list)
+    # Assistant transcript deltas per item, promoted to a turn on *.done or at call end.
+    partial_turns: Dict[str, List[str]] = field(default_factory=dict)
+    usage: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(REALTIME_PRICING_CENTS_PER_MTOK, 0))
+    dropped_events: int = 0
+    dirty: bool = True
+    write_attempts: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.ended_at is not None
+
+    @property
+    def cost_cents(self) -> int:
+        total = sum(self.usage[name] * rate for name, rate in REALTIME_PRICING_CENTS_PER_MTOK.items())
+        return round(total / 1_000_000)
+
+    def append_turn(self, role: str, content: str, message_id: Optional[str] = None):
+        content = (content or "").strip()
+        if not content:
+            return
+        self.transcript.append(
+            {
+                "role": role,
+                "content": content,
+                "timestamp": datetime.utcnow().isoformat(),
+                "id": message_id,
+            }
+        )
+
+    def apply(self, event: Dict[str, Any]):
+        event_type = event.get("type")
+        item_id = event.get("item_id")
+        if event_type == "conversation.item.input_audio_transcription.completed":
+            self.append_turn("user", event.get("transcript"), item_id)
+        elif event_type in ("response.audio_transcript.delta", "response.text.delta"):
+            self.partial_turns.setdefault(item_id or "", []).append(event.get("delta") or "")
+        elif event_type in ("response.audio_transcript.done", "response.text.done"):
+            self.partial_turns.pop(item_id or "", None)
+            self.append_turn("assistant", event.get("transcript") or event.get("text"), item_id)
+        elif event_type == "response.done":
+            self._add_usage((event.get("response") or {}).get("usage") or {})
+        elif event_type == "error":
+            error = event.get("error") or {}
+            self.append_turn("system", f"error: {error.get('message') or error}")
+        self.dirty = True
+
+    def _add_usage(self, usage: Dict[str, Any]):
+        input_details = usage.get("input_token_details") or {}
+        output_details = usage.get("output_token_details") or {}
+        self.usage["text_input"] += int(input_details.get("text_tokens") or 0)
+        self.usage["audio_input"] += int(input_details.get("audio_tokens") or 0)
+        self.usage["text_output"] += int(output_details.get("text_tokens") or 0)
+        self.usage["audio_output"] += int(output_details.get("audio_tokens") or 0)
+        usage_meter.record(self.workspace_id, "llm_tokens", int(usage.get("total_tokens") or 0))
+
+    def finish(self, status: str):
+        # Keep whatever the assistant had said when the caller hung up mid-response.
+        for item_id, deltas in self.partial_turns.items():
+            self.append_turn("assistant", "".join(deltas), item_id or None)
+        self.partial_turns.clear()
+        self.status = status
+        self.dirty = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        ended_at = self.ended_at
+        duration_end = ended_at or datetime.utcnow()
+        return {
+            "key": self.key,
+            "call_id": self.call_id,
+            "workspace_id": self.workspace_id,
+            "agent_id": self.agent_id,
+            "caller_name": self.caller_name,
+            "caller_number": self.caller_number,
+            "direction": self.direction,
+            "tags": list(self.tags),
+            "status": self.status,
+            "transcript": list(self.transcript),
+            "duration_seconds": int((duration_end - self.started_at).total_seconds()),
+            "cost_cents": self.cost_cents,
+            "started_at": self.started_at,
+            "ended_at": ended_at,
+        }
+
+
+class RealtimeCallTap:
+    """
+    Callable handed to the realtime bridge. Never blocks the relay path.
+    """
+
+    def __init__(self, writer: "RealtimeCallLogWriter", state: RealtimeCallState):
+        self._writer = writer
+        self.state = state
+
+    def __call__(self, event: Dict[str, Any]):
+        if event.get("type") not in TAPPED_EVENT_TYPES:
+            return
+        try:
+            self._writer.queue.put_nowait((self.state.key, event))
+        except asyncio.QueueFull:
+            self.state.dropped_events += 1
+            self._writer.dropped_events += 1
+
+    def close(self, status: str = "completed"):
+        self._writer.end_call(self.state.key, status)
+
+
+class RealtimeCallLogWriter:
+    """Background writer that batches realtime call state into ``call_logs``."""
+
+    def __init__(self, max_queue_size: int = 5000, flush_interval: float = 2.0):
+        self.max_queue_size = max_queue_size
+        self.flush_interval = flush_interval
+        self.queue: Optional[asyncio.Queue] = None
+        self.calls: Dict[str, RealtimeCallState] = {}
+        self.dropped_events = 0
+        self._worker: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def open_call(
+        self,
+        *,
+        workspace_id: int,
+        agent_id: Optional[int] = None,
+        caller_name: Optional[str] = None,
+        caller_number: Optional[str] = None,
+        direction: str = "inbound",
+        tags: Optional[List[str]] = None,
+    ) -> RealtimeCallTap:
+        self._ensure_worker()
+        state = RealtimeCallState(
+            key=uuid4().hex,
+            workspace_id=workspace_id,
+            agent_id=agent_id,
+            caller_name=caller_name,
+            caller_number=caller_number,
+            direction=direction,
+            tags=tags or ["realtime"],
+        )
+        self.calls[state.key] = state
+        self._wakeup.set()
+        return RealtimeCallTap(self, state)
+
+    def end_call(self, key: str, status: str = "completed"):
+        state = self.calls.get(key)
+        if state and not state.finished:
+            state.ended_at = datetime.utcnow()
+            state.final_status = status
+            # A flush may be writing the running call right now; the end still needs a write
+            state.dirty = True
+            if self._wakeup:
+                self._wakeup.set()
+
+    async def close(self):
+        """Flush everything still buffered and stop the writer."""
+        if self._worker is None:
+            return
+        self._stopping = True
+        try:
+            # Wake the writer; if the queue is full it is about to wake up anyway.
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+        try:
+            await self._worker
+        except Exception:
+            pass
+        self._worker = None
+        self._drain()
+        for state in self.calls.values():
+            if not state.finished:
+                state.ended_at = datetime.utcnow()
+                state.final_status = "failed"
+        await self._flush()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._stopping = False
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    def _apply(self, item: Optional[Tuple[str, Dict[str, Any]]]):
+        if item is None:
+            return
+        key, event = item
+        state = self.calls.get(key)
+        if state is not None:
+            state.apply(event)
+
+    def _drain(self) -> None:
+        while self.queue is not None and not self.queue.empty():
+            self._apply(self.queue.get_nowait())
+
+    async def _run(self):
+        last_flush = time.monotonic()
+        while not self._stopping:
+            try:
+                self._apply(await asyncio.wait_for(self.queue.get(), timeout=self.flush_interval))
+                self._drain()
+            except asyncio.TimeoutError:
+                pass
+
+            # New and finished calls are written promptly; running calls on the interval.
+            urgent = self._wakeup.is_set()
+            if urgent or time.monotonic() - last_flush >= self.flush_interval:
+                self._wakeup.clear()
+                await self._flush()
+                last_flush = time.monotonic()
+
+    async def _flush(self):
+        for state in self.calls.values():
+            if state.finished and state.status == "in-progress":
+                state.finish(state.final_status)
+        pending = [state for state in self.calls.values() if state.dirty]
+        if not pending:
+            return
+        snapshots = [state.snapshot() for state in pending]
+        for state in pending:
+            state.dirty = False
+
+        try:
+            written, failed = await asyncio.to_thread(_write_call_logs, snapshots)
+        except Exception as exc:
+            print(f"[REALTIME-LOG] Failed to persist {len(snapshots)} realtime calls: {exc}")
+            written, failed = {}, {snapshot["key"] for snapshot in snapshots}
+
+        for state in pending:
+            if state.key in written:
+                state.call_id = written[state.key]
+                state.write_attempts = 0
+                if state.finished and state.status != "in-progress" and not state.dirty:
+                    self.calls.pop(state.key, None)
+                    if state.dropped_events:
+                        print(
+                            f"[REALTIME-LOG] Call {state.call_id}: dropped {state.dropped_events} events (queue full)."
+                        )
+            elif state.key in failed:
+                state.write_attempts += 1
+                state.dirty = True
+                if state.write_attempts >= MAX_WRITE_ATTEMPTS and state.finished:
+                    print(f"[REALTIME-LOG] Giving up on realtime call {state.key} after {state.write_attempts} attempts.")
+                    self.calls.pop(state.key, None)
+
+
+def _apply_snapshot(session: Session, call_log: CallLog, snapshot: Dict[str, Any]):
+    call_log.status = snapshot["status"]
+    call_log.transcript = snapshot["transcript"]
+    call_log.duration_seconds = snapshot["duration_seconds"]
+    call_log.cost_cents = snapshot["cost_cents"]
+    call_log.ended_at = snapshot["ended_at"]
+    session.add(call_log)
+
+
+def _new_call_log(snapshot: Dict[str, Any]) -> CallLog:
+    return CallLog(
+        workspace_id=snapshot["workspace_id"],
+        agent_id=snapshot["agent_id"],
+        caller_name=snapshot["caller_name"],
+        caller_number=snapshot["caller_number"],
+        direction=snapshot["direction"],
+        tags=snapshot["tags"],
+        started_at=snapshot["started_at"],
+        status=snapshot["status"],
+    )
+
+
+def _write_batch(session: Session, snapshots: List[Dict[str, Any]]) -> Dict[str, int]:
+    existing_ids = [snapshot["call_id"] for snapshot in snapshots if snapshot["call_id"]]
+    existing: Dict[int, CallLog] = {}
+    if existing_ids:
+        existing = {
+            call_log.id: call_log
+            for call_log in session.exec(select(CallLog).where(CallLog.id.in_(existing_ids))).all()
+        }
+
+    created: List[Tuple[str, CallLog]] = []
+    agent_increments: Dict[int, int] = {}
+    for snapshot in snapshots:
+        call_log = existing.get(snapshot["call_id"]) if snapshot["call_id"] else None
+        if call_log is None:
+            call_log = _new_call_log(snapshot)
+            created.append((snapshot["key"], call_log))
+            if snapshot["agent_id"]:
+                agent_increments[snapshot["agent_id"]] = agent_increments.get(snapshot["agent_id"], 0) + 1
+        _apply_snapshot(session, call_log, snapshot)
+
+    if agent_increments:
+        for agent in session.exec(select(Agent).where(Agent.id.in_(list(agent_increments)))).all():
+            agent.total_calls = (agent.total_calls or 0) + agent_increments[agent.id]
+            session.add(agent)
+
+    session.commit()
+    written = {snapshot["key"]: snapshot["call_id"] for snapshot in snapshots if snapshot["call_id"]}
+    written.update({key: call_log.id for key, call_log in created})
+    return written
+
+
+def _write_call_logs(snapshots: List[Dict[str, Any]]) -> Tuple[Dict[str, int], set]:
+    """
+    Write all snapshots in one transaction; if that fails (e.g. one bad workspace id),
+    retry row by row so a single call cannot sink the whole batch.
+    """
+    with Session(engine) as session:
+        try:
+            return _write_batch(session, snapshots), set()
+        except Exception:
+            session.rollback()
+
+    written: Dict[str, int] = {}
+    failed = set()
+    for snapshot in snapshots:
+        with Session(engine) as session:
+            try:
+                written.update(_write_batch(session, [snapshot]))
+            except Exception as exc:
+                session.rollback()
+                failed.add(snapshot["key"])
+                print(f"[REALTIME-LOG] Could not write realtime call {snapshot['key']}: {exc}")
+    return written, failed
+
+
+realtime_call_log_writer = RealtimeCallLogWriter()
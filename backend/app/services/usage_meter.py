@@ -0,0 +1,434 @@
+"""
+In-process usage metering for billing and quotas.
+
+Every worker accumulates usage (call minutes and calls, LLM tokens, TTS
+characters, STT seconds, and anything posted to ``/api/billing/usage``) in
+memory per workspace, metric and period, and adds the accumulated deltas to the
+running counter rows in ``usage_stats`` (one per workspace, metric, period and
+``period_start``) every USAGE_FLUSH_SECONDS, or sooner once
+USAGE_FLUSH_MAX_EVENTS events are pending. Recording an event costs a dict
+update and one line appended to a local journal, not a database write.
+
+Crash safety: the journal under USAGE_JOURNAL_DIR is split into segments; each
+flush closes the current segment and, in the same transaction as the counter
+updates, marks it in ``usage_journal_segments``. A worker starting up replays
+segments left behind by workers that died (unlocked files) unless they are
+marked, so every event is counted once. Without ``fcntl`` (Windows), segments
+are only recovered at startup and the meter assumes a single worker process.
+
+Reads (``live_usage``) return the stored counters (cached for
+USAGE_REVALIDATE_SECONDS) plus this worker's unflushed events; other workers'
+unflushed events show up within one flush interval.
+
+Call minutes and calls come from the committed call_metrics_daily deltas, so
+they follow every ORM write to call_logs. After repairing the rollup, reset the
+counters from it:
+
+    cd backend && python -m app.services.usage_meter --rebuild-calls [--workspace-id N]
+    cd backend && python -m app.services.usage_meter --recover          # replay orphaned journal segments
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+
+from app.core.config import settings
+from app.db import add_to_counters
+from app.models.billing import UsageJournalSegment, UsageStat
+from app.models.call import CallMetricsDaily
+from app.services import call_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+METRICS = ("minutes", "calls", "llm_tokens", "tts_characters", "stt_seconds")
+PERIODS = ("monthly", "annual")
+_COUNTER_KEY = ("workspace_id", "metric", "period", "period_start")
+# Marked segments are kept this long (replays only happen at startup)
+_SEGMENT_RETENTION = timedelta(days=7)
+_SEGMENT_PREFIX = "usage-"
+
+CounterKey = Tuple[int, str, str, date]
+
+
+def period_start(period: str, when: Optional[Any] = None) -> date:
+    """First day of the billing period containing ``when`` (default: now)."""
+    if period not in PERIODS:
+        raise ValueError(f"unknown usage period {period!r}")
+    day = when.date() if isinstance(when, datetime) else (when or datetime.utcnow().date())
+    return day.replace(month=1, day=1) if period == "annual" else day.replace(day=1)
+
+
+def _add(totals: Dict[CounterKey, float], deltas: Dict[CounterKey, float]) -> None:
+    for key, value in deltas.items():
+        totals[key] += value
+
+
+def write_usage(conn: Connection, deltas: Dict[CounterKey, float], segments: Iterable[str] = ()) -> None:
+    """Add deltas to the usage_stats counters and mark journal segments as applied."""
+    rows = [
+        dict(zip(_COUNTER_KEY, key), value=value, created_at=datetime.utcnow())
+        for key, value in deltas.items()
+        if value
+    ]
+    add_to_counters(conn, UsageStat, rows, ("value",), key=_COUNTER_KEY)
+    names = [{"name": name, "flushed_at": datetime.utcnow()} for name in segments]
+    if names:
+        conn.execute(insert(UsageJournalSegment), names)
+
+
+class _Segment:
+    """One journal file: appended to until the next flush, deleted once applied."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.stem
+        self.file = open(path, "a", encoding="utf-8")
+        if fcntl is not None:
+            # Held while this worker lives, so others know not to replay it
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def sync(self) -> None:
+        os.fsync(self.file.fileno())
+
+    def discard(self) -> None:
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+
+def _read_segment(path: Path) -> Dict[CounterKey, float]:
+    deltas: Dict[CounterKey, float] = defaultdict(float)
+    with open(path, encoding="utf-8") as journal:
+        for line in journal:
+            try:
+                record = json.loads(line)
+                key = (record["w"], record["m"], record["p"], date.fromisoformat(record["s"]))
+                deltas[key] += float(record["v"])
+            except (ValueError, KeyError, TypeError):
+                # A line cut short by the crash
+                continue
+    return deltas
+
+
+class UsageMeter:
+    """Per-worker usage counters with a journal; see the module docstring."""
+
+    def __init__(self, journal_dir: Optional[str] = None):
+        self.journal_dir = Path(journal_dir or settings.USAGE_JOURNAL_DIR)
+        self._lock = threading.Lock()
+        self._pending: Dict[CounterKey, float] = defaultdict(float)
+        self._in_flight: Dict[CounterKey, float] = defaultdict(float)
+        self._events = 0
+        self._segment: Optional[_Segment] = None
+        # Closed segments whose events are pending (a flush failed) or being flushed
+        self._closed: List[_Segment] = []
+        self._segment_count = 0
+        self._instance = f"{socket.gethostname()}-{os.getpid()}-{int(time.time() * 1000)}"
+        # Stored counters per (workspace_id, period, period_start): (read at, {metric: value})
+        self._stored: Dict[Tuple[int, str, date], Tuple[float, Dict[str, float]]] = {}
+        self._generation = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_prune = 0.0
+
+    # --- recording ---------------------------------------------------------
+
+    def record(self, workspace_id: Optional[int], metric: str, value: float, period: str = "monthly", when: Any = None) -> None:
+        """Count ``value`` of ``metric`` for the workspace (callable from any thread)."""
+        if not workspace_id or not value:
+            return
+        key = (workspace_id, metric, period, period_start(period, when))
+        with self._lock:
+            self._pending[key] += value
+            self._events += 1
+            try:
+                self._current_segment().append(
+                    {"w": key[0], "m": metric, "p": period, "s": key[3].isoformat(), "v": value}
+                )
+            except OSError as exc:
+                print(f"[usage_meter] journal write failed (usage kept in memory only): {exc}")
+            full = self._events >= settings.USAGE_FLUSH_MAX_EVENTS
+        if full:
+            self._request_flush()
+
+    def _current_segment(self) -> _Segment:
+        if self._segment is None:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            self._segment_count += 1
+            path = self.journal_dir / f"{_SEGMENT_PREFIX}{self._instance}-{self._segment_count}.jsonl"
+            self._segment = _Segment(path)
+        return self._segment
+
+    def _request_flush(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    # --- flushing ----------------------------------------------------------
+
+    def flush(self) -> int:
+        """Add pending usage to usage_stats; returns how many counters were written."""
+        from app.db import engine
+
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, defaultdict(float)
+            self._events = 0
+            if self._segment is not None:
+                self._closed.append(self._segment)
+                self._segment = None
+            segments = list(self._closed)
+            _add(self._in_flight, batch)
+        try:
+            for segment in segments:
+                segment.sync()
+            with engine.begin() as conn:
+                write_usage(conn, batch, [segment.name for segment in segments])
+                if time.monotonic() - self._last_prune > 3600:
+                    conn.execute(
+                        delete(UsageJournalSegment).where(
+                            UsageJournalSegment.flushed_at < datetime.utcnow() - _SEGMENT_RETENTION
+                        )
+                    )
+                    self._last_prune = time.monotonic()
+        except Exception as exc:
+            print(f"[usage_meter] flush of {len(batch)} counters failed, will retry: {exc}")
+            with self._lock:
+                _add(self._in_flight, {key: -value for key, value in batch.items()})
+                _add(self._pending, batch)
+            return 0
+        with self._lock:
+            _add(self._in_flight, {key: -value for key, value in batch.items()})
+            self._in_flight = defaultdict(float, {key: value for key, value in self._in_flight.items() if value})
+            self._closed = [segment for segment in self._closed if segment not in segments]
+            # Stored counters now include the batch; re-read them on the next live_usage()
+            self._generation += 1
+            for workspace_id, _, period, start in batch:
+                self._stored.pop((workspace_id, period, start), None)
+        for segment in segments:
+            segment.discard()
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.USAGE_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        """Replay orphaned journal segments, then flush on the interval (call from the event loop)."""
+        self.recover()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flusher and write out everything pending."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+
+    # --- recovery ----------------------------------------------------------
+
+    def _orphaned_segments(self) -> List[Tuple[Path, Any]]:
+        own = {segment.path for segment in self._closed + ([self._segment] if self._segment else [])}
+        orphans = []
+        for path in sorted(self.journal_dir.glob(f"{_SEGMENT_PREFIX}*.jsonl")):
+            if path in own:
+                continue
+            handle = open(path, "a", encoding="utf-8")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # A live worker's segment
+                    handle.close()
+                    continue
+            orphans.append((path, handle))
+        return orphans
+
+    def recover(self) -> int:
+        """Add the events of journal segments left by dead workers (once); returns segments replayed."""
+        from app.db import engine
+
+        if not self.journal_dir.is_dir():
+            return 0
+        replayed = 0
+        for path, handle in self._orphaned_segments():
+            try:
+                with engine.begin() as conn:
+                    applied = conn.execute(
+                        select(UsageJournalSegment.name).where(UsageJournalSegment.name == path.stem)
+                    ).first()
+                    if not applied:
+                        write_usage(conn, _read_segment(path), [path.stem])
+                        replayed += 1
+                path.unlink(missing_ok=True)
+            except Exception as exc:
+                print(f"[usage_meter] could not replay journal segment {path.name}: {exc}")
+            finally:
+                handle.close()
+        if replayed:
+            print(f"[usage_meter] replayed {replayed} journal segments left by stopped workers")
+        return replayed
+
+    # --- reads -------------------------------------------------------------
+
+    def unflushed_by_counter(self, workspace_id: int) -> Dict[Tuple[str, str, date], float]:
+        """This worker's unflushed usage of a workspace per (metric, period, period_start)."""
+        totals: Dict[Tuple[str, str, date], float] = defaultdict(float)
+        with self._lock:
+            for source in (self._pending, self._in_flight):
+                for (key_workspace, metric, period, start), value in source.items():
+                    if key_workspace == workspace_id:
+                        totals[(metric, period, start)] += value
+        return totals
+
+    def _stored_query(self, workspace_id: int, period: str, start: date):
+        return select(UsageStat.metric, UsageStat.value).where(
+            UsageStat.workspace_id == workspace_id, UsageStat.period == period, UsageStat.period_start == start
+        )
+
+    def _cached_counters(self, key: Tuple[int, str, date]) -> Optional[Dict[str, float]]:
+        cached = self._stored.get(key)
+        if cached is None or time.monotonic() - cached[0] > settings.USAGE_REVALIDATE_SECONDS:
+            return None
+        return cached[1]
+
+    def _live(self, key: Tuple[int, str, date], stored: Dict[str, float]) -> Dict[str, float]:
+        workspace_id, period, start = key
+        usage = {metric: 0.0 for metric in METRICS}
+        usage.update(stored)
+        for (metric, key_period, key_start), value in self.unflushed_by_counter(workspace_id).items():
+            if key_period == period and key_start == start:
+                usage[metric] = usage.get(metric, 0.0) + value
+        return usage
+
+    def _remember(self, key: Tuple[int, str, date], generation: int, rows: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+        stored = {metric: value for metric, value in rows}
+        # A flush that finished meanwhile may not be in what was read
+        if generation == self._generation:
+            self._stored[key] = (time.monotonic(), stored)
+        return stored
+
+    async def live_usage(self, session, workspace_id: int, period: str = "monthly") -> Dict[str, float]:
+        """{metric: value} for the current period: stored counters plus this worker's unflushed usage."""
+        key = (workspace_id, period, period_start(period))
+        stored = self._cached_counters(key)
+        if stored is None:
+            generation = self._generation
+            rows = (await session.exec(self._stored_query(*key))).all()
+            stored = self._remember(key, generation, rows)
+        return self._live(key, stored)
+
+    def live_usage_sync(self, session, workspace_id: int, period: str = "monthly") -> Dict[str, float]:
+        """live_usage() for routers on the sync session."""
+        key = (workspace_id, period, period_start(period))
+        stored = self._cached_counters(key)
+        if stored is None:
+            generation = self._generation
+            stored = self._remember(key, generation, session.exec(self._stored_query(*key)).all())
+        return self._live(key, stored)
+
+
+usage_meter = UsageMeter()
+
+
+@call_metrics.on_deltas_committed
+def _meter_call_usage(deltas: Dict[tuple, List[float]]) -> None:
+    # Rollup deltas carry each call's day, so late updates count toward the call's period
+    for (workspace_id, day, *_), (count, duration, *_) in deltas.items():
+        usage_meter.record(workspace_id, "calls", count, when=day)
+        usage_meter.record(workspace_id, "minutes", duration / 60, when=day)
+
+
+def audio_seconds(audio: bytes) -> float:
+    """Length of WAV audio (16 kHz 16-bit mono assumed when the header can't be read)."""
+    import io
+    import wave
+
+    try:
+        with wave.open(io.BytesIO(audio)) as clip:
+            return clip.getnframes() / float(clip.getframerate() or 1)
+    except (wave.Error, EOFError):
+        return len(audio) / 32_000
+
+
+# --- backfill / repair -----------------------------------------------------
+
+
+def rebuild_call_usage(conn: Connection, workspace_id: Optional[int] = None) -> int:
+    """
+    Reset the monthly "minutes" and "calls" counters from call_metrics_daily.
+    Returns the number of counters written.
+    """
+    query = select(
+        CallMetricsDaily.workspace_id,
+        CallMetricsDaily.day,
+        func.sum(CallMetricsDaily.call_count),
+        func.sum(CallMetricsDaily.duration_seconds),
+    ).group_by(CallMetricsDaily.workspace_id, CallMetricsDaily.day)
+    clear = update(UsageStat).where(
+        UsageStat.metric.in_(("minutes", "calls")), UsageStat.period == "monthly", UsageStat.period_start.is_not(None)
+    )
+    if workspace_id is not None:
+        query = query.where(CallMetricsDaily.workspace_id == workspace_id)
+        clear = clear.where(UsageStat.workspace_id == workspace_id)
+    totals: Dict[CounterKey, float] = defaultdict(float)
+    for row_workspace, day, calls, duration in conn.execute(query):
+        start = period_start("monthly", date.fromisoformat(call_metrics.bucket_date(day)))
+        totals[(row_workspace, "calls", "monthly", start)] += calls or 0
+        totals[(row_workspace, "minutes", "monthly", start)] += (duration or 0) / 60
+    conn.execute(clear.values(value=0))
+    write_usage(conn, totals)
+    return len(totals)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Usage meter maintenance.")
+    parser.add_argument("--rebuild-calls", action="store_true", help="reset minutes/calls counters from the rollup")
+    parser.add_argument("--workspace-id", type=int, help="only this workspace (with --rebuild-calls)")
+    parser.add_argument("--recover", action="store_true", help="replay journal segments left by stopped workers")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    if args.recover:
+        print(f"Replayed {usage_meter.recover()} journal segments.")
+    if args.rebuild_calls:
+        with engine.begin() as conn:
+            written = rebuild_call_usage(conn, args.workspace_id)
+        print(f"Rebuilt minutes/calls usage: {written} counters.")
+
+
+if __name__ == "__main__":
+    main()
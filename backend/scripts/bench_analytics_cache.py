@@ -0,0 +1,159 @@
+"""
+Columnar analytics cache vs the rollup queries.
+
+For several windows, computes the analytics totals, per-day trends and per-agent
+totals both from app.services.call_columns (NumPy arrays) and from the
+call_metrics_daily rollup, fails if they differ, and prints the median time of
+each. Then inserts, updates and deletes a few calls through the ORM and checks
+the cached workspace was updated in place (not reloaded) and still matches.
+
+Run from backend/ against a scratch database (rows are inserted):
+
+    DATABASE_URL=sqlite:////tmp/analytics.db python scripts/bench_analytics_cache.py --calls 100000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("CAMPAIGN_DIALER_ENABLED", "false")
+os.environ.setdefault("APEX_RUNTIME_PRELOAD", "false")
+
+from index_advisor import seed_calls  # noqa: E402  (same directory)
+
+WINDOWS = (1, 7, 30, 90, 365)
+
+
+async def timed(compute, repeats: int) -> tuple:
+    """(result, median milliseconds) of ``repeats`` runs."""
+    timings = []
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = await compute()
+        timings.append((time.perf_counter() - began) * 1000)
+    return result, statistics.median(timings)
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rounded(item) for item in value]
+    return value
+
+
+async def compare(workspace_id: int, repeats: int, verbose: bool = True) -> None:
+    from app.db import get_async_session
+    from app.services import call_columns, call_metrics
+
+    now = datetime.utcnow()
+    async with contextlib.asynccontextmanager(get_async_session)() as session:
+        # Load (or revalidate) outside the timings
+        await call_columns.workspace_columns(session, workspace_id, now - timedelta(days=365))
+        checks = {
+            "totals": (
+                lambda start: call_columns.call_totals(session, workspace_id, start, now),
+                lambda start: call_metrics.call_totals(session, call_metrics.metrics_window(workspace_id, start, now)),
+            ),
+            "trends": (
+                lambda start: call_columns.daily_call_trends(session, workspace_id, start, now),
+                lambda start: call_metrics.daily_call_trends(session, call_metrics.metrics_window(workspace_id, start, now)),
+            ),
+            "agents": (
+                lambda start: call_columns.agent_call_totals(session, workspace_id, start, now),
+                lambda start: call_metrics.agent_call_totals(session, workspace_id, start, now),
+            ),
+        }
+        if verbose:
+            print(f"{'window':>8}{'read':>8}{'cache ms':>10}{'rollup ms':>11}")
+        for days in WINDOWS:
+            start = now - timedelta(days=days)
+            for name, (cached, rollup) in checks.items():
+                cached_result, cached_ms = await timed(lambda: cached(start), repeats)
+                rollup_result, rollup_ms = await timed(lambda: rollup(start), repeats)
+                if _rounded(cached_result) != _rounded(rollup_result):
+                    raise SystemExit(f"{name} over {days}d differ:\n cache  {cached_result}\n rollup {rollup_result}")
+                if verbose:
+                    print(f"{days:>7}d{name:>8}{cached_ms:>10.3f}{rollup_ms:>11.3f}")
+
+
+def write_some_calls(engine, workspace_id: int) -> None:
+    """Insert, update and delete calls through the ORM, as the app does."""
+    from sqlmodel import Session, select
+
+    from app.models.call import CallLog
+
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        for i in range(3):
+            session.add(
+                CallLog(
+                    workspace_id=workspace_id,
+                    status="in-progress",
+                    direction="outbound",
+                    sentiment="positive",
+                    sentiment_score=0.9,
+                    duration_seconds=10 * i,
+                    started_at=now - timedelta(hours=i),
+                )
+            )
+        session.commit()
+        calls = session.exec(
+            select(CallLog).where(CallLog.workspace_id == workspace_id).order_by(CallLog.id.desc()).limit(3)
+        ).all()
+        calls[0].status = "completed"
+        calls[0].duration_seconds = 321
+        calls[0].cost_cents = 45
+        session.delete(calls[1])
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Columnar analytics cache vs rollup queries.")
+    parser.add_argument("--workspace-id", type=int, default=1)
+    parser.add_argument("--calls", type=int, default=0, help="seed until the workspace has this many calls")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    from sqlalchemy import func
+    from sqlmodel import Session, select
+
+    from app import db
+    from app.migrations import check_schema
+    from app.models.call import CallLog
+    from app.services.call_columns import column_cache
+
+    check_schema(db.engine)
+    with Session(db.engine) as session:
+        existing = session.exec(select(func.count(CallLog.id)).where(CallLog.workspace_id == args.workspace_id)).one()
+    if args.calls > existing:
+        seed_calls(db.engine, args.workspace_id, args.calls - existing)
+
+    async def run() -> None:
+        await compare(args.workspace_id, args.repeats)
+        entry = column_cache.peek(args.workspace_id)
+        print(f"cached {entry.size} calls in {entry.nbytes / (1024 * 1024):.1f} MiB")
+
+        await asyncio.to_thread(write_some_calls, db.engine, args.workspace_id)
+        if column_cache.peek(args.workspace_id) is not entry:
+            raise SystemExit("cached workspace was dropped instead of updated in place")
+        await compare(args.workspace_id, 1, verbose=False)
+        print(f"after ORM writes: still cached ({entry.size} slots), results match the rollup")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
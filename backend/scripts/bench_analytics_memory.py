@@ -0,0 +1,119 @@
+"""
+Memory and time of the analytics aggregates as call_logs grows.
+
+Seeds synthetic call logs into a workspace in steps (cumulative) and, after each
+step, computes the /api/analytics/overview totals over the whole year twice: by
+loading every CallLog row and summing in Python (how the analytics endpoints
+worked before app.services.call_metrics), and with the grouped SQL aggregates
+the endpoints use now. Peak Python memory (tracemalloc) of the aggregate path
+stays flat while the row path grows with the number of calls.
+
+Run from backend/ against a scratch database (rows are inserted):
+
+    DATABASE_URL=sqlite:////tmp/analytics.db python scripts/bench_analytics_memory.py
+    python scripts/bench_analytics_memory.py --steps 10000,100000,1000000 --max-row-load 200000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("CAMPAIGN_DIALER_ENABLED", "false")
+os.environ.setdefault("APEX_RUNTIME_PRELOAD", "false")
+
+from index_advisor import seed_calls  # noqa: E402  (same directory)
+
+
+async def totals_from_rows(session, workspace_id: int, start: datetime) -> dict:
+    from sqlmodel import select
+
+    from app.models.call import CallLog
+
+    calls = (
+        await session.exec(select(CallLog).where(CallLog.workspace_id == workspace_id, CallLog.started_at >= start))
+    ).all()
+    return {
+        "total_calls": len(calls),
+        "completed_calls": len([c for c in calls if c.status == "completed"]),
+        "total_duration": sum([c.duration_seconds for c in calls]),
+        "total_cost_cents": sum([c.cost_cents for c in calls]),
+    }
+
+
+async def totals_from_sql(session, workspace_id: int, start: datetime) -> dict:
+    from app.services import call_metrics
+
+    totals = await call_metrics.call_totals(session, call_metrics.metrics_window(workspace_id, start))
+    return {key: totals[key] for key in ("total_calls", "completed_calls", "total_duration", "total_cost_cents")}
+
+
+async def measure(compute, workspace_id: int) -> tuple:
+    """(result, seconds, peak MiB) of one computation in a fresh session."""
+    from app.db import get_async_session
+
+    # Whole UTC days, as the rollup counts them
+    start = datetime.combine((datetime.utcnow() - timedelta(days=365)).date(), datetime.min.time())
+    async with contextlib.asynccontextmanager(get_async_session)() as session:
+        tracemalloc.start()
+        began = time.perf_counter()
+        result = await compute(session, workspace_id, start)
+        elapsed = time.perf_counter() - began
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Row loading vs SQL aggregates for analytics totals.")
+    parser.add_argument("--workspace-id", type=int, default=1)
+    parser.add_argument("--steps", default="10000,100000,1000000", help="cumulative call_logs counts to measure at")
+    parser.add_argument(
+        "--max-row-load",
+        type=int,
+        default=200_000,
+        help="skip the row-loading path above this many calls (it needs roughly 1-2 KiB per row)",
+    )
+    args = parser.parse_args()
+
+    from sqlalchemy import func
+    from sqlmodel import Session, select
+
+    from app import db
+    from app.migrations import check_schema
+    from app.models.call import CallLog
+
+    check_schema(db.engine)
+    steps = sorted(int(step) for step in args.steps.split(","))
+
+    print(f"{'calls':>10}{'rows s':>10}{'rows MiB':>10}{'sql s':>10}{'sql MiB':>10}")
+    for target in steps:
+        with Session(db.engine) as session:
+            existing = session.exec(
+                select(func.count(CallLog.id)).where(CallLog.workspace_id == args.workspace_id)
+            ).one()
+        if target > existing:
+            seed_calls(db.engine, args.workspace_id, target - existing)
+
+        sql_result, sql_seconds, sql_peak = asyncio.run(measure(totals_from_sql, args.workspace_id))
+        if sql_result["total_calls"] <= args.max_row_load:
+            row_result, row_seconds, row_peak = asyncio.run(measure(totals_from_rows, args.workspace_id))
+            if row_result != sql_result:
+                raise SystemExit(f"results differ: rows {row_result} vs sql {sql_result}")
+            rows_cols = f"{row_seconds:>10.2f}{row_peak:>10.1f}"
+        else:
+            rows_cols = f"{'-':>10}{'-':>10}"
+        print(f"{sql_result['total_calls']:>10}{rows_cols}{sql_seconds:>10.2f}{sql_peak:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Per-request cost of preparing an agent runtime payload.
+
+Compares the previous approach (deep-copying every blueprint model for demo requests,
+round-tripping the merged config through model_dump() + validation, formatting the
+whole system prompt) with the compiled, frozen blueprints in app.routers.agent_runtimes.
+
+Run from backend/:  python scripts/bench_blueprints.py [--number 20000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from app.routers import agent_runtimes  # noqa: E402
+from app.routers.agent_runtimes import apex_models  # noqa: E402
+from apex_sales_pro.prompts import build_system_prompt  # noqa: E402
+
+
+def legacy_merge_agent_config(base, incoming):
+    merged = base.model_dump()
+    for field, value in incoming.model_dump(exclude_none=True).items():
+        if field in {"name", "persona"}:
+            continue
+        merged[field] = value
+    merged["name"] = base.name
+    merged["persona"] = base.persona.model_dump()
+    return apex_models.AgentConfig(**merged)
+
+
+def legacy_demo_request(blueprint):
+    return apex_models.ApexSalesRequest(
+        agent=blueprint.config.model_copy(deep=True),
+        lead=blueprint.lead.model_copy(deep=True),
+        settings=blueprint.settings.model_copy(deep=True),
+        history=[turn.model_copy(deep=True) for turn in blueprint.history],
+        custom_variables={},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="iterations per case")
+    parser.add_argument("--slug", default="zenith-support")
+    args = parser.parse_args()
+
+    blueprint = agent_runtimes.get_blueprint(args.slug)
+    incoming = apex_models.AgentConfig(temperature=0.2, memory_turns=8, ab_test_variant=None)
+
+    # Both paths must produce the same payloads before timing means anything.
+    assert legacy_merge_agent_config(blueprint.config, incoming) == apex_models.AgentConfig.model_validate(
+        agent_runtimes.merge_agent_config(args.slug, incoming).model_dump()
+    )
+    assert build_system_prompt(blueprint.config, blueprint.lead, blueprint.settings) == (
+        blueprint.system_prompt.render(blueprint.lead, blueprint.settings)
+    )
+
+    cases = [
+        (
+            "merge request config",
+            lambda: legacy_merge_agent_config(blueprint.config, incoming),
+            lambda: agent_runtimes.merge_agent_config(args.slug, incoming),
+        ),
+        (
+            "build demo request",
+            lambda: legacy_demo_request(blueprint),
+            lambda: agent_runtimes.build_demo_request_for(args.slug),
+        ),
+        (
+            "render system prompt",
+            lambda: build_system_prompt(blueprint.config, blueprint.lead, blueprint.settings),
+            lambda: blueprint.system_prompt.render(blueprint.lead, blueprint.settings),
+        ),
+    ]
+    print(f"{'case':<24}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, before, after in cases:
+        before_us = min(timeit.repeat(before, number=args.number, repeat=3)) / args.number * 1e6
+        after_us = min(timeit.repeat(after, number=args.number, repeat=3)) / args.number * 1e6
+        print(f"{name:<24}{before_us:>14.2f}{after_us:>14.2f}{before_us / after_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Mixed REST + WebSocket load against a local API worker.
+
+Starts the app twice on the database in DATABASE_URL: once with the routers'
+async sessions replaced by a sync Session queried on the event loop (how every
+router worked before get_async_session), once as shipped. Each run fires
+concurrent analytics / dashboard / call-list requests while WebSocket clients
+ping /ws/notifications; it reports REST throughput and ping round-trip latency,
+which is what live call audio on the same worker waits on.
+
+Run from backend/:  python scripts/bench_mixed_load.py --email you@example.com --password ... --workspace-id 1
+Point DATABASE_URL at a database with a realistic number of call logs.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, List
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("CAMPAIGN_DIALER_ENABLED", "false")
+os.environ.setdefault("APEX_RUNTIME_PRELOAD", "false")
+
+
+class BlockingSession:
+    """get_async_session stand-in that runs every query on the event loop."""
+
+    def __init__(self, bind):
+        from sqlmodel import Session
+
+        self.sync_session = Session(bind, expire_on_commit=False)
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    def __getattr__(self, name: str):
+        method = getattr(self.sync_session, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return method(*args, **kwargs)
+
+        return call
+
+
+def serve(mode: str, port: int) -> None:
+    import uvicorn
+
+    from app import db
+    from app.main import app
+
+    if mode == "sync":
+        async def blocking_session():
+            session = BlockingSession(db.engine)
+            try:
+                yield session
+            finally:
+                session.sync_session.close()
+
+        app.dependency_overrides[db.get_async_session] = blocking_session
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def _wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/health")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def _rest_worker(client, paths: List[str], stop_at: float, counts: List[int]) -> None:
+    index = 0
+    while time.monotonic() < stop_at:
+        response = await client.get(paths[index % len(paths)])
+        response.raise_for_status()
+        counts.append(1)
+        index += 1
+
+
+async def _ws_worker(ws_url: str, stop_at: float, rtts: List[float]) -> None:
+    import websockets
+
+    async with websockets.connect(ws_url) as ws:
+        await ws.recv()  # connected
+        while time.monotonic() < stop_at:
+            sent = time.perf_counter()
+            await ws.send('{"type": "ping"}')
+            await ws.recv()
+            rtts.append((time.perf_counter() - sent) * 1000)
+            await asyncio.sleep(0.02)  # ~ one audio frame
+
+
+async def drive(args: argparse.Namespace, port: int) -> dict:
+    import httpx
+
+    base_url = f"http://127.0.0.1:{port}"
+    await _wait_ready(base_url)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        login = await client.post("/api/auth/login", data={"username": args.email, "password": args.password})
+        login.raise_for_status()
+        access_token = login.json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {access_token}"
+
+        workspace = args.workspace_id
+        paths = [
+            f"/api/analytics/overview?workspace_id={workspace}&days=90",
+            f"/api/dashboard/overview?workspace_id={workspace}",
+            f"/api/calls?workspace_id={workspace}&limit=50",
+            f"/api/analytics/calls/trends?workspace_id={workspace}&days=30",
+        ]
+        ws_url = f"ws://127.0.0.1:{port}/ws/notifications?workspace_id={workspace}&token={access_token}"
+        counts: List[int] = []
+        rtts: List[float] = []
+        stop_at = time.monotonic() + args.seconds
+        await asyncio.gather(
+            *(_rest_worker(client, paths, stop_at, counts) for _ in range(args.rest_clients)),
+            *(_ws_worker(ws_url, stop_at, rtts) for _ in range(args.ws_clients)),
+        )
+
+    rtts.sort()
+    return {
+        "rest_rps": len(counts) / args.seconds,
+        "ws_p50": statistics.median(rtts),
+        "ws_p99": rtts[min(len(rtts) - 1, int(len(rtts) * 0.99))],
+        "ws_max": rtts[-1],
+    }
+
+
+def run(mode: str, args: argparse.Namespace) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", mode, "--port", str(args.port)],
+        cwd=str(BACKEND_ROOT),
+    )
+    try:
+        return asyncio.run(drive(args, args.port))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sync and async sessions under mixed load.")
+    parser.add_argument("--email", default="sarah@voiceai.app")
+    parser.add_argument("--password", default="changeme")
+    parser.add_argument("--workspace-id", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rest-clients", type=int, default=16)
+    parser.add_argument("--ws-clients", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    print(f"{'sessions':<10}{'REST req/s':>12}{'WS p50 ms':>12}{'WS p99 ms':>12}{'WS max ms':>12}")
+    for mode in ("sync", "async"):
+        result = run(mode, args)
+        print(
+            f"{mode:<10}{result['rest_rps']:>12.1f}{result['ws_p50']:>12.1f}"
+            f"{result['ws_p99']:>12.1f}{result['ws_max']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Query budgets: fail when a read endpoint issues more queries than allowed.
+
+Calls each endpoint in-process (after one warm-up call, so cached auth lookups
+do not count) inside app.core.query_shape.assert_max_queries. A budget that
+holds with many rows means the endpoint's query count does not grow with them;
+--seed-members / --seed-workspaces add rows to make N+1 patterns visible.
+
+Run from backend/ against a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/budgets.db python scripts/check_query_budgets.py --seed-members 50 --seed-workspaces 20
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-budgets")
+os.environ.setdefault("CAMPAIGN_DIALER_ENABLED", "false")
+os.environ.setdefault("APEX_RUNTIME_PRELOAD", "false")
+
+# Endpoint -> most queries it may issue with warm auth caches
+BUDGETS = {
+    "/api/workspaces": 1,
+    "/api/workspaces/{ws}/members": 2,
+    "/api/calls?workspace_id={ws}&limit=50": 1,
+    "/api/calls/stats/overview?workspace_id={ws}": 1,
+    "/api/analytics/overview?workspace_id={ws}": 2,
+    "/api/analytics/agents/performance?workspace_id={ws}": 2,
+    "/api/dashboard/overview?workspace_id={ws}": 3,
+    "/api/notifications?workspace_id={ws}": 1,
+    "/api/notifications/unread-count?workspace_id={ws}": 2,
+}
+
+
+def seed(engine, email: str, workspace_id: int, members: int, workspaces: int) -> None:
+    """Add ``members`` users to the workspace and ``workspaces`` workspaces to the user."""
+    from sqlmodel import Session, select
+
+    from app.core.security import get_password_hash
+    from app.models.user import User
+    from app.models.workspace import Workspace, WorkspaceMembership
+
+    with Session(engine) as session:
+        owner = session.exec(select(User).where(User.email == email)).one()
+        password = get_password_hash("budget-check")
+        for i in range(members):
+            user = User(email=f"budget-member-{os.getpid()}-{i}@example.com", name=f"Member {i}", hashed_password=password)
+            session.add(user)
+            session.flush()
+            session.add(WorkspaceMembership(workspace_id=workspace_id, user_id=user.id, role="member"))
+        for i in range(workspaces):
+            workspace = Workspace(name=f"Budget workspace {i}", slug=f"budget-{os.getpid()}-{i}")
+            session.add(workspace)
+            session.flush()
+            session.add(WorkspaceMembership(workspace_id=workspace.id, user_id=owner.id, role="owner"))
+        session.commit()
+    print(f"seeded {members} members and {workspaces} workspaces")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check per-endpoint query budgets.")
+    parser.add_argument("--email", default="sarah@voiceai.app")
+    parser.add_argument("--password", default="changeme")
+    parser.add_argument("--workspace-id", type=int, default=1)
+    parser.add_argument("--seed-members", type=int, default=0)
+    parser.add_argument("--seed-workspaces", type=int, default=0)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+
+    from app import db
+    from app.core.query_shape import assert_max_queries
+    from app.main import app
+    from app.migrations import check_schema
+
+    check_schema(db.engine)
+    if args.seed_members or args.seed_workspaces:
+        seed(db.engine, args.email, args.workspace_id, args.seed_members, args.seed_workspaces)
+
+    failures = 0
+    with TestClient(app) as client:
+        login = client.post("/api/auth/login", data={"username": args.email, "password": args.password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+        for template, budget in BUDGETS.items():
+            path = template.format(ws=args.workspace_id)
+            client.get(path).raise_for_status()  # warm caches
+            try:
+                with assert_max_queries(budget) as counter:
+                    client.get(path).raise_for_status()
+                print(f"ok    {counter.count}/{budget}  {path}")
+            except AssertionError as exc:
+                failures += 1
+                print(f"FAIL  {path}: {exc}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Index advisor: the SQL each endpoint issues, with its query plan.
+
+Calls a set of read endpoints in-process, captures every statement they send to
+the database and runs EXPLAIN on it (EXPLAIN QUERY PLAN on SQLite). Plans that
+scan a whole table or sort without an index are flagged, so a query shape
+without a matching index shows up before it reaches production data.
+
+Run from backend/ against a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/advisor.db python scripts/index_advisor.py --seed-calls 200000
+    python scripts/index_advisor.py --only-flagged
+
+--seed-calls inserts synthetic call logs into the workspace (only into databases
+you can throw away). Plans depend on table statistics, so seed enough rows for
+the planner to prefer indexes.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-advisor")
+os.environ.setdefault("CAMPAIGN_DIALER_ENABLED", "false")
+os.environ.setdefault("APEX_RUNTIME_PRELOAD", "false")
+
+ENDPOINTS = [
+    "/api/calls?workspace_id={ws}&limit=50",
+    "/api/calls?workspace_id={ws}&status=completed&limit=50",
+    "/api/calls?workspace_id={ws}&direction=outbound&limit=50",
+    "/api/calls/stats/overview?workspace_id={ws}",
+    "/api/analytics/overview?workspace_id={ws}&days=30",
+    "/api/analytics/calls/trends?workspace_id={ws}&days=30",
+    "/api/analytics/agents/performance?workspace_id={ws}",
+    "/api/analytics/sentiment/distribution?workspace_id={ws}",
+    "/api/analytics/usage?workspace_id={ws}",
+    "/api/dashboard/overview?workspace_id={ws}",
+    "/api/notifications?workspace_id={ws}",
+    "/api/notifications/unread-count?workspace_id={ws}",
+]
+
+# Plan lines that usually mean a missing index: full scans (group 1 = table) and sorts
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?!.*USING (?:COVERING )?INDEX)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+_SORT = re.compile(r"USE TEMP B-TREE|^\s*(?:->\s*)?Sort\b")
+
+
+def seed_calls(engine, workspace_id: int, count: int, batch_size: int = 5000) -> None:
+    """Insert ``count`` synthetic call logs (and a few agents) into a workspace."""
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.models.agent import Agent
+    from app.models.call import CallLog
+    from app.services.call_distributions import rebuild_sketches
+    from app.services.call_metrics import rebuild_daily_metrics
+
+    with Session(engine) as session:
+        agents = [Agent(workspace_id=workspace_id, name=f"Advisor agent {i}", status="active") for i in range(8)]
+        session.add_all(agents)
+        session.commit()
+        agent_ids = [agent.id for agent in agents]
+
+        now = datetime.utcnow()
+        rng = random.Random(7)
+        rows = []
+        for i in range(count):
+            started = now - timedelta(seconds=rng.randint(0, 180 * 86400))
+            duration = rng.randint(5, 900)
+            rows.append(
+                {
+                    "workspace_id": workspace_id,
+                    "agent_id": rng.choice(agent_ids),
+                    "direction": rng.choice(("inbound", "outbound")),
+                    "status": rng.choice(("completed", "completed", "completed", "failed", "missed", "voicemail")),
+                    "duration_seconds": duration,
+                    "sentiment": rng.choice(("positive", "neutral", "negative")),
+                    "sentiment_score": rng.random(),
+                    "transcript": [],
+                    "tags": [],
+                    "cost_cents": duration // 6,
+                    "started_at": started,
+                    "ended_at": started + timedelta(seconds=duration),
+                    "created_at": started,
+                }
+            )
+            if len(rows) >= batch_size:
+                session.execute(insert(CallLog), rows)
+                rows = []
+        if rows:
+            session.execute(insert(CallLog), rows)
+        session.commit()
+    with engine.begin() as conn:
+        rebuild_daily_metrics(conn, workspace_id)  # bulk inserts bypass the rollup hooks
+        rebuild_sketches(conn, workspace_id)
+        conn.exec_driver_sql("ANALYZE")
+    print(f"seeded {count} call logs into workspace {workspace_id}")
+
+
+def capture(paths: List[str], email: str, password: str) -> Dict[str, List[Tuple[str, object]]]:
+    """Call each path; returns the statements (and parameters) each one executed."""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app import db
+    from app.main import app
+
+    current: List[Tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        current.append((statement, parameters))
+
+    engines = [db.engine] + ([db.async_engine.sync_engine] if db.async_engine is not None else [])
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+
+    captured: Dict[str, List[Tuple[str, object]]] = {}
+    with TestClient(app) as client:
+        login = client.post("/api/auth/login", data={"username": email, "password": password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+        for path in paths:
+            client.get(path)  # warm the auth caches so only the endpoint's own queries remain
+            current.clear()
+            response = client.get(path)
+            if response.status_code >= 400:
+                print(f"{path}: HTTP {response.status_code}, skipped")
+                continue
+            captured[path] = list(current)
+
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", record)
+    return captured
+
+
+def explain(engine, statement: str, parameters: object) -> List[str]:
+    if engine.dialect.name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        prefix = "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    if engine.dialect.name == "sqlite":
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def flagged_lines(engine, plan: List[str], min_rows: int, row_counts: Dict[str, int]) -> List[str]:
+    """
+    Plan lines worth a look: scans of tables with at least ``min_rows`` rows
+    (scanning a small table is the right plan) and sorts in queries that also scan.
+    """
+    scan_pattern = _SQLITE_SCAN if engine.dialect.name == "sqlite" else _POSTGRES_SCAN
+    flagged = []
+    for line in plan:
+        match = scan_pattern.search(line)
+        if not match:
+            continue
+        table = match.group(1)
+        if table not in row_counts:
+            with engine.connect() as conn:
+                row_counts[table] = conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar()
+        if row_counts[table] >= min_rows:
+            flagged.append(line)
+    if flagged:
+        flagged += [line for line in plan if _SORT.search(line)]
+    return flagged
+
+
+def _short(statement: str, width: int = 160) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= width else flat[: width - 3] + "..."
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN the queries issued by the read endpoints.")
+    parser.add_argument("--email", default="sarah@voiceai.app")
+    parser.add_argument("--password", default="changeme")
+    parser.add_argument("--workspace-id", type=int, default=1)
+    parser.add_argument("--seed-calls", type=int, default=0, help="insert this many synthetic call logs first")
+    parser.add_argument("--path", action="append", help="endpoint to check (repeatable); default: built-in list")
+    parser.add_argument("--only-flagged", action="store_true", help="only print statements with flagged plans")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignore scans of tables smaller than this")
+    args = parser.parse_args()
+
+    from app import db
+    from app.migrations import check_schema
+
+    check_schema(db.engine)
+    if args.seed_calls:
+        seed_calls(db.engine, args.workspace_id, args.seed_calls)
+
+    paths = [path.format(ws=args.workspace_id) for path in (args.path or ENDPOINTS)]
+    captured = capture(paths, args.email, args.password)
+
+    row_counts: Dict[str, int] = {}
+    total_flagged = 0
+    for path, statements in captured.items():
+        print(f"\n{path}  ({len(statements)} queries)")
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            plan = explain(db.engine, statement, parameters)
+            flagged = flagged_lines(db.engine, plan, args.min_rows, row_counts)
+            total_flagged += bool(flagged)
+            if args.only_flagged and not flagged:
+                continue
+            marker = "!!" if flagged else "ok"
+            print(f"  [{marker}] {_short(statement)}")
+            for line in plan:
+                print(f"         {'>' if line in flagged else ' '} {line}")
+
+    print(f"\n{total_flagged} statement(s) with flagged plans")
+    sys.exit(1 if total_flagged else 0)
+
+
+if __name__ == "__main__":
+    main()